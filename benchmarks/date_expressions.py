@@ -0,0 +1,83 @@
+"""
+Date expression parsing: first parse vs memoized repeats.
+
+Parses a corpus of the expressions agents pass to the calendar tools
+("сегодня", "завтра в 10", "на следующей неделе", ISO times, ...). The cold
+pass clears the caches before every call, so each one matches the grammar
+and resolves the dates; the warm pass repeats the corpus with a reference
+time moving within the same day, as consecutive tool calls do.
+
+Run: python -m benchmarks.date_expressions [--rounds 200]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytz
+
+from src.utils import date_expressions
+from src.utils.date_expressions import parse_date_expression
+
+TIME_ZONE = "Europe/Moscow"
+
+CORPUS = [
+    "сегодня", "завтра", "послезавтра", "вчера", "today", "tomorrow",
+    "завтра в 10", "завтра в 10:30", "сегодня в 18:00", "послезавтра в 9 утра", "tomorrow at 2 pm",
+    "на неделе", "на этой неделе", "на следующей неделе", "на прошлой неделе", "за прошлые две недели",
+    "this week", "next week", "last week", "past two weeks",
+    "через неделю", "через 3 дня", "через 2 недели", "через месяц", "in 5 days",
+    "в пятницу", "в следующую среду", "в понедельник в 11", "в пятницу после обеда", "friday evening",
+    "завтра утром", "сегодня вечером", "в 15:00", "at 9",
+    "2026-10-20", "2026-10-20 14:00", "2026-10-20T14:00:00+03:00", "2026-10-20T11:00:00Z",
+]
+
+
+def _per_call_us(samples: List[float]) -> Dict[str, float]:
+    return {
+        "mean_us": round(statistics.mean(samples) * 1e6, 2),
+        "p50_us": round(statistics.median(samples) * 1e6, 2),
+    }
+
+
+def run(rounds: int) -> Dict[str, Any]:
+    """Run both passes and return results."""
+    now = pytz.timezone(TIME_ZONE).localize(datetime(2026, 10, 14, 9, 0))
+    
+    cold = []
+    for _ in range(rounds):
+        for expression in CORPUS:
+            date_expressions.cache_clear()
+            start = time.perf_counter()
+            parse_date_expression(expression, TIME_ZONE, now)
+            cold.append(time.perf_counter() - start)
+    
+    warm = []
+    for i in range(rounds):
+        moment = now + timedelta(seconds=i)
+        for expression in CORPUS:
+            start = time.perf_counter()
+            parse_date_expression(expression, TIME_ZONE, moment)
+            warm.append(time.perf_counter() - start)
+    
+    return {
+        "expressions": len(CORPUS),
+        "rounds": rounds,
+        "cold": _per_call_us(cold),
+        "warm": _per_call_us(warm),
+        "speedup": round(statistics.mean(cold) / statistics.mean(warm), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rounds), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
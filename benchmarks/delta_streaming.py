@@ -0,0 +1,91 @@
+"""
+Bytes-on-wire and CPU of streaming a long answer: full-text vs delta events.
+
+The legacy scheme sent the whole accumulated text with every token
+(quadratic in answer length); DeltaStream sends the token plus offset/seq
+and a full-text checkpoint only when the text has doubled.
+
+Run:
+    python -m benchmarks.delta_streaming
+    python -m benchmarks.delta_streaming --tokens 4000 --token-chars 4
+"""
+
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import sys
+import time
+
+from src.utils.delta_stream import DeltaStream
+
+
+def _tokens(count: int, token_chars: int) -> List[str]:
+    word = "ответ"[:max(token_chars - 1, 1)]
+    return [f"{word}{i % 10} " for i in range(count)]
+
+
+def _measure(build_payloads) -> Dict[str, Any]:
+    started = time.process_time()
+    total_bytes = 0
+    messages = 0
+    for payload in build_payloads():
+        total_bytes += len(json.dumps(
+            {"type": "final_result_chunk", "data": payload},
+            ensure_ascii=False,
+            separators=(",", ":")
+        ).encode("utf-8"))
+        messages += 1
+    return {
+        "messages": messages,
+        "ws_bytes": total_bytes,
+        "cpu_ms": round((time.process_time() - started) * 1000, 2),
+    }
+
+
+def run(tokens: int = 4000, token_chars: int = 4) -> Dict[str, Any]:
+    """
+    Stream the same answer with both schemes.
+    
+    Args:
+        tokens: Number of streamed tokens
+        token_chars: Approximate characters per token
+    
+    Returns:
+        {"full_text": {...}, "delta": {...}, "bytes_ratio": ...}
+    """
+    chunks = _tokens(tokens, token_chars)
+    
+    def full_text():
+        content = ""
+        for chunk in chunks:
+            content += chunk
+            yield {"content": content}
+    
+    def delta():
+        stream = DeltaStream()
+        for chunk in chunks:
+            yield stream.append(chunk)
+    
+    legacy = _measure(full_text)
+    current = _measure(delta)
+    return {
+        "tokens": tokens,
+        "answer_chars": sum(len(chunk) for chunk in chunks),
+        "full_text": legacy,
+        "delta": current,
+        "bytes_ratio": round(legacy["ws_bytes"] / max(current["ws_bytes"], 1), 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Full-text vs delta streaming")
+    parser.add_argument("--tokens", type=int, default=4000)
+    parser.add_argument("--token-chars", type=int, default=4)
+    args = parser.parse_args(argv)
+    
+    print(json.dumps(run(args.tokens, args.token_chars), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
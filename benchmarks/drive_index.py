@@ -0,0 +1,272 @@
+"""
+Name lookups in a large workspace folder: Drive queries vs the local index.
+
+Builds a synthetic folder tree (100k files by default) in FakeDrive, an
+in-memory double of the Drive files/changes API. The Drive path is the
+workspace server's single or-combined `name contains` query per lookup;
+each Drive call also waits --drive-latency-ms to stand for the round-trip.
+The index path bootstraps DriveMetadataIndex once, then answers lookups
+from its in-memory name postings and applies a burst of changes through the
+changes feed.
+
+Run: python -m benchmarks.drive_index [--files 100000] [--lookups 200] [--drive-latency-ms 100]
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.mcp_servers.drive_index import FOLDER_MIME_TYPE, DriveMetadataIndex
+
+DOCUMENT = "application/vnd.google-apps.document"
+SPREADSHEET = "application/vnd.google-apps.spreadsheet"
+
+WORDS = [
+    "Отчёт", "продажи", "Бюджет", "план", "договор", "Счёт", "акт", "сверки", "презентация",
+    "Résumé", "café", "Q3", "report", "Budget", "roadmap", "meeting", "notes", "Тест", "ёлка",
+    "маркетинг", "HR", "zakupki", "поставщики", "клиенты", "KPI", "итоги", "квартал", "Smörgåsbord",
+]
+
+
+class _Request:
+    def __init__(self, drive: "FakeDrive", method: str, result):
+        self._drive = drive
+        self._method = method
+        self._result = result
+    
+    def execute(self):
+        self._drive.calls[self._method] = self._drive.calls.get(self._method, 0) + 1
+        if self._drive.latency:
+            time.sleep(self._drive.latency)
+        return self._result()
+
+
+class _Files:
+    def __init__(self, drive: "FakeDrive"):
+        self._drive = drive
+    
+    def list(self, q: str = "", pageSize: int = 100, pageToken: Optional[str] = None, **kwargs):
+        return _Request(self._drive, "files.list", lambda: self._drive.list_files(q, pageSize, pageToken))
+
+
+class _Changes:
+    def __init__(self, drive: "FakeDrive"):
+        self._drive = drive
+    
+    def getStartPageToken(self, **kwargs):
+        return _Request(self._drive, "changes.getStartPageToken", lambda: {"startPageToken": str(len(self._drive.log))})
+    
+    def list(self, pageToken: str, pageSize: int = 100, **kwargs):
+        return _Request(self._drive, "changes.list", lambda: self._drive.list_changes(pageToken, pageSize))
+
+
+class FakeDrive:
+    """
+    In-memory Drive: files.list with parents/name/mimeType/trashed filters and the changes feed.
+    
+    `name contains` matches case-sensitively, like the serial retries assumed.
+    Mutations (create, rename, move, trash) are recorded in the changes log.
+    """
+    
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.files_by_id: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.log: List[str] = []
+        self.calls: Dict[str, int] = {}
+        self._next_id = 0
+        self._clock = 0
+    
+    def files(self) -> _Files:
+        return _Files(self)
+    
+    def changes(self) -> _Changes:
+        return _Changes(self)
+    
+    def _timestamp(self) -> str:
+        self._clock += 1
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(1_700_000_000 + self._clock)) + ".000Z"
+    
+    def create(self, name: str, parent: str, mime_type: str = DOCUMENT, file_id: Optional[str] = None) -> str:
+        """Create a file; returns its ID."""
+        if file_id is None:
+            self._next_id += 1
+            file_id = f"f{self._next_id}"
+        now = self._timestamp()
+        self.files_by_id[file_id] = {
+            "id": file_id,
+            "name": name,
+            "mimeType": mime_type,
+            "parents": [parent],
+            "createdTime": now,
+            "modifiedTime": now,
+            "webViewLink": f"https://drive.google.com/file/d/{file_id}/view",
+            "owners": [{"displayName": "Owner", "emailAddress": "owner@example.com"}],
+            "trashed": False,
+        }
+        self.children.setdefault(parent, []).append(file_id)
+        self.log.append(file_id)
+        return file_id
+    
+    def rename(self, file_id: str, name: str) -> None:
+        self.files_by_id[file_id].update(name=name, modifiedTime=self._timestamp())
+        self.log.append(file_id)
+    
+    def move(self, file_id: str, parent: str) -> None:
+        file = self.files_by_id[file_id]
+        self.children[file["parents"][0]].remove(file_id)
+        self.children.setdefault(parent, []).append(file_id)
+        file.update(parents=[parent], modifiedTime=self._timestamp())
+        self.log.append(file_id)
+    
+    def trash(self, file_id: str) -> None:
+        self.files_by_id[file_id]["trashed"] = True
+        self.log.append(file_id)
+    
+    def list_files(self, q: str, page_size: int, page_token: Optional[str]) -> Dict[str, Any]:
+        parents = re.findall(r"'([^']+)' in parents", q)
+        if parents:
+            candidates = [self.files_by_id[i] for parent in parents for i in self.children.get(parent, [])]
+        else:
+            candidates = list(self.files_by_id.values())
+        fragments = [
+            re.sub(r"\\(.)", r"\1", fragment)
+            for fragment in re.findall(r"name contains '((?:[^'\\]|\\.)*)'", q)
+        ]
+        mime_type = re.search(r"mimeType='([^']+)'", q)
+        matched = [
+            f for f in candidates
+            if not (f["trashed"] and "trashed=false" in q)
+            and (not fragments or any(fragment in f["name"] for fragment in fragments))
+            and (mime_type is None or f["mimeType"] == mime_type.group(1))
+        ]
+        start = int(page_token or 0)
+        page = matched[start:start + page_size]
+        result: Dict[str, Any] = {"files": [dict(f) for f in page]}
+        if start + page_size < len(matched):
+            result["nextPageToken"] = str(start + page_size)
+        return result
+    
+    def list_changes(self, page_token: str, page_size: int) -> Dict[str, Any]:
+        start = int(page_token)
+        # Like Drive: one change per file, at the position of its latest change
+        latest = {file_id: position for position, file_id in enumerate(self.log[start:], start)}
+        ordered = sorted(latest, key=latest.get)
+        page = ordered[:page_size]
+        changes = [{"fileId": file_id, "removed": False, "file": dict(self.files_by_id[file_id])} for file_id in page]
+        if len(ordered) > page_size:
+            return {"changes": changes, "nextPageToken": str(latest[page[-1]] + 1)}
+        return {"changes": changes, "newStartPageToken": str(len(self.log))}
+    
+    @classmethod
+    def tree(cls, files: int, root_id: str = "root", subfolders: int = 6, files_per_folder: int = 40, seed: int = 0) -> "FakeDrive":
+        """
+        Synthetic workspace: nested folders of documents and spreadsheets under root_id.
+        
+        Args:
+            files: Number of files and folders in the tree
+            root_id: Workspace folder ID
+            subfolders: Subfolders per folder
+            files_per_folder: Files per folder
+            seed: Random seed of the names
+        """
+        drive = cls()
+        rng = random.Random(seed)
+        drive.files_by_id[root_id] = {"id": root_id, "name": "Workspace", "mimeType": FOLDER_MIME_TYPE, "parents": [], "trashed": False}
+        queue = deque([root_id])
+        created = 0
+        while created < files:
+            parent = queue.popleft()
+            for _ in range(min(subfolders, files - created)):
+                queue.append(drive.create(f"{rng.choice(WORDS)} {rng.randint(2019, 2026)}", parent, FOLDER_MIME_TYPE))
+                created += 1
+            for _ in range(min(files_per_folder, files - created)):
+                name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)} {rng.randint(1, 999)}"
+                drive.create(name, parent, rng.choice([DOCUMENT, SPREADSHEET]))
+                created += 1
+        # Outside the workspace folder
+        drive.create("Отчёт чужой", "elsewhere")
+        drive.log.clear()
+        return drive
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def run(files: int, lookups: int, drive_latency_ms: float) -> Dict[str, Any]:
+    """Run both variants and return results."""
+    drive = FakeDrive.tree(files)
+    rng = random.Random(1)
+    names = [f["name"] for f in drive.files_by_id.values() if f["mimeType"] != FOLDER_MIME_TYPE]
+    queries = [rng.choice(names).split(" ")[0].lower() for _ in range(lookups)]
+    
+    drive.latency = drive_latency_ms / 1000
+    drive_times = []
+    for query in queries:
+        variations = list(dict.fromkeys([query, query.capitalize(), query.upper()]))
+        clause = " or ".join(f"name contains '{v}'" for v in variations)
+        start = time.perf_counter()
+        drive.files().list(q=f"({clause}) and trashed=false", pageSize=20).execute()
+        drive_times.append(time.perf_counter() - start)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        index = DriveMetadataIndex(Path(tmp) / "drive_index.sqlite3", lambda: drive)
+        calls_before = dict(drive.calls)
+        start = time.perf_counter()
+        indexed = index.bootstrap("root")
+        bootstrap_sec = time.perf_counter() - start
+        bootstrap_calls = sum(drive.calls.values()) - sum(calls_before.values())
+        
+        index_times = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, limit=20)
+            index_times.append(time.perf_counter() - start)
+        
+        ids = [i for i, f in drive.files_by_id.items() if f["mimeType"] != FOLDER_MIME_TYPE and f["parents"] != ["elsewhere"]]
+        for file_id in rng.sample(ids, 200):
+            drive.rename(file_id, f"Переименован {file_id}")
+        start = time.perf_counter()
+        applied = index.sync()
+        sync_sec = time.perf_counter() - start
+        index.close()
+    
+    return {
+        "files": files,
+        "lookups": lookups,
+        "drive_latency_ms": drive_latency_ms,
+        "drive_query": _percentiles(drive_times),
+        "index": {
+            "indexed": indexed,
+            "bootstrap_sec": round(bootstrap_sec, 2),
+            "bootstrap_drive_calls": bootstrap_calls,
+            "lookup": _percentiles(index_times),
+            "sync_200_changes_ms": round(sync_sec * 1000, 1),
+            "changes_applied": applied,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--drive-latency-ms", type=float, default=100.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.files, args.lookups, args.drive_latency_ms), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Scriptable fake chat model for benchmarks.
+
+Responses are scripted per call purpose (the usage_purpose of the engine
+method making the call: think_and_plan, final_answer, analyze_result, ...)
+and streamed in small chunks at a configured token rate, so ReAct timing
+resembles a real provider without network access. Every call reports
+usage_metadata, so usage accounting sees the same numbers a provider sends.
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
+import json
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from src.utils.usage_accounting import current_usage_purpose
+
+
+DEFAULT_PURPOSE = "*"
+CHARS_PER_TOKEN = 4
+
+
+def thought_action(thought: str, tool_name: str, arguments: Optional[Dict[str, Any]] = None, description: str = "") -> str:
+    """
+    Format a response in the <thought>/<action> layout parsed by _think_and_plan.
+    
+    Args:
+        thought: Thought text
+        tool_name: Tool to call (or FINISH / ASK_CLARIFICATION)
+        arguments: Tool arguments
+        description: Short action description
+    
+    Returns:
+        Response text
+    """
+    action = {
+        "tool_name": tool_name,
+        "arguments": arguments or {},
+        "description": description or tool_name,
+        "reasoning": thought,
+    }
+    return f"<thought>\n{thought}\n</thought>\n<action>\n{json.dumps(action, ensure_ascii=False)}\n</action>"
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model answering from per-purpose scripts at a fixed token rate.
+    
+    scripts maps a purpose to its responses, used in order; the last one is
+    repeated when a purpose is called more often. The "*" entry answers
+    purposes without a script of their own.
+    """
+    
+    scripts: Dict[str, List[str]]
+    tokens_per_second: float = 400.0
+    first_token_latency: float = 0.15
+    chunk_tokens: int = 4
+    calls: Dict[str, int] = Field(default_factory=dict)
+    
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+    
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+    
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+    
+    def _next_response(self) -> str:
+        purpose = current_usage_purpose() or DEFAULT_PURPOSE
+        script = self.scripts.get(purpose) or self.scripts.get(DEFAULT_PURPOSE) or [""]
+        index = self.calls.get(purpose, 0)
+        self.calls[purpose] = index + 1
+        return script[min(index, len(script) - 1)]
+    
+    @staticmethod
+    def _usage(messages: List[BaseMessage], text: str) -> Dict[str, Any]:
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        input_tokens = max(1, prompt_chars // CHARS_PER_TOKEN)
+        output_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+    
+    def _chunks(self, text: str) -> List[str]:
+        size = max(1, self.chunk_tokens * CHARS_PER_TOKEN)
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+    
+    def _chunk_delay(self) -> float:
+        return self.chunk_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+    
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._next_response()
+        time.sleep(self.first_token_latency + self._chunk_delay() * len(self._chunks(text)))
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+    
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = "".join([chunk.text async for chunk in self._astream(messages, stop, run_manager, **kwargs)])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=self._usage(messages, text)))])
+    
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        result = self._generate(messages, stop, run_manager, **kwargs)
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content=result.generations[0].message.content,
+            usage_metadata=result.generations[0].message.usage_metadata
+        ))
+    
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._next_response()
+        chunks = self._chunks(text)
+        delay = self._chunk_delay()
+        await asyncio.sleep(self.first_token_latency)
+        for index, piece in enumerate(chunks):
+            if index:
+                await asyncio.sleep(delay)
+            # Usage arrives with the last chunk, as providers report it
+            usage = self._usage(messages, text) if index == len(chunks) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
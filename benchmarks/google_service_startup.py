@@ -0,0 +1,220 @@
+"""
+Cold start and per-call latency of Google API services in the MCP servers.
+
+Compares the old construction (googleapiclient build() per service, one
+httplib2 transport each) with GoogleServiceFactory (bundled discovery parsed
+once, one pooled AuthorizedSession per credential). Requests go to a local
+HTTP stand-in for the Google endpoints; it adds a fixed delay to every new
+connection to stand for the TCP+TLS handshake the real endpoints cost.
+
+Run: python -m benchmarks.google_service_startup [--calls 40] [--handshake-ms 30]
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+from src.mcp_servers import google_services
+from src.mcp_servers.google_services import GoogleServiceFactory
+
+# Services each MCP server builds: (api, version)
+SERVER_SERVICES = {
+    "gmail": [("gmail", "v1")],
+    "calendar": [("calendar", "v3")],
+    "sheets": [("sheets", "v4"), ("drive", "v3")],
+    "docs": [("docs", "v1"), ("drive", "v3")],
+    "slides": [("slides", "v1"), ("drive", "v3"), ("docs", "v1")],
+    "google_workspace": [("drive", "v3"), ("sheets", "v4")],
+}
+
+
+class GoogleStandIn:
+    """
+    Local HTTP server answering like the Google APIs and the OAuth token endpoint.
+    
+    Every API request gets {"ok": true}; requests carrying a token listed in
+    rejected_tokens get 401. POST /token issues a new access token.
+    """
+    
+    def __init__(self, handshake_delay: float = 0.0, request_delay: float = 0.0):
+        stand_in = self
+        self.handshake_delay = handshake_delay
+        self.request_delay = request_delay
+        self.connections = 0
+        self.requests = 0
+        self.token_requests = 0
+        self.rejected_tokens = set()
+        self._lock = threading.Lock()
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+            
+            def setup(self):
+                super().setup()
+                with stand_in._lock:
+                    stand_in.connections += 1
+                time.sleep(stand_in.handshake_delay)
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def do_GET(self):
+                self._api()
+            
+            def do_PATCH(self):
+                self._api()
+            
+            def do_PUT(self):
+                self._api()
+            
+            def do_POST(self):
+                if self.path.rstrip("/").endswith("/token"):
+                    self._read_body()
+                    with stand_in._lock:
+                        stand_in.token_requests += 1
+                        token = f"token-{stand_in.token_requests}"
+                    time.sleep(stand_in.request_delay)
+                    self._reply(200, {"access_token": token, "expires_in": 3600, "token_type": "Bearer"})
+                else:
+                    self._api()
+            
+            def _api(self):
+                self._read_body()
+                with stand_in._lock:
+                    stand_in.requests += 1
+                time.sleep(stand_in.request_delay)
+                token = self.headers.get("Authorization", "").replace("Bearer ", "")
+                if token in stand_in.rejected_tokens:
+                    self._reply(401, {"error": {"code": 401, "message": "Invalid Credentials"}})
+                else:
+                    self._reply(200, {"ok": True, "path": self.path})
+            
+            def _read_body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+            
+            def _reply(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+    
+    def __enter__(self) -> "GoogleStandIn":
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def write_token(self, path: Path, token: Optional[str] = "token-0", expired: bool = False) -> Path:
+        """Write an authorized-user token file (pass url + "token" as the factory token_uri)."""
+        expiry = datetime.utcnow() + (timedelta(hours=-1) if expired else timedelta(hours=1))
+        path.write_text(json.dumps({
+            "token": token,
+            "refresh_token": "refresh-token",
+            "client_id": "client-id",
+            "client_secret": "client-secret",
+            "expiry": expiry.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        }))
+        return path
+
+
+def _call(service, api: str) -> None:
+    """One cheap read per API."""
+    if api == "drive":
+        service.files().get(fileId="file1").execute()
+    elif api == "sheets":
+        service.spreadsheets().get(spreadsheetId="sheet1").execute()
+    elif api == "docs":
+        service.documents().get(documentId="doc1").execute()
+    elif api == "slides":
+        service.presentations().get(presentationId="pres1").execute()
+    elif api == "gmail":
+        service.users().messages().list(userId="me").execute()
+    else:
+        service.events().list(calendarId="primary").execute()
+
+
+def _per_service(stand_in: GoogleStandIn, token_path: Path, specs: List[Tuple[str, str]]) -> List[Tuple[str, Any]]:
+    credentials = Credentials.from_authorized_user_file(str(token_path))
+    return [
+        (api, build(api, version, credentials=credentials, client_options={"api_endpoint": stand_in.url}))
+        for api, version in specs
+    ]
+
+
+def _shared(stand_in: GoogleStandIn, token_path: Path, specs: List[Tuple[str, str]]) -> List[Tuple[str, Any]]:
+    # A fresh process: nothing parsed or built yet
+    google_services.discovery_document.cache_clear()
+    factory = GoogleServiceFactory(api_endpoint=stand_in.url)
+    return [(api, factory.service(api, version, token_path)) for api, version in specs]
+
+
+def _measure(stand_in: GoogleStandIn, token_path: Path, construct, calls: int) -> Dict[str, Any]:
+    cold_start = {}
+    latencies = []
+    connections_before = stand_in.connections
+    for server, specs in SERVER_SERVICES.items():
+        start = time.perf_counter()
+        services = construct(stand_in, token_path, specs)
+        cold_start[server] = round((time.perf_counter() - start) * 1000, 2)
+        for i in range(calls):
+            api, service = services[i % len(services)]
+            start = time.perf_counter()
+            _call(service, api)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "cold_start_ms": cold_start,
+        "call_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "call_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "connections": stand_in.connections - connections_before,
+    }
+
+
+def run(calls: int, handshake_ms: float) -> Dict[str, Any]:
+    """Run both variants and return results."""
+    with GoogleStandIn(handshake_delay=handshake_ms / 1000) as stand_in, tempfile.TemporaryDirectory() as tmp:
+        token_path = stand_in.write_token(Path(tmp) / "token.json")
+        return {
+            "calls_per_server": calls,
+            "handshake_ms": handshake_ms,
+            "per_service_build": _measure(stand_in, token_path, _per_service, calls),
+            "shared_factory": _measure(stand_in, token_path, _shared, calls),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.calls, args.handshake_ms), indent=2))
+
+
+if __name__ == "__main__":
+    main()
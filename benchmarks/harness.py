@@ -0,0 +1,257 @@
+"""
+Benchmark harness: runs scenarios through UnifiedReActEngine and collects numbers.
+
+The engine runs with the real CapabilityRegistry, MCPToolProvider, tools,
+MCPServerManager, MCPConnection and WebSocketManager. Only the LLM is a
+ScriptedChatModel and the MCP servers are stdio stub processes.
+"""
+
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from pathlib import Path
+import asyncio
+import json
+import math
+import os
+import tempfile
+import time
+
+# Benchmarks never talk to real providers; clients only need a key to construct
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-key")
+os.environ.setdefault("GOOGLE_OAUTH_CLIENT_ID", "benchmark-client")
+os.environ.setdefault("GOOGLE_OAUTH_CLIENT_SECRET", "benchmark-secret")
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.pdf_fixture import build_report_pdf
+from benchmarks.scenarios import Scenario
+from benchmarks.stub_mcp_server import StubMCPServers
+from src.api.upload_ingestion import DocumentIngestor, format_pdf_pages
+from src.api.websocket_manager import WebSocketManager
+from src.core.capability_registry import CapabilityRegistry
+from src.core.context_manager import ConversationContext
+from src.core.mode_adapters import AgentModeAdapter
+from src.core.smart_progress import ToolLatencyStats
+from src.core.providers.mcp_provider import MCPToolProvider
+from src.core.unified_react_engine import UnifiedReActEngine
+
+
+@dataclass
+class LLMProfile:
+    """Timing of the scripted LLM."""
+    tokens_per_second: float = 400.0
+    first_token_latency: float = 0.15
+
+
+class ByteCountingWebSocket:
+    """WebSocket stand-in that counts what would go over the wire."""
+    
+    def __init__(self):
+        self.messages = 0
+        self.bytes_sent = 0
+    
+    async def accept(self) -> None:
+        pass
+    
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        # Same encoding as Starlette's WebSocket.send_json
+        self.bytes_sent += len(json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        self.messages += 1
+    
+    async def close(self, code: int = 1000, reason: Optional[str] = None) -> None:
+        pass
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux /proc), None elsewhere."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class PeakRSSSampler:
+    """Samples RSS in the background while a scenario runs."""
+    
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    def _sample(self) -> None:
+        rss = _current_rss_bytes()
+        if rss is None and resource is not None:
+            # ru_maxrss is the lifetime peak in KiB on Linux
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        self.peak = max(self.peak, rss or 0)
+    
+    async def _run(self) -> None:
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval)
+    
+    async def __aenter__(self) -> "PeakRSSSampler":
+        self._sample()
+        self._task = asyncio.create_task(self._run())
+        return self
+    
+    async def __aexit__(self, *exc: Any) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._sample()
+
+
+class BenchmarkEngine(UnifiedReActEngine):
+    """UnifiedReActEngine whose LLM clients are all the scripted model.
+    
+    Tool latencies of stub servers stay in memory, away from the real ETA history.
+    """
+    
+    def __init__(self, *args: Any, llm: ScriptedChatModel, **kwargs: Any):
+        self._benchmark_llm = llm
+        super().__init__(*args, **kwargs)
+        self.result_analyzer.llm = llm
+        self.smart_progress.latency_stats = ToolLatencyStats()
+    
+    def _create_fast_llm(self) -> ScriptedChatModel:
+        return self._benchmark_llm
+    
+    def _create_llm_with_thinking(self, budget_tokens: int = 5000) -> ScriptedChatModel:
+        return self._benchmark_llm
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def _attach_upload(context: ConversationContext, ws_manager: WebSocketManager, session_id: str, pages: int, ingestor: DocumentIngestor) -> str:
+    """Extract a synthetic PDF like /api/upload does and attach it to the context."""
+    file_id = f"bench-upload-{pages}"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "report.pdf"
+        path.write_bytes(build_report_pdf(pages))
+        text_parts: List[str] = []
+        
+        async def on_batch(batch, pages_done, pages_total):
+            text_parts.append(format_pdf_pages(batch))
+            await ws_manager.send_event(session_id, "file_processing_progress", {
+                "file_id": file_id,
+                "filename": "report.pdf",
+                "pages_processed": pages_done,
+                "total_pages": pages_total
+            })
+        
+        await ingestor.extract_pdf(path, on_batch)
+    
+    context.add_file(file_id, {
+        "filename": "report.pdf",
+        "type": "application/pdf",
+        "text": "".join(text_parts).strip(),
+    })
+    return file_id
+
+
+async def run_scenario(
+    scenario: Scenario,
+    repeat: int = 5,
+    warmup: int = 1,
+    profile: Optional[LLMProfile] = None
+) -> Dict[str, Any]:
+    """
+    Run a scenario several times and summarize.
+    
+    Args:
+        scenario: Scenario to run
+        repeat: Measured runs
+        warmup: Unmeasured runs before measuring
+        profile: LLM timing
+    
+    Returns:
+        Result dict (latency percentiles, per-run averages, peak RSS)
+    """
+    profile = profile or LLMProfile()
+    latencies: List[float] = []
+    llm_calls: List[int] = []
+    tool_calls: List[int] = []
+    ws_bytes: List[int] = []
+    ws_messages: List[int] = []
+    statuses: Dict[str, int] = {}
+    ingestor = DocumentIngestor() if scenario.upload_pages else None
+    
+    async with StubMCPServers(scenario.servers) as stubs, PeakRSSSampler() as rss:
+        registry = CapabilityRegistry()
+        registry.register_provider(MCPToolProvider())
+        
+        for index in range(warmup + repeat):
+            session_id = f"bench-{scenario.name}-{index}"
+            ws_manager = WebSocketManager()
+            websocket = ByteCountingWebSocket()
+            await ws_manager.connect(websocket, session_id)
+            
+            llm = ScriptedChatModel(
+                scripts=scenario.scripts,
+                tokens_per_second=profile.tokens_per_second,
+                first_token_latency=profile.first_token_latency
+            )
+            engine = BenchmarkEngine(
+                config=AgentModeAdapter(registry, ws_manager, session_id).get_config(),
+                capability_registry=registry,
+                ws_manager=ws_manager,
+                session_id=session_id,
+                llm=llm
+            )
+            context = ConversationContext(session_id=session_id)
+            tool_calls_before = stubs.tool_calls
+            
+            started = time.perf_counter()
+            file_ids = []
+            if ingestor:
+                file_ids.append(await _attach_upload(context, ws_manager, session_id, scenario.upload_pages, ingestor))
+            result = await engine.execute(goal=scenario.goal, context=context, file_ids=file_ids)
+            await ws_manager.drain(session_id, timeout=10.0)
+            elapsed = time.perf_counter() - started
+            ws_manager.disconnect(websocket, session_id)
+            
+            if index < warmup:
+                continue
+            status = result.get("status", "unknown") if isinstance(result, dict) else "unknown"
+            statuses[status] = statuses.get(status, 0) + 1
+            latencies.append(elapsed)
+            llm_calls.append(llm.total_calls)
+            tool_calls.append(stubs.tool_calls - tool_calls_before)
+            ws_bytes.append(websocket.bytes_sent)
+            ws_messages.append(websocket.messages)
+    
+    if ingestor:
+        ingestor.shutdown()
+    
+    def mean(values: List[float]) -> float:
+        return sum(values) / len(values) if values else 0.0
+    
+    return {
+        "scenario": scenario.name,
+        "runs": len(latencies),
+        "statuses": statuses,
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "latency_mean_ms": round(mean(latencies) * 1000, 1),
+        "llm_calls": round(mean(llm_calls), 2),
+        "tool_calls": round(mean(tool_calls), 2),
+        "ws_bytes": round(mean(ws_bytes)),
+        "ws_messages": round(mean(ws_messages), 1),
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+    }
@@ -0,0 +1,62 @@
+"""
+Synthetic PDF generator for upload benchmarks and tests.
+Builds a valid text-only PDF without extra dependencies.
+"""
+
+from typing import List
+
+
+def build_pdf(pages: List[str]) -> bytes:
+    """
+    Build a PDF with one text page per item.
+    
+    Args:
+        pages: Page texts (ASCII, lines separated by newlines)
+        
+    Returns:
+        PDF file content
+    """
+    objects = []
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append("<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    for i, text in enumerate(pages):
+        lines = " T* ".join(f"({line}) Tj" for line in text.split("\n"))
+        stream = f"BT /F1 10 Tf 12 TL 40 760 Td {lines} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    
+    out = "%PDF-1.4\n"
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out.encode("latin-1")))
+        out += f"{num} 0 obj\n{body}\nendobj\n"
+    
+    xref_offset = len(out.encode("latin-1"))
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+def build_report_pdf(page_count: int, lines_per_page: int = 50) -> bytes:
+    """
+    Build a text-heavy multi-page PDF.
+    
+    Args:
+        page_count: Number of pages
+        lines_per_page: Text lines per page
+        
+    Returns:
+        PDF file content
+    """
+    pages = []
+    for page in range(page_count):
+        lines = [f"Page {page + 1} line {line}: " + "revenue forecast quarter " * 4 for line in range(lines_per_page)]
+        pages.append("\n".join(lines))
+    return build_pdf(pages)
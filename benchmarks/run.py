@@ -0,0 +1,158 @@
+"""
+Run the benchmark suite and optionally compare with a stored baseline.
+
+Run:
+    python -m benchmarks.run                                  # all scenarios, JSON to stdout
+    python -m benchmarks.run --scenario multi_read_report --repeat 10
+    python -m benchmarks.run --output results.json --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json   # exit 1 on regression
+"""
+
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.harness import LLMProfile, run_scenario
+from benchmarks.scenarios import build_scenarios
+
+
+# Metrics compared against the baseline; higher is worse for all of them
+COMPARED_METRICS = ("latency_p50_ms", "latency_p95_ms", "llm_calls", "tool_calls", "ws_bytes", "peak_rss_mb")
+DEFAULT_TOLERANCE = 0.20
+
+
+async def run_suite(
+    names: Optional[List[str]] = None,
+    repeat: int = 5,
+    warmup: int = 1,
+    profile: Optional[LLMProfile] = None,
+    payload_scale: float = 1.0,
+    latency_scale: float = 1.0
+) -> Dict[str, Any]:
+    """
+    Run scenarios sequentially.
+    
+    Args:
+        names: Scenario names (all when None)
+        repeat: Measured runs per scenario
+        warmup: Unmeasured runs per scenario
+        profile: LLM timing
+        payload_scale: Multiplier for stub payload sizes
+        latency_scale: Multiplier for stub tool latencies
+    
+    Returns:
+        Suite report
+    """
+    scenarios = build_scenarios(payload_scale=payload_scale, latency_scale=latency_scale)
+    unknown = [name for name in names or [] if name not in scenarios]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {unknown}. Available: {list(scenarios)}")
+    profile = profile or LLMProfile()
+    
+    results = {}
+    for name in names or list(scenarios):
+        results[name] = await run_scenario(scenarios[name], repeat=repeat, warmup=warmup, profile=profile)
+    
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "repeat": repeat,
+            "warmup": warmup,
+            "tokens_per_second": profile.tokens_per_second,
+            "first_token_latency": profile.first_token_latency,
+            "payload_scale": payload_scale,
+            "latency_scale": latency_scale,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> Dict[str, Any]:
+    """
+    Compare a report with a baseline report.
+    
+    A metric regresses when it grows by more than tolerance (relative).
+    
+    Args:
+        current: Report from run_suite
+        baseline: Stored report
+        tolerance: Allowed relative increase (0.2 = 20%)
+    
+    Returns:
+        {"regressions": [...], "scenarios": {name: {metric: {...}}}}
+    """
+    comparison: Dict[str, Any] = {"tolerance": tolerance, "regressions": [], "scenarios": {}}
+    for name, result in current.get("scenarios", {}).items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        metrics = {}
+        for metric in COMPARED_METRICS:
+            if metric not in result or metric not in base:
+                continue
+            new, old = float(result[metric]), float(base[metric])
+            change = (new - old) / old if old else (0.0 if new == old else float("inf"))
+            regressed = change > tolerance
+            metrics[metric] = {"baseline": old, "current": new, "change": round(change, 4), "regressed": regressed}
+            if regressed:
+                comparison["regressions"].append(f"{name}.{metric}: {old:g} -> {new:g} ({change:+.0%})")
+        comparison["scenarios"][name] = metrics
+    return comparison
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Agent benchmark suite")
+    parser.add_argument("--scenario", action="append", dest="scenarios", help="Scenario to run (repeatable, default all)")
+    parser.add_argument("--list", action="store_true", help="List scenarios and exit")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--token-rate", type=float, default=LLMProfile.tokens_per_second, help="Fake LLM tokens per second")
+    parser.add_argument("--first-token-ms", type=float, default=LLMProfile.first_token_latency * 1000)
+    parser.add_argument("--payload-scale", type=float, default=1.0)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--output", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Compare with this baseline report")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", help="Also store the report as baseline at this path")
+    args = parser.parse_args(argv)
+    
+    if args.list:
+        for name, scenario in build_scenarios().items():
+            print(f"{name}: {scenario.description}")
+        return 0
+    
+    profile = LLMProfile(tokens_per_second=args.token_rate, first_token_latency=args.first_token_ms / 1000)
+    report = asyncio.run(run_suite(
+        args.scenarios,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        profile=profile,
+        payload_scale=args.payload_scale,
+        latency_scale=args.latency_scale
+    ))
+    
+    exit_code = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        report["comparison"] = compare(report, baseline, args.tolerance)
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+    
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    if args.save_baseline:
+        baseline_report = {key: value for key, value in report.items() if key != "comparison"}
+        Path(args.save_baseline).write_text(json.dumps(baseline_report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Benchmark scenarios.
+
+Each scenario fixes the user goal, the scripted LLM responses per call
+purpose and the stub MCP servers (tools, latency, payload size) it needs.
+Tool calls go through the real LangChain tools, MCPServerManager and
+MCPConnection into stdio stub servers.
+"""
+
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+import json
+
+from benchmarks.fake_llm import thought_action
+from benchmarks.stub_mcp_server import StubTool
+
+
+@dataclass
+class Scenario:
+    """One benchmark scenario."""
+    name: str
+    goal: str
+    scripts: Dict[str, List[str]]
+    servers: Dict[str, Dict[str, StubTool]] = field(default_factory=dict)
+    mode: str = "agent"
+    upload_pages: int = 0
+    description: str = ""
+
+
+ANALYSIS_PROGRESS = json.dumps({
+    "is_success": True,
+    "is_goal_achieved": False,
+    "is_error": False,
+    "progress_toward_goal": 0.5,
+    "confidence": 0.8,
+})
+
+FINISH = thought_action("Все данные получены, задача выполнена.", "FINISH", description="Готово")
+
+
+def _report(lines: int) -> str:
+    return "\n".join(f"- Пункт {i + 1}: итог по показателю, рост к прошлому периоду." for i in range(lines))
+
+
+def build_scenarios(payload_scale: float = 1.0, latency_scale: float = 1.0) -> Dict[str, Scenario]:
+    """
+    Build all scenarios.
+    
+    Args:
+        payload_scale: Multiplier for stub payload sizes
+        latency_scale: Multiplier for stub tool latencies
+    
+    Returns:
+        Scenarios by name
+    """
+    def tool(latency_ms: float, payload_bytes: int, shape: str) -> StubTool:
+        return StubTool(latency_ms * latency_scale, int(payload_bytes * payload_scale), shape)
+    
+    scenarios = [
+        Scenario(
+            name="simple_query",
+            description="Greeting answered without tools",
+            goal="Привет! Как дела?",
+            scripts={"*": ["Привет! Всё отлично, чем могу помочь?"]},
+        ),
+        Scenario(
+            name="multi_read_report",
+            description="Three sheet reads followed by a written report",
+            goal="Прочитай таблицу продаж за три квартала и подготовь отчёт",
+            scripts={
+                "think_and_plan": [
+                    thought_action(
+                        f"Нужно прочитать данные за квартал {quarter}.",
+                        "get_sheet_data",
+                        {"spreadsheet_id": "bench-sheet", "range": f"Q{quarter}!A1:D500"},
+                        f"Чтение Q{quarter}"
+                    )
+                    for quarter in (1, 2, 3)
+                ] + [FINISH],
+                "analyze_result": [ANALYSIS_PROGRESS],
+                "final_answer": ["Отчёт по продажам:\n" + _report(20)],
+            },
+            servers={"sheets": {"sheets_read_range": tool(80, 20000, "sheet_values")}},
+        ),
+        Scenario(
+            name="meeting_scheduling",
+            description="Calendar lookup followed by event creation",
+            goal="Посмотри календарь на завтра и создай встречу с командой в 15:00",
+            scripts={
+                "think_and_plan": [
+                    thought_action(
+                        "Сначала проверю занятость на завтра.",
+                        "get_calendar_events",
+                        {"start_time": "завтра"},
+                        "Проверка календаря"
+                    ),
+                    thought_action(
+                        "Время 15:00 свободно, создаю встречу.",
+                        "create_event",
+                        {"title": "Встреча с командой", "start_time": "завтра в 15:00", "duration": "1h", "attendees": ["team@example.com"]},
+                        "Создание встречи"
+                    ),
+                    FINISH,
+                ],
+                "analyze_result": [ANALYSIS_PROGRESS],
+                "final_answer": ["Встреча с командой запланирована на завтра в 15:00."],
+            },
+            servers={"calendar": {
+                "list_events": tool(120, 8000, "calendar_events"),
+                "create_event": tool(200, 500, "event"),
+            }},
+        ),
+        Scenario(
+            name="onec_revenue_report",
+            description="1C revenue aggregation by counterparty and month",
+            goal="Покажи выручку по контрагентам по месяцам за 2024 год из 1С",
+            scripts={
+                "think_and_plan": [
+                    thought_action(
+                        "Нужна выручка по контрагентам из 1С.",
+                        "onec_get_revenue_by_counterparty_month",
+                        {"from_date": "2024-01-01", "to_date": "2024-12-31"},
+                        "Выручка из 1С"
+                    ),
+                    FINISH,
+                ],
+                "analyze_result": [ANALYSIS_PROGRESS],
+                "final_answer": ["Выручка за 2024 год:\n" + _report(30)],
+            },
+            servers={"onec": {"onec_revenue_by_counterparty_month": tool(400, 60000, "onec_revenue")}},
+        ),
+        Scenario(
+            name="large_upload",
+            description="300-page PDF extracted in the process pool, then summarized",
+            goal="Сделай краткое резюме прикреплённого отчёта",
+            scripts={
+                "think_and_plan": [FINISH],
+                "final_answer": ["Краткое резюме отчёта:\n" + _report(15)],
+            },
+            upload_pages=300,
+        ),
+    ]
+    return {scenario.name: scenario for scenario in scenarios}
+
+
+def get_scenario(name: str, **kwargs: Any) -> Optional[Scenario]:
+    """Scenario by name (None if unknown)."""
+    return build_scenarios(**kwargs).get(name)
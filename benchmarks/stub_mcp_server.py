@@ -0,0 +1,223 @@
+"""
+Stdio MCP server stub shared by tests and benchmarks.
+
+Speaks the real MCP protocol, so the host side runs through the normal
+MCPConnection path, and traces its tool handler like the real servers.
+
+- Without --spec it serves one `lookup` tool that performs a (mocked)
+  Google API request, so tracing tests can check that server-side spans
+  are linked to the host trace.
+- With --spec every tool waits a configured latency and answers with a
+  JSON payload of roughly a configured size, shaped like the response of
+  the real server tool it stands in for.
+
+StubMCPServers starts such processes and installs them as the global
+MCPServerManager.
+
+Run: python benchmarks/stub_mcp_server.py --name sheets --spec '{"sheets_read_range": {"latency_ms": 80, "payload_bytes": 20000, "shape": "sheet_values"}}'
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from googleapiclient.http import HttpMockSequence, HttpRequest
+from mcp.server import Server
+from mcp.server.stdio import stdio_server
+from mcp.types import TextContent, Tool
+
+from src.utils.tracing import configure_tracing, instrument_google_api_client, trace_tool_handler
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class StubTool:
+    """Synthetic MCP tool served by a stub server."""
+    latency_ms: float = 50.0
+    payload_bytes: int = 2000
+    shape: str = "generic"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"latency_ms": self.latency_ms, "payload_bytes": self.payload_bytes, "shape": self.shape}
+
+
+def _fill(make_item: Callable[[int], Any], payload_bytes: int) -> List[Any]:
+    """Build items until their JSON reaches payload_bytes."""
+    items: List[Any] = []
+    size = 0
+    while size < payload_bytes:
+        item = make_item(len(items))
+        items.append(item)
+        size += len(json.dumps(item, ensure_ascii=False)) + 2
+    return items
+
+
+def build_payload(shape: str, payload_bytes: int) -> Dict[str, Any]:
+    """
+    Synthetic response of a given shape.
+    
+    Args:
+        shape: sheet_values, calendar_events, event, onec_revenue or generic
+        payload_bytes: Approximate JSON size
+    
+    Returns:
+        Response dict
+    """
+    if shape == "sheet_values":
+        values = _fill(lambda i: [f"2024-{i % 12 + 1:02d}-01", f"Клиент {i % 40}", str(1000 + i * 7), "RUB"], payload_bytes)
+        return {"range": "Sheet1!A1:D", "values": values}
+    if shape == "calendar_events":
+        items = _fill(lambda i: {
+            "id": f"evt{i}",
+            "summary": f"Встреча {i}",
+            "start": {"dateTime": f"2024-06-{i % 28 + 1:02d}T{9 + i % 8:02d}:00:00+03:00"},
+            "end": {"dateTime": f"2024-06-{i % 28 + 1:02d}T{10 + i % 8:02d}:00:00+03:00"},
+            "attendees": [{"email": f"user{i % 5}@example.com"}],
+        }, payload_bytes)
+        return {"items": items, "count": len(items)}
+    if shape == "event":
+        return {"id": "evt-bench", "status": "confirmed", "htmlLink": "https://calendar.google.com/event?eid=bench", "padding": "x" * payload_bytes}
+    if shape == "onec_revenue":
+        rows = _fill(lambda i: {
+            "month": f"2024-{i % 12 + 1:02d}",
+            "counterparty_name": f"ООО Контрагент {i % 60}",
+            "counterparty_guid": f"guid-{i % 60}",
+            "revenue": 10000.0 + i * 13.5,
+        }, payload_bytes)
+        return {"revenue_by_counterparty_month": rows, "total_records": len(rows) * 3}
+    return {"status": "success", "data": "x" * payload_bytes}
+
+
+def _google_lookup() -> Dict[str, Any]:
+    """Execute a mocked Sheets request (traced by instrument_google_api_client)."""
+    request = HttpRequest(
+        HttpMockSequence([({"status": "200"}, '{"values": [["a", 1]]}')]),
+        lambda resp, content: json.loads(content),
+        "https://sheets.googleapis.com/v4/spreadsheets/x/values/A1",
+        methodId="sheets.spreadsheets.values.get"
+    )
+    return request.execute()
+
+
+def build_server(name: str = "stub-mcp", spec: Optional[Dict[str, Dict[str, Any]]] = None) -> Server:
+    """
+    Create the stub server.
+    
+    Args:
+        name: Server name
+        spec: Tool name -> {"latency_ms", "payload_bytes", "shape"};
+            None for the single `lookup` tool backed by a mocked Google request
+    """
+    server = Server(name)
+    payloads = {
+        tool: json.dumps(build_payload(options.get("shape", "generic"), int(options.get("payload_bytes", 1000))), ensure_ascii=False)
+        for tool, options in (spec or {}).items()
+    }
+    
+    @server.list_tools()
+    async def list_tools() -> List[Tool]:
+        if spec is None:
+            return [Tool(name="lookup", description="Lookup", inputSchema={"type": "object", "properties": {}})]
+        return [
+            Tool(name=tool, description=f"Synthetic {tool}", inputSchema={"type": "object", "properties": {}})
+            for tool in spec
+        ]
+    
+    @server.call_tool()
+    @trace_tool_handler(server)
+    async def call_tool(tool: str, arguments: Dict[str, Any]) -> List[TextContent]:
+        if spec is None:
+            return [TextContent(type="text", text=json.dumps(_google_lookup()))]
+        options = spec.get(tool, {})
+        await asyncio.sleep(float(options.get("latency_ms", 0)) / 1000)
+        return [TextContent(type="text", text=payloads.get(tool, "{}"))]
+    
+    return server
+
+
+class StubMCPServers:
+    """
+    Starts stub stdio MCP servers and installs them as the global MCPServerManager.
+    
+    Connections keep the real server names (sheets, calendar, onec, ...), so
+    tools reach them through mcp_manager.call_tool(..., server_name=...).
+    """
+    
+    def __init__(self, servers: Dict[str, Dict[str, StubTool]]):
+        self.servers = servers
+        self.tool_calls = 0
+        self._stack = AsyncExitStack()
+        self._previous_manager: Any = None
+    
+    async def __aenter__(self) -> "StubMCPServers":
+        # Client side only: the stub processes import this module and should start fast
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+        from src.utils import mcp_loader
+        from src.utils.config_loader import MCPServerConfig
+        from src.utils.mcp_loader import MCPConnection, MCPServerManager
+        
+        manager = MCPServerManager()
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+        
+        for name, tools in self.servers.items():
+            spec = {tool: stub.to_dict() for tool, stub in tools.items()}
+            params = StdioServerParameters(
+                command=sys.executable,
+                args=[str(Path(__file__).resolve()), "--name", name, "--spec", json.dumps(spec)],
+                env=env
+            )
+            read_stream, write_stream = await self._stack.enter_async_context(stdio_client(params))
+            session = await self._stack.enter_async_context(ClientSession(read_stream, write_stream))
+            
+            connection = MCPConnection(MCPServerConfig(name=name, endpoint=f"stub://{name}"))
+            connection.session = session
+            await connection._initialize()
+            connection.connected = True
+            self._count_calls(connection)
+            manager.connections[name] = connection
+        
+        self._previous_manager = mcp_loader._mcp_manager
+        mcp_loader._mcp_manager = manager
+        return self
+    
+    def _count_calls(self, connection: Any) -> None:
+        call_tool = connection.call_tool
+        
+        async def counted(tool_name: str, arguments: Dict[str, Any]) -> Any:
+            self.tool_calls += 1
+            return await call_tool(tool_name, arguments)
+        
+        connection.call_tool = counted
+    
+    async def __aexit__(self, *exc: Any) -> None:
+        from src.utils import mcp_loader
+        
+        mcp_loader._mcp_manager = self._previous_manager
+        await self._stack.aclose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Stub stdio MCP server")
+    parser.add_argument("--name", default="stub-mcp")
+    parser.add_argument("--spec", help="JSON: tool -> {latency_ms, payload_bytes, shape}")
+    args = parser.parse_args()
+    
+    configure_tracing(args.name)
+    instrument_google_api_client()
+    server = build_server(args.name, json.loads(args.spec) if args.spec else None)
+    async with stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
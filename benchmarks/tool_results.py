@@ -0,0 +1,139 @@
+"""
+Per-observation processing of a large calendar result: text parsing vs envelope.
+
+get_calendar_events runs against a stub calendar server returning N events.
+The observation is then processed the way the engine does it (operation rows
+for UI streaming, intent summary and details, result summary, entity
+extraction), once from the plain text (the former regex-based path) and once
+from the ToolResult envelope.
+
+Run:
+    python -m benchmarks.tool_results
+    python -m benchmarks.tool_results --events 500 --repeat 200
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.harness import BenchmarkEngine
+from benchmarks.stub_mcp_server import StubMCPServers, StubTool, build_payload
+from src.api.websocket_manager import WebSocketManager
+from src.core.capability_registry import CapabilityRegistry
+from src.core.entity_memory import extract_entities_from_tool_result
+from src.core.mode_adapters import AgentModeAdapter
+from src.mcp_tools.calendar_tools import GetCalendarEventsTool
+
+
+TOOL_NAME = "get_calendar_events"
+
+
+def _payload_bytes_for(events: int) -> int:
+    """Stub payload size that yields exactly this many calendar events."""
+    items = build_payload("calendar_events", events * 400)["items"]
+    return sum(len(json.dumps(item, ensure_ascii=False)) + 2 for item in items[:events - 1]) + 1
+
+
+def _legacy_stream_rows(text: str) -> List[str]:
+    """UI rows as the engine parsed them from the formatted text before the envelope."""
+    lines = text.split('\n')
+    count_match = re.search(r'Found (\d+) event\(s\)', lines[0] if lines else '')
+    if not count_match:
+        return []
+    count = int(count_match.group(1))
+    rows: List[str] = []
+    for line in lines[1:]:
+        line = line.strip()
+        if not line:
+            continue
+        if re.match(r'^\d+\.', line) or line.startswith('📅') or ('Время:' in line and len(rows) < count):
+            info = re.sub(r'^\d+\.\s*', '', line).replace('📅', '').strip()
+            if 'Время:' in info and rows:
+                time_match = re.search(r'Время: ([^-\n]+)', info)
+                if time_match:
+                    rows[-1] = f"{rows[-1]} - {time_match.group(1).strip()}"
+            elif info and 'Время:' not in info:
+                rows.append(f"📅 {info}")
+    return rows
+
+
+def _time_per_call(process: Callable[[], Any], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        process()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+async def run(events: int = 500, repeat: int = 100) -> Dict[str, Any]:
+    """
+    Fetch N events through the real tool and time observation processing.
+    
+    Args:
+        events: Number of calendar events
+        repeat: Timed repetitions per variant
+    
+    Returns:
+        {"text_parsing": {...}, "envelope": {...}, "speedup": ...}
+    """
+    servers = {"calendar": {"list_events": StubTool(0, _payload_bytes_for(events), "calendar_events")}}
+    async with StubMCPServers(servers):
+        result = await GetCalendarEventsTool().ainvoke({"start_time": "2024-06-01", "max_results": events})
+    
+    registry = CapabilityRegistry()
+    ws_manager = WebSocketManager()
+    engine = BenchmarkEngine(
+        config=AgentModeAdapter(registry, ws_manager, "bench").get_config(),
+        capability_registry=registry,
+        ws_manager=ws_manager,
+        session_id="bench",
+        llm=ScriptedChatModel(scripts={"*": [""]}, tokens_per_second=0, first_token_latency=0)
+    )
+    
+    def process(observation: Any, stream_rows: Callable[[Any], List[str]]) -> Dict[str, Any]:
+        return {
+            "rows": stream_rows(observation),
+            "operation_summary": engine._get_result_summary(TOOL_NAME, observation),
+            "intent_summary": engine._format_result_summary(observation, TOOL_NAME),
+            "details": engine._extract_result_details(observation),
+            "entities": extract_entities_from_tool_result(TOOL_NAME, observation),
+        }
+    
+    text = result.text
+    legacy = process(text, _legacy_stream_rows)
+    structured = process(result, lambda r: r.rows)
+    
+    return {
+        "events": len(result.items),
+        "result_chars": len(text),
+        "text_parsing": {
+            "ms_per_observation": round(_time_per_call(lambda: process(text, _legacy_stream_rows), repeat), 3),
+            "rows": len(legacy["rows"]),
+            "entities": len(legacy["entities"]),
+        },
+        "envelope": {
+            "ms_per_observation": round(_time_per_call(lambda: process(result, lambda r: r.rows), repeat), 3),
+            "rows": len(structured["rows"]),
+            "entities": len(structured["entities"]),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Observation processing: text parsing vs ToolResult envelope")
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args(argv)
+    
+    report = asyncio.run(run(args.events, args.repeat))
+    report["speedup"] = round(report["text_parsing"]["ms_per_observation"] / max(report["envelope"]["ms_per_observation"], 1e-6), 1)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
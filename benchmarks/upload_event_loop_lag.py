@@ -0,0 +1,100 @@
+"""
+Event-loop lag during a large PDF upload.
+
+Compares inline PyPDF2 extraction on the event loop (the old /api/upload
+behaviour) with DocumentIngestor (process pool, page batches).
+
+Run: python -m benchmarks.upload_event_loop_lag [--pages 300]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import PyPDF2
+
+from benchmarks.pdf_fixture import build_report_pdf
+from src.api.upload_ingestion import DocumentIngestor, format_pdf_pages
+
+
+async def _measure_lag(work, interval: float = 0.005) -> dict:
+    """Run work() while a ticker records how late each tick fires."""
+    lags = []
+    stop = asyncio.Event()
+    
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, loop.time() - expected))
+    
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(interval * 2)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker_task
+    
+    lags.sort()
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "max_lag_ms": round(lags[-1] * 1000, 1) if lags else 0.0,
+        "p95_lag_ms": round(lags[int(len(lags) * 0.95) - 1] * 1000, 1) if lags else 0.0,
+        "ticks": len(lags),
+    }
+
+
+async def run(pages: int) -> dict:
+    """Run both variants and return results."""
+    content = build_report_pdf(pages)
+    
+    async def inline():
+        reader = PyPDF2.PdfReader(io.BytesIO(content))
+        text = ""
+        for page_num, page in enumerate(reader.pages):
+            page_text = page.extract_text()
+            if page_text:
+                text += f"\n--- Page {page_num + 1} ---\n{page_text}"
+    
+    ingestor = DocumentIngestor()
+    first_batch_at = {}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "report.pdf"
+        path.write_bytes(content)
+        
+        # Warm up the pool so process start-up is not counted
+        await ingestor.count_pdf_pages(path)
+        
+        async def pooled():
+            start = time.perf_counter()
+            
+            async def on_batch(batch, done, total):
+                first_batch_at.setdefault("s", time.perf_counter() - start)
+                format_pdf_pages(batch)
+            
+            await ingestor.extract_pdf(path, on_batch)
+        
+        before = await _measure_lag(inline)
+        after = await _measure_lag(pooled)
+    
+    ingestor.shutdown()
+    after["first_pages_ready_s"] = round(first_batch_at.get("s", 0.0), 3)
+    return {"pages": pages, "pdf_bytes": len(content), "inline": before, "process_pool": after}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.pages)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
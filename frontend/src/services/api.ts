@@ -79,6 +79,9 @@ export interface UploadFileResponse {
   data?: string  // base64 encoded image data
   text?: string  // extracted PDF text
   media_type?: string
+  pages?: number  // PDF page count
+  pages_processed?: number  // PDF pages extracted so far
+  status?: 'processing' | 'ready'  // PDF text keeps growing while 'processing'
 }
 
 export interface SendMessageResponse {
@@ -3,6 +3,7 @@ import { useSettingsStore } from '../store/settingsStore'
 
 export interface WebSocketEvent {
   type: string
+  seq?: number
   timestamp: number
   data: any
 }
@@ -14,6 +15,9 @@ export class WebSocketClient {
   private maxReconnectAttempts = 5
   private reconnectDelay = 1000
   
+  // Last event sequence number seen; sent on reconnect so the server replays missed events
+  private lastSeq: number | null = null
+  
   // Track current reasoning/answer block IDs per message
   private currentReasoningBlockId: string | null = null
   private currentAnswerBlockId: string | null = null
@@ -26,8 +30,14 @@ export class WebSocketClient {
   // Intent block minimum display time (1.5 seconds)
   private intentStartTimes: Record<string, number> = {}
   private pendingIntentCompletes: Record<string, { autoCollapse: boolean; summary?: string }> = {}
+  
+  // Text rebuilt from delta events ({chunk, offset, seq} + periodic full-text checkpoints)
+  private deltaTexts: Record<string, { text: string; seq: number; synced: boolean }> = {}
 
   connect(sessionId: string): void {
+    if (this.sessionId !== sessionId) {
+      this.lastSeq = null
+    }
     this.sessionId = sessionId
     this._connect()
   }
@@ -69,7 +79,8 @@ export class WebSocketClient {
     // localhost/IPv6 issues and keeps WS aligned with REST `/api` proxy behavior.
     const pageProto = window.location.protocol
     const wsProto = pageProto === 'https:' ? 'wss' : 'ws'
-    const wsUrl = `${wsProto}://${window.location.host}/ws/${this.sessionId}`
+    const resumeQuery = this.lastSeq !== null ? `?last_seq=${this.lastSeq}` : ''
+    const wsUrl = `${wsProto}://${window.location.host}/ws/${this.sessionId}${resumeQuery}`
     console.log('[WebSocket] Attempting to connect to:', wsUrl)
     
     try {
@@ -86,6 +97,14 @@ export class WebSocketClient {
           const data: WebSocketEvent = JSON.parse(event.data)
           console.log('[WebSocket] Event received:', data.type, data)
           
+          if (typeof data.seq === 'number') {
+            this.lastSeq = data.seq
+          }
+          if (data.type === 'replay_gap') {
+            console.warn('[WebSocket] Some events were lost while disconnected:', data.data)
+            return
+          }
+          
           // Log react_* events specifically
           if (data.type.startsWith('react_')) {
             console.log('[WebSocket] ReAct event received:', data.type, {
@@ -133,6 +152,35 @@ export class WebSocketClient {
     }
   }
 
+  /**
+   * Rebuild streamed text from a delta event.
+   * Appends the chunk (chunk, token or text) when seq follows the last applied one, replaces the text on
+   * checkpoints (contentKey present) and starts over on seq 1. Returns null while
+   * chunks are missing, until the next checkpoint arrives. Events without seq carry
+   * the full text (legacy format).
+   */
+  private applyDelta(key: string, data: any, contentKey: string = 'content'): string | null {
+    if (typeof data?.seq !== 'number') {
+      return typeof data?.[contentKey] === 'string' ? data[contentKey] : null
+    }
+    let state = this.deltaTexts[key]
+    if (!state || data.seq === 1) {
+      state = this.deltaTexts[key] = { text: '', seq: 0, synced: true }
+    }
+    const delta = data.chunk ?? data.token ?? data.text ?? ''
+    if (state.synced && data.seq === state.seq + 1) {
+      state.text += delta
+    } else if (data.seq > state.seq + 1) {
+      state.synced = false
+    }
+    state.seq = Math.max(state.seq, data.seq)
+    if (typeof data[contentKey] === 'string') {
+      state.text = data[contentKey]
+      state.synced = true
+    }
+    return state.synced ? state.text : null
+  }
+
   private handleEvent(event: WebSocketEvent): void {
     const chatStore = useChatStore.getState()
     
@@ -190,13 +238,19 @@ export class WebSocketClient {
         this.currentMessageId = messageId
         this.currentReasoningBlockId = null
         this.currentAnswerBlockId = null
+        this.deltaTexts = {}
         chatStore.setAgentTyping(true)
         console.log('[WebSocket] Starting new message:', messageId)
         break
 
       case 'thinking':
         // Reasoning/thinking eventchatStore.setAgentTyping(true)
-        const thinkingMessage = event.data.message || event.data.step || 'Thinking...'
+        const thinkingText = this.applyDelta('thinking', event.data, 'message')
+        if (thinkingText === null && typeof event.data.seq === 'number') {
+          // Missed a chunk: wait for the next checkpoint
+          break
+        }
+        const thinkingMessage = thinkingText || event.data.step || 'Thinking...'
         
         // Get or create current message ID
         if (!this.currentMessageId) {
@@ -258,7 +312,11 @@ export class WebSocketClient {
 
       case 'message_chunk':
         // Streaming answer content
-        const chunkContent = event.data.content || ''
+        const chunkContent = this.applyDelta(`message:${event.data.message_id || ''}`, event.data)
+        if (chunkContent === null) {
+          // Missed a chunk: wait for the next checkpoint
+          break
+        }
         
         // CRITICAL FIX: If event.data.message_id exists and differs from currentMessageId,
         // and we have a reasoning block, we need to move the reasoning block to the new message
@@ -697,6 +755,7 @@ export class WebSocketClient {
       case 'final_result_start':
         // Initialize final result for the active workflow
         const finalResultStartWorkflowId = ensureActiveWorkflow()
+        delete this.deltaTexts['final_result']
         if (finalResultStartWorkflowId) {
           // Don't reset if we already have content (avoid race conditions)
           const currentContent = useChatStore.getState().workflows[finalResultStartWorkflowId]?.finalResult
@@ -708,11 +767,12 @@ export class WebSocketClient {
         break
 
       case 'final_result_chunk':
-        // Update final result with accumulated content (streaming)
+        // Update final result with the text rebuilt from deltas (streaming)
         const finalResultChunkWorkflowId = ensureActiveWorkflow()
-        if (finalResultChunkWorkflowId) {
-          chatStore.updateWorkflowFinalResult(finalResultChunkWorkflowId, event.data.content || '')
-          console.log('[WebSocket] Final result chunk received, length:', event.data.content?.length || 0)
+        const finalResultText = this.applyDelta('final_result', event.data)
+        if (finalResultChunkWorkflowId && finalResultText !== null) {
+          chatStore.updateWorkflowFinalResult(finalResultChunkWorkflowId, finalResultText)
+          console.log('[WebSocket] Final result chunk received, length:', finalResultText.length)
         }
         break
 
@@ -1022,15 +1082,26 @@ export class WebSocketClient {
 
       case 'thinking_chunk': {
         console.log('[WebSocket] Thinking chunk:', event.data)
-        const thinkingId = event.data.thinking_id || useChatStore.getState().activeThinkingId
+        let thinkingId = event.data.thinking_id || useChatStore.getState().activeThinkingId
         if (!thinkingId) {
           // Fallback: create thinking block if doesn't exist
-          const newThinkingId = `thinking-${Date.now()}`
-          chatStore.startThinking(newThinkingId)
-          chatStore.appendThinkingChunk(newThinkingId, event.data.chunk || '', event.data.elapsed_seconds || 0, event.data.step_type)
-        } else {
+          thinkingId = `thinking-${Date.now()}`
+          chatStore.startThinking(thinkingId)
+        }
+        if (typeof event.data.seq !== 'number') {
+          // Legacy format: the chunk is appended as is
           chatStore.appendThinkingChunk(thinkingId, event.data.chunk || '', event.data.elapsed_seconds || 0, event.data.step_type)
+          break
+        }
+        const thinkingContent = this.applyDelta(`thinking:${thinkingId}`, event.data)
+        if (thinkingContent === null) {
+          // Missed a chunk: wait for the next checkpoint
+          break
+        }
+        if (!useChatStore.getState().thinkingBlocks[thinkingId]) {
+          chatStore.startThinking(thinkingId)
         }
+        chatStore.setThinkingContent(thinkingId, thinkingContent, event.data.elapsed_seconds || 0)
         break
       }
 
@@ -1045,18 +1116,14 @@ export class WebSocketClient {
             this.thinkingDelayTimer = null
             this.pendingThinkingId = null
           }
+          // Полный текст (checkpoint дельт или legacy full_content) заменяет накопленный
+          const fullContent = this.applyDelta(`thinking:${thinkingId}`, event.data) ?? event.data.full_content
+          if (typeof fullContent === 'string' && fullContent) {
+            chatStore.setThinkingContent(thinkingId, fullContent, event.data.elapsed_seconds || 0)
+          }
+          delete this.deltaTexts[`thinking:${thinkingId}`]
           const autoCollapse = event.data.auto_collapse !== false // Default true
           chatStore.completeThinking(thinkingId, autoCollapse)
-          const stateAfterComplete = useChatStore.getState()
-          // Если есть полный текст, обновляем контент
-          if (event.data.full_content) {
-            const thinkingState = useChatStore.getState()
-            const block = thinkingState.thinkingBlocks[thinkingId]
-            if (block) {
-              // Обновляем контент через appendThinkingChunk
-              chatStore.appendThinkingChunk(thinkingId, event.data.full_content, event.data.elapsed_seconds || block.elapsedSeconds)
-            }
-          }
         }
         
         // Переключаем intent фазу на 'executing'
@@ -1123,18 +1190,30 @@ export class WebSocketClient {
         
         if (workflowId && intentId) {
           chatStore.clearIntentThinking(workflowId, intentId)
+          delete this.deltaTexts[`intent:${intentId}`]
         }
         break
       }
 
       case 'intent_thinking_append': {
-        // Streaming thinking text - append to existing thinkingText
+        // Streaming thinking text - {text, offset, seq} deltas with checkpoints
         const state = useChatStore.getState()
         const workflowId = state.activeWorkflowId
         const intentId = event.data.intent_id || state.activeIntentId
         
-        if (workflowId && intentId && event.data.text) {
-          chatStore.appendIntentThinking(workflowId, intentId, event.data.text)
+        if (!workflowId || !intentId) {
+          break
+        }
+        if (typeof event.data.seq !== 'number') {
+          // Legacy format: the text is appended as is
+          if (event.data.text) {
+            chatStore.appendIntentThinking(workflowId, intentId, event.data.text)
+          }
+          break
+        }
+        const intentThinking = this.applyDelta(`intent:${intentId}`, event.data)
+        if (intentThinking !== null) {
+          chatStore.setIntentThinking(workflowId, intentId, intentThinking)
         }
         break
       }
@@ -1152,13 +1231,15 @@ export class WebSocketClient {
         console.log('[WebSocket] SmartProgress message:', event.data)
         const state = useChatStore.getState()
         if (state.smartProgress) {
+          // Messages carry timing (elapsed/estimate from tool latency history); no separate timer events
           const message = event.data.message || 'Обрабатываю...'
-          chatStore.updateSmartProgress(
-            message,
-            state.smartProgress.elapsedSec,
-            state.smartProgress.estimatedSec,
-            state.smartProgress.progressPercent
-          )
+          const elapsedSec = event.data.elapsed_sec ?? state.smartProgress.elapsedSec
+          const estimatedSec = event.data.estimated_sec ?? state.smartProgress.estimatedSec
+          const progressPercent = event.data.progress_percent ?? state.smartProgress.progressPercent
+          chatStore.updateSmartProgress(message, elapsedSec, estimatedSec, progressPercent)
+          if (state.activeWorkflowId && state.activeIntentId && event.data.progress_percent !== undefined) {
+            chatStore.setIntentProgress(state.activeWorkflowId, state.activeIntentId, progressPercent, elapsedSec, estimatedSec)
+          }
         }
         break
       }
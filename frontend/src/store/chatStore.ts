@@ -320,6 +320,7 @@ interface ChatState {
   // Thinking block methods
   startThinking: (thinkingId: string) => void
   appendThinkingChunk: (thinkingId: string, chunk: string, elapsedSeconds: number, stepType?: 'analyzing' | 'searching' | 'executing' | 'observing' | 'success' | 'error') => void
+  setThinkingContent: (thinkingId: string, content: string, elapsedSeconds: number) => void
   completeThinking: (thinkingId: string, autoCollapse: boolean) => void
   toggleThinkingCollapse: (thinkingId: string) => void
   toggleThinkingPin: (thinkingId: string) => void
@@ -330,6 +331,7 @@ interface ChatState {
   addIntentDetail: (workflowId: string, intentId: string, detail: IntentDetail) => void
   clearIntentThinking: (workflowId: string, intentId: string) => void
   appendIntentThinking: (workflowId: string, intentId: string, text: string) => void
+  setIntentThinking: (workflowId: string, intentId: string, text: string) => void
   setIntentPhase: (workflowId: string, intentId: string, phase: IntentPhase) => void
   setIntentProgress: (workflowId: string, intentId: string, percent: number, elapsed: number, estimated: number) => void
   toggleIntentPhase: (workflowId: string, intentId: string, phase: 'planning' | 'executing') => void
@@ -1386,6 +1388,25 @@ export const useChatStore = create<ChatState>()(
           }
         }),
       
+      setThinkingContent: (thinkingId: string, content: string, elapsedSeconds: number) =>
+        set((state) => {
+          // Текст, восстановленный из дельт (или checkpoint): заменяет контент целиком
+          const existingBlock = state.thinkingBlocks[thinkingId]
+          if (!existingBlock) return state
+          
+          return {
+            thinkingBlocks: {
+              ...state.thinkingBlocks,
+              [thinkingId]: {
+                ...existingBlock,
+                status: 'streaming',
+                content,
+                elapsedSeconds: elapsedSeconds || existingBlock.elapsedSeconds,
+              },
+            },
+          }
+        }),
+      
       completeThinking: (thinkingId: string, autoCollapse: boolean) =>
         set((state) => {
           const existingBlock = state.thinkingBlocks[thinkingId]
@@ -1541,6 +1562,27 @@ export const useChatStore = create<ChatState>()(
           }
         }),
       
+      setIntentThinking: (workflowId: string, intentId: string, text: string) =>
+        set((state) => {
+          const existingIntents = state.intentBlocks[workflowId] || []
+          const updatedIntents = existingIntents.map(intent => {
+            if (intent.id === intentId) {
+              return {
+                ...intent,
+                status: 'streaming' as const,
+                thinkingText: text,
+              }
+            }
+            return intent
+          })
+          return {
+            intentBlocks: {
+              ...state.intentBlocks,
+              [workflowId]: updatedIntents,
+            },
+          }
+        }),
+      
       setIntentPhase: (workflowId: string, intentId: string, phase: IntentPhase) =>
         set((state) => {
           const existingIntents = state.intentBlocks[workflowId] || []
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Render a trace as a text waterfall.
+
+Run: python scripts/trace_waterfall.py <trace_id> [--file data/traces.jsonl]
+     python scripts/trace_waterfall.py --list
+
+Spans are read from the JSON-lines file written with TRACE_EXPORTER=file
+(host process and MCP servers append to the same file).
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Добавляем корень проекта в path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.tracing import DEFAULT_TRACE_FILE, load_spans, render_waterfall
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Render a trace waterfall")
+    parser.add_argument("trace_id", nargs="?", help="Trace id to render")
+    parser.add_argument(
+        "--file",
+        default=os.getenv("TRACE_FILE", str(DEFAULT_TRACE_FILE)),
+        help="Trace file (JSON lines)"
+    )
+    parser.add_argument("--list", action="store_true", help="List recent root spans")
+    parser.add_argument("--width", type=int, default=50, help="Timeline width")
+    args = parser.parse_args()
+    
+    if args.list or not args.trace_id:
+        roots = [s for s in load_spans(Path(args.file)) if not s.get("parent_span_id")]
+        for span in roots[-20:]:
+            duration_ms = (span["end_time_unix_nano"] - span["start_time_unix_nano"]) / 1e6
+            print(f"{span['trace_id']}  {duration_ms:9.1f} ms  {span['name']}")
+        return 0
+    
+    spans = load_spans(Path(args.file), args.trace_id)
+    if not spans:
+        print(f"Trace {args.trace_id} not found in {args.file}", file=sys.stderr)
+        return 1
+    print(render_waterfall(spans, width=args.width))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,6 +19,7 @@ import asyncio
 from uuid import UUID
 
 from src.utils.config_loader import get_config
+from src.utils.delta_stream import DeltaStream
 from src.utils.exceptions import AgentError
 from src.utils.logging_config import get_logger
 from src.core.context_manager import ConversationContext
@@ -36,13 +37,17 @@ class StreamEvent:
 
 
 class StreamingCallbackHandler(AsyncCallbackHandler):
-    """Callback handler for streaming LLM tokens, thinking tokens, and tool calls."""
+    """Callback handler for streaming LLM tokens, thinking tokens, and tool calls.
+    
+    TOKEN and THINKING events carry only the new text with offset/seq
+    (see src/utils/delta_stream.py); the full text comes with checkpoints.
+    """
     
     def __init__(self, event_callback: Optional[Callable] = None, logger=None):
         self.event_callback = event_callback
         self.logger = logger
-        self.accumulated_text = ""
-        self.accumulated_thinking = ""
+        self._text_stream = DeltaStream(delta_key="token", content_key="accumulated")
+        self._thinking_stream = DeltaStream(content_key="message")
         # Cache tool names by run_id for TOOL_RESULT events
         self._tool_name_cache: Dict[str, str] = {}
     
@@ -68,12 +73,9 @@ class StreamingCallbackHandler(AsyncCallbackHandler):
             self.logger.debug(f"[StreamingCallback] New token: {repr(token_text[:50])}")
         
         if token_text:
-            self.accumulated_text += token_text
+            payload = self._text_stream.append(token_text)
             if self.event_callback:
-                await self.event_callback(StreamEvent.TOKEN, {
-                    "token": token_text,
-                    "accumulated": self.accumulated_text
-                })
+                await self.event_callback(StreamEvent.TOKEN, payload)
     
     async def on_chat_model_stream(
         self,
@@ -104,43 +106,34 @@ class StreamingCallbackHandler(AsyncCallbackHandler):
                             if thinking_text:
                                 if self.logger:
                                     self.logger.info(f"[StreamingCallback] Thinking token: {thinking_text[:100]}")
-                                self.accumulated_thinking += thinking_text
+                                payload = self._thinking_stream.append(thinking_text)
                                 if self.event_callback:
                                     await self.event_callback(StreamEvent.THINKING, {
                                         "step": "reasoning",
-                                        "message": self.accumulated_thinking
+                                        **payload
                                     })
                         elif block.type == "text":
                             text = getattr(block, "text", "")
                             if text:
                                 if self.logger:
                                     self.logger.debug(f"[StreamingCallback] Text token: {text[:50]}")
-                                self.accumulated_text += text
+                                payload = self._text_stream.append(text)
                                 if self.event_callback:
-                                    await self.event_callback(StreamEvent.TOKEN, {
-                                        "token": text,
-                                        "accumulated": self.accumulated_text
-                                    })
+                                    await self.event_callback(StreamEvent.TOKEN, payload)
             # Handle string content
             elif isinstance(content, str):
                 if self.logger:
                     self.logger.debug(f"[StreamingCallback] String token: {content[:50]}")
-                self.accumulated_text += content
+                payload = self._text_stream.append(content)
                 if self.event_callback:
-                    await self.event_callback(StreamEvent.TOKEN, {
-                        "token": content,
-                        "accumulated": self.accumulated_text
-                    })
+                    await self.event_callback(StreamEvent.TOKEN, payload)
         # Also handle direct token strings (fallback)
         elif isinstance(chunk, str):
             if self.logger:
                 self.logger.debug(f"[StreamingCallback] Direct string token: {chunk[:50]}")
-            self.accumulated_text += chunk
+            payload = self._text_stream.append(chunk)
             if self.event_callback:
-                await self.event_callback(StreamEvent.TOKEN, {
-                    "token": chunk,
-                    "accumulated": self.accumulated_text
-                })
+                await self.event_callback(StreamEvent.TOKEN, payload)
     
     async def on_tool_start(
         self, 
@@ -205,6 +198,14 @@ class StreamingCallbackHandler(AsyncCallbackHandler):
             })
             
     
+    @property
+    def accumulated_text(self) -> str:
+        return self._text_stream.text
+    
+    @property
+    def accumulated_thinking(self) -> str:
+        return self._thinking_stream.text
+    
     def get_accumulated_text(self) -> str:
         """Get all accumulated text."""
         return self.accumulated_text
@@ -630,9 +631,10 @@ class BaseAgent:
             
             self.logger.info(f"[{self.name}] Starting graph execution with direct chunk processing")
             
-            # Track accumulated text and thinking directly (no callback handler to avoid duplication)
-            accumulated_text = ""
-            accumulated_thinking = ""
+            # Track accumulated text and thinking directly (no callback handler to avoid duplication);
+            # events carry deltas, see src/utils/delta_stream.py
+            text_stream = DeltaStream(delta_key="token", content_key="accumulated")
+            thinking_stream = DeltaStream(content_key="message")
             
             # Execute without callbacks - process chunks directly
             config = {"recursion_limit": 50}
@@ -670,22 +672,19 @@ class BaseAgent:
                                     thinking_text = block.get("thinking", "") if isinstance(block, dict) else getattr(block, "thinking", "")
                                     if thinking_text:
                                         self.logger.info(f"[{self.name}] THINKING block: {thinking_text[:100]}...")
-                                        accumulated_thinking += thinking_text
+                                        payload = thinking_stream.append(thinking_text)
                                         if event_callback:
                                             await event_callback(StreamEvent.THINKING, {
                                                 "step": "reasoning",
-                                                "message": accumulated_thinking
+                                                **payload
                                             })
                                 elif block_type == "text":
                                     # For text blocks, text is in 'text' key
                                     text_content = block.get("text", "") if isinstance(block, dict) else getattr(block, "text", "")
                                     if text_content:
-                                        accumulated_text += text_content
+                                        payload = text_stream.append(text_content)
                                         if event_callback:
-                                            await event_callback(StreamEvent.TOKEN, {
-                                                "token": text_content,
-                                                "accumulated": accumulated_text
-                                            })
+                                            await event_callback(StreamEvent.TOKEN, payload)
                                 elif block_type == "tool_use" or block_type == "input_json_delta":
                                     # Skip tool_use and input_json_delta blocks - these are not user-facing content
                                     # tool_use is for tool calls, input_json_delta is for streaming JSON input
@@ -694,12 +693,9 @@ class BaseAgent:
                                     # Log unknown block types for debugging
                                     self.logger.debug(f"[{self.name}] Unknown block type: {block_type}, block: {block}")
                         elif isinstance(content, str) and content:
-                            accumulated_text += content
+                            payload = text_stream.append(content)
                             if event_callback:
-                                await event_callback(StreamEvent.TOKEN, {
-                                    "token": content,
-                                    "accumulated": accumulated_text
-                                })
+                                await event_callback(StreamEvent.TOKEN, payload)
                     
                     # Collect final message
                     all_messages.append(msg_chunk)
@@ -709,6 +705,8 @@ class BaseAgent:
                         all_messages = chunk.get("messages", [])
             
             self.logger.info(f"[{self.name}] Finished streaming, total chunks: {chunk_count}, messages count: {len(all_messages)}")
+            accumulated_text = text_stream.text
+            accumulated_thinking = thinking_stream.text
             self.logger.info(f"[{self.name}] Streaming completed, text length: {len(accumulated_text)}, thinking length: {len(accumulated_thinking)}")
             
             # If no text accumulated via callback, extract from messages
@@ -821,12 +819,10 @@ class BaseAgent:
                 if event_callback:
                     # Send as token chunks to simulate streaming
                     words = response_text.split()
+                    word_stream = DeltaStream(delta_key="token", content_key="accumulated")
                     for i, word in enumerate(words):
                         chunk = word + (" " if i < len(words) - 1 else "")
-                        await event_callback(StreamEvent.TOKEN, {
-                            "token": chunk,
-                            "accumulated": " ".join(words[:i+1])
-                        })
+                        await event_callback(StreamEvent.TOKEN, word_stream.append(chunk))
             
             # Always notify completion, even if response is empty
             if event_callback:
@@ -3,13 +3,20 @@ Model factory for creating LLM instances.
 Supports multiple providers (Anthropic, OpenAI) and models.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from uuid import UUID
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.language_models.chat_models import BaseChatModel
 import logging
+import time
 
+from src.utils.cassette import with_cassette
 from src.utils.config_loader import get_config
+from src.utils.metrics import LLM_REQUEST_DURATION, LLM_TIME_TO_FIRST_TOKEN
+from src.utils import progress_signals
+from src.utils.usage_accounting import get_usage_tracker, usage_from_llm_result
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +80,93 @@ MODELS: Dict[str, Dict[str, Any]] = {
 }
 
 
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    Records LLM latency and time-to-first-token per model.
+    
+    Time-to-first-token is also reported as a progress signal of the current run.
+    """
+    
+    run_inline = True
+    
+    def __init__(self, model_name: str):
+        """
+        Initialize callback.
+        
+        Args:
+            model_name: Model identifier used as the metric label
+        """
+        self.model_name = model_name
+        self._started: Dict[UUID, float] = {}
+        self._first_token_seen: set = set()
+    
+    def _start(self, run_id: UUID) -> None:
+        self._started[run_id] = time.perf_counter()
+    
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+    
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+    
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.get(run_id)
+        if started is None or run_id in self._first_token_seen:
+            return
+        self._first_token_seen.add(run_id)
+        ttft = time.perf_counter() - started
+        LLM_TIME_TO_FIRST_TOKEN.observe(ttft, model=self.model_name)
+        progress_signals.emit(progress_signals.LLM_FIRST_TOKEN, model=self.model_name, ttft=ttft)
+    
+    def _finish(self, run_id: UUID) -> None:
+        started = self._started.pop(run_id, None)
+        self._first_token_seen.discard(run_id)
+        if started is not None:
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started, model=self.model_name)
+    
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+
+class LLMUsageCallback(BaseCallbackHandler):
+    """
+    Reports provider token usage of every call to the usage tracker.
+    """
+    
+    run_inline = True
+    
+    def __init__(self, model_name: str):
+        """
+        Initialize callback.
+        
+        Args:
+            model_name: Model identifier (MODELS key) used for pricing
+        """
+        self.model_name = model_name
+    
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = usage_from_llm_result(response)
+        if usage is None:
+            return
+        try:
+            get_usage_tracker().record(self.model_name, usage)
+        except Exception as e:
+            logger.warning(f"Failed to record LLM usage for {self.model_name}: {e}")
+
+
+def llm_callbacks(model_name: str) -> List[BaseCallbackHandler]:
+    """
+    Callbacks attached to every LLM client (latency metrics and usage accounting).
+    
+    Args:
+        model_name: Model identifier (MODELS key)
+    """
+    return [LLMMetricsCallback(model_name), LLMUsageCallback(model_name)]
+
+
 def get_available_models() -> Dict[str, Dict[str, Any]]:
     """
     Get list of available models with their configurations.
@@ -126,7 +220,8 @@ def create_llm(model_name: str, api_keys: Optional[Dict[str, str]] = None) -> Ba
                   If None, will use keys from config.
     
     Returns:
-        Initialized LLM instance (ChatAnthropic or ChatOpenAI)
+        Initialized LLM instance (ChatAnthropic or ChatOpenAI, wrapped for
+        record/replay when CASSETTE_MODE is enabled)
         
     Raises:
         ValueError: If model name is not supported or API key is missing
@@ -153,6 +248,7 @@ def create_llm(model_name: str, api_keys: Optional[Dict[str, str]] = None) -> Ba
             "model": model_config["model_id"],
             "api_key": api_keys["anthropic"],
             "streaming": True,  # Enable streaming for real-time token output
+            "callbacks": llm_callbacks(model_name),
         }
         
         # Enable thinking only for models that support it (e.g., claude-sonnet-4-5)
@@ -166,7 +262,7 @@ def create_llm(model_name: str, api_keys: Optional[Dict[str, str]] = None) -> Ba
             # Standard models without thinking
             llm_params["temperature"] = 1.0
         
-        return ChatAnthropic(**llm_params)
+        return with_cassette(ChatAnthropic(**llm_params))
     
     elif model_config["provider"] == "openai":
         if not api_keys.get("openai"):
@@ -176,6 +272,8 @@ def create_llm(model_name: str, api_keys: Optional[Dict[str, str]] = None) -> Ba
             "model": model_config["model_id"],
             "api_key": api_keys["openai"],
             "streaming": True,
+            "stream_usage": True,  # Report token usage in the final streamed chunk
+            "callbacks": llm_callbacks(model_name),
         }
         
         # o1 models have special requirements
@@ -190,7 +288,7 @@ def create_llm(model_name: str, api_keys: Optional[Dict[str, str]] = None) -> Ba
             # For GPT-4o and other standard models
             llm_params["temperature"] = 1.0
         
-        return ChatOpenAI(**llm_params)
+        return with_cassette(ChatOpenAI(**llm_params))
     
     else:
         raise ValueError(f"Unsupported provider: {model_config['provider']}")
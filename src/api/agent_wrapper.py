@@ -15,12 +15,19 @@ from src.core.context_manager import ConversationContext
 from src.core.step_orchestrator import StepOrchestrator
 from src.core.react_orchestrator import ReActOrchestrator
 from src.core.capability_registry import CapabilityRegistry
+from src.core.tool_result_cache import ToolResultCache
 from src.core.providers.mcp_provider import MCPToolProvider
 from src.core.providers.a2a_provider import A2AAgentProvider
 from src.core.mode_adapters import QueryModeAdapter, AgentModeAdapter, PlanModeAdapter
 from src.api.websocket_manager import get_websocket_manager
 from src.utils.audit import get_audit_logger
 from src.utils.config_loader import get_config
+from src.utils.metrics import RUNS_IN_FLIGHT
+from src.utils.tracing import traced
+from src.utils.cassette import get_cassette_library
+from src.utils.delta_stream import DeltaStream
+from src.utils.mcp_loader import get_mcp_manager
+from src.utils.usage_accounting import get_usage_tracker
 
 logger = logging.getLogger(__name__)
 
@@ -71,7 +78,11 @@ Initialize agent wrapper."""
             CapabilityRegistry instance
         """
         if self._capability_registry is None:
-            self._capability_registry = CapabilityRegistry()
+            config = get_config()
+            self._capability_registry = CapabilityRegistry(result_cache=ToolResultCache(
+                max_entries=config.tool_cache_max_entries,
+                enabled=config.tool_cache_enabled
+            ))
             
             # Register MCP provider
             mcp_provider = MCPToolProvider()
@@ -85,6 +96,7 @@ Initialize agent wrapper."""
         
         return self._capability_registry
     
+    @traced("agent.process_message")
     async def process_message(
         self,
         user_message: str,
@@ -157,23 +169,8 @@ Initialize agent wrapper."""
             pass
         # #endregion
         
-        # Wait for WebSocket connection BEFORE sending any events
-        # This ensures events can be sent to the frontend
-        import logging
-        logger = logging.getLogger(__name__)
-        max_wait = 5  # Maximum wait time in seconds
-        wait_interval = 0.1  # Check every 100ms
-        waited = 0
-        logger.info(f"[AgentWrapper] Waiting for WebSocket connection for session {session_id}...")
-        
-        while self.ws_manager.get_connection_count(session_id) == 0 and waited < max_wait:
-            await asyncio.sleep(wait_interval)
-            waited += wait_interval
-        
-        if self.ws_manager.get_connection_count(session_id) == 0:
-            logger.warning(f"[AgentWrapper] No WebSocket connection for session {session_id} after {max_wait}s, proceeding anyway")
-        else:
-            logger.info(f"[AgentWrapper] WebSocket connected for session {session_id} (connections: {self.ws_manager.get_connection_count(session_id)})")
+        # No need to wait for a WebSocket connection: events are buffered by
+        # WebSocketManager and replayed when the client (re)connects.
         
         # Send user message event
         
@@ -204,6 +201,9 @@ Initialize agent wrapper."""
                 "message": "Analyzing your request..."
             }
         )
+        RUNS_IN_FLIGHT.inc()
+        usage_run = get_usage_tracker().start_run(session_id)
+        cassette = get_cassette_library().start(session_id)
         try:
             # All tasks use unified mode adapters (no simple/complex classification)
             # Map execution mode to adapter type
@@ -401,6 +401,36 @@ Initialize agent wrapper."""
             )
             
             raise
+        finally:
+            RUNS_IN_FLIGHT.dec()
+            await self._flush_pending_edits(session_id)
+            get_cassette_library().stop(cassette)
+            await self.ws_manager.send_event(
+                session_id,
+                "usage_summary",
+                get_usage_tracker().end_run(usage_run)
+            )
+    
+    async def _flush_pending_edits(self, session_id: str) -> None:
+        """Apply Docs/Slides edits queued during the run (EDIT_BATCHING)."""
+        if not get_config().edit_batching_enabled:
+            return
+        try:
+            results = await get_mcp_manager().flush_pending_edits()
+        except Exception as e:
+            logger.error(f"Failed to flush pending edits: {e}")
+            return
+        errors = {doc_id: error for result in results.values() for doc_id, error in result.get("errors", {}).items()}
+        if errors:
+            logger.error(f"Pending edits were rejected: {errors}")
+            await self.ws_manager.send_event(
+                session_id,
+                "error",
+                {
+                    "message": "Не удалось применить часть изменений документов: " + "; ".join(errors.values()),
+                    "type": "PendingEditsError"
+                }
+            )
     
     async def _execute_with_streaming(
         self,
@@ -714,48 +744,41 @@ Escape curly braces in text to safely use in f-strings."""
         # Track if we've sent message_start or final_result_start
         message_started = False
         final_result_started = False
-        accumulated_tokens = ""
-        accumulated_thinking = ""
+        # Streamed answer and thinking go out as deltas (see src/utils/delta_stream.py)
+        answer_stream = DeltaStream()
+        thinking_stream = DeltaStream(content_key="message")
         
         async def stream_event_callback(event_type: str, data: Dict[str, Any]):
             """
 Callback to handle streaming events and send to WebSocket."""
-            nonlocal message_started, accumulated_tokens, message_id, final_result_started, accumulated_thinking
+            nonlocal message_started, message_id, final_result_started, thinking_stream
             
             logger.debug(f"[AgentWrapper] Stream event: {event_type}, data keys: {list(data.keys())}")
             
             # For Cursor-like behavior: always send thinking events to show full process
             if event_type == StreamEvent.THINKING:
-                thinking_message = data.get("message", data.get("step", "Обрабатываю..."))
-                accumulated_thinking = thinking_message
+                if "chunk" in data:
+                    # Streamed reasoning: send only the new text
+                    thinking_data = {"step": data.get("step", "reasoning"), **thinking_stream.append(data["chunk"])}
+                else:
+                    # Status message replaces the reasoning text; following chunks start a new stream
+                    thinking_stream = DeltaStream(content_key="message")
+                    thinking_data = {
+                        "step": data.get("step", "reasoning"),
+                        "message": data.get("message", data.get("step", "Обрабатываю..."))
+                    }
                 
                 if stream_to_final_result:
                     # In final_result mode, send thinking as a separate event for logging
                     # Frontend can optionally display this in a collapsible section
-                    await self.ws_manager.send_event(
-                        session_id,
-                        "thinking",
-                        {
-                            "step": data.get("step", "reasoning"),
-                            "message": thinking_message,
-                            "mode": "simple_task"  # Mark as simple task thinking
-                        }
-                    )
-                else:
-                    # Normal mode: send thinking/reasoning step
-                    await self.ws_manager.send_event(
-                        session_id,
-                        "thinking",
-                        {
-                            "step": data.get("step", "reasoning"),
-                            "message": thinking_message
-                        }
-                    )
+                    thinking_data["mode"] = "simple_task"  # Mark as simple task thinking
+                # Normal mode: send thinking/reasoning step
+                await self.ws_manager.send_event(session_id, "thinking", thinking_data)
             
             elif event_type == StreamEvent.TOKEN:
                 # Send streaming token
                 token = data.get("token", "")
-                accumulated_tokens = data.get("accumulated", accumulated_tokens + token)
+                chunk_data = answer_stream.append(token)
                 
                 if stream_to_final_result:
                     # Stream directly to final_result block
@@ -767,13 +790,11 @@ Callback to handle streaming events and send to WebSocket."""
                         )
                         final_result_started = True
                     
-                    # Send as final_result_chunk (with accumulated content)
+                    # Send as final_result_chunk (delta; full content only on checkpoints)
                     await self.ws_manager.send_event(
                         session_id,
                         "final_result_chunk",
-                        {
-                            "content": accumulated_tokens
-                        }
+                        chunk_data
                     )
                 else:
                     # Normal mode: stream to message_chunk
@@ -797,8 +818,7 @@ Callback to handle streaming events and send to WebSocket."""
                         {
                             "role": "assistant",
                             "message_id": message_id,
-                            "chunk": token,
-                            "content": accumulated_tokens
+                            **chunk_data
                         }
                     )
             
@@ -903,7 +923,7 @@ Callback to handle streaming events and send to WebSocket."""
             
             elif event_type == StreamEvent.DONE:
                 # Complete the streaming message
-                response = data.get("response", accumulated_tokens)
+                response = data.get("response", answer_stream.text)
                 logger.info(f"[AgentWrapper] DONE event received, response length: {len(response)}, message_started: {message_started}, final_result_started: {final_result_started}")
                 
                 if stream_to_final_result:
@@ -971,7 +991,7 @@ Callback to handle streaming events and send to WebSocket."""
                             session_id,
                             "final_result_complete",
                             {
-                                "content": accumulated_tokens if accumulated_tokens else ""
+                                "content": answer_stream.text
                             }
                         )
                 else:
@@ -982,7 +1002,7 @@ Callback to handle streaming events and send to WebSocket."""
                         {
                             "role": "assistant",
                             "message_id": message_id,
-                            "content": accumulated_tokens if accumulated_tokens else ""
+                            "content": answer_stream.text
                         }
                     )
         
@@ -1036,11 +1056,10 @@ Callback to handle streaming events and send to WebSocket."""
             logger.error(f"[AgentWrapper] Sent message_start event")
             
             # Stream text in chunks
-            accumulated = ""
+            text_stream = DeltaStream()
             chunk_count = 0
             for i in range(0, len(full_text), chunk_size):
                 chunk = full_text[i:i + chunk_size]
-                accumulated += chunk
                 chunk_count += 1
                 
                 await self.ws_manager.send_event(
@@ -1049,8 +1068,7 @@ Callback to handle streaming events and send to WebSocket."""
                     {
                         "role": "assistant",
                         "message_id": message_id,
-                        "chunk": chunk,
-                        "content": accumulated
+                        **text_stream.append(chunk)
                     }
                 )
                 
@@ -0,0 +1,463 @@
+"""
+Cross-worker messaging for multi-worker deployments.
+
+Lets several API workers (uvicorn --workers N or several hosts sharing a
+volume) serve the same sessions:
+- events published by the worker that runs a session reach WebSocket
+  clients connected to any other worker;
+- session commands (message, approve_plan, reject_plan, stop_generation)
+  are routed to the worker that owns the session's run.
+
+Session ownership is sticky: the first worker that starts a run for a
+session keeps it while its heartbeat is fresh.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+from pathlib import Path
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+EventHandler = Callable[[str, Dict[str, Any]], None]
+CommandHandler = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+def default_worker_id() -> str:
+    """Build a worker identifier unique across hosts and processes."""
+    return os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class EventBus(ABC):
+    """
+    Abstract interface for cross-worker event fan-out and command routing.
+    """
+    
+    def __init__(self, worker_id: Optional[str] = None):
+        """
+        Initialize event bus.
+        
+        Args:
+            worker_id: Identifier of this worker (generated if not given)
+        """
+        self.worker_id = worker_id or default_worker_id()
+        self._event_handler: Optional[EventHandler] = None
+        self._command_handler: Optional[CommandHandler] = None
+    
+    def set_event_handler(self, handler: EventHandler) -> None:
+        """Set callback for events published by other workers."""
+        self._event_handler = handler
+    
+    def set_command_handler(self, handler: CommandHandler) -> None:
+        """Set callback for commands routed to this worker."""
+        self._command_handler = handler
+    
+    async def start(self) -> None:
+        """Start background delivery (no-op by default)."""
+    
+    async def stop(self) -> None:
+        """Stop background delivery (no-op by default)."""
+    
+    @abstractmethod
+    def publish_event(self, session_id: str, message: Dict[str, Any]) -> None:
+        """
+        Publish an event to other workers. Must not block on I/O.
+        
+        Args:
+            session_id: Session identifier
+            message: Event message as sent to WebSocket clients
+        """
+        pass
+    
+    @abstractmethod
+    async def send_command(self, worker_id: str, session_id: str, command: Dict[str, Any]) -> None:
+        """
+        Deliver a session command to a specific worker.
+        
+        Args:
+            worker_id: Target worker
+            session_id: Session identifier
+            command: Command payload (same shape as WebSocket client messages)
+        """
+        pass
+    
+    @abstractmethod
+    async def claim_session(self, session_id: str) -> str:
+        """
+        Claim ownership of a session unless a live worker already owns it.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            Worker id of the (possibly pre-existing) owner
+        """
+        pass
+    
+    @abstractmethod
+    async def get_session_owner(self, session_id: str) -> Optional[str]:
+        """
+        Get the live owner of a session.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            Owner worker id or None if nobody owns it
+        """
+        pass
+
+
+class LocalEventBus(EventBus):
+    """
+    Single-process event bus: this worker owns every session.
+    """
+    
+    def publish_event(self, session_id: str, message: Dict[str, Any]) -> None:
+        """Nothing to fan out in a single process."""
+    
+    async def send_command(self, worker_id: str, session_id: str, command: Dict[str, Any]) -> None:
+        """Deliver command to the local handler."""
+        if self._command_handler:
+            await self._command_handler(session_id, command)
+    
+    async def claim_session(self, session_id: str) -> str:
+        """This worker owns all sessions."""
+        return self.worker_id
+    
+    async def get_session_owner(self, session_id: str) -> Optional[str]:
+        """This worker owns all sessions."""
+        return self.worker_id
+
+
+class SQLiteEventBus(EventBus):
+    """
+    Event bus over a shared SQLite file, polled by every worker.
+    
+    Requires no external services: workers on one host (or hosts sharing a
+    volume) only need a common database path. Outgoing events are batched
+    and written by the poll loop, so publish_event never blocks.
+    """
+    
+    def __init__(
+        self,
+        db_path: Path,
+        worker_id: Optional[str] = None,
+        poll_interval: float = 0.05,
+        owner_ttl: float = 30.0,
+        retention_seconds: float = 300.0
+    ):
+        """
+        Initialize SQLite event bus.
+        
+        Args:
+            db_path: Path to the shared SQLite database
+            worker_id: Identifier of this worker
+            poll_interval: Seconds between polls
+            owner_ttl: Seconds without heartbeat after which a worker's sessions can be taken over
+            retention_seconds: How long published events are kept in the database
+        """
+        super().__init__(worker_id)
+        self.db_path = Path(db_path)
+        self.poll_interval = poll_interval
+        self.owner_ttl = owner_ttl
+        self.retention_seconds = retention_seconds
+        self._outbox: List[Tuple[str, str]] = []
+        self._last_event_id = 0
+        self._last_heartbeat = 0.0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create tables."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS bus_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bus_commands (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                target TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_bus_commands_target ON bus_commands(target, id);
+            CREATE TABLE IF NOT EXISTS bus_workers (
+                worker_id TEXT PRIMARY KEY,
+                last_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bus_session_owners (
+                session_id TEXT PRIMARY KEY,
+                worker_id TEXT NOT NULL
+            );
+        """)
+        return conn
+    
+    def _execute(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn with the shared connection under the lock."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            return fn(self._conn)
+    
+    async def _run_db(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run a database operation off the event loop."""
+        return await asyncio.to_thread(self._execute, fn)
+    
+    async def start(self) -> None:
+        """Register this worker and start the poll loop."""
+        def init(conn: sqlite3.Connection) -> int:
+            conn.execute(
+                "INSERT OR REPLACE INTO bus_workers (worker_id, last_seen) VALUES (?, ?)",
+                (self.worker_id, time.time())
+            )
+            row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM bus_events").fetchone()
+            return row[0]
+        
+        self._last_event_id = await self._run_db(init)
+        self._last_heartbeat = time.time()
+        self._task = asyncio.create_task(self._poll_loop())
+        logger.info(f"SQLite event bus started for worker {self.worker_id} at {self.db_path}")
+    
+    async def stop(self) -> None:
+        """Flush pending events, unregister and stop polling."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        await self._flush_outbox()
+        
+        def unregister(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM bus_workers WHERE worker_id = ?", (self.worker_id,))
+            conn.execute("DELETE FROM bus_session_owners WHERE worker_id = ?", (self.worker_id,))
+        
+        await self._run_db(unregister)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def publish_event(self, session_id: str, message: Dict[str, Any]) -> None:
+        """Queue event for the next poll cycle."""
+        self._outbox.append((session_id, json.dumps(message, ensure_ascii=False, default=str)))
+    
+    async def send_command(self, worker_id: str, session_id: str, command: Dict[str, Any]) -> None:
+        """Write command addressed to worker_id."""
+        if worker_id == self.worker_id:
+            if self._command_handler:
+                await self._command_handler(session_id, command)
+            return
+        
+        payload = json.dumps(command, ensure_ascii=False, default=str)
+        await self._run_db(lambda conn: conn.execute(
+            "INSERT INTO bus_commands (target, session_id, payload) VALUES (?, ?, ?)",
+            (worker_id, session_id, payload)
+        ))
+    
+    def _live_owner(self, conn: sqlite3.Connection, session_id: str) -> Optional[str]:
+        """Return the session owner if its heartbeat is fresh."""
+        row = conn.execute(
+            "SELECT o.worker_id FROM bus_session_owners o "
+            "JOIN bus_workers w ON w.worker_id = o.worker_id "
+            "WHERE o.session_id = ? AND w.last_seen >= ?",
+            (session_id, time.time() - self.owner_ttl)
+        ).fetchone()
+        return row[0] if row else None
+    
+    async def claim_session(self, session_id: str) -> str:
+        """Claim session atomically unless a live worker owns it."""
+        def claim(conn: sqlite3.Connection) -> str:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                owner = self._live_owner(conn, session_id)
+                if owner is None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO bus_session_owners (session_id, worker_id) VALUES (?, ?)",
+                        (session_id, self.worker_id)
+                    )
+                    owner = self.worker_id
+                conn.execute("COMMIT")
+                return owner
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        
+        return await self._run_db(claim)
+    
+    async def get_session_owner(self, session_id: str) -> Optional[str]:
+        """Get live owner of a session."""
+        return await self._run_db(lambda conn: self._live_owner(conn, session_id))
+    
+    async def _flush_outbox(self) -> None:
+        """Write queued events in one transaction."""
+        if not self._outbox:
+            return
+        batch, self._outbox = self._outbox, []
+        now = time.time()
+        rows = [(session_id, self.worker_id, payload, now) for session_id, payload in batch]
+        await self._run_db(lambda conn: conn.executemany(
+            "INSERT INTO bus_events (session_id, origin, payload, created_at) VALUES (?, ?, ?, ?)",
+            rows
+        ))
+    
+    def _poll_once(self) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Fetch new foreign events and commands for this worker, heartbeat, prune."""
+        def poll(conn: sqlite3.Connection):
+            events = conn.execute(
+                "SELECT id, session_id, payload FROM bus_events WHERE id > ? AND origin != ? ORDER BY id",
+                (self._last_event_id, self.worker_id)
+            ).fetchall()
+            if events:
+                self._last_event_id = events[-1][0]
+            
+            commands = conn.execute(
+                "SELECT id, session_id, payload FROM bus_commands WHERE target = ? ORDER BY id",
+                (self.worker_id,)
+            ).fetchall()
+            if commands:
+                conn.execute(
+                    "DELETE FROM bus_commands WHERE target = ? AND id <= ?",
+                    (self.worker_id, commands[-1][0])
+                )
+            
+            now = time.time()
+            if now - self._last_heartbeat >= 1.0:
+                conn.execute(
+                    "INSERT OR REPLACE INTO bus_workers (worker_id, last_seen) VALUES (?, ?)",
+                    (self.worker_id, now)
+                )
+                conn.execute("DELETE FROM bus_events WHERE created_at < ?", (now - self.retention_seconds,))
+                self._last_heartbeat = now
+            
+            return (
+                [(session_id, payload) for _, session_id, payload in events],
+                [(session_id, payload) for _, session_id, payload in commands]
+            )
+        
+        return self._execute(poll)
+    
+    async def _poll_loop(self) -> None:
+        """Flush outgoing events and dispatch incoming ones."""
+        while True:
+            try:
+                await self._flush_outbox()
+                events, commands = await asyncio.to_thread(self._poll_once)
+                
+                for session_id, payload in events:
+                    if self._event_handler:
+                        self._event_handler(session_id, json.loads(payload))
+                
+                for session_id, payload in commands:
+                    if self._command_handler:
+                        asyncio.create_task(self._command_handler(session_id, json.loads(payload)))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event bus poll failed: {e}", exc_info=True)
+            
+            await asyncio.sleep(self.poll_interval)
+
+
+class SessionCommandRouter:
+    """
+    Routes session commands to the worker that owns the session's run.
+    
+    Commands that start a run (CLAIMING_COMMANDS) claim the session for this
+    worker if nobody owns it yet; other commands go to the current owner and
+    are handled locally when the session is unowned.
+    """
+    
+    CLAIMING_COMMANDS = frozenset({"message"})
+    
+    def __init__(self, bus: EventBus, handlers: Dict[str, CommandHandler]):
+        """
+        Initialize router.
+        
+        Args:
+            bus: Event bus used for cross-worker delivery
+            handlers: Local handlers keyed by command "type"
+        """
+        self.bus = bus
+        self.handlers = handlers
+        bus.set_command_handler(self.handle_local)
+    
+    async def dispatch(self, session_id: str, command: Dict[str, Any]) -> Optional[str]:
+        """
+        Execute command here or forward it to the owning worker.
+        
+        Args:
+            session_id: Session identifier
+            command: Command payload with "type"
+        
+        Returns:
+            Id of the worker the command was forwarded to, None if handled locally
+        """
+        if command.get("type") in self.CLAIMING_COMMANDS:
+            owner = await self.bus.claim_session(session_id)
+        else:
+            owner = await self.bus.get_session_owner(session_id)
+        
+        if owner and owner != self.bus.worker_id:
+            logger.info(f"Routing '{command.get('type')}' for session {session_id} to worker {owner}")
+            await self.bus.send_command(owner, session_id, command)
+            return owner
+        
+        await self.handle_local(session_id, command)
+        return None
+    
+    async def handle_local(self, session_id: str, command: Dict[str, Any]) -> Any:
+        """
+        Run the local handler for a command.
+        
+        Args:
+            session_id: Session identifier
+            command: Command payload with "type"
+        """
+        handler = self.handlers.get(command.get("type", ""))
+        if handler is None:
+            logger.warning(f"No handler for session command '{command.get('type')}'")
+            return None
+        return await handler(session_id, command)
+
+
+def create_event_bus(backend: str = "local", db_path: Optional[Path] = None, worker_id: Optional[str] = None) -> EventBus:
+    """
+    Create event bus for the configured backend.
+    
+    Args:
+        backend: "local" (single process) or "sqlite" (shared database)
+        db_path: Database path for the sqlite backend
+        worker_id: Identifier of this worker
+    
+    Returns:
+        EventBus instance
+    """
+    backend = (backend or "local").lower()
+    if backend == "sqlite":
+        if db_path is None:
+            raise ValueError("db_path is required for the sqlite event bus")
+        return SQLiteEventBus(db_path, worker_id=worker_id)
+    if backend != "local":
+        raise ValueError(f"Unknown event bus backend: {backend}")
+    return LocalEventBus(worker_id=worker_id)
@@ -5,7 +5,7 @@ Provides REST API endpoints and real-time WebSocket communication.
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, File, UploadFile, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from typing import Dict, Any, Optional
 from pathlib import Path
@@ -39,7 +39,18 @@ from src.utils.logging_config import setup_logging, get_logger
 from src.utils.mcp_loader import get_mcp_manager
 from src.api.session_manager import get_session_manager
 from src.api.websocket_manager import get_websocket_manager
+from src.api.event_bus import create_event_bus, SessionCommandRouter
+from src.api.upload_ingestion import (
+    spool_upload,
+    get_document_ingestor,
+    format_pdf_pages,
+    UploadTooLarge,
+)
 from src.api.agent_wrapper import AgentWrapper
+from src.utils.code_sandbox import get_sandbox_pool
+from src.utils.metrics import ACTIVE_SESSIONS, CONTENT_TYPE_LATEST, render_metrics
+from src.utils.tracing import get_tracer
+from src.utils.usage_accounting import get_usage_tracker
 from src.api.auth_routes import router as auth_router
 from src.api.integration_routes import router as integration_router
 from src.core.context_manager import ConversationContext
@@ -110,6 +121,10 @@ try:
     ws_manager = get_websocket_manager()
     agent_wrapper = AgentWrapper()
     mcp_manager = get_mcp_manager()
+    event_bus = create_event_bus(
+        getattr(config, "event_bus_backend", "local"),
+        getattr(config, "event_bus_db_path", None)
+    )
     logger.info("Managers initialized successfully")
 except Exception as e:
     import traceback
@@ -128,6 +143,11 @@ except Exception as e:
     ws_manager = StubManager()
     agent_wrapper = StubManager()
     mcp_manager = StubManager()
+    event_bus = create_event_bus("local")
+
+ACTIVE_SESSIONS.set_function(
+    lambda: sum(1 for conns in getattr(ws_manager, "active_connections", {}).values() if conns)
+)
 
 # Include auth routes
 app.include_router(auth_router)
@@ -196,6 +216,14 @@ async def list_models():
         # Return empty list instead of failing
         return {"models": []}
 
+
+@app.get("/metrics")
+async def metrics():
+    """
+Prometheus text-format metrics (latency histograms, sessions, in-flight runs)."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 # Serve static files in production
 if config.is_production:
     frontend_dist = Path(__file__).parent.parent.parent / "frontend" / "dist"
@@ -304,6 +332,20 @@ Initialize services on startup."""
     logger.info(f"API Keys - Anthropic: {'set' if config.anthropic_api_key and config.anthropic_api_key.strip() else 'missing'}, OpenAI: {'set' if config.openai_api_key and config.openai_api_key.strip() else 'missing'}, Available models: {len(available_models_startup)}")
     # #endregion
     
+    # Start cross-worker event bus (no-op backend for single-process deployments)
+    try:
+        await event_bus.start()
+        ws_manager.set_event_bus(event_bus)
+        logger.info(f"Event bus started: {type(event_bus).__name__}, worker {event_bus.worker_id}")
+    except Exception as e:
+        logger.error(f"Failed to start event bus: {e}")
+    
+    # Pre-start sandbox workers so the first execute_python_code call does not pay spawn/import cost
+    try:
+        await get_sandbox_pool().start()
+    except Exception as e:
+        logger.error(f"Failed to start sandbox pool: {e}")
+    
     # Connect to MCP servers
     try:
         results = await mcp_manager.connect_all()
@@ -320,6 +362,9 @@ async def shutdown_event():
     """
 Cleanup on shutdown."""
     logger.info("Shutting down Multi-Agent API...")
+    await event_bus.stop()
+    get_document_ingestor().shutdown()
+    await get_sandbox_pool().shutdown()
     await mcp_manager.disconnect_all()
 
 
@@ -495,6 +540,12 @@ Approve a plan for execution."""
     if not session_id or not confirmation_id:
         raise HTTPException(status_code=400, detail="Session ID and confirmation ID required")
     
+    # The run may be owned by another worker
+    owner = await event_bus.get_session_owner(session_id)
+    if owner and owner != event_bus.worker_id:
+        await event_bus.send_command(owner, session_id, {"type": "approve_plan", "confirmation_id": confirmation_id})
+        return {"status": "approved", "result": None, "worker_id": owner}
+    
     context = session_manager.get_session(session_id)
     if not context:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -527,6 +578,12 @@ Reject a plan."""
     if not session_id or not confirmation_id:
         raise HTTPException(status_code=400, detail="Session ID and confirmation ID required")
     
+    # The run may be owned by another worker
+    owner = await event_bus.get_session_owner(session_id)
+    if owner and owner != event_bus.worker_id:
+        await event_bus.send_command(owner, session_id, {"type": "reject_plan", "confirmation_id": confirmation_id})
+        return {"status": "rejected", "worker_id": owner}
+    
     context = session_manager.get_session(session_id)
     if not context:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -644,9 +701,17 @@ async def upload_file(
     - PDF: application/pdf
     - Word documents: application/vnd.openxmlformats-officedocument.wordprocessingml.document (.docx)
     
+    The upload is spooled to disk in chunks and text is extracted in a process
+    pool. For PDFs the response is returned once the first batch of pages is
+    extracted; remaining pages are appended to the stored file in the background
+    (status "processing" -> "ready") with file_processing_progress /
+    file_processing_complete events sent to the session.
+    
     Returns file_id that can be used when sending messages.
     """
     logger.info(f"Upload endpoint called: filename={file.filename}, session_id={session_id}")
+    spool_path = None
+    spool_owned_by_task = False
     try:
         file_type = file.content_type
         # #region agent log
@@ -655,22 +720,22 @@ async def upload_file(
         if not file_type:
             raise HTTPException(status_code=400, detail="Could not determine file type")
         
-        # Read file content
-        content = await file.read()
-        if len(content) == 0:
-            raise HTTPException(status_code=400, detail="File is empty")
-        
-        # Maximum file size: 20MB
+        # Spool file content to disk. Maximum file size: 20MB
         max_size = 20 * 1024 * 1024
-        if len(content) > max_size:
+        try:
+            spool_path, size = await spool_upload(file, max_size)
+        except UploadTooLarge:
             raise HTTPException(status_code=400, detail=f"File too large. Maximum size: 20MB")
+        if size == 0:
+            raise HTTPException(status_code=400, detail="File is empty")
         
+        ingestor = get_document_ingestor()
         file_id = str(uuid4())
         result = {
             "file_id": file_id,
             "filename": file.filename,
             "type": file_type,
-            "size": len(content)
+            "size": size
         }
         
         # Get or create session
@@ -688,7 +753,8 @@ async def upload_file(
         # Process based on file type
         if file_type.startswith("image/"):
             # For images - encode to base64
-            result["data"] = base64.b64encode(content).decode('utf-8')
+            content = await asyncio.to_thread(spool_path.read_bytes)
+            result["data"] = await asyncio.to_thread(lambda: base64.b64encode(content).decode('utf-8'))
             result["media_type"] = file_type
             
             # Store in context
@@ -697,11 +763,11 @@ async def upload_file(
                 "type": file_type,
                 "media_type": file_type,
                 "data": result["data"],
-                "size": len(content)
+                "size": size
             })
             
         elif file_type == "application/pdf":
-            # For PDF - extract text
+            # For PDF - extract text page batches in the process pool
             if PyPDF2 is None:
                 raise HTTPException(
                     status_code=500, 
@@ -709,49 +775,92 @@ async def upload_file(
                 )
             
             try:
-                pdf_file = io.BytesIO(content)
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                text = ""
-                
-                # Extract text from all pages
-                for page_num, page in enumerate(pdf_reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += f"\n--- Page {page_num + 1} ---\n{page_text}"
-                    except Exception as e:
-                        logger.warning(f"Error extracting text from PDF page {page_num + 1}: {e}")
-                        continue
-                
-                if not text.strip():
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="Could not extract text from PDF. The PDF might be image-based or encrypted."
-                    )
-                
-                result["text"] = text.strip()
-                
-                # Store in context
-                context.add_file(file_id, {
-                    "filename": file.filename,
-                    "type": file_type,
-                    "text": result["text"],
-                    "size": len(content),
-                    "pages": len(pdf_reader.pages)
-                })
-                
+                total_pages = await ingestor.count_pdf_pages(spool_path)
             except Exception as e:
                 logger.error(f"Error processing PDF: {e}")
                 raise HTTPException(
                     status_code=400, 
                     detail=f"Error processing PDF: {str(e)}"
                 )
+            
+            context.add_file(file_id, {
+                "filename": file.filename,
+                "type": file_type,
+                "text": "",
+                "size": size,
+                "pages": total_pages,
+                "pages_processed": 0,
+                "status": "processing"
+            })
+            stored_file = context.get_file(file_id)
+            first_batch_ready = asyncio.Event()
+            pdf_path = spool_path
+            
+            def save_stored_file():
+                # The session may have been saved since the upload (a run, another
+                # worker): write the file into its current context, not this snapshot
+                current = session_manager.get_session(session_id)
+                if current is None:
+                    return  # Deleted meanwhile
+                current.uploaded_files[file_id] = stored_file
+                session_manager.update_session(session_id, current)
+            
+            async def on_pdf_batch(batch, pages_done, pages_total):
+                # Extracted text becomes usable as soon as each batch is parsed
+                stored_file["text"] += format_pdf_pages(batch)
+                stored_file["pages_processed"] = pages_done
+                first_batch_ready.set()
+                await ws_manager.send_event(session_id, "file_processing_progress", {
+                    "file_id": file_id,
+                    "filename": file.filename,
+                    "pages_processed": pages_done,
+                    "total_pages": pages_total
+                })
+            
+            async def extract_pdf_task():
+                try:
+                    await ingestor.extract_pdf(pdf_path, on_pdf_batch, total_pages)
+                    stored_file["text"] = stored_file["text"].strip()
+                    if stored_file["text"]:
+                        stored_file["status"] = "ready"
+                    else:
+                        stored_file["status"] = "failed"
+                        stored_file["error"] = "Could not extract text from PDF. The PDF might be image-based or encrypted."
+                except Exception as e:
+                    logger.error(f"Error processing PDF: {e}")
+                    stored_file["status"] = "failed"
+                    stored_file["error"] = f"Error processing PDF: {str(e)}"
+                finally:
+                    pdf_path.unlink(missing_ok=True)
+                    first_batch_ready.set()
+                    save_stored_file()
+                    await ws_manager.send_event(session_id, "file_processing_complete", {
+                        "file_id": file_id,
+                        "filename": file.filename,
+                        "status": stored_file["status"],
+                        "pages_processed": stored_file["pages_processed"],
+                        "total_pages": total_pages
+                    })
+            
+            spool_owned_by_task = True
+            extraction_task = asyncio.create_task(extract_pdf_task())
+            await first_batch_ready.wait()
+            
+            if extraction_task.done() and stored_file["status"] == "failed":
+                context.uploaded_files.pop(file_id, None)
+                session_manager.update_session(session_id, context)
+                raise HTTPException(status_code=400, detail=stored_file["error"])
+            
+            result["text"] = stored_file["text"].strip()
+            result["pages"] = total_pages
+            result["pages_processed"] = stored_file["pages_processed"]
+            result["status"] = stored_file["status"]
         
         elif file_type in ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", 
                           "application/msword"):
             # For .docx and .doc files
             # #region agent log
-            logger.info(f"[UPLOAD] Processing Word document: {file.filename}, DOCX_AVAILABLE={DOCX_AVAILABLE}, file_size={len(content)}")
+            logger.info(f"[UPLOAD] Processing Word document: {file.filename}, DOCX_AVAILABLE={DOCX_AVAILABLE}, file_size={size}")
             print(f"[DEBUG] Upload Word doc: {file.filename}, DOCX_AVAILABLE={DOCX_AVAILABLE}", flush=True)
             # #endregion
             if not DOCX_AVAILABLE:
@@ -767,9 +876,7 @@ async def upload_file(
                     # #region agent log
                     logger.info(f"[UPLOAD] Attempting to parse .docx file: {file.filename}")
                     # #endregion
-                    doc_file = io.BytesIO(content)
-                    doc = Document(doc_file)
-                    text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+                    text = await ingestor.extract_docx(spool_path)
                     # #region agent log
                     logger.info(f"[UPLOAD] Extracted {len(text)} chars from .docx file: {file.filename}")
                     # #endregion
@@ -793,7 +900,7 @@ async def upload_file(
                     "filename": file.filename,
                     "type": file_type,
                     "text": result["text"],
-                    "size": len(content)
+                    "size": size
                 })
             except HTTPException:
                 raise
@@ -813,7 +920,7 @@ async def upload_file(
         # Update session
         session_manager.update_session(session_id, context)
         files_after_upload = len(context.uploaded_files) if hasattr(context, 'uploaded_files') else 0
-        logger.info(f"[UPLOAD] File uploaded successfully: {file.filename} ({file_type}, {len(content)} bytes) for session {session_id}, file_id: {file_id}, total files in context: {files_after_upload}")
+        logger.info(f"[UPLOAD] File uploaded successfully: {file.filename} ({file_type}, {size} bytes) for session {session_id}, file_id: {file_id}, total files in context: {files_after_upload}")
         print(f"[UPLOAD] File uploaded - file_id: {file_id}, filename: {file.filename}, session: {session_id}, total files: {files_after_upload}", flush=True)
         # Verify file was saved
         saved_file = context.get_file(file_id)
@@ -831,6 +938,9 @@ async def upload_file(
     except Exception as e:
         logger.error(f"Error uploading file: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
+    finally:
+        if spool_path is not None and not spool_owned_by_task:
+            spool_path.unlink(missing_ok=True)
 
 
 @app.post("/api/session/model")
@@ -872,12 +982,129 @@ async def set_session_model(request: Dict[str, Any]):
     }
 
 
+@app.get("/api/usage/{session_id}")
+async def get_session_usage(session_id: str, include_records: bool = False):
+    """
+    Get LLM token usage and estimated cost of a session.
+    
+    Query parameters:
+    - include_records: Include per-call records (purpose, iteration, model) of each run
+    """
+    usage = get_usage_tracker().get_session_usage(session_id, include_records=include_records)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="No usage recorded for session")
+    return usage
+
+
+async def _handle_ws_message(session_id: str, data: Dict[str, Any]) -> None:
+    """
+Handle a user message sent over WebSocket (runs on the session's owner worker)."""
+    # Process user message
+    user_message = data.get("content")
+    file_ids = data.get("file_ids", [])
+    open_files = data.get("open_files", [])
+    
+    # #region agent log
+    logger.info(f"[WS] Received message - session_id: {session_id}, file_ids: {file_ids}, open_files count: {len(open_files) if open_files else 0}")
+    print(f"[WS] Received message - session_id: {session_id}, file_ids: {file_ids}, user_message length: {len(user_message) if user_message else 0}", flush=True)
+    # #endregion
+    
+    context = session_manager.get_session(session_id)
+    
+    # #region agent log
+    if context:
+        files_in_context = len(context.uploaded_files) if hasattr(context, 'uploaded_files') else 0
+        logger.info(f"[WS] Context found - uploaded_files count: {files_in_context}")
+        print(f"[WS] Context found - uploaded_files count: {files_in_context}", flush=True)
+        # Check if file_ids exist in context
+        if file_ids:
+            for file_id in file_ids:
+                file_data = context.get_file(file_id)
+                logger.info(f"[WS] File {file_id} in context: {file_data is not None}")
+                print(f"[WS] File {file_id} in context: {file_data is not None}, filename: {file_data.get('filename') if file_data else 'N/A'}", flush=True)
+    else:
+        logger.warning(f"[WS] Context NOT found for session {session_id} - creating new one (this will lose uploaded files!)")
+        print(f"[WS] WARNING: Context NOT found for session {session_id} - creating new one!", flush=True)
+    # #endregion
+    
+    if not context:
+        context = ConversationContext(session_id)
+        session_manager.update_session(session_id, context)
+    
+    # Run process_message in background task to avoid blocking the message loop
+    # This allows other messages (like approve_plan) to be received while processing
+    async def process_message_task():
+        try:
+            await agent_wrapper.process_message(
+                user_message,
+                context,
+                session_id,
+                file_ids=file_ids if file_ids else None,
+                open_files=open_files if open_files else None
+            )
+            session_manager.update_session(session_id, context)
+        except Exception as e:
+            logger.error(f"Error processing message: {e}", exc_info=True)
+            await ws_manager.send_event(session_id, "error", {"message": str(e)})
+    
+    # Start background task - don't await it
+    asyncio.create_task(process_message_task())
+
+
+async def _handle_ws_approve_plan(session_id: str, data: Dict[str, Any]) -> None:
+    """
+Approve a plan (runs on the session's owner worker)."""
+    confirmation_id = data.get("confirmation_id")
+    context = session_manager.get_session(session_id)
+    
+    if context:
+        await agent_wrapper.approve_plan(
+            confirmation_id,
+            context,
+            session_id
+        )
+        session_manager.update_session(session_id, context)
+
+
+async def _handle_ws_reject_plan(session_id: str, data: Dict[str, Any]) -> None:
+    """
+Reject a plan (runs on the session's owner worker)."""
+    confirmation_id = data.get("confirmation_id")
+    context = session_manager.get_session(session_id)
+    
+    if context:
+        await agent_wrapper.reject_plan(
+            confirmation_id,
+            context,
+            session_id
+        )
+        session_manager.update_session(session_id, context)
+
+
+async def _handle_ws_stop_generation(session_id: str, data: Dict[str, Any]) -> None:
+    """
+Stop generation (runs on the session's owner worker)."""
+    await agent_wrapper.stop_generation(session_id)
+
+
+command_router = SessionCommandRouter(event_bus, {
+    "message": _handle_ws_message,
+    "approve_plan": _handle_ws_approve_plan,
+    "reject_plan": _handle_ws_reject_plan,
+    "stop_generation": _handle_ws_stop_generation,
+})
+
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """
-WebSocket endpoint for real-time communication."""
+WebSocket endpoint for real-time communication.
+    
+    A reconnecting client passes ?last_seq=N to receive the events it missed."""
     
-    await ws_manager.connect(websocket, session_id)
+    last_seq_param = websocket.query_params.get("last_seq")
+    last_seq = int(last_seq_param) if last_seq_param and last_seq_param.isdigit() else None
+    await ws_manager.connect(websocket, session_id, last_seq=last_seq)
     
     try:
         while True:
@@ -890,87 +1117,15 @@ WebSocket endpoint for real-time communication."""
             
             message_type = data.get("type")
             
-            if message_type == "message":
-                # Process user message
-                user_message = data.get("content")
-                file_ids = data.get("file_ids", [])
-                open_files = data.get("open_files", [])
-                
-                # #region agent log
-                logger.info(f"[WS] Received message - session_id: {session_id}, file_ids: {file_ids}, open_files count: {len(open_files) if open_files else 0}")
-                print(f"[WS] Received message - session_id: {session_id}, file_ids: {file_ids}, user_message length: {len(user_message) if user_message else 0}", flush=True)
-                # #endregion
-                
-                context = session_manager.get_session(session_id)
-                
-                # #region agent log
-                if context:
-                    files_in_context = len(context.uploaded_files) if hasattr(context, 'uploaded_files') else 0
-                    logger.info(f"[WS] Context found - uploaded_files count: {files_in_context}")
-                    print(f"[WS] Context found - uploaded_files count: {files_in_context}", flush=True)
-                    # Check if file_ids exist in context
-                    if file_ids:
-                        for file_id in file_ids:
-                            file_data = context.get_file(file_id)
-                            logger.info(f"[WS] File {file_id} in context: {file_data is not None}")
-                            print(f"[WS] File {file_id} in context: {file_data is not None}, filename: {file_data.get('filename') if file_data else 'N/A'}", flush=True)
-                else:
-                    logger.warning(f"[WS] Context NOT found for session {session_id} - creating new one (this will lose uploaded files!)")
-                    print(f"[WS] WARNING: Context NOT found for session {session_id} - creating new one!", flush=True)
-                # #endregion
-                
-                if not context:
-                    context = ConversationContext(session_id)
-                    session_manager.update_session(session_id, context)
-                
-                # Run process_message in background task to avoid blocking the message loop
-                # This allows other messages (like approve_plan) to be received while processing
-                async def process_message_task():
-                    try:
-                        await agent_wrapper.process_message(
-                            user_message,
-                            context,
-                            session_id,
-                            file_ids=file_ids if file_ids else None,
-                            open_files=open_files if open_files else None
-                        )
-                        session_manager.update_session(session_id, context)
-                    except Exception as e:
-                        logger.error(f"Error processing message: {e}", exc_info=True)
-                        await ws_manager.send_event(session_id, "error", {"message": str(e)})
-                
-                # Start background task - don't await it
-                asyncio.create_task(process_message_task())
-            
-            elif message_type == "approve_plan":
-                # Approve plan
-                confirmation_id = data.get("confirmation_id")
-                context = session_manager.get_session(session_id)
-                
-                if context:
-                    await agent_wrapper.approve_plan(
-                        confirmation_id,
-                        context,
-                        session_id
-                    )
-                    session_manager.update_session(session_id, context)
-            
-            elif message_type == "reject_plan":
-                # Reject plan
-                confirmation_id = data.get("confirmation_id")
-                context = session_manager.get_session(session_id)
-                
-                if context:
-                    await agent_wrapper.reject_plan(
-                        confirmation_id,
-                        context,
-                        session_id
-                    )
-                    session_manager.update_session(session_id, context)
-            
-            elif message_type == "stop_generation":
-                # Stop generation
-                await agent_wrapper.stop_generation(session_id)
+            if message_type == "resume":
+                # Replay events missed since the client's last seen sequence number
+                resume_seq = data.get("last_seq")
+                if isinstance(resume_seq, int):
+                    ws_manager.replay(websocket, session_id, resume_seq)
+            elif message_type in command_router.handlers:
+                # Runs are owned by one worker; route the command there
+                with get_tracer().start_span(f"ws.message {message_type}", {"session.id": session_id}):
+                    await command_router.dispatch(session_id, data)
     
     except WebSocketDisconnect as e:
         ws_manager.disconnect(websocket, session_id)
@@ -1,13 +1,142 @@
 """
 Session manager for tracking user sessions and conversation history.
+
+With the sqlite event bus (EVENT_BUS_BACKEND=sqlite) several workers serve
+the same sessions, so contexts are kept in the bus database and the
+in-memory dict is only a cache validated by the stored revision.
 """
 
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from datetime import datetime, timedelta
+from pathlib import Path
 from uuid import uuid4
+import json
+import sqlite3
+import threading
 
+from src.api.websocket_manager import get_websocket_manager
 from src.core.context_manager import ConversationContext, PersistentStorage
 from src.utils.config_loader import get_config
+from src.utils.usage_accounting import get_usage_tracker
+
+
+class SQLiteSessionStorage:
+    """
+    Session contexts in a SQLite database shared by all workers.
+    
+    Every save bumps the session's revision, so a worker can tell whether
+    its cached context is still current.
+    """
+    
+    def __init__(self, db_path: Path):
+        """
+        Initialize storage.
+        
+        Args:
+            db_path: Path to the shared SQLite database
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database and create the table."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    revision INTEGER NOT NULL,
+                    payload TEXT NOT NULL
+                )
+            """)
+            self._conn = conn
+        return self._conn
+    
+    def get_revision(self, session_id: str) -> Optional[int]:
+        """
+        Get the stored revision of a session.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            Revision or None if the session is not stored
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT revision FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def load(self, session_id: str) -> Optional[Tuple[ConversationContext, int]]:
+        """
+        Load a session context.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            (context, revision) or None if not found
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT payload, revision FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return ConversationContext.from_dict(json.loads(row[0])), row[1]
+    
+    def save(self, context: ConversationContext, base_revision: Optional[int] = None) -> int:
+        """
+        Save a session context.
+        
+        Files uploaded through another worker since base_revision are merged
+        into the context, so a run finishing on the owner does not drop them.
+        
+        Args:
+            context: Context to save (its uploaded_files may be extended)
+            base_revision: Revision the context was loaded at (None for new sessions)
+            
+        Returns:
+            New revision
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT payload, revision FROM sessions WHERE session_id = ?", (context.session_id,)
+                ).fetchone()
+                revision = 1
+                if row is not None:
+                    revision = row[1] + 1
+                    if row[1] != base_revision:
+                        stored_files = json.loads(row[0]).get("uploaded_files") or {}
+                        for file_id, file_data in stored_files.items():
+                            context.uploaded_files.setdefault(file_id, file_data)
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, revision, payload) VALUES (?, ?, ?)",
+                    (context.session_id, revision, json.dumps(context.to_dict(), ensure_ascii=False, default=str))
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return revision
+    
+    def delete(self, session_id: str) -> None:
+        """
+        Delete a session context.
+        
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
 
 
 class SessionManager:
@@ -15,13 +144,24 @@ class SessionManager:
     Manages user sessions and conversation contexts.
     """
     
-    def __init__(self):
-        """Initialize session manager."""
+    def __init__(self, shared_storage: Optional[SQLiteSessionStorage] = None):
+        """
+        Initialize session manager.
+        
+        Args:
+            shared_storage: Storage shared with other workers (default: the
+                event bus database when EVENT_BUS_BACKEND=sqlite, otherwise
+                local JSON files)
+        """
         self.sessions: Dict[str, ConversationContext] = {}
         self.storage = PersistentStorage()
+        self.shared_storage = shared_storage
+        self._revisions: Dict[str, int] = {}
         try:
             self.config = get_config()
             self.timeout_minutes = self.config.session_timeout_minutes
+            if self.shared_storage is None and getattr(self.config, "event_bus_backend", "local").lower() == "sqlite":
+                self.shared_storage = SQLiteSessionStorage(self.config.event_bus_db_path)
         except Exception as e:
             # Fallback if config fails to load
             import logging
@@ -45,8 +185,7 @@ class SessionManager:
         session_id = str(uuid4())
         context = ConversationContext(session_id)
         context.execution_mode = execution_mode
-        self.sessions[session_id] = context
-        self.storage.save_context(context)
+        self.update_session(session_id, context)
         return session_id
     
     def get_session(self, session_id: str) -> Optional[ConversationContext]:
@@ -59,6 +198,9 @@ class SessionManager:
         Returns:
             Conversation context or None if not found
         """
+        if self.shared_storage is not None:
+            return self._get_shared_session(session_id)
+        
         # Try memory first
         if session_id in self.sessions:
             return self.sessions[session_id]
@@ -71,6 +213,24 @@ class SessionManager:
         
         return None
     
+    def _get_shared_session(self, session_id: str) -> Optional[ConversationContext]:
+        """Get context from the shared storage, reusing the cached one while its revision is current."""
+        revision = self.shared_storage.get_revision(session_id)
+        if revision is None:
+            self.sessions.pop(session_id, None)
+            self._revisions.pop(session_id, None)
+            return None
+        if session_id in self.sessions and self._revisions.get(session_id) == revision:
+            return self.sessions[session_id]
+        
+        # Changed by another worker (upload, settings): reload
+        loaded = self.shared_storage.load(session_id)
+        if loaded is None:
+            return None
+        context, self._revisions[session_id] = loaded
+        self.sessions[session_id] = context
+        return context
+    
     def update_session(self, session_id: str, context: ConversationContext) -> None:
         """
         Update session context.
@@ -80,18 +240,27 @@ class SessionManager:
             context: Updated context
         """
         self.sessions[session_id] = context
-        self.storage.save_context(context)
+        if self.shared_storage is not None:
+            self._revisions[session_id] = self.shared_storage.save(context, self._revisions.get(session_id))
+        else:
+            self.storage.save_context(context)
     
     def delete_session(self, session_id: str) -> None:
         """
-        Delete a session.
+        Delete a session, its WebSocket replay buffer and its LLM usage.
         
         Args:
             session_id: Session identifier
         """
         if session_id in self.sessions:
             del self.sessions[session_id]
-        self.storage.delete_context(session_id)
+        get_websocket_manager().clear_session(session_id)
+        get_usage_tracker().reset_session(session_id)
+        self._revisions.pop(session_id, None)
+        if self.shared_storage is not None:
+            self.shared_storage.delete(session_id)
+        else:
+            self.storage.delete_context(session_id)
     
     def cleanup_expired_sessions(self) -> int:
         """
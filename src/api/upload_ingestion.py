@@ -0,0 +1,266 @@
+"""
+Upload ingestion pipeline.
+
+Uploads are spooled to disk in chunks and document text is extracted in a
+process pool, so parsing a large PDF never blocks the event loop. PDF pages
+are extracted in batches: text of the first pages is available (and
+reported over WebSocket) before the last pages are parsed.
+"""
+
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import asyncio
+import os
+import tempfile
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_PAGE_BATCH_SIZE = 25
+DEFAULT_JOB_TIMEOUT = 60.0
+DEFAULT_MEMORY_LIMIT = 1024 * 1024 * 1024
+DEFAULT_MAX_WORKERS = 2
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the allowed size while spooling."""
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a single extraction job exceeds its deadline."""
+
+
+# Batch callback: (pages in this batch as (page_number, text), pages done, total pages)
+PageBatchCallback = Callable[[List[Tuple[int, str]], int, int], Awaitable[None]]
+
+
+def _init_worker(memory_limit: Optional[int]) -> None:
+    """Apply address-space limit in a freshly started pool process."""
+    if resource is None or not memory_limit:
+        return
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _count_pdf_pages(path: str) -> int:
+    """Count PDF pages (runs in a pool process)."""
+    import PyPDF2
+    return len(PyPDF2.PdfReader(path).pages)
+
+
+def _extract_pdf_pages(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract text of pages [start, end) (runs in a pool process)."""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(path)
+    pages = []
+    for page_num in range(start, min(end, len(reader.pages))):
+        try:
+            text = reader.pages[page_num].extract_text() or ""
+        except Exception:
+            text = ""
+        pages.append((page_num + 1, text))
+    return pages
+
+
+def _extract_docx_text(path: str) -> str:
+    """Extract paragraph text of a .docx file (runs in a pool process)."""
+    from docx import Document
+    return "\n".join(paragraph.text for paragraph in Document(path).paragraphs)
+
+
+def format_pdf_pages(pages: List[Tuple[int, str]]) -> str:
+    """Format extracted pages the same way the upload endpoint always has."""
+    return "".join(
+        f"\n--- Page {page_num} ---\n{text}"
+        for page_num, text in pages
+        if text
+    )
+
+
+async def spool_upload(
+    upload: Any,
+    max_size: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    spool_dir: Optional[Path] = None
+) -> Tuple[Path, int]:
+    """
+    Copy an upload to a temporary file chunk by chunk.
+    
+    Args:
+        upload: FastAPI UploadFile (anything with async read(size))
+        max_size: Maximum allowed size in bytes
+        chunk_size: Bytes read per chunk
+        spool_dir: Directory for the temporary file (system default if None)
+    
+    Returns:
+        Tuple of (spooled file path, size in bytes)
+    
+    Raises:
+        UploadTooLarge: If the upload exceeds max_size
+    """
+    fd, name = tempfile.mkstemp(prefix="upload_", dir=str(spool_dir) if spool_dir else None)
+    path = Path(name)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+                await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, size
+
+
+class DocumentIngestor:
+    """
+    Extracts document text in a process pool with per-job timeouts.
+    
+    Pool processes run with an address-space limit. A job that exceeds its
+    timeout causes the pool to be torn down (killing the stuck process) and
+    recreated lazily on the next job.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        job_timeout: float = DEFAULT_JOB_TIMEOUT,
+        memory_limit: Optional[int] = DEFAULT_MEMORY_LIMIT,
+        page_batch_size: int = DEFAULT_PAGE_BATCH_SIZE
+    ):
+        """
+        Initialize ingestor.
+        
+        Args:
+            max_workers: Number of pool processes
+            job_timeout: Max seconds for a single extraction job (one page batch)
+            memory_limit: Address-space limit per pool process in bytes (None to disable)
+            page_batch_size: PDF pages extracted per job
+        """
+        self.max_workers = max_workers
+        self.job_timeout = job_timeout
+        self.memory_limit = memory_limit
+        self.page_batch_size = page_batch_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.memory_limit,)
+            )
+        return self._pool
+    
+    def _kill_pool(self) -> None:
+        """Terminate pool processes (used after a job timeout)."""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        processes = list(getattr(pool, "_processes", {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            try:
+                process.kill()
+            except Exception:
+                pass
+    
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn in the pool with the job timeout."""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_pool(), fn, *args)
+        try:
+            return await asyncio.wait_for(future, timeout=self.job_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Extraction job {fn.__name__} exceeded {self.job_timeout}s, restarting pool")
+            self._kill_pool()
+            raise ExtractionTimeout(f"Extraction exceeded {self.job_timeout}s")
+    
+    async def count_pdf_pages(self, path: Path) -> int:
+        """
+        Count pages of a PDF.
+        
+        Args:
+            path: PDF file path
+        
+        Returns:
+            Number of pages
+        """
+        return await self._run(_count_pdf_pages, str(path))
+    
+    async def extract_pdf(
+        self,
+        path: Path,
+        on_batch: Optional[PageBatchCallback] = None,
+        total_pages: Optional[int] = None
+    ) -> List[Tuple[int, str]]:
+        """
+        Extract PDF text batch by batch.
+        
+        Args:
+            path: PDF file path
+            on_batch: Awaited after each batch with its pages and progress
+            total_pages: Page count if already known
+        
+        Returns:
+            All pages as (page_number, text)
+        """
+        if total_pages is None:
+            total_pages = await self.count_pdf_pages(path)
+        
+        pages: List[Tuple[int, str]] = []
+        for start in range(0, total_pages, self.page_batch_size):
+            batch = await self._run(_extract_pdf_pages, str(path), start, start + self.page_batch_size)
+            pages.extend(batch)
+            if on_batch:
+                await on_batch(batch, len(pages), total_pages)
+        return pages
+    
+    async def extract_docx(self, path: Path) -> str:
+        """
+        Extract .docx text.
+        
+        Args:
+            path: Document file path
+        
+        Returns:
+            Paragraph text joined by newlines
+        """
+        return await self._run(_extract_docx_text, str(path))
+    
+    def shutdown(self) -> None:
+        """Stop the process pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global ingestor
+_document_ingestor: Optional[DocumentIngestor] = None
+
+
+def get_document_ingestor() -> DocumentIngestor:
+    """Get global document ingestor."""
+    global _document_ingestor
+    
+    if _document_ingestor is None:
+        _document_ingestor = DocumentIngestor()
+    
+    return _document_ingestor
@@ -3,28 +3,308 @@ WebSocket manager for real-time communication with frontend.
 Handles connections, message broadcasting, and event streaming.
 """
 
-from typing import Dict, Set, Optional, Any
+from typing import Deque, Dict, Set, Optional, Any, Callable
+from collections import deque
 from fastapi import WebSocket, WebSocketDisconnect
 import json
 import asyncio
 import logging
+import time
 
 from src.utils.logging_config import get_logger
+from src.utils.metrics import WEBSOCKET_SEND_DURATION
+from src.api.event_bus import EventBus
 
 logger = get_logger(__name__)
 
 
+# Progress events: only the latest state matters, so on overflow the oldest
+# ones are dropped first. Everything else (intents, operations, final and
+# terminal events like final_result / message_complete / error) is never dropped.
+DROPPABLE_EVENT_TYPES = frozenset({
+    "thinking",
+    "thinking_chunk",
+    "response_chunk",
+    "message_chunk",
+    "intent_detail",
+    "intent_thinking_append",
+    "plan_thinking_chunk",
+    "operation_data",
+    "smart_progress_message",
+    "smart_progress_timer",
+})
+
+DEFAULT_MAX_QUEUE_SIZE = 256
+DEFAULT_SEND_TIMEOUT = 10.0
+DEFAULT_REPLAY_BUFFER_SIZE = 500
+DEFAULT_REPLAY_TTL = 300.0
+
+
+class ConnectionSender:
+    """
+    Bounded outbound queue for a single WebSocket, drained by its own writer task.
+    
+    Producers call enqueue() which never awaits network I/O. When the queue
+    exceeds max_queue_size, the oldest droppable (progress) event is discarded.
+    If the queue still grows past the hard limit (only non-droppable events left)
+    or a single send blocks longer than send_timeout, the consumer is considered
+    chronically slow and is disconnected.
+    """
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+        on_failure: Optional[Callable[["ConnectionSender", str], None]] = None
+    ):
+        """
+        Initialize sender and start its writer task.
+        
+        Args:
+            websocket: WebSocket connection
+            session_id: Session identifier
+            max_queue_size: Soft queue limit; progress events are dropped beyond it
+            send_timeout: Max seconds a single send may block before disconnect
+            on_failure: Callback invoked once when the connection is given up
+        """
+        self.websocket = websocket
+        self.session_id = session_id
+        self.max_queue_size = max_queue_size
+        self.hard_limit = max_queue_size * 2
+        self.send_timeout = send_timeout
+        self.on_failure = on_failure
+        self.dropped_count = 0
+        self.sent_count = 0
+        self.closed = False
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = asyncio.create_task(self._run())
+    
+    @property
+    def queue_size(self) -> int:
+        """Number of messages waiting to be sent."""
+        return len(self._queue)
+    
+    def enqueue(self, message: Dict[str, Any]) -> bool:
+        """
+        Put message into the outbound queue without awaiting.
+        
+        Args:
+            message: Message to send
+            
+        Returns:
+            False if the connection is closed or was just given up as too slow
+        """
+        if self.closed:
+            return False
+        
+        self._queue.append(message)
+        
+        if len(self._queue) > self.max_queue_size:
+            self._drop_oldest_progress()
+        
+        if len(self._queue) > self.hard_limit:
+            self._fail("outbound queue overflow")
+            return False
+        
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+    
+    def _drop_oldest_progress(self) -> None:
+        """Drop the oldest droppable event, if any."""
+        for index, queued in enumerate(self._queue):
+            if queued.get("type") in DROPPABLE_EVENT_TYPES:
+                del self._queue[index]
+                self.dropped_count += 1
+                return
+    
+    async def _run(self) -> None:
+        """Writer loop: send queued messages in order."""
+        while not self.closed:
+            if not self._queue:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            message = self._queue.popleft()
+            try:
+                started = time.perf_counter()
+                await asyncio.wait_for(
+                    self.websocket.send_json(message),
+                    timeout=self.send_timeout
+                )
+                WEBSOCKET_SEND_DURATION.observe(time.perf_counter() - started)
+                self.sent_count += 1
+            except asyncio.TimeoutError:
+                self._fail(f"send blocked for more than {self.send_timeout}s")
+            except Exception as e:
+                self._fail(f"send error: {e}")
+        
+        self._idle.set()
+    
+    def _fail(self, reason: str) -> None:
+        """Give up on the connection and notify the owner."""
+        if self.closed:
+            return
+        logger.warning(f"Disconnecting slow WebSocket consumer for session {self.session_id}: {reason}")
+        self.stop()
+        if self.on_failure:
+            self.on_failure(self, reason)
+    
+    def stop(self) -> None:
+        """Stop the writer task and discard pending messages."""
+        self.closed = True
+        self._queue.clear()
+        self._wakeup.set()
+        self._idle.set()
+        # Interrupt a send that is stuck on a dead socket
+        if self._task is not asyncio.current_task() and not self._task.done():
+            self._task.cancel()
+    
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all queued messages have been sent.
+        
+        Args:
+            timeout: Max seconds to wait (None for no limit)
+            
+        Returns:
+            True if the queue was drained, False on timeout
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
 class WebSocketManager:
     """
     Manages WebSocket connections for real-time updates.
+    
+    Each connection gets its own ConnectionSender, so a slow browser tab
+    never delays other tabs or the code producing events.
+    
+    Every event is stamped with a per-session monotonic sequence number
+    ("seq") and kept in a bounded replay buffer, so a client that reconnects
+    with its last seen seq receives the events it missed. The buffer of a
+    session without connections is evicted after replay_ttl seconds.
     """
     
-    def __init__(self):
-        """Initialize WebSocket manager."""
+    def __init__(
+        self,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+        replay_buffer_size: int = DEFAULT_REPLAY_BUFFER_SIZE,
+        replay_ttl: float = DEFAULT_REPLAY_TTL
+    ):
+        """
+        Initialize WebSocket manager.
+        
+        Args:
+            max_queue_size: Per-connection outbound queue size
+            send_timeout: Max seconds a single send may block before disconnect
+            replay_buffer_size: Number of recent events kept per session for replay
+            replay_ttl: Seconds a replay buffer outlives the last connection of its session
+        """
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        self._senders: Dict[WebSocket, ConnectionSender] = {}
+        self._sequences: Dict[str, int] = {}
+        self._replay_buffers: Dict[str, Deque[Dict[str, Any]]] = {}
+        # Session -> monotonic time its last connection went away
+        self._idle_since: Dict[str, float] = {}
+        self._next_eviction = 0.0
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.replay_buffer_size = replay_buffer_size
+        self.replay_ttl = replay_ttl
+        self.event_bus: Optional[EventBus] = None
         self.logger = logger
     
-    async def connect(self, websocket: WebSocket, session_id: str) -> None:
+    def set_event_bus(self, event_bus: EventBus) -> None:
+        """
+        Fan out events through an event bus for multi-worker deployments.
+        
+        Args:
+            event_bus: Event bus shared by all workers
+        """
+        self.event_bus = event_bus
+        event_bus.set_event_handler(self.deliver_remote_event)
+    
+    def deliver_remote_event(self, session_id: str, message: Dict[str, Any]) -> None:
+        """
+        Deliver an event published by another worker to local connections.
+        
+        The message keeps the owner's sequence number and is buffered for
+        replay, so clients can reconnect to any worker.
+        
+        Args:
+            session_id: Session identifier
+            message: Event message as stamped by the owning worker
+        """
+        seq = message.get("seq")
+        if isinstance(seq, int):
+            self._sequences[session_id] = max(self._sequences.get(session_id, 0), seq)
+        self._buffer_event(session_id, message)
+        
+        for websocket in list(self.active_connections.get(session_id, set())):
+            sender = self._senders.get(websocket)
+            if sender:
+                sender.enqueue(message)
+    
+    def _buffer_event(self, session_id: str, message: Dict[str, Any]) -> None:
+        """Append message to the session's replay buffer."""
+        self.evict_idle_buffers()
+        buffer = self._replay_buffers.get(session_id)
+        if buffer is None:
+            buffer = deque(maxlen=self.replay_buffer_size)
+            self._replay_buffers[session_id] = buffer
+            if session_id not in self.active_connections:
+                # e.g. events of a session connected to another worker
+                self._idle_since.setdefault(session_id, time.monotonic())
+        buffer.append(message)
+    
+    def evict_idle_buffers(self, now: Optional[float] = None) -> int:
+        """
+        Drop replay buffers of sessions without connections for longer than replay_ttl.
+        
+        Runs at most once per replay_ttl / 10 unless `now` is given.
+        
+        Args:
+            now: Monotonic time to evict against (forces a sweep)
+            
+        Returns:
+            Number of evicted buffers
+        """
+        if now is None:
+            now = time.monotonic()
+            if now < self._next_eviction:
+                return 0
+        self._next_eviction = now + self.replay_ttl / 10
+        
+        expired = [
+            session_id for session_id, since in self._idle_since.items()
+            if now - since >= self.replay_ttl
+        ]
+        for session_id in expired:
+            del self._idle_since[session_id]
+            self._replay_buffers.pop(session_id, None)
+        if expired:
+            self.logger.debug(f"Evicted replay buffers of {len(expired)} idle sessions")
+        return len(expired)
+    
+    async def connect(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        last_seq: Optional[int] = None
+    ) -> None:
         """
         Accept WebSocket connection for a session.
         Closes any existing connections for the same session to prevent duplicates.
@@ -32,6 +312,8 @@ class WebSocketManager:
         Args:
             websocket: WebSocket connection
             session_id: Session identifier
+            last_seq: Last sequence number seen by a reconnecting client;
+                events after it are replayed from the buffer
         """
         
         await websocket.accept()
@@ -41,6 +323,7 @@ class WebSocketManager:
         if session_id in self.active_connections:
             old_connections = list(self.active_connections[session_id])
             for old_ws in old_connections:
+                self._stop_sender(old_ws)
                 try:
                     self.logger.info(f"Closing old WebSocket connection for session {session_id}")
                     await old_ws.close(code=1000, reason="New connection established")
@@ -51,8 +334,85 @@ class WebSocketManager:
             self.active_connections[session_id] = set()
         
         self.active_connections[session_id].add(websocket)
+        self._idle_since.pop(session_id, None)
+        self._senders[websocket] = ConnectionSender(
+            websocket,
+            session_id,
+            max_queue_size=self.max_queue_size,
+            send_timeout=self.send_timeout,
+            on_failure=lambda sender, reason: self.disconnect(sender.websocket, sender.session_id)
+        )
         self.logger.info(f"WebSocket connected for session {session_id} (total: 1)")
         
+        if last_seq is not None:
+            self.replay(websocket, session_id, last_seq)
+    
+    def replay(self, websocket: WebSocket, session_id: str, last_seq: int) -> int:
+        """
+        Re-send buffered events with seq greater than last_seq.
+        
+        If the buffer no longer holds every missed event (or was evicted),
+        a "replay_gap" event is sent first so the client knows its state is
+        incomplete.
+        
+        Args:
+            websocket: WebSocket connection to replay into
+            session_id: Session identifier
+            last_seq: Last sequence number seen by the client
+            
+        Returns:
+            Number of replayed events
+        """
+        sender = self._senders.get(websocket)
+        if not sender:
+            return 0
+        buffer = self._replay_buffers.get(session_id) or ()
+        
+        first_seq = buffer[0]["seq"] if buffer else self.get_last_seq(session_id) + 1
+        if first_seq > last_seq + 1:
+            sender.enqueue({
+                "type": "replay_gap",
+                "timestamp": asyncio.get_event_loop().time(),
+                "data": {"from_seq": last_seq + 1, "to_seq": first_seq - 1}
+            })
+        
+        replayed = 0
+        for message in buffer:
+            if message["seq"] > last_seq:
+                sender.enqueue(message)
+                replayed += 1
+        
+        self.logger.info(f"Replayed {replayed} events for session {session_id} after seq {last_seq}")
+        return replayed
+    
+    def get_last_seq(self, session_id: str) -> int:
+        """
+        Get the sequence number of the last event sent to a session.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            Last sequence number (0 if nothing was sent yet)
+        """
+        return self._sequences.get(session_id, 0)
+    
+    def clear_session(self, session_id: str) -> None:
+        """
+        Forget sequence counter and replay buffer of a session.
+        
+        Args:
+            session_id: Session identifier
+        """
+        self._sequences.pop(session_id, None)
+        self._replay_buffers.pop(session_id, None)
+        self._idle_since.pop(session_id, None)
+    
+    def _stop_sender(self, websocket: WebSocket) -> None:
+        """Stop and forget the sender of a connection."""
+        sender = self._senders.pop(websocket, None)
+        if sender:
+            sender.stop()
     
     def disconnect(self, websocket: WebSocket, session_id: str) -> None:
         """
@@ -62,12 +422,16 @@ class WebSocketManager:
             websocket: WebSocket connection
             session_id: Session identifier
         """
+        self._stop_sender(websocket)
+        
         if session_id in self.active_connections:
             self.active_connections[session_id].discard(websocket)
             
             if not self.active_connections[session_id]:
                 del self.active_connections[session_id]
+                self._idle_since[session_id] = time.monotonic()
         
+        self.evict_idle_buffers()
         self.logger.info(f"WebSocket disconnected for session {session_id}")
     
     async def send_personal_message(
@@ -82,6 +446,11 @@ class WebSocketManager:
             message: Message to send
             websocket: WebSocket connection
         """
+        sender = self._senders.get(websocket)
+        if sender:
+            sender.enqueue(message)
+            return
+        
         try:
             await websocket.send_json(message)
         except Exception as e:
@@ -95,6 +464,9 @@ class WebSocketManager:
         """
         Broadcast message to all connections in a session.
         
+        Only enqueues the message: network I/O happens in each
+        connection's writer task.
+        
         Args:
             session_id: Session identifier
             message: Message to broadcast
@@ -102,20 +474,10 @@ class WebSocketManager:
         if session_id not in self.active_connections:
             return
         
-        disconnected = set()
-        
-        for websocket in self.active_connections[session_id]:
-            try:
-                
-                await websocket.send_json(message)
-                
-            except Exception as e:
-                self.logger.warning(f"Error broadcasting to session {session_id}: {e}")
-                disconnected.add(websocket)
-        
-        # Remove disconnected websockets
-        for websocket in disconnected:
-            self.disconnect(websocket, session_id)
+        for websocket in list(self.active_connections[session_id]):
+            sender = self._senders.get(websocket)
+            if sender:
+                sender.enqueue(message)
     
     async def send_event(
         self,
@@ -126,21 +488,31 @@ class WebSocketManager:
         """
         Send an event to session.
         
+        The event is buffered for replay even when no client is connected.
+        
         Args:
             session_id: Session identifier
             event_type: Type of event (message, thinking, tool_call, etc.)
             data: Event data
         """
+        seq = self._sequences.get(session_id, 0) + 1
+        self._sequences[session_id] = seq
         message = {
             "type": event_type,
+            "seq": seq,
             "timestamp": asyncio.get_event_loop().time(),
             "data": data
         }
         
+        self._buffer_event(session_id, message)
+        
+        if self.event_bus:
+            self.event_bus.publish_event(session_id, message)
+        
         connection_count = self.get_connection_count(session_id)
         
         if connection_count == 0:
-            self.logger.warning(f"No active connections for session {session_id} when sending event '{event_type}'")
+            self.logger.debug(f"No active connections for session {session_id}, event '{event_type}' buffered for replay")
             return
         
         
@@ -159,6 +531,24 @@ class WebSocketManager:
         """
         return len(self.active_connections.get(session_id, set()))
     
+    async def drain(self, session_id: str, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all queued messages of a session have been sent.
+        
+        Args:
+            session_id: Session identifier
+            timeout: Max seconds to wait per connection
+            
+        Returns:
+            True if all connections were drained
+        """
+        results = [
+            await sender.drain(timeout)
+            for sender in list(self._senders.values())
+            if sender.session_id == session_id
+        ]
+        return all(results)
+    
     async def send_operation_start(
         self,
         session_id: str,
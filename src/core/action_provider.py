@@ -42,6 +42,9 @@ class ActionCapability:
     # Metadata
     tags: List[str] = field(default_factory=list)
     estimated_duration_ms: Optional[int] = None
+    
+    # READ results are cached by CapabilityRegistry for this many seconds (None - not cached)
+    cache_ttl_sec: Optional[float] = None
 
 
 class ActionProvider(ABC):
@@ -4,12 +4,16 @@ Provides unified access regardless of underlying provider type (MCP tools or A2A
 """
 
 from typing import Dict, List, Optional, Tuple, Any
+import time
 from src.core.action_provider import (
     ActionProvider,
     ActionCapability,
     CapabilityCategory
 )
+from src.core.tool_result_cache import ToolResultCache
 from src.utils.logging_config import get_logger
+from src.utils.metrics import CAPABILITY_EXECUTE_DURATION
+from src.utils.tracing import get_tracer
 
 logger = get_logger(__name__)
 
@@ -23,13 +27,20 @@ class CapabilityRegistry:
     - Indexes capabilities from all registered providers
     - Allows filtering by category (READ/WRITE) and service
     - Routes execution requests to appropriate providers
+    - Serves repeated READ calls from a result cache (see ToolResultCache)
     - Provides capability metadata lookup
     """
     
-    def __init__(self):
-        """Initialize empty capability registry."""
+    def __init__(self, result_cache: Optional[ToolResultCache] = None):
+        """
+        Initialize empty capability registry.
+        
+        Args:
+            result_cache: Cache of READ results (a default one when None)
+        """
         self.providers: List[ActionProvider] = []
         self._capability_map: Dict[str, Tuple[ActionProvider, ActionCapability]] = {}
+        self.result_cache = result_cache if result_cache is not None else ToolResultCache()
         logger.info("[CapabilityRegistry] Initialized")
     
     def register_provider(self, provider: ActionProvider) -> None:
@@ -117,6 +128,10 @@ class CapabilityRegistry:
         """
         Execute capability through appropriate provider.
         
+        READ capabilities with cache_ttl_sec are served from the result cache
+        per session (context["session_id"] or the _session_id argument);
+        WRITE capabilities invalidate the cached reads they affect.
+        
         Args:
             capability_name: Name of the capability to execute
             arguments: Arguments for the capability
@@ -152,8 +167,20 @@ class CapabilityRegistry:
             pass
         # #endregion
         
+        started = time.perf_counter()
         try:
-            result = await provider.execute(capability_name, arguments, context)
+            with get_tracer().start_span(
+                "capability.execute",
+                {"tool": capability_name, "provider": provider.provider_type.value}
+            ):
+                session_id = (context or {}).get("session_id") or arguments.get("_session_id")
+                result = await self.result_cache.execute(
+                    cap,
+                    arguments,
+                    session_id,
+                    lambda: provider.execute(capability_name, arguments, context)
+                )
+            CAPABILITY_EXECUTE_DURATION.observe(time.perf_counter() - started, tool=capability_name, status="ok")
             
             # #region agent log - H3: Registry execute SUCCESS
             _reg_exec_end = _time.time()
@@ -165,6 +192,7 @@ class CapabilityRegistry:
             
             return result
         except Exception as e:
+            CAPABILITY_EXECUTE_DURATION.observe(time.perf_counter() - started, tool=capability_name, status="error")
             # #region agent log - H3,H4: Registry execute ERROR
             _reg_exec_end = _time.time()
             try:
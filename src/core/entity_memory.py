@@ -7,6 +7,8 @@ from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+from src.mcp_tools.tool_result import ToolResult
+
 
 @dataclass
 class EntityReference:
@@ -276,6 +278,23 @@ def extract_entities_from_tool_result(
     """
     entities = []
     
+    # Structured result envelope: take entities from the data, no text parsing
+    if isinstance(tool_result, ToolResult) and tool_result.kind and tool_result.data is not None:
+        items = tool_result.items or ([tool_result.data] if isinstance(tool_result.data, dict) else [])
+        for item in items[:3]:  # Max 3 entities, as for raw results
+            if not isinstance(item, dict):
+                continue
+            entity_id = item.get("id") or item.get("file_id", "")
+            name = item.get("summary") or item.get("title") or item.get("name") or item.get("subject", "")
+            if entity_id and name:
+                entities.append(EntityReference(
+                    entity_type=tool_result.kind,
+                    entity_id=str(entity_id),
+                    name=str(name),
+                    mentioned_at_turn=0,
+                    metadata={**item, "tool_name": tool_name}
+                ))
+        return entities
     
     # Handle string results (may contain JSON or formatted text)
     if isinstance(tool_result, str):
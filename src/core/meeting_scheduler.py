@@ -17,13 +17,23 @@
     # slot = {"start": datetime, "end": datetime} или None
 """
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
 import logging
 import json
 import pytz
 
 logger = logging.getLogger(__name__)
 
+# Максимум календарей в одном запросе FreeBusy (лимит Google Calendar API)
+FREEBUSY_MAX_ITEMS = 50
+
+# Максимум одновременных запросов к календарю (чанки FreeBusy и fallback list_events)
+MAX_CONCURRENT_QUERIES = 8
+
+# Причины ошибок FreeBusy, означающие отсутствие доступа к календарю
+ACCESS_DENIED_REASONS = ("notFound", "notAuthorized", "forbidden")
+
 
 def get_local_timezone():
     """Получает локальную таймзону из конфига."""
@@ -40,6 +50,17 @@ def get_mcp_manager():
     return _get_mcp_manager()
 
 
+class AvailabilityUnknownError(ValueError):
+    """Занятость участников не удалось получить ни через FreeBusy, ни через list_events."""
+    
+    def __init__(self, attendees: List[str]):
+        self.attendees = attendees
+        super().__init__(
+            f"Не удалось получить занятость участников: {', '.join(attendees)}. "
+            f"Календарь временно недоступен — повторите попытку позже."
+        )
+
+
 class MeetingScheduler:
     """
     Планировщик встреч для нескольких участников.
@@ -48,7 +69,13 @@ class MeetingScheduler:
     с учётом буферного времени между встречами.
     """
     
-    def __init__(self, calendar_tools=None, use_mcp: bool = False):
+    def __init__(
+        self,
+        calendar_tools=None,
+        use_mcp: bool = False,
+        freebusy_chunk_size: int = FREEBUSY_MAX_ITEMS,
+        max_concurrency: int = MAX_CONCURRENT_QUERIES
+    ):
         """
         Инициализация планировщика.
         
@@ -56,9 +83,13 @@ class MeetingScheduler:
             calendar_tools: MCP Calendar tools для получения событий календаря.
                            Если None, используется mock для тестов.
             use_mcp: Использовать MCP для получения календарных данных.
+            freebusy_chunk_size: Максимум участников в одном запросе FreeBusy.
+            max_concurrency: Максимум одновременных запросов к календарю.
         """
         self.calendar_tools = calendar_tools
         self.use_mcp = use_mcp
+        self.freebusy_chunk_size = freebusy_chunk_size
+        self.max_concurrency = max_concurrency
     
     async def find_available_slot(
         self,
@@ -140,54 +171,16 @@ class MeetingScheduler:
         
         Returns:
             Словарь {email: [events]}
+        
+        Raises:
+            ValueError: Если календарь участника недоступен (нет доступа)
+            AvailabilityUnknownError: Если занятость участников не удалось получить
         """
         calendars = {}
         
         if self.use_mcp:
-            # Используем FreeBusy API для проверки занятости ВСЕХ участников
-            try:
-                mcp_manager = get_mcp_manager()
-                
-                # FreeBusy запрос для всех участников
-                freebusy_args = {
-                    "timeMin": start.isoformat() + "Z" if "+" not in start.isoformat() else start.isoformat(),
-                    "timeMax": end.isoformat() + "Z" if "+" not in end.isoformat() else end.isoformat(),
-                    "items": [{"id": email} for email in participants]
-                }
-                
-                logger.info(f"[MeetingScheduler] Querying FreeBusy for {len(participants)} participants")
-                result = await mcp_manager.call_tool("freebusy_query", freebusy_args, server_name="calendar")
-                
-                # Парсим результат FreeBusy
-                calendars = self._parse_freebusy_result(result, participants)
-                
-                logger.info(f"[MeetingScheduler] FreeBusy returned busy slots for {len(calendars)} calendars")
-                    
-            except ValueError as e:
-                # ValueError означает недоступность календарей - НЕ используем fallback!
-                logger.error(f"[MeetingScheduler] Calendar access denied: {e}")
-                raise  # Пробрасываем ошибку наверх
-                
-            except Exception as e:
-                # Другие ошибки (сеть, etc.) - пробуем fallback
-                logger.warning(f"[MeetingScheduler] FreeBusy failed: {e}, falling back to list_events")
-                # Fallback: запрашиваем свой календарь (старое поведение)
-                try:
-                    args = {
-                        "timeMin": start.isoformat(),
-                        "timeMax": end.isoformat(),
-                        "maxResults": 100
-                    }
-                    result = await mcp_manager.call_tool("list_events", args, server_name="calendar")
-                    events = self._parse_mcp_result(result)
-                    # В fallback режиме присваиваем всем один календарь (текущего пользователя)
-                    for email in participants:
-                        calendars[email] = events
-                except Exception as e2:
-                    logger.error(f"[MeetingScheduler] Fallback also failed: {e2}")
-                    for email in participants:
-                        calendars[email] = []
-                    
+            calendars = await self._query_busy_slots(participants, start, end)
+        
         elif self.calendar_tools:
             # Legacy: через переданные calendar_tools
             for email in participants:
@@ -203,91 +196,209 @@ class MeetingScheduler:
             
         return calendars
     
-    def _parse_freebusy_result(
-        self, 
-        result, 
-        participants: List[str]
+    async def _query_busy_slots(
+        self,
+        participants: List[str],
+        start: datetime,
+        end: datetime
     ) -> Dict[str, List[Dict]]:
         """
-        Парсит результат FreeBusy API в словарь календарей.
+        Получает занятость участников через FreeBusy API.
+        
+        Участники делятся на чанки по freebusy_chunk_size (лимит API), чанки
+        запрашиваются параллельно. Для участников из упавших чанков и с
+        ошибками FreeBusy (кроме отсутствия доступа) занятость запрашивается
+        через list_events их календарей — тоже параллельно, не более
+        max_concurrency запросов одновременно.
         
         Args:
-            result: Результат от MCP freebusy_query
             participants: Список email участников
+            start: Начало периода
+            end: Конец периода
         
         Returns:
             Словарь {email: [{"start": ..., "end": ...}, ...]}
-            
+        
         Raises:
-            ValueError: Если календарь участника недоступен (notFound, etc.)
+            ValueError: Если календарь участника недоступен (нет доступа)
+            AvailabilityUnknownError: Если занятость участников не удалось получить
         """
-        calendars = {email: [] for email in participants}
-        unavailable_calendars = []
+        mcp_manager = get_mcp_manager()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        time_min = start.isoformat() + "Z" if "+" not in start.isoformat() else start.isoformat()
+        time_max = end.isoformat() + "Z" if "+" not in end.isoformat() else end.isoformat()
+        
+        async def query_chunk(chunk: List[str]):
+            freebusy_args = {
+                "timeMin": time_min,
+                "timeMax": time_max,
+                "items": [{"id": email} for email in chunk]
+            }
+            async with semaphore:
+                result = await mcp_manager.call_tool("freebusy_query", freebusy_args, server_name="calendar")
+            return self._read_freebusy_result(result, chunk)
         
-        try:
-            # Handle MCP result format
-            if isinstance(result, list) and len(result) > 0:
-                first_item = result[0]
-                if hasattr(first_item, 'text'):
-                    result_text = first_item.text
-                elif isinstance(first_item, dict) and 'text' in first_item:
-                    result_text = first_item['text']
-                else:
-                    result_text = str(first_item)
-                
-                parsed = json.loads(result_text)
-            elif isinstance(result, str):
-                parsed = json.loads(result)
-            elif isinstance(result, dict):
-                parsed = result
-            else:
-                logger.warning(f"[MeetingScheduler] Unknown FreeBusy result type: {type(result)}")
-                return calendars
-            
-            # Extract calendars data from FreeBusy response
-            freebusy_calendars = parsed.get("calendars", {})
+        size = max(1, self.freebusy_chunk_size)
+        chunks = [participants[i:i + size] for i in range(0, len(participants), size)]
+        logger.info(
+            f"[MeetingScheduler] Querying FreeBusy for {len(participants)} participants "
+            f"in {len(chunks)} chunk(s)"
+        )
+        results = await asyncio.gather(*(query_chunk(chunk) for chunk in chunks), return_exceptions=True)
+        
+        calendars: Dict[str, List[Dict]] = {}
+        unavailable: List[str] = []
+        failed: List[str] = []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                logger.warning(f"[MeetingScheduler] FreeBusy failed for {len(chunk)} participants: {result}")
+                failed.extend(chunk)
+                continue
+            chunk_calendars, chunk_unavailable, chunk_failed = result
+            calendars.update(chunk_calendars)
+            unavailable.extend(chunk_unavailable)
+            failed.extend(chunk_failed)
+        
+        # Нет доступа к календарю — ошибка, fallback не поможет
+        if unavailable:
+            raise ValueError(
+                f"Не удалось проверить календари участников: {', '.join(unavailable)}. "
+                f"Участники должны открыть доступ к своему календарю или находиться в том же домене Google Workspace."
+            )
+        
+        if failed:
+            logger.warning(f"[MeetingScheduler] Falling back to list_events for {len(failed)} participants")
             
-            for email in participants:
-                calendar_data = freebusy_calendars.get(email, {})
-                busy_slots = calendar_data.get("busy", [])
-                
-                # Check for errors FIRST - calendar might be unavailable
-                errors = calendar_data.get("errors", [])
-                if errors:
-                    for error in errors:
-                        if error.get("reason") in ("notFound", "notAuthorized", "forbidden"):
-                            unavailable_calendars.append(email)
-                            logger.warning(f"[MeetingScheduler] Calendar unavailable for {email}: {error}")
-                            break
-                    else:
-                        # Other errors - just log warning
-                        logger.warning(f"[MeetingScheduler] FreeBusy errors for {email}: {errors}")
-                
-                # Convert FreeBusy format to our format
+            async def list_calendar(email: str) -> List[Dict]:
                 events = []
-                for slot in busy_slots:
-                    events.append({
-                        "start": slot.get("start"),
-                        "end": slot.get("end")
-                    })
-                
-                calendars[email] = events
+                page_token = None
+                while True:
+                    args = {
+                        "calendarId": email,
+                        "timeMin": time_min,
+                        "timeMax": time_max,
+                        "maxResults": 250
+                    }
+                    if page_token:
+                        args["pageToken"] = page_token
+                    async with semaphore:
+                        result = await mcp_manager.call_tool("list_events", args, server_name="calendar")
+                    page = self._load_mcp_json(result)
+                    events.extend(self._parse_mcp_result(page))
+                    # Занятой календарь не помещается в одну страницу
+                    page_token = page.get("nextPageToken")
+                    if not page_token:
+                        return events
             
-            # If any calendars are unavailable, raise an error
-            if unavailable_calendars:
-                raise ValueError(
-                    f"Не удалось проверить календари участников: {', '.join(unavailable_calendars)}. "
-                    f"Участники должны открыть доступ к своему календарю или находиться в том же домене Google Workspace."
-                )
+            events = await asyncio.gather(*(list_calendar(email) for email in failed), return_exceptions=True)
+            unknown = []
+            for email, result in zip(failed, events):
+                if isinstance(result, Exception):
+                    logger.error(f"[MeetingScheduler] Fallback failed for {email}: {result}")
+                    unknown.append(email)
+                else:
+                    calendars[email] = result
             
-            return calendars
+            # Участник с неизвестной занятостью не считается свободным
+            if unknown:
+                raise AvailabilityUnknownError(unknown)
+        
+        logger.info(f"[MeetingScheduler] FreeBusy returned busy slots for {len(calendars)} calendars")
+        return calendars
+    
+    def _read_freebusy_result(
+        self,
+        result,
+        participants: List[str]
+    ) -> Tuple[Dict[str, List[Dict]], List[str], List[str]]:
+        """
+        Разбирает результат FreeBusy API.
+        
+        Args:
+            result: Результат от MCP freebusy_query
+            participants: Список email участников запроса
+        
+        Returns:
+            (календари {email: [{"start": ..., "end": ...}]},
+             участники без доступа к календарю,
+             участники с другими ошибками FreeBusy или без ответа — их
+             занятость неизвестна)
+        
+        Raises:
+            ValueError: Если результат не удалось разобрать
+            RuntimeError: Если сервер календаря вернул ошибку запроса
+        """
+        parsed = self._load_mcp_json(result)
+        
+        # Extract calendars data from FreeBusy response
+        freebusy_calendars = parsed.get("calendars", {})
+        calendars = {}
+        unavailable = []
+        failed = []
+        
+        for email in participants:
+            calendar_data = freebusy_calendars.get(email)
+            if calendar_data is None:
+                # Нет в ответе — не значит свободен
+                logger.warning(f"[MeetingScheduler] FreeBusy returned no calendar for {email}")
+                failed.append(email)
+                continue
             
-        except ValueError:
-            # Re-raise ValueError (calendar unavailable)
-            raise
-        except Exception as e:
-            logger.error(f"[MeetingScheduler] Error parsing FreeBusy result: {e}")
-            return calendars
+            # Check for errors FIRST - calendar might be unavailable
+            errors = calendar_data.get("errors", [])
+            if errors:
+                if any(error.get("reason") in ACCESS_DENIED_REASONS for error in errors):
+                    logger.warning(f"[MeetingScheduler] Calendar unavailable for {email}: {errors}")
+                    unavailable.append(email)
+                else:
+                    logger.warning(f"[MeetingScheduler] FreeBusy errors for {email}: {errors}")
+                    failed.append(email)
+                continue
+            
+            # Convert FreeBusy format to our format
+            calendars[email] = [
+                {"start": slot.get("start"), "end": slot.get("end")}
+                for slot in calendar_data.get("busy", [])
+            ]
+        
+        return calendars, unavailable, failed
+    
+    def _load_mcp_json(self, result) -> Dict[str, Any]:
+        """
+        Разбирает JSON-ответ MCP call_tool (TextContent list, str или dict).
+        
+        Args:
+            result: Результат от MCP
+        
+        Returns:
+            Словарь ответа
+        
+        Raises:
+            ValueError: Если ответ не JSON-объект
+            RuntimeError: Если сервер календаря вернул ошибку ({"error": ...})
+        """
+        # Handle MCP result format
+        if isinstance(result, list) and len(result) > 0:
+            first_item = result[0]
+            if hasattr(first_item, 'text'):
+                result_text = first_item.text
+            elif isinstance(first_item, dict) and 'text' in first_item:
+                result_text = first_item['text']
+            else:
+                result_text = str(first_item)
+            
+            parsed = json.loads(result_text)
+        elif isinstance(result, str):
+            parsed = json.loads(result)
+        else:
+            parsed = result
+        
+        if not isinstance(parsed, dict):
+            raise ValueError(f"Unknown MCP result type: {type(parsed)}")
+        # Сервер календаря возвращает ошибки API как {"error": ...}
+        if parsed.get("error"):
+            raise RuntimeError(parsed["error"])
+        return parsed
     
     def _parse_mcp_result(self, result) -> List[Dict]:
         """
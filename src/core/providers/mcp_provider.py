@@ -3,7 +3,7 @@ MCP Tool Provider - wraps existing MCP/LangChain tools as ActionProvider.
 Loads all MCP tools and classifies them as READ or WRITE capabilities.
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 from langchain_core.tools import BaseTool
 
 from src.core.action_provider import (
@@ -17,6 +17,22 @@ from src.utils.logging_config import get_logger
 logger = get_logger(__name__)
 
 
+# Seconds READ results stay in the registry result cache, by service
+CACHE_TTL_BY_SERVICE = {
+    "sheets": 60.0,
+    "docs": 60.0,
+    "slides": 60.0,
+    "workspace": 60.0,
+    "calendar": 30.0,
+    "gmail": 30.0,
+    "onec": 120.0,
+    "projectlad": 120.0,
+}
+
+# READ tools with side effects in the UI, never served from cache
+UNCACHED_READ_TOOLS = {"find_and_open_file"}
+
+
 class MCPToolProvider(ActionProvider):
     """
     Wraps existing MCP/LangChain tools as ActionProvider.
@@ -119,7 +135,8 @@ class MCPToolProvider(ActionProvider):
                     provider_type=ProviderType.MCP_TOOL,
                     input_schema=input_schema,
                     service=service,
-                    tags=self._get_tags(name)
+                    tags=self._get_tags(name),
+                    cache_ttl_sec=self._get_cache_ttl(name, category, service)
                 ))
             except Exception as e:
                 logger.error(f"[MCPToolProvider] Failed to create capability for {name}: {e}")
@@ -256,6 +273,22 @@ class MCPToolProvider(ActionProvider):
         else:
             return "unknown"
     
+    def _get_cache_ttl(self, name: str, category: CapabilityCategory, service: str) -> Optional[float]:
+        """
+        Get result cache TTL for a tool.
+        
+        Args:
+            name: Tool name
+            category: Tool category
+            service: Service identifier
+            
+        Returns:
+            TTL in seconds, or None if results must not be cached
+        """
+        if category != CapabilityCategory.READ or name in UNCACHED_READ_TOOLS:
+            return None
+        return CACHE_TTL_BY_SERVICE.get(service)
+    
     def _get_tags(self, name: str) -> List[str]:
         """
         Get tags for a tool based on its name and service.
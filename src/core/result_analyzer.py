@@ -9,8 +9,11 @@ from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_anthropic import ChatAnthropic
 
 from src.core.react_state import ActionRecord, Observation
+from src.utils.cassette import with_cassette
 from src.utils.config_loader import get_config
 from src.utils.logging_config import get_logger
+from src.utils.usage_accounting import usage_purpose
+from src.agents.model_factory import llm_callbacks
 
 logger = get_logger(__name__)
 
@@ -43,11 +46,12 @@ class ResultAnalyzer:
         """
         self.model_name = model_name
         config = get_config()
-        self.llm = ChatAnthropic(
+        self.llm = with_cassette(ChatAnthropic(
             model="claude-sonnet-4-5-20250929",
             api_key=config.anthropic_api_key,
-            temperature=0.3
-        )
+            temperature=0.3,
+            callbacks=llm_callbacks("claude-sonnet-4-5")
+        ))
         logger.info(f"[ResultAnalyzer] Initialized with model {model_name or 'default'}")
     
     async def analyze(
@@ -157,6 +161,7 @@ class ResultAnalyzer:
         # If result is too complex or ambiguous, return None to trigger LLM analysis
         return None
     
+    @usage_purpose("analyze_result")
     async def _llm_analyze(
         self,
         action: ActionRecord,
@@ -1,16 +1,26 @@
 """
-SmartProgressGenerator - генерирует контекстные progress-сообщения на основе анализа задачи.
+SmartProgressGenerator - progress-сообщения по реальным сигналам пайплайна.
 
-Цель: показывать пользователю конкретную информацию о текущей работе не реже одного раза в 5 секунд,
-адаптированную к типу задачи (календарь, email, файлы и т.д.).
+Сообщения строятся из событий выполнения (src/utils/progress_signals.py):
+первый токен LLM, старт/завершение инструмента, латентность MCP-вызова,
+объём полученных данных. ETA оценивается по истории латентностей инструментов,
+которая сохраняется локально (ToolLatencyStats). Контекстные сообщения по типу
+задачи (календарь, email, файлы и т.д.) отправляются при старте и как fallback,
+только если сигналов не было дольше настроенной паузы. Частота сообщений
+ограничена: сигналы, пришедшие чаще MIN_MESSAGE_INTERVAL, схлопываются в последний.
 """
 import asyncio
+import json
+import os
 import re
+import threading
 import time
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
 from src.api.websocket_manager import WebSocketManager
+from src.utils import progress_signals
 from src.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -24,8 +34,140 @@ class TaskPattern:
     category: str
 
 
+class ToolLatencyStats:
+    """Персистентная история латентностей инструментов для оценки ETA.
+    
+    Хранит по каждому инструменту экспоненциальное скользящее среднее
+    длительности и число наблюдений в JSON-файле.
+    """
+    
+    # Вес нового наблюдения в скользящем среднем
+    ALPHA = 0.3
+    
+    # Запись файла из нескольких потоков (asave разных сессий) сериализуется
+    _write_lock = threading.Lock()
+    
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: JSON-файл истории (None - только в памяти)
+        """
+        self.path = Path(path) if path else None
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._dirty = False
+        self._load()
+    
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._stats = {
+                name: {"mean": float(entry["mean"]), "count": int(entry["count"])}
+                for name, entry in data.items()
+            }
+        except Exception as e:
+            logger.warning(f"[ToolLatencyStats] Failed to load {self.path}: {e}")
+    
+    def record(self, tool: str, duration: float) -> None:
+        """
+        Добавляет наблюдение.
+        
+        Args:
+            tool: Имя инструмента
+            duration: Длительность в секундах
+        """
+        entry = self._stats.get(tool)
+        if entry is None:
+            self._stats[tool] = {"mean": duration, "count": 1}
+        else:
+            entry["mean"] += self.ALPHA * (duration - entry["mean"])
+            entry["count"] += 1
+        self._dirty = True
+    
+    def expected(self, tool: str) -> Optional[float]:
+        """Ожидаемая длительность инструмента в секундах (None если истории нет)."""
+        entry = self._stats.get(tool)
+        return entry["mean"] if entry else None
+    
+    def save(self) -> None:
+        """Сохраняет историю, если были новые наблюдения."""
+        payload = self._take_payload()
+        if payload is not None:
+            self._write(payload)
+    
+    async def asave(self) -> None:
+        """Как save(), но запись файла выполняется в отдельном потоке."""
+        payload = self._take_payload()
+        if payload is not None:
+            await asyncio.to_thread(self._write, payload)
+    
+    def _take_payload(self) -> Optional[str]:
+        """Снимок истории для записи (None если сохранять нечего)."""
+        if not self._dirty or not self.path:
+            return None
+        self._dirty = False
+        return json.dumps(self._stats, ensure_ascii=False, indent=2)
+    
+    def _write(self, payload: str) -> None:
+        try:
+            with self._write_lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+                tmp_path.write_text(payload, encoding="utf-8")
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            self._dirty = True
+            logger.warning(f"[ToolLatencyStats] Failed to save {self.path}: {e}")
+
+
+_tool_latency_stats: Optional[ToolLatencyStats] = None
+
+
+def get_tool_latency_stats() -> ToolLatencyStats:
+    """Get the global per-tool latency history."""
+    global _tool_latency_stats
+    if _tool_latency_stats is None:
+        from src.utils.config_loader import get_config
+        _tool_latency_stats = ToolLatencyStats(get_config().tool_latency_stats_path)
+    return _tool_latency_stats
+
+
+def _result_size(result: Any, size_hint: Optional[int] = None) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Размер результата инструмента: (символы/байты или None, число строк/записей или None).
+    
+    Результат не сериализуется: размер известен только для строк/байтов
+    или из size_hint, переданного источником сигнала.
+    """
+    rows = None
+    if isinstance(result, (list, tuple)):
+        rows = len(result)
+    elif isinstance(getattr(result, "rows", None), list):
+        # ToolResult: строки для UI, по одной на запись
+        rows = len(result.rows)
+    elif isinstance(result, dict):
+        for key in ("values", "rows", "items", "events", "files", "messages", "records"):
+            if isinstance(result.get(key), list):
+                rows = len(result[key])
+                break
+    if size_hint is not None:
+        return size_hint, rows
+    if isinstance(result, (str, bytes, bytearray)):
+        return len(result), rows
+    return None, rows
+
+
+def _format_bytes(size: int) -> str:
+    if size < 1024:
+        return f"{size} Б"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} КБ"
+    return f"{size / (1024 * 1024):.1f} МБ"
+
+
 class SmartProgressGenerator:
-    """Генерирует контекстные progress-сообщения на основе анализа задачи."""
+    """Генерирует progress-сообщения по сигналам пайплайна с оценкой ETA."""
     
     # Паттерны задач с соответствующими сообщениями
     TASK_PATTERNS: List[TaskPattern] = [
@@ -106,35 +248,51 @@ class SmartProgressGenerator:
         "Завершаю обработку..."
     ]
     
-    # Интервал между сообщениями (секунды)
-    MESSAGE_INTERVAL = 4.0  # 4 секунды для гарантии "не реже одного раза в 5 секунд"
-    
-    # Интервал обновления таймера (секунды)
-    TIMER_INTERVAL = 1.0
+    # Минимальный интервал между сообщениями (секунды); более частые сигналы схлопываются
+    MIN_MESSAGE_INTERVAL = 1.0
     
     def __init__(
         self,
         ws_manager: WebSocketManager,
-        session_id: str
+        session_id: str,
+        silence_sec: Optional[float] = None,
+        latency_stats: Optional[ToolLatencyStats] = None
     ):
         """
         Args:
             ws_manager: WebSocket менеджер для отправки событий
             session_id: ID сессии
+            silence_sec: Пауза без сигналов до fallback-сообщения (по умолчанию из config)
+            latency_stats: История латентностей (по умолчанию глобальная)
         """
         self.ws_manager = ws_manager
         self.session_id = session_id
+        if silence_sec is None:
+            from src.utils.config_loader import get_config
+            silence_sec = get_config().smart_progress_silence_sec
+        self.silence_sec = silence_sec
+        self.latency_stats = latency_stats or get_tool_latency_stats()
         self._running = False
         self._task: Optional[asyncio.Task] = None
-        self._timer_task: Optional[asyncio.Task] = None
+        self._listener_token = None
+        self._wake = asyncio.Event()
+        self._pending: Optional[Dict[str, Any]] = None
         self._start_time: Optional[float] = None
         self._estimated_duration: Optional[int] = None
+        self._last_sent = 0.0
+        self._last_signal = 0.0
+        self._current_tool: Optional[Dict[str, Any]] = None
+        self._last_mcp: Optional[Dict[str, Any]] = None
         self._current_messages: List[str] = []
         self._message_index = 0
+        self._save_task: Optional[asyncio.Task] = None
     
     async def start(self, goal: str, estimated_duration_sec: int) -> None:
         """
-        Запускает генерацию progress-сообщений.
+        Запускает progress для выполнения задачи.
+        
+        Сразу отправляет контекстное сообщение по типу задачи, дальше сообщения
+        идут по сигналам пайплайна.
         
         Args:
             goal: Цель задачи
@@ -145,8 +303,12 @@ class SmartProgressGenerator:
             self.stop()
         
         self._running = True
-        self._start_time = time.time()
+        self._start_time = time.monotonic()
+        self._last_signal = self._start_time
         self._estimated_duration = estimated_duration_sec
+        self._pending = None
+        self._current_tool = None
+        self._last_mcp = None
         self._message_index = 0
         
         # Определяем сообщения на основе цели
@@ -161,22 +323,31 @@ class SmartProgressGenerator:
                 "goal": goal[:100]  # Первые 100 символов
             }
         )
+        await self._send_message(self._next_fallback_message(), "start")
         
-        # Запускаем задачи
-        self._task = asyncio.create_task(self._message_loop())
-        self._timer_task = asyncio.create_task(self._timer_loop())
+        self._listener_token = progress_signals.listen(self._on_signal)
+        self._task = asyncio.create_task(self._publish_loop())
     
     def stop(self) -> None:
-        """Останавливает генерацию progress-сообщений."""
+        """Останавливает progress и сохраняет историю латентностей."""
         self._running = False
+        self._pending = None
+        
+        if self._listener_token is not None:
+            progress_signals.unlisten(self._listener_token)
+            self._listener_token = None
         
         if self._task:
             self._task.cancel()
             self._task = None
         
-        if self._timer_task:
-            self._timer_task.cancel()
-            self._timer_task = None
+        # stop() вызывается из finally пайплайна: запись файла не блокирует event loop
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.latency_stats.save()
+        else:
+            self._save_task = loop.create_task(self.latency_stats.asave())
     
     def _get_messages_for_goal(self, goal: str) -> List[str]:
         """
@@ -184,7 +355,7 @@ class SmartProgressGenerator:
         
         Args:
             goal: Цель задачи
-            
+        
         Returns:
             Список сообщений для показа
         """
@@ -198,57 +369,121 @@ class SmartProgressGenerator:
         # Если паттерн не найден, используем дефолтные
         return self.DEFAULT_MESSAGES
     
-    async def _message_loop(self) -> None:
-        """Основной цикл отправки сообщений."""
+    def _next_fallback_message(self) -> str:
+        """Сообщение при отсутствии сигналов: текущий инструмент или контекст задачи."""
+        if self._current_tool:
+            elapsed = time.monotonic() - self._current_tool["started"]
+            message = f"Всё ещё выполняю {self._current_tool['display_name']} ({elapsed:.0f} с"
+            if self._current_tool["expected"]:
+                message += f", обычно ~{self._current_tool['expected']:.0f} с"
+            return message + ")"
+        
+        message = self._current_messages[self._message_index % len(self._current_messages)]
+        self._message_index += 1
+        return message
+    
+    def _on_signal(self, signal: str, data: Dict[str, Any]) -> None:
+        """Обрабатывает сигнал пайплайна (синхронно, без ожиданий)."""
+        if not self._running:
+            return
+        now = time.monotonic()
+        self._last_signal = now
+        message = None
+        
+        if signal == progress_signals.TOOL_START:
+            tool = data.get("tool", "")
+            display_name = data.get("display_name") or tool
+            expected = self.latency_stats.expected(tool)
+            self._current_tool = {"tool": tool, "display_name": display_name, "started": now, "expected": expected}
+            self._last_mcp = None
+            message = f"Выполняю {display_name}..."
+            if expected and expected >= 1:
+                message += f" (обычно ~{expected:.0f} с)"
+        
+        elif signal == progress_signals.TOOL_END:
+            tool = data.get("tool", "")
+            duration = float(data.get("duration", 0.0))
+            if data.get("success", True):
+                self.latency_stats.record(tool, duration)
+            display_name = self._current_tool["display_name"] if self._current_tool else tool
+            self._current_tool = None
+            if data.get("success", True):
+                size, rows = _result_size(data.get("result"), data.get("size"))
+                parts = []
+                if rows is not None:
+                    parts.append(f"{rows} записей")
+                if size is not None:
+                    parts.append(_format_bytes(size))
+                received = f"получено {', '.join(parts)}" if parts else "готово"
+                message = f"{display_name}: {received} за {duration:.1f} с"
+                if self._last_mcp:
+                    message += f" (сервер {self._last_mcp['server']}: {self._last_mcp['duration']:.1f} с)"
+            else:
+                message = f"{display_name}: ошибка через {duration:.1f} с"
+        
+        elif signal == progress_signals.MCP_CALL:
+            self._last_mcp = {"server": data.get("server", ""), "duration": float(data.get("duration", 0.0))}
+        
+        elif signal == progress_signals.LLM_FIRST_TOKEN:
+            message = f"Модель начала отвечать через {float(data.get('ttft', 0.0)):.1f} с"
+        
+        if message:
+            self._pending = {"message": message, "kind": signal}
+            self._wake.set()
+    
+    async def _publish_loop(self) -> None:
+        """Отправляет накопленные сообщения с ограничением частоты; fallback после паузы."""
         try:
             while self._running:
-                if self._message_index < len(self._current_messages):
-                    message = self._current_messages[self._message_index]
-                    
-                    await self.ws_manager.send_event(
-                        self.session_id,
-                        "smart_progress_message",
-                        {
-                            "message": message,
-                            "index": self._message_index,
-                            "total": len(self._current_messages)
-                        }
-                    )
-                    
-                    self._message_index += 1
-                
-                # Ждём интервал
-                await asyncio.sleep(self.MESSAGE_INTERVAL)
+                now = time.monotonic()
+                if self._pending is not None:
+                    wait = self._last_sent + self.MIN_MESSAGE_INTERVAL - now
+                    if wait <= 0:
+                        pending, self._pending = self._pending, None
+                        await self._send_message(pending["message"], pending["kind"])
+                        continue
+                else:
+                    quiet_since = max(self._last_sent, self._last_signal)
+                    wait = quiet_since + self.silence_sec - now
+                    if wait <= 0:
+                        await self._send_message(self._next_fallback_message(), "fallback")
+                        continue
                 
-                # Если все сообщения показаны, начинаем заново
-                if self._message_index >= len(self._current_messages):
-                    self._message_index = 0
-                    
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        
         except asyncio.CancelledError:
-            logger.debug("[SmartProgressGenerator] Message loop cancelled")
+            logger.debug("[SmartProgressGenerator] Publish loop cancelled")
         except Exception as e:
-            logger.error(f"[SmartProgressGenerator] Error in message loop: {e}")
+            logger.error(f"[SmartProgressGenerator] Error in publish loop: {e}")
+    
+    def _timing(self) -> Dict[str, Any]:
+        """Прошедшее время, оценка длительности и ETA текущего инструмента."""
+        now = time.monotonic()
+        elapsed = now - (self._start_time or now)
+        eta = None
+        if self._current_tool and self._current_tool["expected"]:
+            eta = max(self._current_tool["expected"] - (now - self._current_tool["started"]), 0.0)
+        estimated = max(float(self._estimated_duration or 0), elapsed + (eta or 0.0), 1.0)
+        timing = {
+            "elapsed_sec": int(elapsed),
+            "estimated_sec": int(round(estimated)),
+            "progress_percent": min(99, int(elapsed / estimated * 100)),
+        }
+        if eta is not None:
+            timing["eta_sec"] = round(eta, 1)
+        return timing
     
-    async def _timer_loop(self) -> None:
-        """Цикл обновления таймера."""
+    async def _send_message(self, message: str, kind: str) -> None:
+        self._last_sent = time.monotonic()
         try:
-            while self._running:
-                if self._start_time and self._estimated_duration:
-                    elapsed = time.time() - self._start_time
-                    
-                    await self.ws_manager.send_event(
-                        self.session_id,
-                        "smart_progress_timer",
-                        {
-                            "elapsed_sec": int(elapsed),
-                            "estimated_sec": self._estimated_duration,
-                            "progress_percent": min(100, int((elapsed / self._estimated_duration) * 100))
-                        }
-                    )
-                
-                await asyncio.sleep(self.TIMER_INTERVAL)
-                
-        except asyncio.CancelledError:
-            logger.debug("[SmartProgressGenerator] Timer loop cancelled")
+            await self.ws_manager.send_event(
+                self.session_id,
+                "smart_progress_message",
+                {"message": message, "kind": kind, **self._timing()}
+            )
         except Exception as e:
-            logger.error(f"[SmartProgressGenerator] Error in timer loop: {e}")
+            logger.error(f"[SmartProgressGenerator] Failed to send progress: {e}")
@@ -0,0 +1,222 @@
+"""
+Read-through cache of READ capability results.
+
+The planner often repeats a READ call with the same arguments within one run
+(get_sheet_data, list_files, get_calendar_events), and follow-up messages of
+a session fetch the same data again. CapabilityRegistry.execute serves such
+calls from this cache:
+
+- the key is (session, capability, canonical arguments); arguments starting
+  with "_" (_session_id, _intent_id) are not part of it
+- only capabilities with cache_ttl_sec set are cached, for that long
+- concurrent identical calls share one execution (single flight)
+- a WRITE invalidates cached reads of the resources it touches: entries whose
+  resource ids (spreadsheet_id, file_id, ...) intersect the write's, listings
+  without resource ids, and, for writes without resource ids (create_event,
+  send_email), every entry of the same service. Writes invalidate across
+  sessions, since sessions can share documents
+- a read that overlaps a write is not stored, so it cannot bring stale data back
+
+Hits return the stored result object unchanged, so the engine observes them
+like any other tool result.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import asyncio
+import json
+import time
+
+from src.core.action_provider import ActionCapability, CapabilityCategory
+from src.utils.logging_config import get_logger
+from src.utils.metrics import TOOL_CACHE_REQUESTS
+
+logger = get_logger(__name__)
+
+
+DEFAULT_MAX_ENTRIES = 512
+
+# Arguments that identify the resource a call reads or changes
+RESOURCE_ARGUMENTS = (
+    "spreadsheet_id",
+    "document_id",
+    "presentation_id",
+    "file_id",
+    "file_ids",
+    "folder_id",
+    "calendar_id",
+    "event_id",
+    "event_ids",
+    "message_id",
+    "project_id",
+)
+
+CacheKey = Tuple[str, str, str]
+
+
+@dataclass
+class _Entry:
+    result: Any
+    expires_at: float
+    service: str
+    resources: FrozenSet[str]
+
+
+def canonical_arguments(arguments: Dict[str, Any]) -> str:
+    """
+    Serialize arguments independently of key order.
+    
+    Args:
+        arguments: Capability arguments
+    
+    Returns:
+        JSON string without private ("_"-prefixed) arguments
+    """
+    public = {key: value for key, value in (arguments or {}).items() if not key.startswith("_")}
+    return json.dumps(public, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def resource_ids(arguments: Dict[str, Any]) -> FrozenSet[str]:
+    """
+    Collect ids of the resources a call refers to.
+    
+    Args:
+        arguments: Capability arguments
+    
+    Returns:
+        Set of resource ids (empty for listings and searches)
+    """
+    ids = set()
+    for key in RESOURCE_ARGUMENTS:
+        value = (arguments or {}).get(key)
+        if isinstance(value, (list, tuple, set)):
+            ids.update(str(item) for item in value if item)
+        elif value:
+            ids.add(str(value))
+    return frozenset(ids)
+
+
+class ToolResultCache:
+    """TTL cache with single flight and write invalidation for capability results."""
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, enabled: bool = True):
+        """
+        Initialize cache.
+        
+        Args:
+            max_entries: Entries kept before the least recently used are evicted
+            enabled: When False every call goes to the provider
+        """
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._write_generation = 0
+        self.hits = 0
+        self.misses = 0
+    
+    async def execute(
+        self,
+        capability: ActionCapability,
+        arguments: Dict[str, Any],
+        session_id: Optional[str],
+        call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run a capability call through the cache.
+        
+        Args:
+            capability: Capability being executed
+            arguments: Its arguments
+            session_id: Session the call belongs to
+            call: Coroutine factory that executes the capability
+        
+        Returns:
+            Cached, shared or fresh result
+        """
+        if not self.enabled:
+            return await call()
+        
+        if capability.category == CapabilityCategory.WRITE:
+            # Reads in flight during the write are not stored
+            self._write_generation += 1
+            try:
+                return await call()
+            finally:
+                # Also after a failed write: it may have partially applied
+                self.invalidate(capability.service, resource_ids(arguments))
+        
+        ttl = capability.cache_ttl_sec
+        if not ttl:
+            return await call()
+        
+        key = (session_id or "", capability.name, canonical_arguments(arguments))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                TOOL_CACHE_REQUESTS.inc(tool=capability.name, result="hit")
+                logger.debug(f"[ToolResultCache] Hit for '{capability.name}'")
+                return entry.result
+            del self._entries[key]
+        
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            TOOL_CACHE_REQUESTS.inc(tool=capability.name, result="shared")
+            return await asyncio.shield(inflight)
+        
+        self.misses += 1
+        TOOL_CACHE_REQUESTS.inc(tool=capability.name, result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._write_generation
+        try:
+            result = await call()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Waiters receive the error; nobody else has to retrieve it
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        
+        future.set_result(result)
+        if generation == self._write_generation:
+            self._store(key, _Entry(result, time.monotonic() + ttl, capability.service, resource_ids(arguments)))
+        return result
+    
+    def invalidate(self, service: str, resources: FrozenSet[str]) -> int:
+        """
+        Drop cached reads affected by a write.
+        
+        Args:
+            service: Service of the write
+            resources: Resource ids the write touched
+        
+        Returns:
+            Number of dropped entries
+        """
+        self._write_generation += 1
+        stale = [
+            key for key, entry in self._entries.items()
+            if not entry.resources
+            or entry.resources & resources
+            or (not resources and entry.service == service)
+        ]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            logger.debug(f"[ToolResultCache] Invalidated {len(stale)} entries after {service} write")
+        return len(stale)
+    
+    def _store(self, key: CacheKey, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
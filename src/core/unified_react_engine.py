@@ -23,11 +23,22 @@ from src.core.action_provider import CapabilityCategory
 from src.core.file_context_resolver import FileContextResolver
 from src.core.action_filter import ActionFilter
 from src.api.websocket_manager import WebSocketManager
-from src.agents.model_factory import create_llm, supports_vision
+from src.agents.model_factory import create_llm, supports_vision, llm_callbacks
+from src.mcp_tools.tool_result import ToolResult
+from src.utils.cassette import with_cassette
+from src.utils.delta_stream import DeltaStream
 from src.utils.logging_config import get_logger
+from src.utils.metrics import REACT_ITERATIONS, REACT_PHASE_DURATION
+from src.utils import progress_signals
+from src.utils.tracing import get_tracer, traced
+from src.utils.usage_accounting import current_usage_run, get_usage_tracker, usage_purpose
 
 logger = get_logger(__name__)
 
+# Rows of a ToolResult streamed to the UI as operation_data events; the rest
+# are summarized in one row (full items stay in ToolResult.data)
+MAX_STREAMED_ROWS = 50
+
 
 @dataclass
 class ReActConfig:
@@ -173,7 +184,7 @@ class UnifiedReActEngine:
                 if provider == "anthropic" and model_config.get("supports_reasoning"):
                     reasoning_type = model_config.get("reasoning_type")
                     if reasoning_type == "extended_thinking":
-                        return ChatAnthropic(
+                        return with_cassette(ChatAnthropic(
                             model=model_config["model_id"],
                             api_key=config.anthropic_api_key,
                             streaming=True,
@@ -181,8 +192,9 @@ class UnifiedReActEngine:
                             thinking={
                                 "type": "enabled",
                                 "budget_tokens": budget_tokens
-                            }
-                        )
+                            },
+                            callbacks=llm_callbacks(config_model_name)
+                        ))
             
             # Fallback
             return create_llm(config_model_name)
@@ -209,6 +221,28 @@ class UnifiedReActEngine:
         Returns:
             Execution result
         """
+        # Standalone engine runs account their own usage; under AgentWrapper
+        # the run spans the whole message (all Plan Mode phases)
+        tracker = get_usage_tracker()
+        usage_run = None if current_usage_run() else tracker.start_run(self.session_id)
+        try:
+            return await self._execute(goal, context, file_ids, phase)
+        finally:
+            if usage_run:
+                await self.ws_manager.send_event(
+                    self.session_id,
+                    "usage_summary",
+                    tracker.end_run(usage_run)
+                )
+    
+    async def _execute(
+        self,
+        goal: str,
+        context: ConversationContext,
+        file_ids: Optional[List[str]] = None,
+        phase: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Execute ReAct cycle for goal (see execute)."""
         file_ids = file_ids or []
         
         # #region agent log
@@ -367,6 +401,8 @@ class UnifiedReActEngine:
             {"thinking_id": self._current_thinking_id, "started_at": int(time.time() * 1000)}
         )
         
+        # One span per loop iteration; closed when the next one starts or the loop exits
+        iteration_span = None
         try:
             # Main ReAct loop
             while state.iteration < state.max_iterations:
@@ -374,8 +410,17 @@ class UnifiedReActEngine:
                     logger.info(f"[UnifiedReActEngine] Stop requested at iteration {state.iteration}")
                     break
                 
+                budget_reason = get_usage_tracker().check_budget()
+                if budget_reason:
+                    logger.warning(f"[UnifiedReActEngine] {budget_reason}, stopping at iteration {state.iteration}")
+                    return await self._finalize_timeout(state, context, budget_reason)
+                
                 state.iteration += 1
+                get_usage_tracker().set_iteration(state.iteration)
                 logger.info(f"[UnifiedReActEngine] Starting iteration {state.iteration}")
+                if iteration_span:
+                    iteration_span.end()
+                iteration_span = get_tracer().open_span("react.iteration", {"iteration": state.iteration})
                 
                 # #region agent log - H_ITER: Iteration start with full context
                 # #endregion
@@ -397,6 +442,7 @@ class UnifiedReActEngine:
                 # #region agent log - H2: After _think_and_plan timing
                 _think_plan_end = time.time()
                 # #endregion
+                REACT_PHASE_DURATION.observe(_think_plan_end - _think_plan_start, phase="think")
                 
                 state.current_thought = thought
                 state.add_reasoning_step("think", thought)
@@ -789,16 +835,35 @@ class UnifiedReActEngine:
                 _exec_action_start = time.time()
                 # #endregion
                 
+                executed_tool = action_plan.get("tool_name", "")
+                progress_signals.emit(
+                    progress_signals.TOOL_START,
+                    tool=executed_tool,
+                    display_name=self._get_tool_display_name(executed_tool, action_plan.get("arguments", {}))
+                )
                 try:
                     result = await self._execute_action(action_plan, context)
                     
                     # #region agent log - H3: After _execute_action SUCCESS
                     _exec_action_end = time.time()
                     # #endregion
+                    progress_signals.emit(
+                        progress_signals.TOOL_END,
+                        tool=executed_tool,
+                        duration=_exec_action_end - _exec_action_start,
+                        success=True,
+                        result=result
+                    )
                 except Exception as e:
                     # #region agent log - H3,H4: _execute_action ERROR
                     _exec_action_end = time.time()
                     # #endregion
+                    progress_signals.emit(
+                        progress_signals.TOOL_END,
+                        tool=executed_tool,
+                        duration=_exec_action_end - _exec_action_start,
+                        success=False
+                    )
                     error_msg = str(e)
                     logger.error(f"[UnifiedReActEngine] Action execution failed: {error_msg}")
                     
@@ -818,8 +883,11 @@ class UnifiedReActEngine:
                     else:
                         result = f"Error: {error_msg}"
                 
+                REACT_PHASE_DURATION.observe(_exec_action_end - _exec_action_start, phase="act")
+                
                 # 4. OBSERVE - Analyze result
                 state.status = "observing"
+                _observe_start = time.time()
                 observation = state.add_observation(
                     action_record,
                     result,
@@ -828,7 +896,7 @@ class UnifiedReActEngine:
                 
                 # #region agent log - H2_OBSERVATION: Tool result saved
                 await self._stream_reasoning("react_observation", {
-                    "result": str(result),  # Full result - no truncation
+                    "result": result if isinstance(result, ToolResult) else str(result),  # Full result - no truncation
                     "iteration": state.iteration
                 })
                 
@@ -844,6 +912,7 @@ class UnifiedReActEngine:
                 observation.success = analysis.is_success
                 observation.error_message = analysis.error_message
                 observation.extracted_data = analysis.extracted_data
+                REACT_PHASE_DURATION.observe(time.time() - _observe_start, phase="observe")
                 
                 state.add_reasoning_step("observe", f"Analysis: {analysis.progress_toward_goal:.0%} progress", {
                     "success": analysis.is_success,
@@ -929,6 +998,8 @@ class UnifiedReActEngine:
             return await self._finalize_timeout(state, context)
             
         except Exception as e:
+            if iteration_span:
+                iteration_span.set_status("ERROR", str(e))
             logger.error(f"[UnifiedReActEngine] Error in execute: {e}", exc_info=True)
             await self.ws_manager.send_event(
                 self.session_id,
@@ -940,9 +1011,13 @@ class UnifiedReActEngine:
             )
             raise
         finally:
+            if iteration_span:
+                iteration_span.end()
+            REACT_ITERATIONS.observe(state.iteration)
             # Останавливаем SmartProgress в любом случае
             self.smart_progress.stop()
     
+    @usage_purpose("needs_tools")
     async def _needs_tools(self, goal: str, context: ConversationContext) -> bool:
         """
         Determine if the query needs tools or can be answered directly.
@@ -1242,6 +1317,7 @@ class UnifiedReActEngine:
             # Default to using tools if check fails
             return True
     
+    @usage_purpose("answer_directly")
     async def _answer_directly(
         self,
         goal: str,
@@ -1842,6 +1918,8 @@ class UnifiedReActEngine:
         """
         if result is None:
             return None
+        if isinstance(result, ToolResult) and result.summary:
+            return f"✅ {result.summary}"
             
         result_str = str(result)
         
@@ -1880,123 +1958,122 @@ class UnifiedReActEngine:
     class StreamingThoughtParser:
         """Парсит thought из стрима и отправляет по WebSocket.
         
-        Также отправляет intent_detail события если передан intent_id,
+        Также отправляет intent_thinking_append события если передан intent_id,
         что позволяет показывать thinking в UI как часть intent блока.
+        
+        thinking_chunk и intent_thinking_append несут только новый текст с
+        offset/seq (см. src/utils/delta_stream.py); thinking_completed несёт
+        полный текст мысли. Каждый chunk обрабатывается за время, зависящее
+        только от его длины, а не от длины всего ответа.
         """
         
+        OPEN_TAG = "<thought>"
+        CLOSE_TAG = "</thought>"
+        
         def __init__(self, ws_manager: WebSocketManager, session_id: str, intent_id: Optional[str] = None):
             self.ws_manager = ws_manager
             self.session_id = session_id
             self.intent_id = intent_id  # Для отправки intent_thinking_append
-            self.buffer = ""
             self.thought_started = False
             self.thought_complete = False
-            self.thought_content = ""
             self.thinking_id = f"thinking_{session_id}_{int(time.time() * 1000)}"
+            self._head = ""  # Текст до <thought>
+            self._pending = ""  # Текст thought, ещё не отправленный (пробелы или начало </thought>)
+            self._tail: List[str] = []  # Текст после </thought> (action часть)
+            self._thought = DeltaStream()
+            self._intent_text = DeltaStream(delta_key="text")
+        
+        @property
+        def thought_content(self) -> str:
+            return self._thought.text
         
         async def process_chunk(self, chunk: str) -> None:
             """Обрабатывает chunk, извлекает thought и стримит.
             
             Отправляет:
             - thinking_chunk: legacy событие для ThinkingMessage
-            - intent_detail: новое событие для IntentMessage (если есть intent_id)
+            - intent_thinking_append: событие для IntentMessage (если есть intent_id)
             """
-            self.buffer += chunk
+            if self.thought_complete:
+                self._tail.append(chunk)
+                return
             
-            # Проверяем начало thought
-            if "<thought>" in self.buffer and not self.thought_started:
+            if not self.thought_started:
+                self._head += chunk
+                start = self._head.find(self.OPEN_TAG)
+                if start < 0:
+                    return
                 self.thought_started = True
                 await self.ws_manager.send_event(
                     self.session_id,
                     "thinking_started",
                     {"thinking_id": self.thinking_id}
                 )
-                # Удаляем открывающий тег из буфера
-                self.buffer = self.buffer.replace("<thought>", "", 1)
+                # Удаляем открывающий тег, остальное - начало thought
+                chunk = self._head[:start] + self._head[start + len(self.OPEN_TAG):]
+                self._head = ""
             
-            # Если thought начался, извлекаем контент
-            if self.thought_started and not self.thought_complete:
-                # Ищем закрывающий тег
-                if "</thought>" in self.buffer:
-                    # Извлекаем контент до закрывающего тега
-                    parts = self.buffer.split("</thought>", 1)
-                    full_thought = parts[0]
-                    
-                    # FIX: Вычисляем только НОВУЮ часть (то, что ещё не было в thought_content)
-                    # Это исправляет баг дублирования!
-                    final_new_part = full_thought[len(self.thought_content):] if self.thought_content else full_thought
-                    
-                    # Стримим только новую часть (если есть)
-                    if final_new_part.strip():
-                        await self.ws_manager.send_event(
-                            self.session_id,
-                            "thinking_chunk",
-                            {
-                                "thinking_id": self.thinking_id,
-                                "chunk": final_new_part
-                            }
-                        )
-                        # Отправляем как intent_detail для UI
-                        await self._send_intent_detail(final_new_part.strip(), force_flush=True)
-                    else:
-                        # Даже если chunk пустой, flush буфер
-                        await self._send_intent_detail("", force_flush=True)
-                    
-                    # FIX: Присваиваем, а не добавляем (было: self.thought_content += thought_chunk)
-                    self.thought_content = full_thought
-                    
-                    self.thought_complete = True
-                    await self.ws_manager.send_event(
-                        self.session_id,
-                        "thinking_completed",
-                        {"thinking_id": self.thinking_id}
-                    )
-                    
-                    # Оставляем остаток буфера (action часть)
-                    self.buffer = parts[1] if len(parts) > 1 else ""
-                else:
-                    # Ещё нет закрывающего тега, стримим весь буфер
-                    # Но нужно стримить только новые части
-                    if len(self.buffer) > len(self.thought_content):
-                        new_chunk = self.buffer[len(self.thought_content):]
-                        self.thought_content = self.buffer
-                        
-                        if new_chunk.strip():
-                            await self.ws_manager.send_event(
-                                self.session_id,
-                                "thinking_chunk",
-                                {
-                                    "thinking_id": self.thinking_id,
-                                    "chunk": new_chunk
-                                }
-                            )
-                            # Отправляем как intent_thinking_append для streaming в UI
-                            await self._send_intent_detail(new_chunk)
+            text = self._pending + chunk
+            end = text.find(self.CLOSE_TAG)
+            if end >= 0:
+                self._pending = ""
+                await self._emit(text[:end].rstrip())
+                self.thought_complete = True
+                await self.ws_manager.send_event(
+                    self.session_id,
+                    "thinking_completed",
+                    {"thinking_id": self.thinking_id, **self._thought.checkpoint()}
+                )
+                # Оставляем остаток (action часть)
+                rest = text[end + len(self.CLOSE_TAG):]
+                if rest:
+                    self._tail.append(rest)
+                return
+            
+            # Придерживаем хвост, который может оказаться началом </thought>,
+            # и текст из одних пробелов (уйдёт со следующим chunk)
+            keep = self._partial_tag_length(text)
+            ready, self._pending = text[:len(text) - keep], text[len(text) - keep:]
+            if ready.strip():
+                await self._emit(ready)
+            else:
+                self._pending = text
+        
+        def _partial_tag_length(self, text: str) -> int:
+            """Длина конца text, совпадающего с началом закрывающего тега."""
+            for size in range(min(len(text), len(self.CLOSE_TAG) - 1), 0, -1):
+                if self.CLOSE_TAG.startswith(text[-size:]):
+                    return size
+            return 0
+        
+        async def _emit(self, text: str) -> None:
+            """Отправляет новый текст thought (thinking_chunk + intent_thinking_append)."""
+            if not text:
+                return
+            await self.ws_manager.send_event(
+                self.session_id,
+                "thinking_chunk",
+                {"thinking_id": self.thinking_id, **self._thought.append(text)}
+            )
+            await self._send_intent_detail(text)
         
-        async def _send_intent_detail(self, text: str, force_flush: bool = False) -> None:
+        async def _send_intent_detail(self, text: str) -> None:
             """Отправляет intent_thinking_append с текстом thinking если есть intent_id.
             
-            Отправляет текст как есть для append к существующему thinkingText.
-            Без буферизации по предложениям - просто streaming.
+            Отправляет только новый текст (фронтенд аппендит по seq).
             
             Args:
                 text: Новый chunk текста
-                force_flush: Если True, flush буфера (игнорируется в новой реализации)
             """
             if not self.intent_id or not text:
                 return
             
-            # #region agent log - H1,H2: Backend sends intent_thinking_append
-            import json as _json
-            # #endregion
-            
-            # Просто отправляем текст как есть для append
             await self.ws_manager.send_event(
                 self.session_id,
                 "intent_thinking_append",
                 {
                     "intent_id": self.intent_id,
-                    "text": text  # Текст как есть, фронтенд аппендит
+                    **self._intent_text.append(text)
                 }
             )
         
@@ -2006,8 +2083,13 @@ class UnifiedReActEngine:
         
         def get_remaining_buffer(self) -> str:
             """Возвращает оставшийся буфер (action часть)."""
-            return self.buffer
+            if not self.thought_started:
+                return self._head
+            if not self.thought_complete:
+                return ""
+            return "".join(self._tail)
     
+    @usage_purpose("think")
     async def _think(
         self,
         state: ReActState,
@@ -2196,7 +2278,7 @@ class UnifiedReActEngine:
             ]
             
             # Stream thinking process
-            thought = ""
+            thought_stream = DeltaStream()
             thinking_id = f"thinking_{self.session_id}_{int(time.time() * 1000)}"
             
             # Send thinking start
@@ -2223,13 +2305,12 @@ class UnifiedReActEngine:
                     chunk_text = chunk
                 
                 if chunk_text:
-                    thought += chunk_text
                     await self.ws_manager.send_event(
                         self.session_id,
                         "thinking_chunk",
                         {
                             "thinking_id": thinking_id,
-                            "chunk": chunk_text  # Frontend expects "chunk" not "content"
+                            **thought_stream.append(chunk_text)  # Frontend expects "chunk" not "content"
                         }
                     )
             
@@ -2237,14 +2318,15 @@ class UnifiedReActEngine:
             await self.ws_manager.send_event(
                 self.session_id,
                 "thinking_completed",
-                {"thinking_id": thinking_id}
+                {"thinking_id": thinking_id, **thought_stream.checkpoint()}
             )
             
-            return thought.strip()
+            return thought_stream.text.strip()
         except Exception as e:
             logger.error(f"[UnifiedReActEngine] Error in _think: {e}")
             return f"Анализирую ситуацию... (итерация {state.iteration})"
     
+    @usage_purpose("plan_action")
     async def _plan_action(
         self,
         state: ReActState,
@@ -2559,6 +2641,8 @@ class UnifiedReActEngine:
                     "reasoning": str(e)
                 }
     
+    @traced("react.think_and_plan")
+    @usage_purpose("think_and_plan")
     async def _think_and_plan(
         self,
         state: ReActState,
@@ -3009,6 +3093,7 @@ class UnifiedReActEngine:
             
             return fallback_thought, fallback_plan
     
+    @traced("react.execute_action")
     async def _execute_action(
         self,
         action_plan: Dict[str, Any],
@@ -3140,109 +3225,43 @@ class UnifiedReActEngine:
         _registry_end = time.time()
         # #endregion
         
-        # Process result for operations (parse and stream data)
-        if operation_id and self.ws_manager and self.session_id:
+        # Process result for operations: stream structured rows of list-returning tools
+        if self.ws_manager and self.session_id and isinstance(result, ToolResult) and result.rows is not None:
             intent_id = getattr(self, '_current_intent_id', None)
-            
-            if capability_name == 'get_calendar_events':
-                # Parse calendar events from result string
-                try:
-                    result_str = str(result) if result else ""
-                    
-                    if 'Found' in result_str and 'event(s)' in result_str:
-                        # Result is formatted string, extract count and events
-                        lines = result_str.split('\n')
-                        count_line = lines[0] if lines else ''
-                        
-                        # Extract count
-                        count_match = re.search(r'Found (\d+) event\(s\)', count_line)
-                        if count_match:
-                            count = int(count_match.group(1))
-                            
-                            # Extract events from formatted string (lines starting with number or emoji)
-                            events_data = []
-                            for line in lines[1:]:
-                                line = line.strip()
-                                if not line:
-                                    continue
-                                # Match lines like "1. Event Name" or "📅 Event Name" or lines with event info
-                                if re.match(r'^\d+\.', line) or line.startswith('📅') or ('Время:' in line and len(events_data) < count):
-                                    # Clean up line
-                                    event_info = re.sub(r'^\d+\.\s*', '', line)  # Remove number prefix
-                                    event_info = event_info.replace('📅', '').strip()
-                                    
-                                    # If line contains "Время:", combine with previous event
-                                    if 'Время:' in event_info and events_data:
-                                        prev_event = events_data[-1]
-                                        # Extract just the time part
-                                        time_match = re.search(r'Время: ([^-\n]+)', event_info)
-                                        if time_match:
-                                            time_str = time_match.group(1).strip()
-                                            events_data[-1] = f"{prev_event} - {time_str}"
-                                    elif event_info and not 'Время:' in event_info:
-                                        if not event_info.startswith('   '):  # Skip indented lines (time info)
-                                            events_data.append(f"📅 {event_info}")
-                            
-                            # If we didn't extract events from formatted string, try to extract from numbered lines
-                            if not events_data:
-                                for line in lines[1:]:
-                                    line = line.strip()
-                                    if re.match(r'^\d+\.', line):
-                                        event_info = re.sub(r'^\d+\.\s*', '', line).strip()
-                                        if event_info and 'Found' not in event_info:
-                                            events_data.append(f"📅 {event_info}")
-                            
-                            # Stream events (or just show count if we can't parse individual events)
-                            if events_data:
-                                for event_data in events_data:
-                                    await self.ws_manager.send_operation_data(
-                                        self.session_id,
-                                        operation_id,
-                                        event_data
-                                    )
-                            
-                            # Send operation_end
-                            await self.ws_manager.send_operation_end(
-                                self.session_id,
-                                operation_id,
-                                f"Получено {count} встреч"
-                            )
-                        else:
-                            # Couldn't parse count, send summary
-                            result_summary = self._get_result_summary(capability_name, result)
-                            if result_summary:
-                                await self.ws_manager.send_operation_end(
-                                    self.session_id,
-                                    operation_id,
-                                    result_summary
-                                )
-                    elif result_str.startswith('Found 0'):
-                        # No events found
-                        await self.ws_manager.send_operation_end(
-                            self.session_id,
-                            operation_id,
-                            "Встречи не найдены"
-                        )
-                    else:
-                        # Unknown format, send summary
-                        result_summary = self._get_result_summary(capability_name, result)
-                        if result_summary:
-                            await self.ws_manager.send_operation_end(
-                                self.session_id,
-                                operation_id,
-                                result_summary
-                            )
-                except Exception as e:
-                    logger.warning(f"[UnifiedReActEngine] Failed to process operation for {capability_name}: {e}", exc_info=True)
-                    # Fallback to summary
-                    result_summary = self._get_result_summary(capability_name, result) if capability_name else None
-                    if result_summary:
-                        await self.ws_manager.send_operation_end(
-                            self.session_id,
-                            operation_id,
-                            result_summary
-                        )
-            # TODO: Add processing for other tools (sheets, docs, etc.)
+            try:
+                if not operation_id:
+                    display_name = self._get_tool_display_name(capability_name, arguments)
+                    operation_id = f"op-{int(time.time() * 1000)}"
+                    await self.ws_manager.send_operation_start(
+                        self.session_id,
+                        operation_id,
+                        display_name,
+                        display_name,
+                        "read",
+                        intent_id=intent_id
+                    )
+                for row in result.rows[:MAX_STREAMED_ROWS]:
+                    await self.ws_manager.send_operation_data(self.session_id, operation_id, row)
+                if len(result.rows) > MAX_STREAMED_ROWS:
+                    await self.ws_manager.send_operation_data(
+                        self.session_id, operation_id, f"… и ещё {len(result.rows) - MAX_STREAMED_ROWS}"
+                    )
+                await self.ws_manager.send_operation_end(
+                    self.session_id,
+                    operation_id,
+                    result.summary or self._get_result_summary(capability_name, result) or ""
+                )
+            except Exception as e:
+                logger.warning(f"[UnifiedReActEngine] Failed to stream operation for {capability_name}: {e}", exc_info=True)
+        elif operation_id and self.ws_manager and self.session_id:
+            # Tool returned no structured rows: close the operation with a summary
+            result_summary = self._get_result_summary(capability_name, result)
+            if result_summary:
+                await self.ws_manager.send_operation_end(
+                    self.session_id,
+                    operation_id,
+                    result_summary
+                )
         elif self.ws_manager and self.session_id:
             # Legacy: Send intent_detail AFTER tool execution with result summary
             intent_id = getattr(self, '_current_intent_id', None)
@@ -3262,6 +3281,7 @@ class UnifiedReActEngine:
         
         return result
     
+    @usage_purpose("find_alternative")
     async def _find_alternative(
         self,
         state: ReActState,
@@ -3349,6 +3369,7 @@ class UnifiedReActEngine:
             logger.error(f"[UnifiedReActEngine] Error in _find_alternative: {e}")
             return None
     
+    @usage_purpose("final_answer")
     async def _generate_final_answer(self, state: ReActState, context: Optional[ConversationContext] = None, file_ids: Optional[List[str]] = None) -> str:
         """Generate a human-friendly final answer based on all collected results with streaming."""
         try:
@@ -3484,8 +3505,8 @@ class UnifiedReActEngine:
             else:
                 messages = [HumanMessage(content=prompt)]
 
-            # Stream the response
-            full_answer = ""
+            # Stream the response (final_result_chunk carries deltas, see src/utils/delta_stream.py)
+            answer_stream = DeltaStream()
             
             # Send intent event to show user what's happening
             intent_message = "Анализирую содержимое файлов" if file_contents_text else "Формирую ответ"
@@ -3559,13 +3580,13 @@ class UnifiedReActEngine:
                     chunk_text = chunk
                 
                 if chunk_text:
-                    full_answer += chunk_text
                     _stream_chunk_count += 1
                     await self.ws_manager.send_event(
                         self.session_id,
                         "final_result_chunk",
-                        {"content": full_answer}  # Send accumulated content
+                        answer_stream.append(chunk_text)  # Delta; full content only on checkpoints
                     )
+            full_answer = answer_stream.text
             
             # #region agent log - H7: final_result streaming complete
             # #endregion
@@ -3589,7 +3610,9 @@ class UnifiedReActEngine:
             logger.error(f"[UnifiedReActEngine] Error generating final answer: {e}")
             # Fallback to last result
             if state.observations:
-                last_result = str(state.observations[-1].raw_result)
+                last_result = state.observations[-1].raw_result
+                if not isinstance(last_result, ToolResult):
+                    last_result = str(last_result)
                 return self._format_result_summary(last_result, state.observations[-1].action.tool_name)
             return "Задача выполнена."
 
@@ -3782,9 +3805,10 @@ class UnifiedReActEngine:
     async def _finalize_timeout(
         self,
         state: ReActState,
-        context: ConversationContext
+        context: ConversationContext,
+        budget_reason: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Finalize execution that reached max iterations."""
+        """Finalize execution that reached max iterations (or a usage budget)."""
         state.status = "failed"
         
         # === NEW ARCHITECTURE: Complete the task-level intent with timeout status ===
@@ -3795,17 +3819,23 @@ class UnifiedReActEngine:
                 "intent_complete",
                 {
                     "intent_id": task_intent_id,
-                    "summary": f"⏱️ Достигнут лимит ({state.iteration} итераций)",
+                    "summary": (
+                        "⏱️ Достигнут лимит бюджета" if budget_reason
+                        else f"⏱️ Достигнут лимит ({state.iteration} итераций)"
+                    ),
                     "auto_collapse": False
                 }
             )
         
         timeout_report = {
-            "status": "timeout",
+            "status": "budget_exceeded" if budget_reason else "timeout",
             "goal": state.goal,
             "iterations": state.iteration,
             "actions_taken": len(state.action_history),
-            "message": f"Достигнут лимит итераций ({state.max_iterations})",
+            "message": (
+                f"Достигнут лимит бюджета ({budget_reason})" if budget_reason
+                else f"Достигнут лимит итераций ({state.max_iterations})"
+            ),
             "reasoning_trail": [
                 {
                     "iteration": step.iteration,
@@ -3910,6 +3940,8 @@ class UnifiedReActEngine:
     
     def _extract_result_details(self, result: str) -> List[str]:
         """Extract meaningful details from result for display in intent block."""
+        if isinstance(result, ToolResult) and result.rows is not None:
+            return result.rows[:10]
         details = []
         try:
             import json
@@ -4017,6 +4049,8 @@ class UnifiedReActEngine:
 
     def _format_result_summary(self, result: str, tool: str) -> str:
         """Format raw tool result into human-readable Russian summary."""
+        if isinstance(result, ToolResult) and result.summary:
+            return result.summary
         import re
         result_lower = result.lower()
         tool_lower = tool.lower() if tool else ""
@@ -4103,7 +4137,9 @@ class UnifiedReActEngine:
                     # === NEW ARCHITECTURE: Add result as intent_detail, don't complete yet ===
                     task_intent_id = getattr(self, '_task_intent_id', None)
                     if task_intent_id:
-                        result = str(data.get("result", ""))
+                        result = data.get("result", "")
+                        if not isinstance(result, ToolResult):
+                            result = str(result)
                         tool = getattr(self, '_last_tool', 'unknown')
                         
                         # Format result into human-readable Russian summary
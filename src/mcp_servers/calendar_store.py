@@ -0,0 +1,354 @@
+"""
+Local event store for the Google Calendar MCP server.
+
+Questions like "what do I have today / this week / tomorrow" used to fetch
+the whole range from the API on every call. With the store enabled (server
+flag --event-store <db path>) list_events answers from a per-calendar copy of
+the events in SQLite:
+
+- a calendar is first copied by a full events.list (single events, all
+  pages), keeping its nextSyncToken; the server runs it in a background
+  thread (start_full_sync) and answers through the API until it is done
+- later reads first apply the changes since that token (events.list with
+  syncToken), at most every sync_interval_sec; cancelled events are removed
+- a 410 Gone (token expired or invalidated by Google) clears the calendar
+  and runs a full sync again
+- the server's own create/update/delete tools invalidate the calendar, so
+  the next read syncs before answering
+
+Range queries follow events.list: events ending after timeMin and starting
+before timeMax, ordered by start time.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import date, datetime, time as dt_time
+from pathlib import Path
+from zoneinfo import ZoneInfo
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+
+# Changes are fetched at most this often (reads in between use the store as is)
+SYNC_INTERVAL_SEC = 30.0
+
+# events.list page size (API maximum)
+PAGE_SIZE = 2500
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS calendar_events (
+        calendar_id TEXT NOT NULL,
+        event_id TEXT NOT NULL,
+        start_ts REAL NOT NULL,
+        end_ts REAL NOT NULL,
+        event TEXT NOT NULL,
+        PRIMARY KEY (calendar_id, event_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_calendar_events_start ON calendar_events(calendar_id, start_ts);
+    CREATE TABLE IF NOT EXISTS calendar_sync_state (
+        calendar_id TEXT PRIMARY KEY,
+        sync_token TEXT,
+        time_zone TEXT
+    );
+"""
+
+
+def parse_timestamp(value: str) -> float:
+    """
+    POSIX timestamp of an RFC 3339 time.
+    
+    Args:
+        value: Time with offset ("2026-10-19T10:00:00+03:00", "...Z")
+    
+    Returns:
+        Seconds since epoch
+    
+    Raises:
+        ValueError: If the value is not a time or has no offset
+    """
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        raise ValueError(f"Time without offset: {value}")
+    return parsed.timestamp()
+
+
+def _boundary(value: Dict[str, Any], time_zone: str) -> float:
+    """Timestamp of an event start/end ({"dateTime": ...} or all-day {"date": ...})."""
+    if value.get("dateTime"):
+        return parse_timestamp(value["dateTime"])
+    # All-day events start and end at midnight of the calendar's time zone
+    day = date.fromisoformat(value["date"])
+    return datetime.combine(day, dt_time(), tzinfo=ZoneInfo(time_zone)).timestamp()
+
+
+class SyncTokenExpired(Exception):
+    """The calendar's sync token is no longer valid (410 Gone): a full sync is required."""
+
+
+class CalendarEventStore:
+    """SQLite copy of calendar events, kept current with incremental sync."""
+    
+    def __init__(
+        self,
+        db_path: Path,
+        get_calendar_service: Callable[[], Any],
+        event_fields: str,
+        sync_interval_sec: float = SYNC_INTERVAL_SEC
+    ):
+        """
+        Initialize store.
+        
+        Args:
+            db_path: SQLite database file (created if missing)
+            get_calendar_service: Callable returning the Calendar API service
+            event_fields: Fields stored per event (the mask of list_events)
+            sync_interval_sec: Minimum interval between syncs of a calendar
+        """
+        self.db_path = Path(db_path)
+        self._get_calendar_service = get_calendar_service
+        self.event_fields = event_fields
+        self.sync_interval_sec = sync_interval_sec
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._synced_at: Dict[str, float] = {}
+        self._full_sync_guard = threading.Lock()
+        self._full_sync_threads: Dict[str, threading.Thread] = {}
+        self._full_sync_failed_at: Dict[str, float] = {}
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create tables."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+    
+    def _sync_state(self, calendar_id: str) -> Tuple[Optional[str], str]:
+        row = self._connect().execute(
+            "SELECT sync_token, time_zone FROM calendar_sync_state WHERE calendar_id = ?", (calendar_id,)
+        ).fetchone()
+        return (row[0], row[1] or "UTC") if row else (None, "UTC")
+    
+    def invalidate(self, calendar_id: str) -> None:
+        """
+        Make the next read of the calendar sync first (after the server's own writes).
+        
+        Args:
+            calendar_id: Calendar ID
+        """
+        with self._lock:
+            self._synced_at.pop(calendar_id, None)
+    
+    def is_ready(self, calendar_id: str) -> bool:
+        """
+        Whether the calendar is stored; does not wait for a running full sync.
+        
+        Args:
+            calendar_id: Calendar ID
+        """
+        thread = self._full_sync_threads.get(calendar_id)
+        if thread is not None and thread.is_alive():
+            return False
+        with self._lock:
+            sync_token, _ = self._sync_state(calendar_id)
+            return sync_token is not None
+    
+    def start_full_sync(self, calendar_id: str) -> bool:
+        """
+        Run the first full sync of a calendar in a background thread unless it is stored or being synced.
+        
+        A failed sync is retried no sooner than sync_interval_sec later.
+        
+        Args:
+            calendar_id: Calendar ID
+        
+        Returns:
+            True if a sync was started
+        """
+        with self._full_sync_guard:
+            thread = self._full_sync_threads.get(calendar_id)
+            if thread is not None and thread.is_alive():
+                return False
+            failed_at = self._full_sync_failed_at.get(calendar_id)
+            if failed_at is not None and time.monotonic() - failed_at < self.sync_interval_sec:
+                return False
+            if self.is_ready(calendar_id):
+                return False
+            thread = threading.Thread(
+                target=self._full_sync_in_background,
+                args=(calendar_id,),
+                name="calendar-store-full-sync",
+                daemon=True
+            )
+            self._full_sync_threads[calendar_id] = thread
+            thread.start()
+            return True
+    
+    def _full_sync_in_background(self, calendar_id: str) -> None:
+        try:
+            self.full_sync(calendar_id)
+            self._full_sync_failed_at.pop(calendar_id, None)
+        except Exception as e:
+            logger.warning(f"Calendar store: full sync of {calendar_id} failed: {e}")
+            self._full_sync_failed_at[calendar_id] = time.monotonic()
+    
+    def ensure_fresh(self, calendar_id: str) -> None:
+        """
+        Run a full sync of a new calendar or apply its changes if the sync interval passed.
+        
+        Args:
+            calendar_id: Calendar ID
+        """
+        with self._lock:
+            sync_token, _ = self._sync_state(calendar_id)
+            if sync_token is None:
+                self.full_sync(calendar_id)
+            elif time.monotonic() - self._synced_at.get(calendar_id, float("-inf")) >= self.sync_interval_sec:
+                self.sync(calendar_id)
+    
+    def full_sync(self, calendar_id: str) -> int:
+        """
+        Replace the stored events of a calendar with all its events.
+        
+        Args:
+            calendar_id: Calendar ID
+        
+        Returns:
+            Number of stored events
+        """
+        # Fetched without the lock: reads of other calendars go on meanwhile
+        events, sync_token, time_zone = self._fetch(calendar_id)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM calendar_events WHERE calendar_id = ?", (calendar_id,))
+                self._apply(conn, calendar_id, events, time_zone)
+                conn.execute(
+                    "INSERT OR REPLACE INTO calendar_sync_state (calendar_id, sync_token, time_zone) VALUES (?, ?, ?)",
+                    (calendar_id, sync_token, time_zone)
+                )
+            self._synced_at[calendar_id] = time.monotonic()
+            count = conn.execute("SELECT COUNT(*) FROM calendar_events WHERE calendar_id = ?", (calendar_id,)).fetchone()[0]
+            logger.info(f"Calendar store: full sync of {calendar_id}, {count} events")
+            return count
+    
+    def sync(self, calendar_id: str) -> int:
+        """
+        Apply the changes of a calendar since its sync token (full sync on 410 Gone).
+        
+        Args:
+            calendar_id: Calendar ID
+        
+        Returns:
+            Number of changed events
+        """
+        with self._lock:
+            sync_token, _ = self._sync_state(calendar_id)
+            if sync_token is None:
+                self.full_sync(calendar_id)
+                return 0
+            try:
+                events, sync_token, time_zone = self._fetch(calendar_id, sync_token)
+            except SyncTokenExpired:
+                logger.info(f"Calendar store: sync token of {calendar_id} expired, running full sync")
+                self.full_sync(calendar_id)
+                return 0
+            conn = self._connect()
+            with conn:
+                self._apply(conn, calendar_id, events, time_zone)
+                conn.execute(
+                    "UPDATE calendar_sync_state SET sync_token = ?, time_zone = ? WHERE calendar_id = ?",
+                    (sync_token, time_zone, calendar_id)
+                )
+            self._synced_at[calendar_id] = time.monotonic()
+            return len(events)
+    
+    def _fetch(self, calendar_id: str, sync_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], str, str]:
+        """All pages of events.list: (events, next sync token, calendar time zone)."""
+        service = self._get_calendar_service()
+        events: List[Dict[str, Any]] = []
+        page_token = None
+        while True:
+            try:
+                response = service.events().list(
+                    calendarId=calendar_id,
+                    syncToken=sync_token,
+                    pageToken=page_token,
+                    maxResults=PAGE_SIZE,
+                    singleEvents=True,
+                    fields=f"nextPageToken,nextSyncToken,timeZone,items({self.event_fields})"
+                ).execute()
+            except HttpError as e:
+                if sync_token and e.resp.status == 410:
+                    raise SyncTokenExpired(calendar_id) from e
+                raise
+            events.extend(response.get("items", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return events, response.get("nextSyncToken"), response.get("timeZone") or "UTC"
+    
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, calendar_id: str, events: List[Dict[str, Any]], time_zone: str) -> None:
+        for event in events:
+            if event.get("status") == "cancelled":
+                conn.execute("DELETE FROM calendar_events WHERE calendar_id = ? AND event_id = ?", (calendar_id, event.get("id")))
+                continue
+            try:
+                start_ts = _boundary(event["start"], time_zone)
+                end_ts = _boundary(event["end"], time_zone)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Calendar store: skipping event {event.get('id')} without valid times: {e}")
+                continue
+            conn.execute(
+                "INSERT OR REPLACE INTO calendar_events (calendar_id, event_id, start_ts, end_ts, event) VALUES (?, ?, ?, ?, ?)",
+                (calendar_id, event["id"], start_ts, end_ts, json.dumps(event, ensure_ascii=False))
+            )
+    
+    def events(
+        self,
+        calendar_id: str,
+        time_min: Optional[str] = None,
+        time_max: Optional[str] = None,
+        max_results: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Events of a calendar in a time range, syncing first if needed.
+        
+        Args:
+            calendar_id: Calendar ID
+            time_min: Only events ending after this time (RFC 3339 with offset)
+            time_max: Only events starting before this time (RFC 3339 with offset)
+            max_results: Maximum number of events
+        
+        Returns:
+            Events ordered by start time, as events.list returns them
+        
+        Raises:
+            ValueError: If a bound is not a time with offset
+        """
+        lower = parse_timestamp(time_min) if time_min else float("-inf")
+        upper = parse_timestamp(time_max) if time_max else float("inf")
+        with self._lock:
+            self.ensure_fresh(calendar_id)
+            rows = self._connect().execute(
+                "SELECT event FROM calendar_events WHERE calendar_id = ? AND end_ts > ? AND start_ts < ? "
+                "ORDER BY start_ts, end_ts LIMIT ?",
+                (calendar_id, lower, upper, max_results if max_results is not None else -1)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+    
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,590 @@
+"""
+Local index of Drive file metadata for the Google Workspace MCP server.
+
+Every name lookup used to be a files.list with `name contains`, which costs a
+round-trip and matches case and separators unpredictably (hence the
+case-variation retries of the workspace tools). With the index enabled
+(server flag --drive-index <db path>) the server keeps id, name, mimeType,
+parents, times, owners and link of every file under the workspace folder in
+SQLite and answers name lookups locally:
+
+- the tree is bootstrapped once, several folders per files.list query
+- the changes feed (changes.getStartPageToken / changes.list) is polled at
+  most every sync_interval_sec before a lookup; files created, renamed,
+  moved in or out of the tree and trashed are applied, a folder moved into
+  the tree is crawled
+- names are matched normalized (case, diacritics and separators ignored),
+  by substring, and by trigram similarity for typos when nothing contains
+  the query, optionally within a subfolder
+
+The bootstrap of a large tree takes minutes against real Drive, so the
+server runs it in a background thread (start_bootstrap) and answers lookups
+through Drive queries until the index is ready. The database survives
+restarts: only the changes since the saved page token are fetched, and a
+different workspace folder starts a new bootstrap. Name search runs over trigram postings held in memory, loaded from the database on the
+first lookup and kept in step with it: grouping trigram rows in SQLite took
+tens of milliseconds per lookup on a 100k-file tree.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from array import array
+from collections import Counter
+from pathlib import Path
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+# Changes feed is polled at most this often (lookups in between use the index as is)
+SYNC_INTERVAL_SEC = 30.0
+
+# Folders listed by one files.list ("'a' in parents or 'b' in parents ...")
+PARENTS_PER_QUERY = 40
+PAGE_SIZE = 1000
+
+# Minimum trigram similarity of a fuzzy (non-substring) match
+FUZZY_THRESHOLD = 0.3
+
+FILE_FIELDS = "id,name,mimeType,parents,createdTime,modifiedTime,size,webViewLink,owners(displayName,emailAddress),trashed"
+FILES_LIST_FIELDS = f"nextPageToken,files({FILE_FIELDS})"
+CHANGES_LIST_FIELDS = f"nextPageToken,newStartPageToken,changes(fileId,removed,file({FILE_FIELDS}))"
+
+_SEPARATORS = re.compile(r"[\s_\-.,;:()\[\]{}'\"«»]+")
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS drive_files (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        name_key TEXT NOT NULL,
+        stem_key TEXT NOT NULL,
+        mime_type TEXT,
+        parents TEXT,
+        created_time TEXT,
+        modified_time TEXT,
+        size TEXT,
+        web_view_link TEXT,
+        owners TEXT
+    );
+    CREATE TABLE IF NOT EXISTS drive_parents (
+        parent_id TEXT NOT NULL,
+        file_id TEXT NOT NULL,
+        PRIMARY KEY (parent_id, file_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_drive_parents_file ON drive_parents(file_id);
+    CREATE TABLE IF NOT EXISTS drive_index_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+"""
+
+
+def normalize_name(name: str) -> str:
+    """
+    Search key of a file name: casefolded, without diacritics, separators collapsed to spaces.
+    
+    Args:
+        name: File name ("Отчёт_Продажи-2026.xlsx")
+    
+    Returns:
+        Key like "отчет продажи 2026 xlsx"
+    """
+    chars: List[str] = []
+    for char in unicodedata.normalize("NFD", name.casefold()):
+        if unicodedata.combining(char):
+            # й is a letter of its own, not и with a diacritic
+            if char == "\u0306" and chars and chars[-1] == "и":
+                chars[-1] = "й"
+            continue
+        chars.append(char)
+    return _SEPARATORS.sub(" ", "".join(chars)).strip()
+
+
+def _compact(key: str) -> str:
+    return key.replace(" ", "")
+
+
+def trigrams(key: str) -> List[str]:
+    """
+    Trigrams of a search key, separators ignored and ends padded.
+    
+    Args:
+        key: Result of normalize_name()
+    
+    Returns:
+        Unique trigrams ("тест2" -> "  т", " те", "тес", ...)
+    """
+    padded = f"  {_compact(key)} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+class _NameTable:
+    """Trigram postings over the compact name keys of the indexed files."""
+    
+    def __init__(self):
+        # Per slot; a removed file leaves its slot with id None until the table is rebuilt
+        self.ids: List[Optional[str]] = []
+        self.keys: List[str] = []
+        self.stems: List[str] = []
+        self.mime_types: List[Optional[str]] = []
+        self.modified: List[str] = []
+        self.trigram_counts: List[int] = []
+        self.slots: Dict[str, int] = {}
+        self.postings: Dict[str, array] = {}
+    
+    def add(self, file_id: str, name_key: str, stem_key: str, mime_type: Optional[str], modified_time: Optional[str]) -> None:
+        self.remove(file_id)
+        slot = len(self.ids)
+        key_trigrams = trigrams(name_key)
+        self.ids.append(file_id)
+        self.keys.append(name_key)
+        self.stems.append(stem_key)
+        self.mime_types.append(mime_type)
+        self.modified.append(modified_time or "")
+        self.trigram_counts.append(len(key_trigrams))
+        self.slots[file_id] = slot
+        for trigram in key_trigrams:
+            postings = self.postings.get(trigram)
+            if postings is None:
+                postings = self.postings[trigram] = array("I")
+            postings.append(slot)
+    
+    def remove(self, file_id: str) -> None:
+        slot = self.slots.pop(file_id, None)
+        if slot is not None:
+            self.ids[slot] = None
+    
+    @property
+    def stale(self) -> bool:
+        """Most slots belong to removed files."""
+        return len(self.ids) > 1000 and len(self.ids) > 2 * len(self.slots)
+    
+    def substring(self, key: str) -> List[int]:
+        """Slots of names containing the compact key."""
+        if len(key) < 3:
+            candidates: Iterable[int] = range(len(self.ids))
+        else:
+            inner = [self.postings.get(key[i:i + 3]) for i in range(len(key) - 2)]
+            if any(postings is None for postings in inner):
+                return []
+            # Every trigram of the key occurs in a matching name: scan the rarest one
+            candidates = min(inner, key=len)
+        ids, keys = self.ids, self.keys
+        return [slot for slot in candidates if ids[slot] is not None and key in keys[slot]]
+    
+    def similar(self, key: str) -> List[Tuple[int, float]]:
+        """(slot, similarity) of names sharing at least FUZZY_THRESHOLD of trigrams with the key."""
+        key_trigrams = trigrams(key)
+        hits: Counter = Counter()
+        for trigram in key_trigrams:
+            hits.update(self.postings.get(trigram, ()))
+        result = []
+        for slot, count in hits.items():
+            if self.ids[slot] is None:
+                continue
+            similarity = count / (len(key_trigrams) + self.trigram_counts[slot] - count)
+            if similarity >= FUZZY_THRESHOLD:
+                result.append((slot, similarity))
+        return result
+
+
+class DriveMetadataIndex:
+    """SQLite index of the files under one Drive folder, synced from the changes feed."""
+    
+    def __init__(
+        self,
+        db_path: Path,
+        get_drive_service: Callable[[], Any],
+        sync_interval_sec: float = SYNC_INTERVAL_SEC
+    ):
+        """
+        Initialize index.
+        
+        Args:
+            db_path: SQLite database file (created if missing)
+            get_drive_service: Callable returning the Drive API service
+            sync_interval_sec: Minimum interval between changes feed polls
+        """
+        self.db_path = Path(db_path)
+        self._get_drive_service = get_drive_service
+        self.sync_interval_sec = sync_interval_sec
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._names: Optional[_NameTable] = None
+        self._last_sync = 0.0
+        self._bootstrap_guard = threading.Lock()
+        self._bootstrap_thread: Optional[threading.Thread] = None
+        self._bootstrap_failed_at: Optional[float] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create tables."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+    
+    def _state(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM drive_index_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_state(self, key: str, value: Optional[str]) -> None:
+        self._connect().execute("INSERT OR REPLACE INTO drive_index_state (key, value) VALUES (?, ?)", (key, value))
+    
+    @property
+    def root_folder_id(self) -> Optional[str]:
+        """Folder the index covers (None before the first bootstrap)."""
+        with self._lock:
+            return self._state("root_folder_id")
+    
+    def count(self) -> int:
+        """Number of indexed files and folders."""
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM drive_files").fetchone()[0]
+    
+    def is_ready(self, root_folder_id: str) -> bool:
+        """
+        Whether the index covers the folder; does not wait for a running bootstrap.
+        
+        Args:
+            root_folder_id: Workspace folder ID
+        """
+        thread = self._bootstrap_thread
+        if thread is not None and thread.is_alive():
+            return False
+        with self._lock:
+            return self._state("root_folder_id") == root_folder_id and self._state("page_token") is not None
+    
+    def start_bootstrap(self, root_folder_id: str) -> bool:
+        """
+        Bootstrap the folder in a background thread unless it is indexed or being indexed.
+        
+        A failed bootstrap is retried no sooner than sync_interval_sec later.
+        
+        Args:
+            root_folder_id: Workspace folder ID
+        
+        Returns:
+            True if a bootstrap was started
+        """
+        with self._bootstrap_guard:
+            if self._bootstrap_thread is not None and self._bootstrap_thread.is_alive():
+                return False
+            if self._bootstrap_failed_at is not None and time.monotonic() - self._bootstrap_failed_at < self.sync_interval_sec:
+                return False
+            if self.is_ready(root_folder_id):
+                return False
+            self._bootstrap_thread = threading.Thread(
+                target=self._bootstrap_in_background,
+                args=(root_folder_id,),
+                name="drive-index-bootstrap",
+                daemon=True
+            )
+            self._bootstrap_thread.start()
+            return True
+    
+    def _bootstrap_in_background(self, root_folder_id: str) -> None:
+        try:
+            self.bootstrap(root_folder_id)
+            self._bootstrap_failed_at = None
+        except Exception as e:
+            logger.warning(f"Drive index bootstrap of {root_folder_id} failed: {e}")
+            self._bootstrap_failed_at = time.monotonic()
+    
+    def ensure_fresh(self, root_folder_id: str) -> None:
+        """
+        Bootstrap the index for the folder or apply pending changes if the poll interval passed.
+        
+        Args:
+            root_folder_id: Workspace folder ID
+        """
+        with self._lock:
+            if self._state("root_folder_id") != root_folder_id or self._state("page_token") is None:
+                self.bootstrap(root_folder_id)
+            elif time.monotonic() - self._last_sync >= self.sync_interval_sec:
+                self.sync()
+    
+    def bootstrap(self, root_folder_id: str) -> int:
+        """
+        Index the folder tree from scratch.
+        
+        The changes page token is taken before the walk, so changes made during
+        it are applied by the next sync.
+        
+        Args:
+            root_folder_id: Workspace folder ID
+        
+        Returns:
+            Number of indexed files and folders
+        """
+        with self._lock:
+            conn = self._connect()
+            started = time.perf_counter()
+            drive = self._get_drive_service()
+            page_token = drive.changes().getStartPageToken(supportsAllDrives=True).execute()["startPageToken"]
+            self._names = None
+            with conn:
+                conn.execute("DELETE FROM drive_files")
+                conn.execute("DELETE FROM drive_parents")
+                self._crawl(conn, [root_folder_id])
+                self._set_state("root_folder_id", root_folder_id)
+                self._set_state("page_token", page_token)
+            self._last_sync = time.monotonic()
+            count = self.count()
+            logger.info(f"Drive index of {root_folder_id}: {count} files in {time.perf_counter() - started:.1f}s")
+            return count
+    
+    def sync(self) -> int:
+        """
+        Apply changes since the saved page token.
+        
+        Returns:
+            Number of changes read from the feed
+        """
+        with self._lock:
+            conn = self._connect()
+            page_token = self._state("page_token")
+            drive = self._get_drive_service()
+            applied = 0
+            try:
+                with conn:
+                    while page_token:
+                        response = drive.changes().list(
+                            pageToken=page_token,
+                            pageSize=PAGE_SIZE,
+                            fields=CHANGES_LIST_FIELDS,
+                            includeRemoved=True,
+                            supportsAllDrives=True,
+                            includeItemsFromAllDrives=True
+                        ).execute()
+                        for change in response.get("changes", []):
+                            self._apply_change(conn, change)
+                            applied += 1
+                        if response.get("newStartPageToken"):
+                            self._set_state("page_token", response["newStartPageToken"])
+                            break
+                        page_token = response.get("nextPageToken")
+                        self._set_state("page_token", page_token)
+            except Exception:
+                # The transaction is rolled back, the postings may already hold part of it
+                self._names = None
+                raise
+            self._last_sync = time.monotonic()
+            if applied:
+                logger.info(f"Drive index: applied {applied} change(s)")
+            return applied
+    
+    def _crawl(self, conn: sqlite3.Connection, folder_ids: Iterable[str]) -> None:
+        """Index the contents of folders and, recursively, of their subfolders."""
+        drive = self._get_drive_service()
+        pending = list(folder_ids)
+        while pending:
+            batch, pending = pending[:PARENTS_PER_QUERY], pending[PARENTS_PER_QUERY:]
+            parents_clause = " or ".join(f"'{folder_id}' in parents" for folder_id in batch)
+            page_token = None
+            while True:
+                response = drive.files().list(
+                    q=f"({parents_clause}) and trashed=false",
+                    pageSize=PAGE_SIZE,
+                    pageToken=page_token,
+                    fields=FILES_LIST_FIELDS,
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True
+                ).execute()
+                for file in response.get("files", []):
+                    self._upsert(conn, file)
+                    if file.get("mimeType") == FOLDER_MIME_TYPE:
+                        pending.append(file["id"])
+                page_token = response.get("nextPageToken")
+                if not page_token:
+                    break
+    
+    def _apply_change(self, conn: sqlite3.Connection, change: Dict[str, Any]) -> None:
+        file_id = change.get("fileId")
+        file = change.get("file")
+        root_folder_id = self._state("root_folder_id")
+        if not file_id or file_id == root_folder_id:
+            return
+        if change.get("removed") or not file or file.get("trashed"):
+            self._delete_subtree(conn, file_id)
+            return
+        
+        in_tree = any(
+            parent == root_folder_id
+            or conn.execute("SELECT 1 FROM drive_files WHERE id = ?", (parent,)).fetchone()
+            for parent in file.get("parents", [])
+        )
+        known = conn.execute("SELECT 1 FROM drive_files WHERE id = ?", (file_id,)).fetchone() is not None
+        if not in_tree:
+            # Moved out of the workspace folder (or never in it)
+            if known:
+                self._delete_subtree(conn, file_id)
+            return
+        self._upsert(conn, file)
+        if not known and file.get("mimeType") == FOLDER_MIME_TYPE:
+            # Moved in from elsewhere: its contents have no changes of their own
+            self._crawl(conn, [file_id])
+    
+    def _upsert(self, conn: sqlite3.Connection, file: Dict[str, Any]) -> None:
+        file_id = file["id"]
+        name = file.get("name", "")
+        name_key = _compact(normalize_name(name))
+        stem_key = _compact(normalize_name(name.rsplit(".", 1)[0])) if "." in name else name_key
+        parents = file.get("parents", [])
+        conn.execute("DELETE FROM drive_parents WHERE file_id = ?", (file_id,))
+        conn.execute(
+            "INSERT OR REPLACE INTO drive_files "
+            "(id, name, name_key, stem_key, mime_type, parents, created_time, modified_time, size, web_view_link, owners) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                file_id, name, name_key, stem_key, file.get("mimeType"), json.dumps(parents),
+                file.get("createdTime"), file.get("modifiedTime"), file.get("size"),
+                file.get("webViewLink"), json.dumps(file.get("owners", []), ensure_ascii=False)
+            )
+        )
+        conn.executemany("INSERT OR IGNORE INTO drive_parents (parent_id, file_id) VALUES (?, ?)", [(parent, file_id) for parent in parents])
+        if self._names is not None:
+            self._names.add(file_id, name_key, stem_key, file.get("mimeType"), file.get("modifiedTime"))
+    
+    def _subtree(self, conn: sqlite3.Connection, folder_id: str) -> Set[str]:
+        """IDs of a file or folder and everything under it."""
+        rows = conn.execute(
+            "WITH RECURSIVE subtree(id) AS ("
+            " SELECT ? UNION SELECT p.file_id FROM drive_parents p JOIN subtree s ON p.parent_id = s.id"
+            ") SELECT id FROM subtree",
+            (folder_id,)
+        )
+        return {row[0] for row in rows}
+    
+    def _delete_subtree(self, conn: sqlite3.Connection, file_id: str) -> None:
+        ids = self._subtree(conn, file_id)
+        conn.executemany("DELETE FROM drive_files WHERE id = ?", [(i,) for i in ids])
+        conn.executemany("DELETE FROM drive_parents WHERE file_id = ?", [(i,) for i in ids])
+        if self._names is not None:
+            for i in ids:
+                self._names.remove(i)
+    
+    def _name_table(self) -> _NameTable:
+        """Postings of all indexed names (built from the database when missing or mostly stale)."""
+        if self._names is None or self._names.stale:
+            names = _NameTable()
+            rows = self._connect().execute("SELECT id, name_key, stem_key, mime_type, modified_time FROM drive_files")
+            for row in rows:
+                names.add(*row)
+            self._names = names
+        return self._names
+    
+    def search(
+        self,
+        query: str,
+        folder_id: Optional[str] = None,
+        mime_type: Optional[str] = None,
+        limit: int = 20,
+        recursive: bool = True,
+        fuzzy: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Find files by name.
+        
+        Ranking: same name (ignoring case, diacritics, separators and
+        extension), name starting with the query, containing it; newer files
+        first within a rank. Fuzzy matches by trigram similarity are returned
+        only when no name contains the query: padding exact hits with near
+        misses would turn one match into a choice between files.
+        
+        Args:
+            query: File name or its fragment
+            folder_id: Only files under this folder (None - the whole index)
+            mime_type: Only files of this MIME type
+            limit: Maximum number of results
+            recursive: Whole subtree of folder_id (False - only its direct children)
+            fuzzy: Fall back to trigram similarity (False - substring matches
+                only, like Drive `name contains`)
+        
+        Returns:
+            Files as Drive resources (id, name, mimeType, parents, createdTime,
+            modifiedTime, size, webViewLink, owners)
+        """
+        key = _compact(normalize_name(query))
+        if not key:
+            return []
+        
+        with self._lock:
+            conn = self._connect()
+            names = self._name_table()
+            scope = None
+            if folder_id and not recursive:
+                rows = conn.execute("SELECT file_id FROM drive_parents WHERE parent_id = ?", (folder_id,))
+                scope = {row[0] for row in rows}
+            elif folder_id and folder_id != self._state("root_folder_id"):
+                scope = self._subtree(conn, folder_id)
+            
+            def eligible(slot: int) -> bool:
+                return (
+                    (mime_type is None or names.mime_types[slot] == mime_type)
+                    and (scope is None or names.ids[slot] in scope)
+                )
+            
+            # (rank, -similarity, slot); rank: 0 same name or stem, 1 prefix, 2 substring, 3 fuzzy
+            matches: List[Tuple[int, float, int]] = []
+            for slot in names.substring(key):
+                if not eligible(slot):
+                    continue
+                if key == names.keys[slot] or key == names.stems[slot]:
+                    rank = 0
+                else:
+                    rank = 1 if names.keys[slot].startswith(key) else 2
+                matches.append((rank, 0.0, slot))
+            if not matches and fuzzy and len(key) >= 3:
+                matches = [
+                    (3, -similarity, slot)
+                    for slot, similarity in names.similar(key)
+                    if eligible(slot)
+                ]
+            
+            # Newer first, then by rank (the sort is stable)
+            matches.sort(key=lambda match: names.modified[match[2]], reverse=True)
+            matches.sort(key=lambda match: match[:2])
+            ids = [names.ids[slot] for _, _, slot in matches[:limit]]
+            if not ids:
+                return []
+            rows = conn.execute(
+                "SELECT id, name, mime_type, parents, created_time, modified_time, size, web_view_link, owners "
+                f"FROM drive_files WHERE id IN ({','.join('?' * len(ids))})",
+                ids
+            ).fetchall()
+        resources = {row[0]: self._resource(row) for row in rows}
+        return [resources[i] for i in ids if i in resources]
+    
+    @staticmethod
+    def _resource(row: Tuple) -> Dict[str, Any]:
+        resource = {
+            "id": row[0],
+            "name": row[1],
+            "mimeType": row[2],
+            "parents": json.loads(row[3] or "[]"),
+            "createdTime": row[4],
+            "modifiedTime": row[5],
+            "size": row[6],
+            "webViewLink": row[7],
+            "owners": json.loads(row[8] or "[]"),
+        }
+        return {key: value for key, value in resource.items() if value is not None}
+    
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._names = None
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
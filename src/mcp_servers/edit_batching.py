@@ -0,0 +1,165 @@
+"""
+Edit transactions for the Google Docs and Slides MCP servers.
+
+With batching enabled (server flag --batch-edits), editing tools do not call
+batchUpdate themselves: their requests are appended to an open transaction
+of the document and sent together in one batchUpdate when
+- a tool reads the same document (the read must see the edits),
+- the host calls the server's flush tool (at the end of each agent run),
+- the transaction reaches max_requests, or the server shuts down.
+
+batchUpdate applies requests in order, each against the result of the
+previous ones, so a queued sequence has the same effect as the individual
+calls. Tools that derive indices from a document read (end of text, length
+of a text box) take them from per-transaction state instead of reading
+stale values; the servers keep that state in EditBatcher.state().
+
+Queued calls get synthesized replies with the object ids the requests
+assign themselves (createSlide, createShape, ...). A rejected transaction
+is retried once without its formatting-only requests; if it still fails,
+its edits are discarded and the error is raised from the flushing call.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+MAX_PENDING_REQUESTS = 200
+
+
+def utf16_length(text: str) -> int:
+    """Length of text in UTF-16 code units, the unit of Docs and Slides indices."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+class PendingEditsError(Exception):
+    """Queued edits of a document were rejected by the API."""
+    
+    def __init__(self, document_id: str, count: int, cause: Exception):
+        self.document_id = document_id
+        self.count = count
+        super().__init__(f"{count} pending edit request(s) of {document_id} were rejected: {cause}")
+
+
+class EditBatcher:
+    """Per-document queues of batchUpdate requests."""
+    
+    def __init__(
+        self,
+        execute: Callable[[str, List[Dict[str, Any]]], Dict[str, Any]],
+        enabled: bool = False,
+        max_requests: int = MAX_PENDING_REQUESTS,
+        style_request_types: Iterable[str] = ()
+    ):
+        """
+        Initialize batcher.
+        
+        Args:
+            execute: Sends requests of a document in one batchUpdate, returns its response
+            enabled: Queue edits (False - every submit is sent immediately)
+            max_requests: Pending requests per document that trigger a flush
+            style_request_types: Request types dropped on retry of a rejected batch
+        """
+        self._execute = execute
+        self.enabled = enabled
+        self.max_requests = max_requests
+        self.style_request_types = set(style_request_types)
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._state: Dict[str, Dict[str, Any]] = {}
+    
+    def submit(self, document_id: str, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Send or queue requests of one tool call.
+        
+        Args:
+            document_id: Document or presentation ID
+            requests: batchUpdate requests
+        
+        Returns:
+            batchUpdate response, synthesized for queued requests
+        """
+        if not self.enabled:
+            return self._execute(document_id, requests)
+        
+        self._pending.setdefault(document_id, []).extend(requests)
+        if len(self._pending[document_id]) >= self.max_requests:
+            self.flush(document_id)
+        return {"replies": [self._reply(request) for request in requests], "queued": True}
+    
+    def pending(self, document_id: str) -> int:
+        """Number of queued requests of a document."""
+        return len(self._pending.get(document_id, []))
+    
+    def state(self, document_id: str) -> Dict[str, Any]:
+        """
+        Scratch state of the open transaction (cleared on flush).
+        
+        Args:
+            document_id: Document or presentation ID
+        
+        Returns:
+            Mutable dict owned by the server
+        """
+        return self._state.setdefault(document_id, {})
+    
+    def flush(self, document_id: str) -> int:
+        """
+        Send queued requests of a document.
+        
+        Args:
+            document_id: Document or presentation ID
+        
+        Returns:
+            Number of requests sent
+        
+        Raises:
+            PendingEditsError: If the API rejected the edits
+        """
+        requests = self._pending.pop(document_id, [])
+        self._state.pop(document_id, None)
+        if not requests:
+            return 0
+        
+        try:
+            self._execute(document_id, requests)
+        except Exception as e:
+            content = [r for r in requests if not self.style_request_types.intersection(r)]
+            if not content or len(content) == len(requests):
+                raise PendingEditsError(document_id, len(requests), e) from e
+            logger.warning(f"Pending edits of {document_id} rejected, retrying without formatting: {e}")
+            try:
+                self._execute(document_id, content)
+            except Exception as retry_error:
+                raise PendingEditsError(document_id, len(requests), retry_error) from retry_error
+            return len(content)
+        
+        logger.info(f"Flushed {len(requests)} edit request(s) of {document_id} in one batchUpdate")
+        return len(requests)
+    
+    def flush_all(self, document_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send queued requests of all documents (or of one).
+        
+        Args:
+            document_id: Only this document when given
+        
+        Returns:
+            {"flushed": {document_id: count}, "errors": {document_id: message}}
+        """
+        flushed, errors = {}, {}
+        for doc_id in [document_id] if document_id else list(self._pending):
+            try:
+                flushed[doc_id] = self.flush(doc_id)
+            except PendingEditsError as e:
+                errors[doc_id] = str(e)
+        return {"flushed": flushed, "errors": errors}
+    
+    @staticmethod
+    def _reply(request: Dict[str, Any]) -> Dict[str, Any]:
+        # Creation requests carry their own objectId: the reply is known in advance
+        for kind, body in request.items():
+            if kind.startswith("create") and isinstance(body, dict) and body.get("objectId"):
+                return {kind: {"objectId": body["objectId"]}}
+        return {}
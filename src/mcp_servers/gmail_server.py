@@ -22,11 +22,11 @@ import html
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from src.mcp_servers.google_services import get_service_factory
+from src.utils.tracing import configure_tracing, instrument_google_api_client, trace_tool_handler
+
 logger = logging.getLogger(__name__)
 
 # Gmail API scopes
@@ -38,6 +38,12 @@ GMAIL_SCOPES = [
     "https://www.googleapis.com/auth/gmail.labels",
 ]
 
+# Fields the tools read (partial responses): summaries use headers and labels,
+# bodies are decoded from the payload parts
+MESSAGE_LIST_FIELDS = "messages(id)"
+MESSAGE_METADATA_FIELDS = "id,threadId,snippet,labelIds,payload/headers"
+MESSAGE_FULL_FIELDS = "id,threadId,snippet,labelIds,payload(mimeType,headers,body/data,parts)"
+
 
 class GmailMCPServer:
     """MCP Server for Gmail operations."""
@@ -57,40 +63,10 @@ class GmailMCPServer:
     def _get_gmail_service(self):
         """Get or create Gmail API service."""
         if self._gmail_service is None:
-            if not self.token_path.exists():
-                raise ValueError(
-                    f"OAuth token not found at {self.token_path}. "
-                    "Please complete OAuth flow first."
-                )
-            
-            creds = Credentials.from_authorized_user_file(
-                str(self.token_path),
-                GMAIL_SCOPES
+            self._gmail_service = get_service_factory().service(
+                'gmail', 'v1', self.token_path, GMAIL_SCOPES,
+                reauth_hint="Please re-authenticate via /api/integrations/gmail/enable."
             )
-            
-            # Refresh token if expired
-            if creds.expired:
-                if creds.refresh_token:
-                    try:
-                        creds.refresh(Request())
-                        # Save refreshed token
-                        with open(self.token_path, 'w') as token:
-                            token.write(creds.to_json())
-                    except Exception as e:
-                        logger.error(f"Failed to refresh token: {e}")
-                        raise ValueError(
-                            f"Token expired and refresh failed: {e}. "
-                            "Please re-authenticate via /api/integrations/gmail/enable"
-                        )
-                else:
-                    # Token expired and no refresh_token - user needs to re-authenticate
-                    raise ValueError(
-                        "Token expired and no refresh token available. "
-                        "Please re-authenticate via /api/integrations/gmail/enable. "
-                        "Make sure to use 'prompt=consent' during OAuth to get a refresh token."
-                    )
-            
-            self._gmail_service = build('gmail', 'v1', credentials=creds)
         
         return self._gmail_service
     
@@ -576,6 +552,7 @@ class GmailMCPServer:
             ]
         
         @self.server.call_tool()
+        @trace_tool_handler(self.server)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls."""
             try:
@@ -591,7 +568,8 @@ class GmailMCPServer:
                         userId="me",
                         maxResults=max_results,
                         labelIds=label_ids,
-                        includeSpamTrash=include_spam_trash
+                        includeSpamTrash=include_spam_trash,
+                        fields=MESSAGE_LIST_FIELDS
                     ).execute()
                     
                     messages = results.get('messages', [])
@@ -603,7 +581,8 @@ class GmailMCPServer:
                             userId="me",
                             id=msg['id'],
                             format="metadata",
-                            metadataHeaders=["From", "To", "Subject", "Date"]
+                            metadataHeaders=["From", "To", "Subject", "Date"],
+                            fields=MESSAGE_METADATA_FIELDS
                         ).execute()
                         detailed_messages.append(self._format_email_summary(msg_detail))
                     
@@ -622,7 +601,8 @@ class GmailMCPServer:
                     message = service.users().messages().get(
                         userId="me",
                         id=message_id,
-                        format=format_type
+                        format=format_type,
+                        fields={"full": MESSAGE_FULL_FIELDS, "metadata": MESSAGE_METADATA_FIELDS}.get(format_type)
                     ).execute()
                     
                     result = self._format_email_summary(message)
@@ -648,7 +628,7 @@ class GmailMCPServer:
                     if label_ids:
                         params["labelIds"] = label_ids
                     
-                    results = service.users().messages().list(**params).execute()
+                    results = service.users().messages().list(**params, fields=MESSAGE_LIST_FIELDS).execute()
                     
                     messages = results.get('messages', [])
                     
@@ -659,7 +639,8 @@ class GmailMCPServer:
                             userId="me",
                             id=msg['id'],
                             format="metadata",
-                            metadataHeaders=["From", "To", "Subject", "Date"]
+                            metadataHeaders=["From", "To", "Subject", "Date"],
+                            fields=MESSAGE_METADATA_FIELDS
                         ).execute()
                         detailed_messages.append(self._format_email_summary(msg_detail))
                     
@@ -677,7 +658,8 @@ class GmailMCPServer:
                     
                     thread = service.users().threads().get(
                         userId="me",
-                        id=thread_id
+                        id=thread_id,
+                        fields=f"messages({MESSAGE_FULL_FIELDS})"
                     ).execute()
                     
                     messages = []
@@ -696,7 +678,7 @@ class GmailMCPServer:
                     )]
                 
                 elif name == "gmail_list_labels":
-                    results = service.users().labels().list(userId="me").execute()
+                    results = service.users().labels().list(userId="me", fields="labels(id,name,type)").execute()
                     labels = results.get('labels', [])
                     
                     return [TextContent(
@@ -718,7 +700,8 @@ class GmailMCPServer:
                     
                     label = service.users().labels().get(
                         userId="me",
-                        id=label_id
+                        id=label_id,
+                        fields="name,messagesUnread,messagesTotal"
                     ).execute()
                     
                     return [TextContent(
@@ -776,7 +759,8 @@ class GmailMCPServer:
                         userId="me",
                         id=message_id,
                         format="metadata",
-                        metadataHeaders=["From", "To", "Cc", "Subject", "Message-ID", "References"]
+                        metadataHeaders=["From", "To", "Cc", "Subject", "Message-ID", "References"],
+                        fields=MESSAGE_METADATA_FIELDS
                     ).execute()
                     
                     headers = original.get('payload', {}).get('headers', [])
@@ -849,7 +833,8 @@ class GmailMCPServer:
                     original = service.users().messages().get(
                         userId="me",
                         id=message_id,
-                        format="full"
+                        format="full",
+                        fields=MESSAGE_FULL_FIELDS
                     ).execute()
                     
                     headers = original.get('payload', {}).get('headers', [])
@@ -1077,7 +1062,8 @@ class GmailMCPServer:
                     results = service.users().messages().list(
                         userId="me",
                         q=query,
-                        maxResults=max_results
+                        maxResults=max_results,
+                        fields=MESSAGE_LIST_FIELDS
                     ).execute()
                     
                     messages = results.get('messages', [])
@@ -1088,7 +1074,8 @@ class GmailMCPServer:
                             userId="me",
                             id=msg['id'],
                             format="metadata",
-                            metadataHeaders=["From", "To", "Subject", "Date"]
+                            metadataHeaders=["From", "To", "Subject", "Date"],
+                            fields=MESSAGE_METADATA_FIELDS
                         ).execute()
                         detailed_messages.append(self._format_email_summary(msg_detail))
                     
@@ -1166,6 +1153,10 @@ async def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
+    # Spans of this process join the host trace via tool-call _meta
+    configure_tracing("gmail")
+    instrument_google_api_client()
+    
     server = GmailMCPServer(Path(args.token_path))
     await server.run()
 
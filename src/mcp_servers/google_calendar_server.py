@@ -14,11 +14,12 @@ import logging
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from src.mcp_servers.calendar_store import CalendarEventStore
+from src.mcp_servers.google_services import FIELDS_ARGUMENT, field_mask, get_service_factory
+from src.utils.tracing import configure_tracing, instrument_google_api_client, trace_tool_handler
+
 logger = logging.getLogger(__name__)
 
 # Calendar API scopes
@@ -26,62 +27,89 @@ CALENDAR_SCOPES = [
     "https://www.googleapis.com/auth/calendar",
 ]
 
+# Fields the read tools return (partial responses, see google_services.field_mask)
+EVENT_FIELDS = (
+    "id,status,htmlLink,summary,description,location,start,end,"
+    "attendees(email,displayName,responseStatus,optional),organizer(email,displayName),"
+    "hangoutLink,recurringEventId"
+)
+CALENDAR_LIST_FIELDS = "items(id,summary,description,primary)"
+
 
 class GoogleCalendarMCPServer:
     """MCP Server for Google Calendar operations."""
     
-    def __init__(self, token_path: Path):
+    def __init__(self, token_path: Path, event_store_path: Optional[Path] = None):
         """
         Initialize Google Calendar MCP Server.
         
         Args:
             token_path: Path to OAuth token file
+            event_store_path: SQLite file of the local event store; list_events is
+                answered from it (None - every call queries the API)
         """
         self.token_path = Path(token_path)
         self._calendar_service = None
+        self._event_store = (
+            CalendarEventStore(event_store_path, self._get_calendar_service, EVENT_FIELDS) if event_store_path else None
+        )
+        self._own_calendar_ids: Optional[set] = None
         self.server = Server("google-calendar-mcp")
         self._setup_tools()
     
     def _get_calendar_service(self):
         """Get or create Google Calendar API service."""
         if self._calendar_service is None:
-            if not self.token_path.exists():
-                raise ValueError(
-                    f"OAuth token not found at {self.token_path}. "
-                    "Please complete OAuth flow first."
-                )
-            
-            creds = Credentials.from_authorized_user_file(
-                str(self.token_path),
-                CALENDAR_SCOPES
+            self._calendar_service = get_service_factory().service(
+                'calendar', 'v3', self.token_path, CALENDAR_SCOPES,
+                reauth_hint="Please re-authenticate via /api/integrations/google-calendar/enable."
             )
-            
-            # Refresh token if expired
-            if creds.expired:
-                if creds.refresh_token:
-                    try:
-                        creds.refresh(Request())
-                        # Save refreshed token
-                        with open(self.token_path, 'w') as token:
-                            token.write(creds.to_json())
-                    except Exception as e:
-                        logger.error(f"Failed to refresh token: {e}")
-                        raise ValueError(
-                            f"Token expired and refresh failed: {e}. "
-                            "Please re-authenticate via /api/integrations/google-calendar/enable"
-                        )
-                else:
-                    # Token expired and no refresh_token - user needs to re-authenticate
-                    raise ValueError(
-                        "Token expired and no refresh token available. "
-                        "Please re-authenticate via /api/integrations/google-calendar/enable. "
-                        "Make sure to use 'prompt=consent' during OAuth to get a refresh token."
-                    )
-            
-            self._calendar_service = build('calendar', 'v3', credentials=creds)
         
         return self._calendar_service
     
+    def _stored_events(self, calendar_id: str, time_min: Optional[str], time_max: Optional[str], max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Events of a range from the local store.
+        
+        Returns:
+            Events; None if the store is disabled, has not synced the calendar
+            yet or is unavailable (query the API instead)
+        """
+        if self._event_store is None or not self._is_own_calendar(calendar_id):
+            return None
+        try:
+            if not self._event_store.is_ready(calendar_id):
+                # Never run the first full sync inside a tool call: a busy calendar takes long
+                self._event_store.start_full_sync(calendar_id)
+                return None
+            return self._event_store.events(calendar_id, time_min, time_max, max_results)
+        except Exception as e:
+            logger.warning(f"Event store unavailable, querying the API: {e}")
+            return None
+    
+    def _is_own_calendar(self, calendar_id: str) -> bool:
+        """
+        Whether a calendar is one of the user's own (primary or in calendarList).
+        
+        Other calendars (e.g. attendees' calendars read for free/busy fallback)
+        are not synced into the store: one range query would download them whole.
+        """
+        if calendar_id == "primary":
+            return True
+        if self._own_calendar_ids is None:
+            try:
+                result = self._get_calendar_service().calendarList().list(fields="items(id)").execute()
+            except Exception as e:
+                logger.warning(f"Failed to list calendars, querying the API: {e}")
+                return False
+            self._own_calendar_ids = {cal.get('id') for cal in result.get('items', [])}
+        return calendar_id in self._own_calendar_ids
+    
+    def _invalidate_events(self, calendar_id: str) -> None:
+        """Make the next read of the calendar sync its changes first."""
+        if self._event_store is not None:
+            self._event_store.invalidate(calendar_id)
+    
     def _setup_tools(self):
         """Register MCP tools."""
         
@@ -120,7 +148,12 @@ class GoogleCalendarMCPServer:
                                 "type": "integer",
                                 "description": "Maximum number of results",
                                 "default": 10
-                            }
+                            },
+                            "pageToken": {
+                                "type": "string",
+                                "description": "nextPageToken of the previous page"
+                            },
+                            "fields": FIELDS_ARGUMENT
                         }
                     }
                 ),
@@ -138,7 +171,8 @@ class GoogleCalendarMCPServer:
                             "eventId": {
                                 "type": "string",
                                 "description": "Event ID"
-                            }
+                            },
+                            "fields": FIELDS_ARGUMENT
                         },
                         "required": ["eventId"]
                     }
@@ -330,14 +364,16 @@ class GoogleCalendarMCPServer:
             ]
         
         @self.server.call_tool()
+        @trace_tool_handler(self.server)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls."""
             try:
                 service = self._get_calendar_service()
                 
                 if name == "list_calendars":
-                    result = service.calendarList().list().execute()
+                    result = service.calendarList().list(fields=CALENDAR_LIST_FIELDS).execute()
                     calendars = result.get('items', [])
+                    self._own_calendar_ids = {cal.get('id') for cal in calendars}
                     return [TextContent(
                         type="text",
                         text=json.dumps({
@@ -358,23 +394,33 @@ class GoogleCalendarMCPServer:
                     time_min = arguments.get("timeMin")
                     time_max = arguments.get("timeMax")
                     max_results = arguments.get("maxResults", 10)
+                    page_token = arguments.get("pageToken")
                     
-                    events_result = service.events().list(
-                        calendarId=calendar_id,
-                        timeMin=time_min,
-                        timeMax=time_max,
-                        maxResults=max_results,
-                        singleEvents=True,
-                        orderBy='startTime'
-                    ).execute()
+                    # Extra fields are not stored and page tokens come from the API: those calls go to the API
+                    events = None
+                    if not arguments.get("fields") and not page_token:
+                        events = self._stored_events(calendar_id, time_min, time_max, max_results)
                     
-                    events = events_result.get('items', [])
+                    next_page_token = None
+                    if events is None:
+                        events_result = service.events().list(
+                            calendarId=calendar_id,
+                            timeMin=time_min,
+                            timeMax=time_max,
+                            maxResults=max_results,
+                            pageToken=page_token,
+                            singleEvents=True,
+                            orderBy='startTime',
+                            fields=field_mask(EVENT_FIELDS, arguments.get("fields"), collection="items")
+                        ).execute()
+                        events = events_result.get('items', [])
+                        next_page_token = events_result.get('nextPageToken')
+                    response = {"items": events, "count": len(events)}
+                    if next_page_token:
+                        response["nextPageToken"] = next_page_token
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
-                            "items": events,
-                            "count": len(events)
-                        }, indent=2, default=str)
+                        text=json.dumps(response, indent=2, default=str)
                     )]
                 
                 elif name == "get_event":
@@ -383,7 +429,8 @@ class GoogleCalendarMCPServer:
                     
                     event = service.events().get(
                         calendarId=calendar_id,
-                        eventId=event_id
+                        eventId=event_id,
+                        fields=field_mask(EVENT_FIELDS, arguments.get("fields"))
                     ).execute()
                     
                     return [TextContent(
@@ -488,6 +535,7 @@ class GoogleCalendarMCPServer:
                         calendarId=calendar_id,
                         body=event_body
                     ).execute()
+                    self._invalidate_events(calendar_id)
                     
                     # #region agent log - H2: Track event after API call
                     try:
@@ -554,6 +602,7 @@ class GoogleCalendarMCPServer:
                         eventId=event_id,
                         body=event
                     ).execute()
+                    self._invalidate_events(calendar_id)
                     
                     return [TextContent(
                         type="text",
@@ -572,6 +621,7 @@ class GoogleCalendarMCPServer:
                         calendarId=calendar_id,
                         eventId=event_id
                     ).execute()
+                    self._invalidate_events(calendar_id)
                     
                     return [TextContent(
                         type="text",
@@ -589,6 +639,7 @@ class GoogleCalendarMCPServer:
                         calendarId=calendar_id,
                         text=text
                     ).execute()
+                    self._invalidate_events(calendar_id)
                     
                     return [TextContent(
                         type="text",
@@ -681,6 +732,12 @@ async def main():
         default="config/google_calendar_token.json",
         help="Path to OAuth token file"
     )
+    parser.add_argument(
+        "--event-store",
+        type=str,
+        default=None,
+        help="SQLite file of the local event store (answer list_events from it, kept current with incremental sync)"
+    )
     args = parser.parse_args()
     
     # Setup logging
@@ -689,7 +746,14 @@ async def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    server = GoogleCalendarMCPServer(Path(args.token_path))
+    # Spans of this process join the host trace via tool-call _meta
+    configure_tracing("google-calendar")
+    instrument_google_api_client()
+    
+    server = GoogleCalendarMCPServer(
+        Path(args.token_path),
+        event_store_path=Path(args.event_store) if args.event_store else None
+    )
     await server.run()
 
 
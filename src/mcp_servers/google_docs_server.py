@@ -14,11 +14,12 @@ import re
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from src.mcp_servers.google_services import get_service_factory
+from src.mcp_servers.edit_batching import EditBatcher, utf16_length
+from src.utils.tracing import configure_tracing, instrument_google_api_client, trace_tool_handler
+
 logger = logging.getLogger(__name__)
 
 # Docs API scopes
@@ -27,69 +28,78 @@ DOCS_SCOPES = [
     "https://www.googleapis.com/auth/drive.file",
 ]
 
+# Requests that only style text; dropped when a batch with them is rejected
+STYLE_REQUEST_TYPES = {"updateTextStyle", "updateParagraphStyle", "createParagraphBullets"}
+
 
 class GoogleDocsMCPServer:
     """MCP Server for Google Docs operations."""
     
-    def __init__(self, token_path: Path, config_path: Optional[Path] = None):
+    def __init__(self, token_path: Path, config_path: Optional[Path] = None, batch_edits: bool = False):
         """
         Initialize Google Docs MCP Server.
         
         Args:
             token_path: Path to OAuth token file
             config_path: Path to workspace config file (optional, defaults to config/workspace_config.json)
+            batch_edits: Queue edits per document and send them in one batchUpdate (see edit_batching)
         """
         self.token_path = Path(token_path)
         self.config_path = config_path or Path("config/workspace_config.json")
         self._docs_service = None
         self._drive_service = None
         self._workspace_folder_id = None
+        self._edits = EditBatcher(self._send_batch_update, enabled=batch_edits, style_request_types=STYLE_REQUEST_TYPES)
         self.server = Server("google-docs-mcp")
         self._setup_tools()
     
     def _get_docs_service(self):
         """Get or create Google Docs API service."""
         if self._docs_service is None:
-            if not self.token_path.exists():
-                raise ValueError(
-                    f"OAuth token not found at {self.token_path}. "
-                    "Please complete OAuth flow first."
-                )
-            
-            # Load credentials without specifying scopes - use scopes from token file
-            creds = Credentials.from_authorized_user_file(str(self.token_path))
-            
-            # Refresh token if expired
-            if creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-                # Save refreshed token
-                with open(self.token_path, 'w') as token:
-                    token.write(creds.to_json())
-            
-            self._docs_service = build('docs', 'v1', credentials=creds)
+            self._docs_service = get_service_factory().service('docs', 'v1', self.token_path)
         
         return self._docs_service
     
     def _get_drive_service(self):
         """Get or create Google Drive API service for document operations."""
         if self._drive_service is None:
-            if not self.token_path.exists():
-                raise ValueError(
-                    f"OAuth token not found at {self.token_path}. "
-                    "Please complete OAuth flow first."
-                )
-            
-            # Load credentials without specifying scopes - use scopes from token file
-            creds = Credentials.from_authorized_user_file(str(self.token_path))
-            
-            # Refresh token if expired
-            if creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            
-            self._drive_service = build('drive', 'v3', credentials=creds)
+            self._drive_service = get_service_factory().service('drive', 'v3', self.token_path)
         
         return self._drive_service
     
+    def _send_batch_update(self, document_id: str, requests: List[Dict]) -> Dict[str, Any]:
+        """Send requests in one documents.batchUpdate."""
+        return self._get_docs_service().documents().batchUpdate(
+            documentId=document_id,
+            body={"requests": requests}
+        ).execute()
+    
+    def _end_index(self, document_id: str) -> int:
+        """
+        End index of the document body, including queued edits.
+        
+        The document is read once per transaction; queued inserts and
+        deletions then shift the end without another read.
+        """
+        state = self._edits.state(document_id) if self._edits.enabled else {}
+        if "base_end" not in state:
+            document = self._get_docs_service().documents().get(documentId=document_id).execute()
+            state["base_end"] = document.get('body', {}).get('content', [{}])[-1].get('endIndex', 1)
+            state["delta"] = 0
+        return state["base_end"] + state["delta"]
+    
+    def _submit(self, document_id: str, requests: List[Dict]) -> Dict[str, Any]:
+        """Send or queue edit requests, keeping the tracked body length in step."""
+        state = self._edits.state(document_id) if self._edits.enabled else {}
+        if "base_end" in state:
+            for request in requests:
+                if "insertText" in request and not request["insertText"].get("location", {}).get("segmentId"):
+                    state["delta"] += utf16_length(request["insertText"]["text"])
+                elif "deleteContentRange" in request and not request["deleteContentRange"]["range"].get("segmentId"):
+                    deleted = request["deleteContentRange"]["range"]
+                    state["delta"] -= deleted["endIndex"] - deleted["startIndex"]
+        return self._edits.submit(document_id, requests)
+    
     def _load_config(self) -> Dict[str, Any]:
         """Load workspace configuration."""
         if not self.config_path.exists():
@@ -324,13 +334,39 @@ class GoogleDocsMCPServer:
                         "required": ["documentId", "searchText"]
                     }
                 ),
+                Tool(
+                    name="docs_flush_edits",
+                    description="Apply queued edits (batching mode) of one or all documents.",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "documentId": {
+                                "type": "string",
+                                "description": "Document ID or URL (optional, all documents by default)"
+                            }
+                        }
+                    }
+                ),
             ]
         
         @self.server.call_tool()
+        @trace_tool_handler(self.server)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls."""
             try:
-                if name == "docs_create":
+                if name in ("docs_read", "docs_search_text") and arguments.get("documentId"):
+                    # Reads must see queued edits
+                    self._edits.flush(self._extract_file_id(arguments["documentId"]))
+                
+                if name == "docs_flush_edits":
+                    document_id = arguments.get("documentId")
+                    result = self._edits.flush_all(self._extract_file_id(document_id) if document_id else None)
+                    return [TextContent(
+                        type="text",
+                        text=json.dumps(result, indent=2)
+                    )]
+                
+                elif name == "docs_create":
                     drive_service = self._get_drive_service()
                     docs_service = self._get_docs_service()
                     folder_id = self._get_workspace_folder_id()
@@ -416,13 +452,11 @@ class GoogleDocsMCPServer:
                     )]
                 
                 elif name == "docs_update":
-                    docs_service = self._get_docs_service()
                     document_id = self._extract_file_id(arguments.get("documentId"))
                     content = arguments.get("content")
                     
-                    # Get document to find end index
-                    document = docs_service.documents().get(documentId=document_id).execute()
-                    end_index = document.get('body', {}).get('content', [{}])[-1].get('endIndex', 1)
+                    # Find end index
+                    end_index = self._end_index(document_id)
                     
                     # Delete existing content (except the last newline)
                     requests = []
@@ -446,10 +480,7 @@ class GoogleDocsMCPServer:
                         })
                     
                     if requests:
-                        docs_service.documents().batchUpdate(
-                            documentId=document_id,
-                            body={"requests": requests}
-                        ).execute()
+                        self._submit(document_id, requests)
                     
                     return [TextContent(
                         type="text",
@@ -460,27 +491,20 @@ class GoogleDocsMCPServer:
                     )]
                 
                 elif name == "docs_append":
-                    docs_service = self._get_docs_service()
                     document_id = self._extract_file_id(arguments.get("documentId"))
                     content = arguments.get("content")
                     
-                    # Get document to find end index
-                    document = docs_service.documents().get(documentId=document_id).execute()
-                    end_index = document.get('body', {}).get('content', [{}])[-1].get('endIndex', 1)
+                    # Find end index
+                    end_index = self._end_index(document_id)
                     
                     # Insert at end (before the last newline)
                     insert_index = end_index - 1
-                    docs_service.documents().batchUpdate(
-                        documentId=document_id,
-                        body={
-                            "requests": [{
-                                "insertText": {
-                                    "location": {"index": insert_index},
-                                    "text": content
-                                }
-                            }]
+                    self._submit(document_id, [{
+                        "insertText": {
+                            "location": {"index": insert_index},
+                            "text": content
                         }
-                    ).execute()
+                    }])
                     
                     return [TextContent(
                         type="text",
@@ -491,22 +515,16 @@ class GoogleDocsMCPServer:
                     )]
                 
                 elif name == "docs_insert":
-                    docs_service = self._get_docs_service()
                     document_id = self._extract_file_id(arguments.get("documentId"))
                     index = arguments.get("index")
                     content = arguments.get("content")
                     
-                    docs_service.documents().batchUpdate(
-                        documentId=document_id,
-                        body={
-                            "requests": [{
-                                "insertText": {
-                                    "location": {"index": index},
-                                    "text": content
-                                }
-                            }]
+                    self._submit(document_id, [{
+                        "insertText": {
+                            "location": {"index": index},
+                            "text": content
                         }
-                    ).execute()
+                    }])
                     
                     return [TextContent(
                         type="text",
@@ -518,7 +536,6 @@ class GoogleDocsMCPServer:
                     )]
                 
                 elif name == "docs_format_text":
-                    docs_service = self._get_docs_service()
                     document_id = self._extract_file_id(arguments.get("documentId"))
                     start_index = arguments.get("startIndex")
                     end_index = arguments.get("endIndex")
@@ -567,10 +584,7 @@ class GoogleDocsMCPServer:
                         }
                     }]
                     
-                    docs_service.documents().batchUpdate(
-                        documentId=document_id,
-                        body={"requests": requests}
-                    ).execute()
+                    self._submit(document_id, requests)
                     
                     return [TextContent(
                         type="text",
@@ -638,12 +652,17 @@ class GoogleDocsMCPServer:
     
     async def run(self):
         """Run the MCP server."""
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
-            )
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options()
+                )
+        finally:
+            result = self._edits.flush_all()
+            if result["errors"]:
+                logger.error(f"Queued edits lost on shutdown: {result['errors']}")
 
 
 async def main():
@@ -663,6 +682,11 @@ async def main():
         default="config/workspace_config.json",
         help="Path to workspace config file"
     )
+    parser.add_argument(
+        "--batch-edits",
+        action="store_true",
+        help="Queue edits per document and apply them in one batchUpdate"
+    )
     args = parser.parse_args()
     
     # Setup logging
@@ -671,7 +695,11 @@ async def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    server = GoogleDocsMCPServer(Path(args.token_path), config_path=Path(args.config_path))
+    # Spans of this process join the host trace via tool-call _meta
+    configure_tracing("google-docs")
+    instrument_google_api_client()
+    
+    server = GoogleDocsMCPServer(Path(args.token_path), config_path=Path(args.config_path), batch_edits=args.batch_edits)
     await server.run()
 
 
@@ -0,0 +1,335 @@
+"""
+Shared construction of Google API services for the MCP servers.
+
+Every server used to call googleapiclient.discovery.build() per service, each
+with its own httplib2 transport: one TLS connection per service, no pooling
+and an httplib2.Http that must not be shared between the threads the servers
+offload calls to. GoogleServiceFactory builds them differently:
+
+- discovery documents come from the copies bundled with google-api-python-client
+  and are parsed once per process (no network fetch, no repeated JSON parsing)
+- credentials are loaded once per token file and shared by all services built
+  from it; refresh is single flight: concurrent callers that see an expired
+  token (or a 401) wait for one refresh instead of each refreshing
+- all services of a credential share one requests-based AuthorizedSession with
+  a connection pool, so Drive/Sheets/Docs/Slides calls reuse keep-alive
+  connections and can run from several threads
+- each service is built once per (credential, api, version)
+
+Use get_service_factory().service("sheets", "v4", token_path).
+
+Tools request partial responses: each declares the fields it returns and
+builds its `fields=` mask with field_mask(), adding the fields the agent asks
+for through the optional "fields" argument (FIELDS_ARGUMENT).
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pathlib import Path
+import functools
+import json
+import logging
+import socket
+import threading
+
+import httplib2
+import requests
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import DEFAULT_HTTP_TIMEOUT_SEC
+
+logger = logging.getLogger(__name__)
+
+
+# Connections kept per host; the servers offload calls to a thread pool
+POOL_MAXSIZE = 16
+
+# Redirects followed like httplib2 does; 308 means "resume incomplete" for uploads
+REDIRECT_CODES = {301, 302, 303, 307}
+MAX_REDIRECTS = 5
+
+# Schema of the optional "fields" argument of tools returning API resources
+FIELDS_ARGUMENT = {
+    "type": "string",
+    "description": "Additional API fields to return, comma-separated (e.g. 'attendees,conferenceData'); '*' returns all fields"
+}
+
+
+# spreadsheets.get without grid data: the tools only read sheet properties
+SPREADSHEET_INFO_FIELDS = (
+    "spreadsheetId,spreadsheetUrl,properties(title,locale,timeZone),"
+    "sheets/properties(sheetId,title,index,gridProperties(rowCount,columnCount))"
+)
+
+
+def split_fields(fields: Optional[str]) -> List[str]:
+    """
+    Split a field mask into its top-level selectors.
+    
+    Args:
+        fields: Mask like "id,files(id,name),owners/emailAddress"
+    
+    Returns:
+        Selectors without surrounding spaces ("files(id,name)" stays whole)
+    """
+    selectors, depth, current = [], 0, ""
+    for char in fields or "":
+        if char == "," and depth == 0:
+            selectors.append(current.strip())
+            current = ""
+            continue
+        depth += (char == "(") - (char == ")")
+        current += char
+    selectors.append(current.strip())
+    return [selector for selector in selectors if selector]
+
+
+def field_mask(fields: str, extra: Optional[str] = None, collection: Optional[str] = None) -> str:
+    """
+    Partial-response mask of a tool call.
+    
+    Args:
+        fields: Fields the tool returns (of each item for list calls)
+        extra: Fields requested by the caller ("*" - everything)
+        collection: Item collection of a list call ("files", "items"): the mask
+            becomes "nextPageToken,<collection>(<fields>)"
+    
+    Returns:
+        Value for the `fields` request parameter
+    """
+    if extra and extra.strip() == "*":
+        return "*"
+    selectors = ",".join(dict.fromkeys(split_fields(fields) + split_fields(extra)))
+    return f"nextPageToken,{collection}({selectors})" if collection else selectors
+
+
+def extra_field_names(extra: Optional[str]) -> Optional[List[str]]:
+    """
+    Top-level names of the fields requested by the caller.
+    
+    Args:
+        extra: Value of the "fields" argument
+    
+    Returns:
+        Names like ["owners", "size"]; None for "*" (all fields)
+    """
+    if extra and extra.strip() == "*":
+        return None
+    return [selector.split("(")[0].split("/")[0].strip() for selector in split_fields(extra)]
+
+
+@functools.lru_cache(maxsize=None)
+def discovery_document(api: str, version: str) -> Dict[str, Any]:
+    """
+    Bundled discovery document of an API, parsed once (shared, do not modify).
+    
+    Args:
+        api: API name (drive, sheets, docs, slides, gmail, calendar)
+        version: API version
+    
+    Returns:
+        Parsed discovery document
+    
+    Raises:
+        ValueError: If the client library has no bundled document for it
+    """
+    document = get_static_doc(api, version)
+    if document is None:
+        raise ValueError(f"No bundled discovery document for {api} {version}")
+    return json.loads(document)
+
+
+class _CredentialEntry:
+    """Credentials of one token file with the session and services built from them."""
+    
+    def __init__(self, token_path: Path, credentials: Credentials, session: AuthorizedSession, reauth_hint: str):
+        self.token_path = token_path
+        self.reauth_hint = reauth_hint
+        self.credentials = credentials
+        self.session = session
+        self.refresh_lock = threading.Lock()
+        self.services: Dict[Tuple[str, str], Any] = {}
+
+
+class SessionHttp:
+    """
+    httplib2.Http-compatible transport over a shared AuthorizedSession.
+    
+    googleapiclient only calls request() (and close() on Resource.close), so
+    this adapter is all it needs to send requests through the pooled session.
+    """
+    
+    def __init__(self, factory: "GoogleServiceFactory", entry: _CredentialEntry, timeout: float):
+        self._factory = factory
+        self._entry = entry
+        self.timeout = timeout
+    
+    def request(self, uri, method="GET", body=None, headers=None, redirections=MAX_REDIRECTS, connection_type=None):
+        """Send a request; returns (httplib2.Response, content) like httplib2.Http.request."""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        credentials = self._entry.credentials
+        token = self._factory.ensure_valid(self._entry)
+        response = self._send(method, uri, body, headers, redirections)
+        if response.status_code == 401 and credentials.refresh_token:
+            # Token revoked or expired early: refresh once for all waiting callers
+            self._factory.ensure_valid(self._entry, stale_token=token)
+            response = self._send(method, uri, body, headers, redirections)
+        
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info["status"] = str(response.status_code)
+        result = httplib2.Response(info)
+        result.reason = response.reason
+        return result, response.content
+    
+    def _send(self, method: str, uri: str, body: Optional[bytes], headers: Optional[Dict[str, str]], redirections: int) -> requests.Response:
+        for _ in range(redirections + 1):
+            response = self._entry.session.request(
+                method, uri, data=body, headers=headers, timeout=self.timeout, allow_redirects=False
+            )
+            if response.status_code not in REDIRECT_CODES or "location" not in response.headers:
+                return response
+            uri = requests.compat.urljoin(uri, response.headers["location"])
+            if response.status_code == 303:
+                method, body = "GET", None
+        return response
+    
+    def close(self) -> None:
+        """The session is shared by all services of the credential: nothing to close."""
+
+
+class GoogleServiceFactory:
+    """Builds Google API services with shared credentials and connections."""
+    
+    def __init__(self, api_endpoint: Optional[str] = None, token_uri: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Initialize factory.
+        
+        Args:
+            api_endpoint: Root URL for all APIs instead of the Google endpoints (local stand-ins)
+            token_uri: OAuth token endpoint instead of Google's (local stand-ins)
+            timeout: HTTP timeout in seconds (socket default or googleapiclient's default)
+        """
+        self.api_endpoint = api_endpoint
+        self.token_uri = token_uri
+        self.timeout = timeout or socket.getdefaulttimeout() or DEFAULT_HTTP_TIMEOUT_SEC
+        self._entries: Dict[Tuple[str, Optional[Tuple[str, ...]]], _CredentialEntry] = {}
+        self._lock = threading.Lock()
+        self._auth_request = Request()
+    
+    def service(
+        self,
+        api: str,
+        version: str,
+        token_path: Path,
+        scopes: Optional[Sequence[str]] = None,
+        reauth_hint: str = ""
+    ) -> Any:
+        """
+        Get or build an API service.
+        
+        Args:
+            api: API name
+            version: API version
+            token_path: OAuth token file
+            scopes: Scopes to load the token with (None - scopes from the token file)
+            reauth_hint: Appended to errors that require signing in again
+        
+        Returns:
+            googleapiclient Resource
+        
+        Raises:
+            ValueError: If the token is missing or cannot be refreshed
+        """
+        entry = self._entry(Path(token_path), scopes, reauth_hint)
+        key = (api, version)
+        with self._lock:
+            service = entry.services.get(key)
+            if service is None:
+                client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+                service = build_from_document(
+                    discovery_document(api, version),
+                    http=SessionHttp(self, entry, self.timeout),
+                    client_options=client_options
+                )
+                entry.services[key] = service
+        return service
+    
+    def ensure_valid(self, entry: _CredentialEntry, stale_token: Optional[str] = None) -> str:
+        """
+        Refresh credentials once for all concurrent callers.
+        
+        Args:
+            entry: Credential entry
+            stale_token: Token the API rejected (refresh even if it looks valid)
+        
+        Returns:
+            Access token to use
+        """
+        credentials = entry.credentials
+        if stale_token is None and credentials.valid:
+            return credentials.token
+        with entry.refresh_lock:
+            # Another caller may have refreshed while this one waited
+            if stale_token is None and credentials.valid:
+                return credentials.token
+            if stale_token is not None and credentials.token != stale_token:
+                return credentials.token
+            if not credentials.refresh_token:
+                raise ValueError(
+                    "Token expired and no refresh token available. "
+                    f"{entry.reauth_hint} "
+                    "Make sure to use 'prompt=consent' during OAuth to get a refresh token."
+                )
+            try:
+                credentials.refresh(self._auth_request)
+            except Exception as e:
+                logger.error(f"Failed to refresh token: {e}")
+                raise ValueError(f"Token expired and refresh failed: {e}. {entry.reauth_hint}".strip())
+            try:
+                entry.token_path.write_text(credentials.to_json())
+            except OSError as e:
+                logger.warning(f"Failed to save refreshed token to {entry.token_path}: {e}")
+            return credentials.token
+    
+    def _entry(self, token_path: Path, scopes: Optional[Sequence[str]], reauth_hint: str) -> _CredentialEntry:
+        key = (str(token_path.absolute()), tuple(scopes) if scopes else None)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if not token_path.exists():
+                    raise ValueError(
+                        f"OAuth token not found at {token_path}. "
+                        "Please complete OAuth flow first."
+                    )
+                credentials = Credentials.from_authorized_user_file(str(token_path), scopes)
+                if self.token_uri:
+                    # The copy does not keep the expiry
+                    expiry = credentials.expiry
+                    credentials = credentials.with_token_uri(self.token_uri)
+                    credentials.expiry = expiry
+                session = AuthorizedSession(credentials, refresh_status_codes=())
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                entry = self._entries[key] = _CredentialEntry(token_path, credentials, session, reauth_hint)
+        self.ensure_valid(entry)
+        return entry
+
+
+# Global factory instance
+_service_factory: Optional[GoogleServiceFactory] = None
+
+
+def get_service_factory() -> GoogleServiceFactory:
+    """
+    Get or create global service factory instance.
+    
+    Returns:
+        GoogleServiceFactory instance
+    """
+    global _service_factory
+    if _service_factory is None:
+        _service_factory = GoogleServiceFactory()
+    return _service_factory
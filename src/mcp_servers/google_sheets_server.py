@@ -6,6 +6,7 @@ Provides MCP tools for Google Sheets operations via OAuth2.
 import asyncio
 import json
 import sys
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 import logging
@@ -14,11 +15,11 @@ import re
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from src.mcp_servers.google_services import SPREADSHEET_INFO_FIELDS, get_service_factory
+from src.utils.tracing import configure_tracing, instrument_google_api_client, trace_tool_handler
+
 logger = logging.getLogger(__name__)
 
 # Sheets API scopes
@@ -27,6 +28,254 @@ SHEETS_SCOPES = [
     "https://www.googleapis.com/auth/drive.file",
 ]
 
+# Reads of one spreadsheet arriving within this window share one values.batchGet
+COALESCE_WINDOW_SEC = 0.02
+
+# Spreadsheets whose ranges are kept before the least recently read are dropped
+MAX_CACHED_SPREADSHEETS = 100
+
+# Tools that do not change spreadsheet data
+READ_ONLY_TOOLS = {
+    "sheets_list_spreadsheets",
+    "sheets_get_spreadsheet_info",
+    "sheets_read_range",
+    "sheets_read_multiple_ranges",
+    "sheets_search",
+}
+
+_A1_RANGE = re.compile(
+    r"^(?:(?P<sheet>'(?:[^']|'')+'|[^!]+)!)?(?P<c0>[A-Z]+)(?P<r0>[0-9]+)(?::(?P<c1>[A-Z]+)(?P<r1>[0-9]+))?$",
+    re.IGNORECASE
+)
+
+
+def _dumps(payload: Any) -> str:
+    """Compact JSON for tool results (no indentation, UTF-8 text as is)."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for letter in letters.upper():
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+
+def _parse_a1(range_notation: str) -> Optional[tuple]:
+    """
+    Parse a bounded A1 range.
+    
+    Args:
+        range_notation: Range like "Sheet1!A1:C10", "B2" or "'My sheet'!A1:B2"
+    
+    Returns:
+        (sheet part or "", first row, first column, last row, last column),
+        or None for unbounded ranges ("A:C", "Sheet1") and named ranges
+    """
+    match = _A1_RANGE.match(range_notation.strip())
+    if not match:
+        return None
+    r0, c0 = int(match.group("r0")), _column_number(match.group("c0"))
+    r1 = int(match.group("r1")) if match.group("r1") else r0
+    c1 = _column_number(match.group("c1")) if match.group("c1") else c0
+    if r1 < r0 or c1 < c0:
+        return None
+    return (match.group("sheet") or "", r0, c0, r1, c1)
+
+
+class SheetsRangeCache:
+    """
+    Revision-aware cache of range values for one server process.
+    
+    Cached values of a spreadsheet are reused only while its Drive version
+    and modifiedTime are unchanged; this is checked with one lightweight
+    files.get per batch of reads. Reads of several ranges from one
+    spreadsheet arriving within COALESCE_WINDOW_SEC are fetched with a
+    single values.batchGet; if it fails (one bad range fails the whole
+    call), the ranges are read one by one, so only the readers of a failing
+    range get its error. A range inside a cached bounded range of the same
+    sheet is cut out of it without an API call.
+    """
+    
+    def __init__(
+        self,
+        get_sheets_service,
+        get_drive_service,
+        window_sec: float = COALESCE_WINDOW_SEC,
+        max_spreadsheets: int = MAX_CACHED_SPREADSHEETS
+    ):
+        """
+        Initialize cache.
+        
+        Args:
+            get_sheets_service: Callable returning the Sheets API service
+            get_drive_service: Callable returning the Drive API service
+            window_sec: Coalescing window for concurrent reads
+            max_spreadsheets: Spreadsheets kept before the least recently read are dropped
+        """
+        self._get_sheets_service = get_sheets_service
+        self._get_drive_service = get_drive_service
+        self.window_sec = window_sec
+        self.max_spreadsheets = max_spreadsheets
+        # spreadsheet_id -> {"revision": str, "ranges": {(range, render option): value range}}
+        self._spreadsheets: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # (spreadsheet_id, render option) -> {"ranges": [...], "future": Future}
+        self._pending: Dict[tuple, Dict[str, Any]] = {}
+        # Spreadsheets whose Drive metadata is not accessible (drive.file scope): never cached
+        self._unversioned = set()
+    
+    async def read(self, spreadsheet_id: str, ranges: List[str], value_render_option: str = "FORMATTED_VALUE") -> List[Dict[str, Any]]:
+        """
+        Read ranges, reusing cached values and coalescing concurrent reads.
+        
+        Args:
+            spreadsheet_id: Spreadsheet ID
+            ranges: Ranges in A1 notation
+            value_render_option: Sheets valueRenderOption
+        
+        Returns:
+            Value ranges ({"range", "values", ...}) in the order of ranges
+        
+        Raises:
+            HttpError: If reading one of the ranges failed
+        """
+        key = (spreadsheet_id, value_render_option)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = {"ranges": [], "future": asyncio.get_running_loop().create_future()}
+            self._pending[key] = batch
+            asyncio.create_task(self._flush(key, batch))
+        for range_notation in ranges:
+            if range_notation not in batch["ranges"]:
+                batch["ranges"].append(range_notation)
+        
+        results = await asyncio.shield(batch["future"])
+        value_ranges = [results[range_notation] for range_notation in ranges]
+        for value_range in value_ranges:
+            if isinstance(value_range, Exception):
+                raise value_range
+        return value_ranges
+    
+    def invalidate(self, spreadsheet_id: str) -> None:
+        """
+        Drop cached values of a spreadsheet (after a write through this server).
+        
+        Args:
+            spreadsheet_id: Spreadsheet ID
+        """
+        self._spreadsheets.pop(spreadsheet_id, None)
+    
+    async def _flush(self, key: tuple, batch: Dict[str, Any]) -> None:
+        await asyncio.sleep(self.window_sec)
+        self._pending.pop(key, None)
+        try:
+            batch["future"].set_result(self._fetch(key[0], batch["ranges"], key[1]))
+        except Exception as e:
+            batch["future"].set_exception(e)
+            # Readers get the error; nobody else has to retrieve it
+            batch["future"].exception()
+    
+    def _revision(self, spreadsheet_id: str) -> Optional[str]:
+        if spreadsheet_id in self._unversioned:
+            return None
+        try:
+            metadata = self._get_drive_service().files().get(
+                fileId=spreadsheet_id,
+                fields="version,modifiedTime",
+                supportsAllDrives=True
+            ).execute()
+        except HttpError as e:
+            if e.resp.status in (403, 404):
+                self._unversioned.add(spreadsheet_id)
+            logger.debug(f"Revision check failed for {spreadsheet_id}, reading without cache: {e}")
+            return None
+        return f"{metadata.get('version')}:{metadata.get('modifiedTime')}"
+    
+    def _fetch(self, spreadsheet_id: str, ranges: List[str], value_render_option: str) -> Dict[str, Any]:
+        """Value range, or the HttpError of reading it, of each range."""
+        revision = self._revision(spreadsheet_id)
+        cached = self._spreadsheets.get(spreadsheet_id)
+        if cached is None or revision is None or cached["revision"] != revision:
+            cached = {"revision": revision, "ranges": {}}
+            if revision is None:
+                self._spreadsheets.pop(spreadsheet_id, None)
+            else:
+                self._spreadsheets[spreadsheet_id] = cached
+        if revision is not None:
+            self._spreadsheets.move_to_end(spreadsheet_id)
+            while len(self._spreadsheets) > self.max_spreadsheets:
+                self._spreadsheets.popitem(last=False)
+        
+        results = {}
+        missing = []
+        for range_notation in ranges:
+            value_range = self._lookup(cached["ranges"], range_notation, value_render_option)
+            if value_range is None:
+                missing.append(range_notation)
+            else:
+                results[range_notation] = value_range
+        
+        fetched = {}
+        if len(missing) > 1:
+            try:
+                value_ranges = self._get_sheets_service().spreadsheets().values().batchGet(
+                    spreadsheetId=spreadsheet_id,
+                    ranges=missing,
+                    valueRenderOption=value_render_option
+                ).execute().get('valueRanges', [])
+                fetched = dict(zip(missing, value_ranges))
+            except HttpError as e:
+                logger.debug(f"batchGet failed for {spreadsheet_id}, reading {len(missing)} ranges one by one: {e}")
+        
+        for range_notation in missing:
+            if range_notation not in fetched:
+                try:
+                    fetched[range_notation] = self._get_sheets_service().spreadsheets().values().get(
+                        spreadsheetId=spreadsheet_id,
+                        range=range_notation,
+                        valueRenderOption=value_render_option
+                    ).execute()
+                except HttpError as e:
+                    # Delivered to the readers of this range only
+                    results[range_notation] = e
+                    continue
+            cached["ranges"][(range_notation, value_render_option)] = fetched[range_notation]
+            results[range_notation] = fetched[range_notation]
+        return results
+    
+    @staticmethod
+    def _lookup(cached_ranges: Dict[tuple, Dict[str, Any]], range_notation: str, value_render_option: str) -> Optional[Dict[str, Any]]:
+        exact = cached_ranges.get((range_notation, value_render_option))
+        if exact is not None:
+            return exact
+        
+        wanted = _parse_a1(range_notation)
+        if wanted is None:
+            return None
+        sheet, r0, c0, r1, c1 = wanted
+        for (cached_notation, render), value_range in cached_ranges.items():
+            bounds = _parse_a1(cached_notation) if render == value_render_option else None
+            if bounds is None or bounds[0] != sheet:
+                continue
+            _, top, left, bottom, right = bounds
+            if not (top <= r0 and left <= c0 and r1 <= bottom and c1 <= right):
+                continue
+            
+            values = [row[c0 - left:c1 - left + 1] for row in value_range.get('values', [])[r0 - top:r1 - top + 1]]
+            # The API omits trailing empty cells and rows
+            values = [row[:max((i + 1 for i, cell in enumerate(row) if cell != ""), default=0)] for row in values]
+            while values and not values[-1]:
+                values.pop()
+            
+            resolved_sheet = value_range.get('range', '').rpartition('!')[0]
+            a1 = range_notation.strip().rpartition('!')[2].upper()
+            sliced = {"range": f"{resolved_sheet}!{a1}" if resolved_sheet else a1, "majorDimension": "ROWS"}
+            if values:
+                sliced["values"] = values
+            return sliced
+        return None
+
+
 
 class GoogleSheetsMCPServer:
     """MCP Server for Google Sheets operations."""
@@ -44,53 +293,21 @@ class GoogleSheetsMCPServer:
         self._sheets_service = None
         self._drive_service = None
         self._workspace_folder_id = None
+        self._range_cache = SheetsRangeCache(self._get_sheets_service, self._get_drive_service)
         self.server = Server("google-sheets-mcp")
         self._setup_tools()
     
     def _get_sheets_service(self):
         """Get or create Google Sheets API service."""
         if self._sheets_service is None:
-            if not self.token_path.exists():
-                raise ValueError(
-                    f"OAuth token not found at {self.token_path}. "
-                    "Please complete OAuth flow first."
-                )
-            
-            creds = Credentials.from_authorized_user_file(
-                str(self.token_path),
-                SHEETS_SCOPES
-            )
-            
-            # Refresh token if expired
-            if creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-                # Save refreshed token
-                with open(self.token_path, 'w') as token:
-                    token.write(creds.to_json())
-            
-            self._sheets_service = build('sheets', 'v4', credentials=creds)
+            self._sheets_service = get_service_factory().service('sheets', 'v4', self.token_path, SHEETS_SCOPES)
         
         return self._sheets_service
     
     def _get_drive_service(self):
         """Get or create Google Drive API service for spreadsheet creation."""
         if self._drive_service is None:
-            if not self.token_path.exists():
-                raise ValueError(
-                    f"OAuth token not found at {self.token_path}. "
-                    "Please complete OAuth flow first."
-                )
-            
-            creds = Credentials.from_authorized_user_file(
-                str(self.token_path),
-                SHEETS_SCOPES
-            )
-            
-            # Refresh token if expired
-            if creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            
-            self._drive_service = build('drive', 'v3', credentials=creds)
+            self._drive_service = get_service_factory().service('drive', 'v3', self.token_path, SHEETS_SCOPES)
         
         return self._drive_service
     
@@ -736,11 +953,15 @@ class GoogleSheetsMCPServer:
             ]
         
         @self.server.call_tool()
+        @trace_tool_handler(self.server)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls."""
             try:
                 service = self._get_sheets_service()
                 
+                if name not in READ_ONLY_TOOLS and arguments.get("spreadsheetId"):
+                    self._range_cache.invalidate(self._extract_spreadsheet_id(arguments["spreadsheetId"]))
+                
                 if name == "sheets_list_spreadsheets":
                     drive_service = self._get_drive_service()
                     max_results = arguments.get("maxResults", 10)
@@ -755,7 +976,7 @@ class GoogleSheetsMCPServer:
                     files = results.get('files', [])
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "spreadsheets": [
                                 {
                                     "id": f.get('id'),
@@ -767,14 +988,15 @@ class GoogleSheetsMCPServer:
                                 for f in files
                             ],
                             "count": len(files)
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_get_spreadsheet_info":
                     spreadsheet_id = self._extract_spreadsheet_id(arguments.get("spreadsheetId"))
                     
                     spreadsheet = service.spreadsheets().get(
-                        spreadsheetId=spreadsheet_id
+                        spreadsheetId=spreadsheet_id,
+                        fields=SPREADSHEET_INFO_FIELDS
                     ).execute()
                     
                     sheets_info = [
@@ -790,14 +1012,14 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "spreadsheetId": spreadsheet.get('spreadsheetId'),
                             "title": spreadsheet.get('properties', {}).get('title'),
                             "locale": spreadsheet.get('properties', {}).get('locale'),
                             "timeZone": spreadsheet.get('properties', {}).get('timeZone'),
                             "url": spreadsheet.get('spreadsheetUrl'),
                             "sheets": sheets_info
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_create_spreadsheet":
@@ -847,7 +1069,7 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "spreadsheetId": spreadsheet_id,
                             "title": spreadsheet.get('properties', {}).get('title'),
                             "url": sheet_file.get('webViewLink', spreadsheet.get('spreadsheetUrl', '')),
@@ -856,7 +1078,7 @@ class GoogleSheetsMCPServer:
                                 for sheet in spreadsheet.get('sheets', [])
                             ],
                             "status": "created"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_read_range":
@@ -864,38 +1086,27 @@ class GoogleSheetsMCPServer:
                     range_notation = arguments.get("range")
                     value_render_option = arguments.get("valueRenderOption", "FORMATTED_VALUE")
                     
-                    
-                    result = service.spreadsheets().values().get(
-                        spreadsheetId=spreadsheet_id,
-                        range=range_notation,
-                        valueRenderOption=value_render_option
-                    ).execute()
-                    
+                    result = (await self._range_cache.read(spreadsheet_id, [range_notation], value_render_option))[0]
                     
                     values = result.get('values', [])
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "range": result.get('range'),
                             "values": values,
                             "rowCount": len(values),
                             "columnCount": max(len(row) for row in values) if values else 0
-                        }, indent=2, default=str)
+                        })
                     )]
                 
                 elif name == "sheets_read_multiple_ranges":
                     spreadsheet_id = self._extract_spreadsheet_id(arguments.get("spreadsheetId"))
                     ranges = arguments.get("ranges")
                     
-                    result = service.spreadsheets().values().batchGet(
-                        spreadsheetId=spreadsheet_id,
-                        ranges=ranges
-                    ).execute()
-                    
-                    value_ranges = result.get('valueRanges', [])
+                    value_ranges = await self._range_cache.read(spreadsheet_id, ranges)
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "ranges": [
                                 {
                                     "range": vr.get('range'),
@@ -903,7 +1114,7 @@ class GoogleSheetsMCPServer:
                                 }
                                 for vr in value_ranges
                             ]
-                        }, indent=2, default=str)
+                        })
                     )]
                 
                 elif name == "sheets_write_range":
@@ -921,13 +1132,13 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "updatedRange": result.get('updatedRange'),
                             "updatedRows": result.get('updatedRows'),
                             "updatedColumns": result.get('updatedColumns'),
                             "updatedCells": result.get('updatedCells'),
                             "status": "written"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_append_rows":
@@ -947,13 +1158,13 @@ class GoogleSheetsMCPServer:
                     updates = result.get('updates', {})
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "updatedRange": updates.get('updatedRange'),
                             "updatedRows": updates.get('updatedRows'),
                             "updatedColumns": updates.get('updatedColumns'),
                             "updatedCells": updates.get('updatedCells'),
                             "status": "appended"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_clear_range":
@@ -967,10 +1178,10 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "clearedRange": result.get('clearedRange'),
                             "status": "cleared"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_add_sheet":
@@ -1003,11 +1214,11 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "sheetId": new_sheet.get('sheetId'),
                             "title": new_sheet.get('title'),
                             "status": "added"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_delete_sheet":
@@ -1029,10 +1240,10 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "sheetId": sheet_id,
                             "status": "deleted"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_rename_sheet":
@@ -1059,11 +1270,11 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "sheetId": sheet_id,
                             "newTitle": new_title,
                             "status": "renamed"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_copy_sheet":
@@ -1084,12 +1295,12 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "newSheetId": result.get('sheetId'),
                             "newTitle": result.get('title'),
                             "destinationSpreadsheetId": dest_spreadsheet_id,
                             "status": "copied"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_search":
@@ -1100,7 +1311,8 @@ class GoogleSheetsMCPServer:
                     
                     # Get spreadsheet info to know all sheets
                     spreadsheet = service.spreadsheets().get(
-                        spreadsheetId=spreadsheet_id
+                        spreadsheetId=spreadsheet_id,
+                        fields=SPREADSHEET_INFO_FIELDS
                     ).execute()
                     
                     matches = []
@@ -1151,11 +1363,11 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "searchValue": search_value,
                             "matches": matches,
                             "matchCount": len(matches)
-                        }, indent=2, default=str)
+                        })
                     )]
                 
                 elif name == "sheets_format_cells":
@@ -1215,10 +1427,10 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "status": "formatted",
                             "appliedFormats": list(cell_format.keys())
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_auto_resize_columns":
@@ -1245,9 +1457,9 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "status": "resized"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_insert_rows":
@@ -1277,11 +1489,11 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "insertedRows": num_rows,
                             "startIndex": start_index,
                             "status": "inserted"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_delete_rows":
@@ -1308,10 +1520,10 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "deletedRows": arguments.get("endIndex") - arguments.get("startIndex"),
                             "status": "deleted"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_insert_columns":
@@ -1341,11 +1553,11 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "insertedColumns": num_columns,
                             "startIndex": start_index,
                             "status": "inserted"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_delete_columns":
@@ -1372,10 +1584,10 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "deletedColumns": arguments.get("endIndex") - arguments.get("startIndex"),
                             "status": "deleted"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_sort_range":
@@ -1407,11 +1619,11 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "sortColumn": arguments.get("sortColumnIndex"),
                             "ascending": arguments.get("ascending", True),
                             "status": "sorted"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_merge_cells":
@@ -1441,10 +1653,10 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "mergeType": merge_type,
                             "status": "merged"
-                        }, indent=2)
+                        })
                     )]
                 
                 elif name == "sheets_unmerge_cells":
@@ -1472,9 +1684,9 @@ class GoogleSheetsMCPServer:
                     
                     return [TextContent(
                         type="text",
-                        text=json.dumps({
+                        text=_dumps({
                             "status": "unmerged"
-                        }, indent=2)
+                        })
                     )]
                 
                 else:
@@ -1485,14 +1697,14 @@ class GoogleSheetsMCPServer:
                 logger.error(error_msg)
                 return [TextContent(
                     type="text",
-                    text=json.dumps({"error": error_msg}, indent=2)
+                    text=_dumps({"error": error_msg})
                 )]
             except Exception as e:
                 error_msg = f"Error executing tool {name}: {str(e)}"
                 logger.error(error_msg, exc_info=True)
                 return [TextContent(
                     type="text",
-                    text=json.dumps({"error": error_msg}, indent=2)
+                    text=_dumps({"error": error_msg})
                 )]
     
     async def run(self):
@@ -1525,6 +1737,10 @@ async def main():
     )
     
     config_path = Path("config/workspace_config.json")
+    # Spans of this process join the host trace via tool-call _meta
+    configure_tracing("google-sheets")
+    instrument_google_api_client()
+    
     server = GoogleSheetsMCPServer(Path(args.token_path), config_path=config_path)
     await server.run()
 
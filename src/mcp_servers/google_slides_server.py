@@ -4,6 +4,7 @@ Provides MCP tools for Google Slides operations via OAuth2.
 """
 
 import asyncio
+import hashlib
 import json
 import sys
 from pathlib import Path
@@ -14,11 +15,12 @@ import re
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from src.mcp_servers.google_services import get_service_factory
+from src.mcp_servers.edit_batching import EditBatcher, utf16_length
+from src.utils.tracing import configure_tracing, instrument_google_api_client, trace_tool_handler
+
 logger = logging.getLogger(__name__)
 
 # Slides API scopes
@@ -28,17 +30,234 @@ SLIDES_SCOPES = [
     "https://www.googleapis.com/auth/documents",  # For reading documents
 ]
 
+# Requests per presentations.batchUpdate call when building a deck
+MAX_REQUESTS_PER_BATCH = 500
+
+# Requests that only style text; dropped when a batch with them is rejected
+STYLE_REQUEST_TYPES = {"updateTextStyle", "updateParagraphStyle", "createParagraphBullets"}
+
+# Tools whose result depends on the current presentation: queued edits are flushed first
+PRESENTATION_READING_TOOLS = {
+    "slides_get",
+    "slides_get_masters",
+    "slides_update_table_cell",
+    "slides_update_element_transform",
+}
+
+# Placeholders whose ids are assigned up front when slides are created in batching mode
+TEXT_PLACEHOLDER_TYPES = ("TITLE", "CENTERED_TITLE", "SUBTITLE", "BODY")
+
+# Our layout names -> layout names used by Google Slides
+LAYOUT_NAMES = {
+    'TITLE': ['Title Slide', 'Title slide', 'title slide', 'TITLE'],
+    'TITLE_AND_BODY': ['Title and Body', 'Title and body', 'title and body', 'TITLE_AND_BODY'],
+    'SECTION_HEADER': ['Section Header', 'Section header', 'section header', 'SECTION_HEADER'],
+    'BLANK': ['Blank', 'blank', 'BLANK'],
+    'ONE_COLUMN_TEXT': ['One column text', 'ONE_COLUMN_TEXT'],
+    'TITLE_ONLY': ['Title Only', 'Title only', 'TITLE_ONLY'],
+}
+
+# Fields of presentations.get needed to plan a deck
+DECK_PLAN_FIELDS = (
+    "layouts(objectId,layoutProperties(name),pageElements(objectId,shape(shapeType,placeholder))),"
+    "slides(objectId,pageElements(objectId,shape(shapeType,placeholder)))"
+)
+
+
+def chunk_requests(requests: List[Dict], size: int = MAX_REQUESTS_PER_BATCH) -> List[List[Dict]]:
+    """Split requests into consecutive batchUpdate bodies of at most size requests."""
+    return [requests[i:i + size] for i in range(0, len(requests), size)]
+
+
+class DeckPlanner:
+    """
+    Compiles slide definitions into presentations.batchUpdate requests.
+    
+    Object ids of new slides and of their title, subtitle and body
+    placeholders are assigned up front (createSlide placeholderIdMappings),
+    so text and bullets go into the same batch as slide creation and the
+    presentation never has to be re-read to find placeholders.
+    """
+    
+    def __init__(self, presentation: Dict[str, Any], id_prefix: str):
+        """
+        Initialize planner.
+        
+        Args:
+            presentation: presentations.get result (layouts and slides with page elements)
+            id_prefix: Prefix of generated object ids (letters, digits, "_")
+        """
+        self.id_prefix = id_prefix
+        self.slides = presentation.get('slides', [])
+        self.layouts: Dict[str, Dict[str, Any]] = {}
+        self._first_layout: Optional[Dict[str, Any]] = None
+        
+        for layout in presentation.get('layouts', []):
+            placeholders = {}
+            for element in layout.get('pageElements', []):
+                placeholder = element.get('shape', {}).get('placeholder', {})
+                if placeholder.get('type') and placeholder['type'] not in placeholders:
+                    placeholders[placeholder['type']] = placeholder.get('index', 0)
+            info = {"objectId": layout.get('objectId'), "placeholders": placeholders}
+            if self._first_layout is None:
+                self._first_layout = info
+            
+            layout_name = layout.get('layoutProperties', {}).get('name', '')
+            self.layouts[layout_name] = info
+            for our_name, google_names in LAYOUT_NAMES.items():
+                if layout_name in google_names:
+                    self.layouts[our_name] = info
+    
+    def plan(self, slide_definitions: List[Dict]) -> List[Dict]:
+        """
+        Build requests for the whole deck.
+        
+        The first existing slide becomes the title slide, other existing
+        slides are deleted; each new slide is followed by its text and
+        formatting requests.
+        
+        Args:
+            slide_definitions: Slides from _group_content_into_slides
+        
+        Returns:
+            Ordered batchUpdate requests
+        """
+        requests = [{"deleteObject": {"objectId": slide.get('objectId')}} for slide in self.slides[1:]]
+        
+        for i, slide_def in enumerate(slide_definitions):
+            if i == 0 and self.slides:
+                # Layout of an existing slide cannot be changed: fill its placeholders as is
+                elements = self._existing_placeholders(self.slides[0])
+            else:
+                elements, create_request = self._create_slide(i, slide_def)
+                requests.append(create_request)
+            requests.extend(self._text_requests(slide_def, elements))
+        
+        return requests
+    
+    def _create_slide(self, index: int, slide_def: Dict) -> tuple:
+        slide_id = f"{self.id_prefix}_s{index}"
+        layout = (
+            self.layouts.get(slide_def.get('layout', 'TITLE_AND_BODY'))
+            or self.layouts.get('TITLE_AND_BODY')
+            or self._first_layout
+            or {"objectId": None, "placeholders": {}}
+        )
+        placeholders = layout["placeholders"]
+        
+        elements = {}
+        mappings = []
+        for role, types in (("title", ("TITLE", "CENTERED_TITLE")), ("subtitle", ("SUBTITLE",)), ("body", ("BODY",))):
+            placeholder_type = next((t for t in types if t in placeholders), None)
+            if placeholder_type is None:
+                continue
+            elements[role] = f"{slide_id}_{role}"
+            mappings.append({
+                "layoutPlaceholder": {"type": placeholder_type, "index": placeholders[placeholder_type]},
+                "objectId": elements[role]
+            })
+        
+        create_slide = {"objectId": slide_id}
+        if layout["objectId"]:
+            create_slide["slideLayoutReference"] = {"layoutId": layout["objectId"]}
+        if mappings:
+            create_slide["placeholderIdMappings"] = mappings
+        return elements, {"createSlide": create_slide}
+    
+    @staticmethod
+    def _existing_placeholders(slide: Dict) -> Dict[str, str]:
+        elements = {}
+        for element in slide.get('pageElements', []):
+            if 'shape' not in element:
+                continue
+            placeholder_type = element['shape'].get('placeholder', {}).get('type', '')
+            if placeholder_type in ['TITLE', 'CENTERED_TITLE']:
+                elements['title'] = element.get('objectId')
+            elif placeholder_type == 'SUBTITLE':
+                elements['subtitle'] = element.get('objectId')
+            elif placeholder_type == 'BODY':
+                elements['body'] = element.get('objectId')
+            elif element['shape'].get('shapeType') == 'TEXT_BOX' and 'title' not in elements:
+                # Fallback: use first text box as title
+                elements['title'] = element.get('objectId')
+        return elements
+    
+    @staticmethod
+    def _text_requests(slide_def: Dict, elements: Dict[str, str]) -> List[Dict]:
+        requests = []
+        
+        if slide_def.get('title') and elements.get('title'):
+            requests.append({"insertText": {"objectId": elements['title'], "text": slide_def['title']}})
+            # Format title: bold, larger font
+            requests.append({
+                "updateTextStyle": {
+                    "objectId": elements['title'],
+                    "style": {
+                        "bold": True,
+                        "fontSize": {"magnitude": 32, "unit": "PT"}
+                    },
+                    "textRange": {"type": "ALL"},
+                    "fields": "bold,fontSize"
+                }
+            })
+        
+        if slide_def.get('subtitle') and elements.get('subtitle'):
+            requests.append({"insertText": {"objectId": elements['subtitle'], "text": slide_def['subtitle']}})
+        
+        if slide_def.get('content') and elements.get('body'):
+            body_parts = []
+            body_length = 0  # UTF-16 code units, the unit of Slides text indices
+            bullet_ranges = []  # Track which ranges need bullets
+            for content_item in slide_def['content']:
+                item_text = content_item.get('text', '')
+                item_type = content_item.get('type', 'text')
+                
+                if item_type in ['subheading', 'bullet', 'text']:
+                    part = item_text + '\n'
+                elif item_type == 'table':
+                    part = item_text + '\n\n'
+                else:
+                    continue
+                start_pos = body_length
+                body_parts.append(part)
+                body_length += utf16_length(part)
+                if item_type == 'bullet':
+                    bullet_ranges.append((start_pos, body_length))
+            
+            full_body_text = ''.join(body_parts).rstrip('\n')
+            if full_body_text:
+                requests.append({"insertText": {"objectId": elements['body'], "text": full_body_text}})
+                full_body_length = utf16_length(full_body_text)
+                for start, end in bullet_ranges:
+                    end = min(end, full_body_length)
+                    if start >= end:
+                        continue
+                    requests.append({
+                        "createParagraphBullets": {
+                            "objectId": elements['body'],
+                            "textRange": {
+                                "type": "FIXED_RANGE",
+                                "startIndex": start,
+                                "endIndex": end
+                            },
+                            "bulletPreset": "BULLET_DISC_CIRCLE_SQUARE"
+                        }
+                    })
+        
+        return requests
+
 
 class GoogleSlidesMCPServer:
     """MCP Server for Google Slides operations."""
     
-    def __init__(self, token_path: Path, config_path: Optional[Path] = None):
+    def __init__(self, token_path: Path, config_path: Optional[Path] = None, batch_edits: bool = False):
         """
         Initialize Google Slides MCP Server.
         
         Args:
             token_path: Path to OAuth token file
             config_path: Path to workspace config file (optional, defaults to config/workspace_config.json)
+            batch_edits: Queue edits per presentation and send them in one batchUpdate (see edit_batching)
         """
         self.token_path = Path(token_path)
         self.config_path = config_path or Path("config/workspace_config.json")
@@ -46,72 +265,79 @@ class GoogleSlidesMCPServer:
         self._drive_service = None
         self._docs_service = None
         self._workspace_folder_id = None
+        self._edits = EditBatcher(self._send_batch_update, enabled=batch_edits, style_request_types=STYLE_REQUEST_TYPES)
         self.server = Server("google-slides-mcp")
         self._setup_tools()
     
     def _get_slides_service(self):
         """Get or create Google Slides API service."""
         if self._slides_service is None:
-            if not self.token_path.exists():
-                raise ValueError(
-                    f"OAuth token not found at {self.token_path}. "
-                    "Please complete OAuth flow first."
-                )
-            
-            # Load credentials without specifying scopes - use scopes from token file
-            creds = Credentials.from_authorized_user_file(str(self.token_path))
-            
-            # Refresh token if expired
-            if creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-                # Save refreshed token
-                with open(self.token_path, 'w') as token:
-                    token.write(creds.to_json())
-            
-            self._slides_service = build('slides', 'v1', credentials=creds)
+            self._slides_service = get_service_factory().service('slides', 'v1', self.token_path)
         
         return self._slides_service
     
     def _get_drive_service(self):
         """Get or create Google Drive API service for presentation operations."""
         if self._drive_service is None:
-            if not self.token_path.exists():
-                raise ValueError(
-                    f"OAuth token not found at {self.token_path}. "
-                    "Please complete OAuth flow first."
-                )
-            
-            # Load credentials without specifying scopes - use scopes from token file
-            creds = Credentials.from_authorized_user_file(str(self.token_path))
-            
-            # Refresh token if expired
-            if creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            
-            self._drive_service = build('drive', 'v3', credentials=creds)
+            self._drive_service = get_service_factory().service('drive', 'v3', self.token_path)
         
         return self._drive_service
     
     def _get_docs_service(self):
         """Get or create Google Docs API service for reading documents."""
         if self._docs_service is None:
-            if not self.token_path.exists():
-                raise ValueError(
-                    f"OAuth token not found at {self.token_path}. "
-                    "Please complete OAuth flow first."
-                )
-            
-            # Load credentials without specifying scopes - use scopes from token file
-            creds = Credentials.from_authorized_user_file(str(self.token_path))
-            
-            # Refresh token if expired
-            if creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            
-            self._docs_service = build('docs', 'v1', credentials=creds)
+            self._docs_service = get_service_factory().service('docs', 'v1', self.token_path)
         
         return self._docs_service
     
+    def _send_batch_update(self, presentation_id: str, requests: List[Dict]) -> Dict[str, Any]:
+        """Send requests in one presentations.batchUpdate."""
+        return self._get_slides_service().presentations().batchUpdate(
+            presentationId=presentation_id,
+            body={"requests": requests}
+        ).execute()
+    
+    def _map_queued_placeholders(
+        self,
+        presentation_id: str,
+        create_slide_request: Dict[str, Any],
+        layout_elements: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Assign ids to the text placeholders of a queued createSlide.
+        
+        The slide does not exist until the transaction is flushed, so its
+        placeholders are given known ids (placeholderIdMappings) and recorded
+        in the transaction state for slides_insert_text.
+        """
+        slide_id = create_slide_request["objectId"]
+        mappings = []
+        elements = []
+        for i, element in enumerate(layout_elements):
+            placeholder = element.get('shape', {}).get('placeholder', {})
+            if placeholder.get('type') not in TEXT_PLACEHOLDER_TYPES:
+                continue
+            element_id = f"{slide_id}_p{i}"
+            mappings.append({
+                "layoutPlaceholder": {"type": placeholder['type'], "index": placeholder.get('index', 0)},
+                "objectId": element_id
+            })
+            elements.append({"objectId": element_id, "type": placeholder['type']})
+        
+        if mappings:
+            create_slide_request["placeholderIdMappings"] = mappings
+        state = self._edits.state(presentation_id)
+        state.setdefault('slides', {})[slide_id] = elements
+        state.setdefault('text_lengths', {}).update({element["objectId"]: 0 for element in elements})
+    
+    def _find_queued_placeholder(self, presentation_id: str, page_id: str, target_element: str) -> Optional[str]:
+        """Id of the title/body placeholder of a slide created in the open transaction."""
+        wanted = ('TITLE', 'CENTERED_TITLE') if target_element == "title" else ('BODY',)
+        for element in self._edits.state(presentation_id).get('slides', {}).get(page_id, []):
+            if element["type"] in wanted:
+                return element["objectId"]
+        return None
+    
     def _load_config(self) -> Dict[str, Any]:
         """Load workspace configuration."""
         if not self.config_path.exists():
@@ -182,7 +408,7 @@ class GoogleSlidesMCPServer:
         Args:
             content: Document body content
             inline_objects: Dictionary of inline objects (images) from document
-            
+        
         Returns:
             List of structured elements:
             - {'type': 'heading', 'level': 1-6, 'text': str}
@@ -253,7 +479,7 @@ class GoogleSlidesMCPServer:
                             'text': text,
                             'is_bullet': is_bullet
                         })
-                        
+            
             elif 'table' in element:
                 # Extract table as text
                 table = element['table']
@@ -281,7 +507,7 @@ class GoogleSlidesMCPServer:
         Args:
             structured_content: List from _extract_structured_content
             doc_title: Document title for the title slide
-            
+        
         Returns:
             List of slide definitions:
             - {'layout': str, 'title': str, 'subtitle': str, 'content': list, 'images': list}
@@ -308,7 +534,7 @@ class GoogleSlidesMCPServer:
                     # Document title - update title slide subtitle or skip
                     if item['text'] != doc_title:
                         slides[0]['subtitle'] = item['text']
-                        
+                
                 elif level == 1:
                     # H1 - Section header slide
                     if current_slide:
@@ -320,7 +546,7 @@ class GoogleSlidesMCPServer:
                         'content': [],
                         'images': []
                     }
-                    
+                
                 elif level == 2:
                     # H2 - New content slide with title
                     if current_slide:
@@ -332,7 +558,7 @@ class GoogleSlidesMCPServer:
                         'content': [],
                         'images': []
                     }
-                    
+                
                 else:
                     # H3+ - Add as bold content to current slide
                     if current_slide is None:
@@ -349,7 +575,7 @@ class GoogleSlidesMCPServer:
                             'type': 'subheading',
                             'text': item['text']
                         })
-                    
+            
             elif item['type'] == 'text':
                 if current_slide is None:
                     # Create slide with auto-generated title from first text words
@@ -389,7 +615,7 @@ class GoogleSlidesMCPServer:
                     'type': 'bullet' if item.get('is_bullet') else 'text',
                     'text': item['text']
                 })
-                
+            
             elif item['type'] == 'image':
                 if current_slide is None:
                     current_slide = {
@@ -403,7 +629,7 @@ class GoogleSlidesMCPServer:
                     'uri': item['uri'],
                     'object_id': item.get('object_id')
                 })
-                
+            
             elif item['type'] == 'table':
                 if current_slide is None:
                     current_slide = {
@@ -430,7 +656,7 @@ class GoogleSlidesMCPServer:
         
         Args:
             theme: Theme name (professional, creative, minimal, dark)
-            
+        
         Returns:
             Template presentation ID or None if not configured
         """
@@ -626,7 +852,7 @@ class GoogleSlidesMCPServer:
                 Tool(
                     name="slides_create_presentation_from_doc",
                     description="""Create a professional presentation from a Google Docs document.
-                    
+
 The document structure is automatically analyzed:
 - H1 headings create section divider slides
 - H2 headings create content slides with titles
@@ -1087,14 +1313,39 @@ Choose an appropriate theme based on the document content:
                         "required": ["presentationId", "pageId", "layoutId"]
                     }
                 ),
+                Tool(
+                    name="slides_flush_edits",
+                    description="Apply queued edits (batching mode) of one or all presentations.",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "presentationId": {
+                                "type": "string",
+                                "description": "Presentation ID or URL (optional, all presentations by default)"
+                            }
+                        }
+                    }
+                ),
             ]
         
         @self.server.call_tool()
+        @trace_tool_handler(self.server)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls."""
             try:
-                if name == "slides_create":
-                    
+                if name in PRESENTATION_READING_TOOLS and arguments.get("presentationId"):
+                    self._edits.flush(self._extract_file_id(arguments["presentationId"]))
+                
+                if name == "slides_flush_edits":
+                    presentation_id = arguments.get("presentationId")
+                    result = self._edits.flush_all(self._extract_file_id(presentation_id) if presentation_id else None)
+                    return [TextContent(
+                        type="text",
+                        text=json.dumps(result, indent=2)
+                    )]
+                
+                elif name == "slides_create":
+                
                     try:
                         drive_service = self._get_drive_service()
                         
@@ -1123,7 +1374,7 @@ Choose an appropriate theme based on the document content:
                         
                         # Move to workspace folder
                         if folder_id:
-                            
+                        
                             file_info = drive_service.files().get(
                                 fileId=presentation_id,
                                 fields="parents"
@@ -1135,7 +1386,7 @@ Choose an appropriate theme based on the document content:
                                 removeParents=previous_parents,
                                 fields="id, parents"
                             ).execute()
-                            
+                        
                         
                         # Get presentation URL
                         pres_file = drive_service.files().get(
@@ -1199,25 +1450,30 @@ Choose an appropriate theme based on the document content:
                     layout = arguments.get("layout", "TITLE_AND_BODY")
                     insertion_index = arguments.get("insertionIndex")
                     
-                    # Get layout ID
-                    presentation = slides_service.presentations().get(
-                        presentationId=presentation_id
-                    ).execute()
+                    # Get layout ID (queued edits do not change layouts: reuse them within a transaction)
+                    state = self._edits.state(presentation_id) if self._edits.enabled else {}
+                    layouts = state.get('layouts')
+                    if layouts is None:
+                        presentation = slides_service.presentations().get(
+                            presentationId=presentation_id
+                        ).execute()
+                        layouts = state['layouts'] = presentation.get('layouts', [])
                     
-                    layouts = presentation.get('layouts', [])
                     layout_id = None
+                    layout_elements = []
                     for layout_obj in layouts:
                         if layout_obj.get('layoutProperties', {}).get('name') == layout:
                             layout_id = layout_obj.get('objectId')
+                            layout_elements = layout_obj.get('pageElements', [])
                             break
                     
                     if not layout_id and layouts:
                         # Use first available layout
                         layout_id = layouts[0].get('objectId')
+                        layout_elements = layouts[0].get('pageElements', [])
                     
                     # Generate a short objectId (Google Slides API requires max 50 characters)
                     # Use hash of presentation_id + timestamp to create unique short ID
-                    import hashlib
                     import time as time_module
                     unique_str = f"{presentation_id}_{time_module.time()}_{insertion_index or 0}"
                     object_id_hash = hashlib.md5(unique_str.encode()).hexdigest()[:16]
@@ -1242,10 +1498,11 @@ Choose an appropriate theme based on the document content:
                     if not requests[0]["createSlide"]["slideLayoutReference"]:
                         del requests[0]["createSlide"]["slideLayoutReference"]
                     
-                    response = slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    if self._edits.enabled:
+                        # Text for the new slide can then be queued without reading it back
+                        self._map_queued_placeholders(presentation_id, create_slide_request, layout_elements)
+                    
+                    response = self._edits.submit(presentation_id, requests)
                     
                     slide_id = response.get('replies', [{}])[0].get('createSlide', {}).get('objectId')
                     
@@ -1259,7 +1516,7 @@ Choose an appropriate theme based on the document content:
                     )]
                 
                 elif name == "slides_insert_text":
-                    
+                
                     slides_service = self._get_slides_service()
                     presentation_id = self._extract_file_id(arguments.get("presentationId"))
                     page_id = arguments.get("pageId")
@@ -1268,9 +1525,13 @@ Choose an appropriate theme based on the document content:
                     text = arguments.get("text")
                     insert_index = arguments.get("insertIndex", -1)
                     
+                    # A slide created in the open transaction: its placeholder ids are known
+                    if not element_id and self._edits.enabled:
+                        element_id = self._find_queued_placeholder(presentation_id, page_id, target_element)
+                    
                     # If element_id not provided, find first text box
                     if not element_id:
-                        
+                        self._edits.flush(presentation_id)
                         presentation = slides_service.presentations().get(
                             presentationId=presentation_id
                         ).execute()
@@ -1278,7 +1539,7 @@ Choose an appropriate theme based on the document content:
                         
                         for slide in presentation.get('slides', []):
                             if slide.get('objectId') == page_id:
-                                
+                            
                                 # Find the BODY placeholder (not TITLE) for inserting content
                                 # Priority: BODY placeholder > second TEXT_BOX > first TEXT_BOX
                                 body_element_id = None
@@ -1323,8 +1584,12 @@ Choose an appropriate theme based on the document content:
                             )]
                     
                     # Get current text to determine insert index
+                    text_lengths = self._edits.state(presentation_id).setdefault('text_lengths', {}) if self._edits.enabled else {}
+                    if insert_index == -1 and element_id in text_lengths:
+                        insert_index = text_lengths[element_id]
+                    
                     if insert_index == -1:
-                        
+                        self._edits.flush(presentation_id)
                         try:
                             presentation = slides_service.presentations().get(
                                 presentationId=presentation_id,
@@ -1341,7 +1606,7 @@ Choose an appropriate theme based on the document content:
                                             text_elements = text_obj.get('textElements', [])
                                             # Calculate total length
                                             insert_index = sum(
-                                                len(elem.get('textRun', {}).get('content', ''))
+                                                utf16_length(elem.get('textRun', {}).get('content', ''))
                                                 for elem in text_elements
                                             )
                                             break
@@ -1363,13 +1628,12 @@ Choose an appropriate theme based on the document content:
                         }
                     }]
                     
+                    if element_id in text_lengths:
+                        text_lengths[element_id] += utf16_length(text)
                     
                     try:
-                        response = slides_service.presentations().batchUpdate(
-                            presentationId=presentation_id,
-                            body={"requests": requests}
-                        ).execute()
-                        
+                        response = self._edits.submit(presentation_id, requests)
+                    
                     except Exception as api_error:
                         raise
                     
@@ -1387,10 +1651,7 @@ Choose an appropriate theme based on the document content:
                                     "fields": "bold,fontSize"
                                 }
                             }]
-                            slides_service.presentations().batchUpdate(
-                                presentationId=presentation_id,
-                                body={"requests": format_requests}
-                            ).execute()
+                            self._edits.submit(presentation_id, format_requests)
                         except Exception as format_error:
                             logger.warning(f"Failed to apply title formatting: {format_error}")
                     
@@ -1406,7 +1667,7 @@ Choose an appropriate theme based on the document content:
                     )]
                 
                 elif name == "slides_format_text":
-                    
+                
                     slides_service = self._get_slides_service()
                     presentation_id = self._extract_file_id(arguments.get("presentationId"))
                     page_id = arguments.get("pageId")
@@ -1485,10 +1746,7 @@ Choose an appropriate theme based on the document content:
                     
                     
                     try:
-                        response = slides_service.presentations().batchUpdate(
-                            presentationId=presentation_id,
-                            body={"requests": requests}
-                        ).execute()
+                        response = self._edits.submit(presentation_id, requests)
                         
                         
                         return [TextContent(
@@ -1512,7 +1770,6 @@ Choose an appropriate theme based on the document content:
                     height = int(arguments.get("height"))
                     
                     # Generate unique object ID
-                    import hashlib
                     import time as time_module
                     unique_str = f"{presentation_id}_{page_id}_{time_module.time()}_image"
                     object_id_hash = hashlib.md5(unique_str.encode()).hexdigest()[:16]
@@ -1539,10 +1796,7 @@ Choose an appropriate theme based on the document content:
                         }
                     }]
                     
-                    response = slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    response = self._edits.submit(presentation_id, requests)
                     
                     image_id = response.get('replies', [{}])[0].get('createImage', {}).get('objectId')
                     
@@ -1567,7 +1821,6 @@ Choose an appropriate theme based on the document content:
                     height = int(arguments.get("height"))
                     
                     # Generate unique object ID
-                    import hashlib
                     import time as time_module
                     unique_str = f"{presentation_id}_{page_id}_{time_module.time()}_shape"
                     object_id_hash = hashlib.md5(unique_str.encode()).hexdigest()[:16]
@@ -1652,10 +1905,7 @@ Choose an appropriate theme based on the document content:
                         
                         requests.extend(update_requests)
                     
-                    response = slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    response = self._edits.submit(presentation_id, requests)
                     
                     shape_id = response.get('replies', [{}])[0].get('createShape', {}).get('objectId')
                     
@@ -1716,10 +1966,7 @@ Choose an appropriate theme based on the document content:
                             text=json.dumps({"error": "Either solidColor or imageUrl must be provided"}, indent=2)
                         )]
                     
-                    slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    self._edits.submit(presentation_id, requests)
                     
                     return [TextContent(
                         type="text",
@@ -1742,7 +1989,6 @@ Choose an appropriate theme based on the document content:
                     height = int(arguments.get("height"))
                     
                     # Generate unique object ID
-                    import hashlib
                     import time as time_module
                     unique_str = f"{presentation_id}_{page_id}_{time_module.time()}_table"
                     object_id_hash = hashlib.md5(unique_str.encode()).hexdigest()[:16]
@@ -1770,10 +2016,7 @@ Choose an appropriate theme based on the document content:
                         }
                     }]
                     
-                    response = slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    response = self._edits.submit(presentation_id, requests)
                     
                     table_id = response.get('replies', [{}])[0].get('createTable', {}).get('objectId')
                     
@@ -1857,10 +2100,7 @@ Choose an appropriate theme based on the document content:
                         }
                     })
                     
-                    slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    self._edits.submit(presentation_id, requests)
                     
                     return [TextContent(
                         type="text",
@@ -1886,7 +2126,6 @@ Choose an appropriate theme based on the document content:
                     linking_mode = arguments.get("linkingMode", "LINKED")
                     
                     # Generate unique object ID
-                    import hashlib
                     import time as time_module
                     unique_str = f"{presentation_id}_{page_id}_{time_module.time()}_chart"
                     object_id_hash = hashlib.md5(unique_str.encode()).hexdigest()[:16]
@@ -1915,10 +2154,7 @@ Choose an appropriate theme based on the document content:
                         }
                     }]
                     
-                    response = slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    response = self._edits.submit(presentation_id, requests)
                     
                     created_chart_id = response.get('replies', [{}])[0].get('createSheetsChart', {}).get('objectId')
                     
@@ -1991,10 +2227,7 @@ Choose an appropriate theme based on the document content:
                         }
                     }]
                     
-                    slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    self._edits.submit(presentation_id, requests)
                     
                     return [TextContent(
                         type="text",
@@ -2025,10 +2258,7 @@ Choose an appropriate theme based on the document content:
                         }
                     }]
                     
-                    slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    self._edits.submit(presentation_id, requests)
                     
                     return [TextContent(
                         type="text",
@@ -2086,10 +2316,7 @@ Choose an appropriate theme based on the document content:
                         }
                     }]
                     
-                    slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    self._edits.submit(presentation_id, requests)
                     
                     return [TextContent(
                         type="text",
@@ -2111,10 +2338,7 @@ Choose an appropriate theme based on the document content:
                         }
                     }]
                     
-                    slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    self._edits.submit(presentation_id, requests)
                     
                     return [TextContent(
                         type="text",
@@ -2167,10 +2391,7 @@ Choose an appropriate theme based on the document content:
                         }
                     }]
                     
-                    slides_service.presentations().batchUpdate(
-                        presentationId=presentation_id,
-                        body={"requests": requests}
-                    ).execute()
+                    self._edits.submit(presentation_id, requests)
                     
                     return [TextContent(
                         type="text",
@@ -2222,289 +2443,55 @@ Choose an appropriate theme based on the document content:
                     slide_definitions = self._group_content_into_slides(structured_content, doc_title)
                     logger.info(f"Grouped into {len(slide_definitions)} slides")
                     
-                    
-                    # Try to copy template if available, otherwise create empty
+                    # Copy the template or create an empty presentation right in the workspace folder
                     template_id = self._get_template_id(theme)
-                    
+                    file_body = {"name": presentation_title, "parents": [folder_id]}
                     if template_id:
-                        # Copy template presentation
                         new_file = drive_service.files().copy(
                             fileId=template_id,
-                            body={
-                                "name": presentation_title,
-                                "parents": [folder_id]
-                            }
-                        ).execute()
-                        presentation_id = new_file.get('id')
-                        
-                        # Get presentation and delete all slides except first
-                        presentation_obj = slides_service.presentations().get(
-                            presentationId=presentation_id
+                            body=file_body,
+                            fields="id, webViewLink"
                         ).execute()
-                        existing_slides = presentation_obj.get('slides', [])
-                        
-                        # Delete all slides except the first one (we'll use it for title)
-                        if len(existing_slides) > 1:
-                            delete_requests = []
-                            for slide in existing_slides[1:]:
-                                delete_requests.append({
-                                    "deleteObject": {"objectId": slide.get('objectId')}
-                                })
-                            if delete_requests:
-                                slides_service.presentations().batchUpdate(
-                                    presentationId=presentation_id,
-                                    body={"requests": delete_requests}
-                                ).execute()
                     else:
-                        # Create new empty presentation
-                        presentation = slides_service.presentations().create(
-                            body={"title": presentation_title}
-                        ).execute()
-                        presentation_id = presentation.get('presentationId')
-                        
-                        # Move to workspace folder
-                        file_info = drive_service.files().get(
-                            fileId=presentation_id,
-                            fields="parents"
-                        ).execute()
-                        previous_parents = ",".join(file_info.get('parents', []))
-                        drive_service.files().update(
-                            fileId=presentation_id,
-                            addParents=folder_id,
-                            removeParents=previous_parents,
-                            fields="id, parents"
+                        new_file = drive_service.files().create(
+                            body={**file_body, "mimeType": "application/vnd.google-apps.presentation"},
+                            fields="id, webViewLink"
                         ).execute()
+                    presentation_id = new_file.get('id')
                     
-                    # Get current presentation state and layout IDs
+                    # One read for layouts and existing slides; all ids of new objects are assigned up front
                     presentation_obj = slides_service.presentations().get(
-                        presentationId=presentation_id
+                        presentationId=presentation_id,
+                        fields=DECK_PLAN_FIELDS
                     ).execute()
+                    id_prefix = "deck_" + hashlib.sha1(document_id.encode("utf-8")).hexdigest()[:8]
+                    deck_requests = DeckPlanner(presentation_obj, id_prefix).plan(slide_definitions)
                     
-                    layouts = presentation_obj.get('layouts', [])
-                    layout_ids = {}
-                    
-                    # Map our layout names to Google Slides layout names
-                    layout_name_mapping = {
-                        'TITLE': ['Title Slide', 'Title slide', 'title slide', 'TITLE'],
-                        'TITLE_AND_BODY': ['Title and Body', 'Title and body', 'title and body', 'TITLE_AND_BODY'],
-                        'SECTION_HEADER': ['Section Header', 'Section header', 'section header', 'SECTION_HEADER'],
-                        'BLANK': ['Blank', 'blank', 'BLANK'],
-                        'ONE_COLUMN_TEXT': ['One column text', 'ONE_COLUMN_TEXT'],
-                        'TITLE_ONLY': ['Title Only', 'Title only', 'TITLE_ONLY'],
-                    }
-                    
-                    for layout in layouts:
-                        layout_name = layout.get('layoutProperties', {}).get('name', '')
-                        layout_id = layout.get('objectId')
-                        
-                        # Store by original name
-                        layout_ids[layout_name] = layout_id
-                        
-                        # Also store by our normalized names
-                        for our_name, google_names in layout_name_mapping.items():
-                            if layout_name in google_names:
-                                layout_ids[our_name] = layout_id
-                    
-                    logger.info(f"Available layouts: {list(layout_ids.keys())}")
-                    
-                    # Get first slide ID (use it for title slide)
-                    existing_slides = presentation_obj.get('slides', [])
-                    first_slide_id = existing_slides[0].get('objectId') if existing_slides else None
-                    
-                    # Create slides based on definitions
-                    create_requests = []
-                    slide_id_map = {}  # Map definition index to slide ID
-                    
-                    for i, slide_def in enumerate(slide_definitions):
-                        if i == 0 and first_slide_id:
-                            # Use the existing first slide for title (don't try to change layout - not supported by API)
-                            slide_id_map[i] = first_slide_id
-                            # Note: updateSlideProperties with layoutObjectId is not supported
-                            # We just use the first slide as-is
-                        else:
-                            # Create new slide with short ID (max 50 chars required by API)
-                            import random
-                            import string
-                            random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
-                            slide_id = f"slide_{i}_{random_suffix}"  # e.g. "slide_1_abc12xyz" (max ~20 chars)
-                            slide_id_map[i] = slide_id
-                            
-                            # Choose layout based on slide type
-                            layout_name = slide_def.get('layout', 'TITLE_AND_BODY')
-                            layout_id = layout_ids.get(layout_name) or layout_ids.get('TITLE_AND_BODY') or layouts[0].get('objectId')
-                            
-                            create_requests.append({
-                                "createSlide": {
-                                    "objectId": slide_id,
-                                    "slideLayoutReference": {"layoutId": layout_id}
-                                }
-                            })
-                    
-                    # Execute slide creation
-                    logger.info(f"Creating {len(create_requests)} slide requests")
-                    if create_requests:
+                    batches = chunk_requests(deck_requests, MAX_REQUESTS_PER_BATCH)
+                    logger.info(f"Building {len(slide_definitions)} slides with {len(deck_requests)} requests in {len(batches)} batch(es)")
+                    for batch in batches:
                         try:
                             slides_service.presentations().batchUpdate(
                                 presentationId=presentation_id,
-                                body={"requests": create_requests}
+                                body={"requests": batch}
                             ).execute()
-                            logger.info("Slides created successfully")
-                        except Exception as e:
-                            logger.error(f"Error creating slides: {e}")
-                            raise
-                    
-                    # Refresh presentation to get all elements
-                    presentation_obj = slides_service.presentations().get(
-                        presentationId=presentation_id
-                    ).execute()
-                    logger.info(f"Presentation now has {len(presentation_obj.get('slides', []))} slides")
-                    
-                    # Build a map of slide ID -> slide data
-                    slide_data_map = {}
-                    for slide in presentation_obj.get('slides', []):
-                        slide_data_map[slide.get('objectId')] = slide
-                    
-                    # Insert text and apply formatting
-                    text_requests = []
-                    format_requests = []
-                    
-                    for i, slide_def in enumerate(slide_definitions):
-                        slide_id = slide_id_map.get(i)
-                        if not slide_id or slide_id not in slide_data_map:
-                            logger.warning(f"Slide {i} not found in slide_data_map, skipping")
-                            continue
-                        
-                        slide_data = slide_data_map[slide_id]
-                        logger.info(f"Processing slide {i}: layout={slide_def.get('layout')}, title='{slide_def.get('title', '')[:30]}...'")
-                        
-                        # Find text boxes in this slide
-                        title_element_id = None
-                        body_element_id = None
-                        subtitle_element_id = None
-                        
-                        for element in slide_data.get('pageElements', []):
-                            if 'shape' in element:
-                                placeholder = element['shape'].get('placeholder', {})
-                                placeholder_type = placeholder.get('type', '')
-                                element_id = element.get('objectId')
-                                
-                                if placeholder_type in ['TITLE', 'CENTERED_TITLE']:
-                                    title_element_id = element_id
-                                elif placeholder_type == 'SUBTITLE':
-                                    subtitle_element_id = element_id
-                                elif placeholder_type == 'BODY':
-                                    body_element_id = element_id
-                                elif element['shape'].get('shapeType') == 'TEXT_BOX' and not title_element_id:
-                                    # Fallback: use first text box as title
-                                    title_element_id = element_id
-                        
-                        logger.info(f"Slide {i} elements: title={title_element_id}, body={body_element_id}, subtitle={subtitle_element_id}")
-                        
-                        
-                        # Insert title
-                        if slide_def.get('title') and title_element_id:
-                            title_text = slide_def['title']
-                            text_requests.append({
-                                "insertText": {
-                                    "objectId": title_element_id,
-                                    "text": title_text
-                                }
-                            })
-                            # Format title: bold, larger font
-                            format_requests.append({
-                                "updateTextStyle": {
-                                    "objectId": title_element_id,
-                                    "style": {
-                                        "bold": True,
-                                        "fontSize": {"magnitude": 32, "unit": "PT"}
-                                    },
-                                    "textRange": {"type": "ALL"},
-                                    "fields": "bold,fontSize"
-                                }
-                            })
-                        
-                        # Insert subtitle if present
-                        if slide_def.get('subtitle') and subtitle_element_id:
-                            text_requests.append({
-                                "insertText": {
-                                    "objectId": subtitle_element_id,
-                                    "text": slide_def['subtitle']
-                                }
-                            })
-                        
-                        # Insert body content
-                        if slide_def.get('content') and body_element_id:
-                            body_text_parts = []
-                            bullet_ranges = []  # Track which ranges need bullets
-                            current_pos = 0
-                            
-                            for content_item in slide_def['content']:
-                                item_text = content_item.get('text', '')
-                                item_type = content_item.get('type', 'text')
-                                
-                                if item_type == 'subheading':
-                                    # Add as bold text with newline
-                                    body_text_parts.append(item_text + '\n')
-                                elif item_type in ['bullet', 'text']:
-                                    # Add text with newline
-                                    start_pos = sum(len(p) for p in body_text_parts)
-                                    body_text_parts.append(item_text + '\n')
-                                    end_pos = sum(len(p) for p in body_text_parts)
-                                    if item_type == 'bullet':
-                                        bullet_ranges.append((start_pos, end_pos))
-                                elif item_type == 'table':
-                                    body_text_parts.append(item_text + '\n\n')
-                            
-                            if body_text_parts:
-                                full_body_text = ''.join(body_text_parts).rstrip('\n')
-                                text_requests.append({
-                                    "insertText": {
-                                        "objectId": body_element_id,
-                                        "text": full_body_text
-                                    }
-                                })
-                                
-                                # Apply bullet formatting
-                                for start, end in bullet_ranges:
-                                    format_requests.append({
-                                        "createParagraphBullets": {
-                                            "objectId": body_element_id,
-                                            "textRange": {
-                                                "type": "FIXED_RANGE",
-                                                "startIndex": start,
-                                                "endIndex": min(end, len(full_body_text))
-                                            },
-                                            "bulletPreset": "BULLET_DISC_CIRCLE_SQUARE"
-                                        }
-                                    })
-                    
-                    # Execute text insertion first
-                    if text_requests:
-                        slides_service.presentations().batchUpdate(
-                            presentationId=presentation_id,
-                            body={"requests": text_requests}
-                        ).execute()
-                    
-                    # Then apply formatting
-                    if format_requests:
-                        try:
+                        except HttpError as format_error:
+                            # Batches are atomic: retry without formatting so the content still lands
+                            content_requests = [r for r in batch if not STYLE_REQUEST_TYPES.intersection(r)]
+                            if len(content_requests) == len(batch):
+                                raise
+                            logger.warning(f"Some formatting failed: {format_error}")
                             slides_service.presentations().batchUpdate(
                                 presentationId=presentation_id,
-                                body={"requests": format_requests}
+                                body={"requests": content_requests}
                             ).execute()
-                        except Exception as format_error:
-                            logger.warning(f"Some formatting failed: {format_error}")
                     
-                    # Get presentation URL
-                    pres_file = drive_service.files().get(
-                        fileId=presentation_id,
-                        fields="webViewLink"
-                    ).execute()
+                    presentation_url = new_file.get('webViewLink') or f"https://docs.google.com/presentation/d/{presentation_id}/edit"
                     
                     result_data = {
                         "presentationId": presentation_id,
                         "title": presentation_title,
-                        "url": pres_file.get('webViewLink'),
+                        "url": presentation_url,
                         "slidesCreated": len(slide_definitions),
                         "theme": theme,
                         "templateUsed": template_id is not None
@@ -2521,7 +2508,7 @@ Choose an appropriate theme based on the document content:
                         type="text",
                         text=json.dumps({"error": f"Unknown tool: {name}"}, indent=2)
                     )]
-                    
+            
             except HttpError as e:
                 error_msg = json.loads(e.content.decode()).get('error', {}).get('message', str(e))
                 return [TextContent(
@@ -2537,12 +2524,17 @@ Choose an appropriate theme based on the document content:
     
     async def run(self):
         """Run the MCP server."""
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
-            )
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options()
+                )
+        finally:
+            result = self._edits.flush_all()
+            if result["errors"]:
+                logger.error(f"Queued edits lost on shutdown: {result['errors']}")
 
 
 async def main():
@@ -2562,6 +2554,11 @@ async def main():
         default="config/workspace_config.json",
         help="Path to workspace config file"
     )
+    parser.add_argument(
+        "--batch-edits",
+        action="store_true",
+        help="Queue edits per document and apply them in one batchUpdate"
+    )
     args = parser.parse_args()
     
     # Setup logging
@@ -2570,7 +2567,11 @@ async def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    server = GoogleSlidesMCPServer(Path(args.token_path), config_path=Path(args.config_path))
+    # Spans of this process join the host trace via tool-call _meta
+    configure_tracing("google-slides")
+    instrument_google_api_client()
+    
+    server = GoogleSlidesMCPServer(Path(args.token_path), config_path=Path(args.config_path), batch_edits=args.batch_edits)
     await server.run()
 
 
@@ -18,13 +18,25 @@ import re
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from src.mcp_servers.google_services import (
+    FIELDS_ARGUMENT,
+    SPREADSHEET_INFO_FIELDS,
+    extra_field_names,
+    field_mask,
+    get_service_factory,
+)
+from src.mcp_servers.drive_index import DriveMetadataIndex, normalize_name
+from src.utils.drive_query import name_contains_any, name_contains_fragments
+from src.utils.tracing import configure_tracing, instrument_google_api_client, trace_tool_handler
+
 logger = logging.getLogger(__name__)
 
+# Partial-response masks of the Drive tools (extended by their "fields" argument)
+FILE_LIST_FIELDS = "id,name,mimeType,createdTime,modifiedTime,webViewLink,size"
+FILE_INFO_FIELDS = f"{FILE_LIST_FIELDS},parents,owners,shared"
+
 # Google Workspace API scopes
 WORKSPACE_SCOPES = [
     "https://www.googleapis.com/auth/drive",
@@ -39,19 +51,22 @@ class GoogleWorkspaceMCPServer:
     Note: Slides operations are handled by google_slides_server.py
     """
     
-    def __init__(self, token_path: Path, config_path: Optional[Path] = None):
+    def __init__(self, token_path: Path, config_path: Optional[Path] = None, drive_index_path: Optional[Path] = None):
         """
         Initialize Google Workspace MCP Server.
         
         Args:
             token_path: Path to OAuth token file
             config_path: Path to workspace configuration file (contains folder_id)
+            drive_index_path: SQLite file of the local Drive metadata index; name
+                lookups are answered from it (None - every lookup queries Drive)
         """
         self.token_path = Path(token_path)
         self.config_path = config_path or Path("config/workspace_config.json")
         self._drive_service = None
         self._sheets_service = None
         self._workspace_folder_id = None
+        self._drive_index = DriveMetadataIndex(drive_index_path, self._get_drive_service) if drive_index_path else None
         self.server = Server("google-workspace-mcp")
         self._setup_tools()
     
@@ -74,40 +89,49 @@ class GoogleWorkspaceMCPServer:
             self._workspace_folder_id = config.get("folder_id")
         return self._workspace_folder_id
     
-    def _get_credentials(self) -> Credentials:
-        """Get or refresh OAuth credentials."""
-        if not self.token_path.exists():
-            raise ValueError(
-                f"OAuth token not found at {self.token_path}. "
-                "Please complete OAuth flow first."
-            )
-        
-        creds = Credentials.from_authorized_user_file(
-            str(self.token_path),
-            WORKSPACE_SCOPES
-        )
-        
-        # Refresh token if expired
-        if creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            # Save refreshed token
-            with open(self.token_path, 'w') as token:
-                token.write(creds.to_json())
-        
-        return creds
-    
     def _get_drive_service(self):
         """Get or create Google Drive API service."""
         if self._drive_service is None:
-            creds = self._get_credentials()
-            self._drive_service = build('drive', 'v3', credentials=creds)
+            self._drive_service = get_service_factory().service('drive', 'v3', self.token_path, WORKSPACE_SCOPES)
         return self._drive_service
     
+    def _search_index(self, names: List[str], folder_id: str, mime_type: Optional[str], limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find files in the workspace folder by name through the local index.
+        
+        Args:
+            names: Names or name fragments (results of all of them are merged)
+            folder_id: Workspace folder ID (only its direct children, like the Drive queries)
+            mime_type: Only files of this MIME type
+            limit: Maximum number of results
+        
+        Returns:
+            Drive file resources; None if the index is disabled, not bootstrapped
+            yet or unavailable (query Drive instead)
+        """
+        if self._drive_index is None:
+            return None
+        try:
+            if not self._drive_index.is_ready(folder_id):
+                # Never bootstrap inside a tool call: a large tree takes minutes
+                self._drive_index.start_bootstrap(folder_id)
+                return None
+            self._drive_index.ensure_fresh(folder_id)
+            files = {}
+            # Case and separator variations of one name are the same lookup;
+            # no fuzzy matches: callers expect `name contains` results
+            for search_name in {normalize_name(n): n for n in names}.values():
+                for f in self._drive_index.search(search_name, folder_id, mime_type, limit, recursive=False, fuzzy=False):
+                    files.setdefault(f["id"], f)
+            return list(files.values())[:limit]
+        except Exception as e:
+            logger.warning(f"Drive index unavailable, querying Drive: {e}")
+            return None
+    
     def _get_sheets_service(self):
         """Get or create Google Sheets API service."""
         if self._sheets_service is None:
-            creds = self._get_credentials()
-            self._sheets_service = build('sheets', 'v4', credentials=creds)
+            self._sheets_service = get_service_factory().service('sheets', 'v4', self.token_path, WORKSPACE_SCOPES)
         return self._sheets_service
     
     @staticmethod
@@ -158,11 +182,17 @@ class GoogleWorkspaceMCPServer:
                                 "type": "string",
                                 "description": "Search query for file names"
                             },
+                            "names": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "File name fragments; files whose name contains any of them are returned (one query instead of one per fragment)"
+                            },
                             "maxResults": {
                                 "type": "integer",
                                 "description": "Maximum number of results (default: 50, max: 100)",
                                 "default": 50
-                            }
+                            },
+                            "fields": FIELDS_ARGUMENT
                         }
                     }
                 ),
@@ -175,7 +205,8 @@ class GoogleWorkspaceMCPServer:
                             "fileId": {
                                 "type": "string",
                                 "description": "File ID or URL"
-                            }
+                            },
+                            "fields": FIELDS_ARGUMENT
                         },
                         "required": ["fileId"]
                     }
@@ -455,6 +486,7 @@ class GoogleWorkspaceMCPServer:
             ]
         
         @self.server.call_tool()
+        @trace_tool_handler(self.server)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls."""
             try:
@@ -482,20 +514,29 @@ class GoogleWorkspaceMCPServer:
                     if search_query:
                         query_parts.append(f"name contains '{search_query}'")
                     
+                    names = arguments.get("names")
+                    if names:
+                        query_parts.append(name_contains_any(names))
+                    
                     query = " and ".join(query_parts)
                     max_results = min(arguments.get("maxResults", 50), 100)
                     
-                    
-                    results = drive_service.files().list(
-                        q=query,
-                        pageSize=max_results,
-                        fields="files(id, name, mimeType, createdTime, modifiedTime, webViewLink, size)",
-                        orderBy="modifiedTime desc",
-                        supportsAllDrives=True,
-                        includeItemsFromAllDrives=True
-                    ).execute()
-                    
-                    files = results.get('files', [])
+                    files = None
+                    if (search_query or names) and not arguments.get("fields"):
+                        files = self._search_index([search_query] if search_query else names, folder_id, mime_type, max_results)
+                    
+                    if files is None:
+                        results = drive_service.files().list(
+                            q=query,
+                            pageSize=max_results,
+                            fields=field_mask(FILE_LIST_FIELDS, arguments.get("fields"), collection="files"),
+                            orderBy="modifiedTime desc",
+                            supportsAllDrives=True,
+                            includeItemsFromAllDrives=True
+                        ).execute()
+                        files = results.get('files', [])
+                    # Requested extra fields are passed through as returned by Drive
+                    extra_names = extra_field_names(arguments.get("fields"))
                     
                     
                     return [TextContent(
@@ -503,6 +544,7 @@ class GoogleWorkspaceMCPServer:
                         text=json.dumps({
                             "files": [
                                 {
+                                    **(f if extra_names is None else {key: f[key] for key in extra_names if key in f}),
                                     "id": f.get('id'),
                                     "name": f.get('name'),
                                     "mimeType": f.get('mimeType'),
@@ -514,7 +556,7 @@ class GoogleWorkspaceMCPServer:
                                 for f in files
                             ],
                             "count": len(files)
-                        }, indent=2)
+                        }, indent=2, default=str)
                     )]
                 
                 elif name == "workspace_get_file_info":
@@ -523,7 +565,7 @@ class GoogleWorkspaceMCPServer:
                     
                     file_info = drive_service.files().get(
                         fileId=file_id,
-                        fields="id, name, mimeType, createdTime, modifiedTime, webViewLink, size, parents, owners, shared"
+                        fields=field_mask(FILE_INFO_FIELDS, arguments.get("fields"))
                     ).execute()
                     
                     return [TextContent(
@@ -624,33 +666,39 @@ class GoogleWorkspaceMCPServer:
                     query = " and ".join(query_parts)
                     max_results = min(arguments.get("maxResults", 20), 100)
                     
+                    # Queries made only of name clauses can be answered by the index
+                    files = None
+                    name_fragments = name_contains_fragments(search_query)
+                    if name_fragments:
+                        files = self._search_index(name_fragments, folder_id, mime_type, max_results)
                     
-                    # Collect all files with pagination to ensure we get all results
-                    files = []
-                    page_token = None
-                    try:
-                        while True:
-                            request = drive_service.files().list(
-                                q=query,
-                                pageSize=min(max_results, 100),  # Google API max is 100
-                                fields="nextPageToken, files(id, name, mimeType, createdTime, modifiedTime, webViewLink)",
-                                orderBy="modifiedTime desc",
-                                supportsAllDrives=True,
-                                includeItemsFromAllDrives=True
-                            )
-                            if page_token:
-                                request.pageToken = page_token
-                            
-                            results = request.execute()
-                            page_files = results.get('files', [])
-                            files.extend(page_files)
-                            
-                            
-                            page_token = results.get('nextPageToken')
-                            if not page_token or len(files) >= max_results:
-                                break
-                    except Exception as api_error:
-                        raise
+                    if files is None:
+                        # Collect all files with pagination to ensure we get all results
+                        files = []
+                        page_token = None
+                        try:
+                            while True:
+                                request = drive_service.files().list(
+                                    q=query,
+                                    pageSize=min(max_results, 100),  # Google API max is 100
+                                    fields="nextPageToken, files(id, name, mimeType, createdTime, modifiedTime, webViewLink)",
+                                    orderBy="modifiedTime desc",
+                                    supportsAllDrives=True,
+                                    includeItemsFromAllDrives=True
+                                )
+                                if page_token:
+                                    request.pageToken = page_token
+                                
+                                results = request.execute()
+                                page_files = results.get('files', [])
+                                files.extend(page_files)
+                                
+                                
+                                page_token = results.get('nextPageToken')
+                                if not page_token or len(files) >= max_results:
+                                    break
+                        except Exception as api_error:
+                            raise
                     
                     # Limit to max_results if we got more
                     files = files[:max_results]
@@ -748,7 +796,8 @@ class GoogleWorkspaceMCPServer:
                         
                         # Get spreadsheet info to find sheet name
                         spreadsheet = sheets_service.spreadsheets().get(
-                            spreadsheetId=file_id
+                            spreadsheetId=file_id,
+                            fields=SPREADSHEET_INFO_FIELDS
                         ).execute()
                         
                         sheets_list = spreadsheet.get('sheets', [])
@@ -840,11 +889,13 @@ class GoogleWorkspaceMCPServer:
                     if mime_type:
                         query_parts.append(f"mimeType='{mime_type}'")
                     
-                    files_found = []
+                    files_found = self._search_index([search_query], folder_id, mime_type, max_results)
+                    indexed = files_found is not None
+                    files_found = files_found or []
                     seen_ids = set()
                     
                     # Try each query variation
-                    for query_var in query_variations:
+                    for query_var in ([] if indexed else query_variations):
                         if len(files_found) >= max_results:
                             break
                         
@@ -901,7 +952,7 @@ class GoogleWorkspaceMCPServer:
                     # Read content based on type
                     if file_mime_type == "application/vnd.google-apps.spreadsheet":
                         sheets_service = self._get_sheets_service()
-                        spreadsheet = sheets_service.spreadsheets().get(spreadsheetId=file_id).execute()
+                        spreadsheet = sheets_service.spreadsheets().get(spreadsheetId=file_id, fields=SPREADSHEET_INFO_FIELDS).execute()
                         sheets_list = spreadsheet.get('sheets', [])
                         
                         if sheets_list:
@@ -947,7 +998,7 @@ class GoogleWorkspaceMCPServer:
                 
                 # ========== SHEETS OPERATIONS ==========
                 elif name == "sheets_create_spreadsheet":
-                    
+                
                     sheets_service = self._get_sheets_service()
                     drive_service = self._get_drive_service()
                     folder_id = self._get_workspace_folder_id()
@@ -1089,7 +1140,8 @@ class GoogleWorkspaceMCPServer:
                     spreadsheet_id = self._extract_spreadsheet_id(arguments.get("spreadsheetId"))
                     
                     spreadsheet = sheets_service.spreadsheets().get(
-                        spreadsheetId=spreadsheet_id
+                        spreadsheetId=spreadsheet_id,
+                        fields=SPREADSHEET_INFO_FIELDS
                     ).execute()
                     
                     sheets_info = [
@@ -1120,7 +1172,8 @@ class GoogleWorkspaceMCPServer:
                     
                     # Get spreadsheet info
                     spreadsheet = sheets_service.spreadsheets().get(
-                        spreadsheetId=spreadsheet_id
+                        spreadsheetId=spreadsheet_id,
+                        fields=SPREADSHEET_INFO_FIELDS
                     ).execute()
                     
                     sheets_list = spreadsheet.get('sheets', [])
@@ -1210,6 +1263,9 @@ class GoogleWorkspaceMCPServer:
     
     async def run(self):
         """Run the MCP server."""
+        folder_id = self._get_workspace_folder_id()
+        if self._drive_index is not None and folder_id:
+            self._drive_index.start_bootstrap(folder_id)
         async with stdio_server() as (read_stream, write_stream):
             await self.server.run(
                 read_stream,
@@ -1235,6 +1291,12 @@ async def main():
         default="config/workspace_config.json",
         help="Path to workspace configuration file"
     )
+    parser.add_argument(
+        "--drive-index",
+        type=str,
+        default=None,
+        help="SQLite file of the local Drive metadata index (answer file name lookups from it)"
+    )
     args = parser.parse_args()
     
     # Setup logging
@@ -1243,9 +1305,14 @@ async def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
+    # Spans of this process join the host trace via tool-call _meta
+    configure_tracing("google-workspace")
+    instrument_google_api_client()
+    
     server = GoogleWorkspaceMCPServer(
         Path(args.token_path),
-        Path(args.config_path) if args.config_path else None
+        Path(args.config_path) if args.config_path else None,
+        drive_index_path=Path(args.drive_index) if args.drive_index else None
     )
     await server.run()
 
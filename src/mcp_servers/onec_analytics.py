@@ -0,0 +1,286 @@
+"""
+Local revenue aggregates for the 1C MCP server.
+
+onec_revenue_by_counterparty_month used to download every posted sales
+document of the period and sum it in Python on each call, so a follow-up
+("and last quarter?") repeated the whole OData download. With the store
+enabled (server flag --analytics-store <db path>) the server keeps revenue
+per (organization, month, counterparty) in SQLite:
+
+- a month is loaded once from the documents of all organizations;
+  contiguous missing months are loaded with a single (paged) query
+- closed months are immutable once loaded; the current month and the
+  refresh_window_months before it are open and reloaded when older than
+  refresh_interval_sec; a month loaded while open is reloaded once after
+  it closes
+- queries sum whole months of the period from the store; a partially
+  covered first/last month (e.g. from 2025-01-15) is aggregated from its
+  documents as before, since monthly totals cannot answer it
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import asyncio
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Months before the current one that are still reloaded (late postings, corrections)
+REFRESH_WINDOW_MONTHS = 1
+
+# Open months are reloaded at most this often
+REFRESH_INTERVAL_SEC = 300.0
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS onec_revenue (
+        month TEXT NOT NULL,
+        organization_key TEXT NOT NULL,
+        counterparty_key TEXT NOT NULL,
+        revenue REAL NOT NULL,
+        documents INTEGER NOT NULL,
+        PRIMARY KEY (month, organization_key, counterparty_key)
+    );
+    CREATE TABLE IF NOT EXISTS onec_revenue_months (
+        month TEXT PRIMARY KEY,
+        closed INTEGER NOT NULL,
+        loaded_at REAL NOT NULL
+    );
+"""
+
+# (month, counterparty key) -> revenue
+Revenue = Dict[Tuple[str, str], float]
+
+# Loads posted sales documents: (from, to, organization GUID or None) -> documents
+FetchSales = Callable[[datetime, datetime, Optional[str]], Awaitable[List[Dict[str, Any]]]]
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _month_key(month: date) -> str:
+    return month.strftime("%Y-%m")
+
+
+def aggregate_sales(documents: List[Dict[str, Any]]) -> Dict[Tuple[str, str, str], List[float]]:
+    """
+    Sum sales documents by month, organization and counterparty.
+    
+    Args:
+        documents: OData documents with Date, Organization_Key, Counterparty_Key, Amount
+    
+    Returns:
+        {(month "YYYY-MM", organization key, counterparty key): [revenue, documents]}
+    """
+    totals: Dict[Tuple[str, str, str], List[float]] = {}
+    for doc in documents:
+        date_str = doc.get("Date", "")
+        if not date_str:
+            continue
+        try:
+            # Parse date (OData format: "2025-01-15T00:00:00" or ISO)
+            if "T" in date_str:
+                doc_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+            else:
+                doc_date = datetime.fromisoformat(f"{date_str}T00:00:00")
+            amount = float(doc.get("Amount", 0))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Failed to process document date/amount: {e}")
+            continue
+        key = (doc_date.strftime("%Y-%m"), doc.get("Organization_Key", ""), doc.get("Counterparty_Key", ""))
+        total = totals.setdefault(key, [0.0, 0])
+        total[0] += amount
+        total[1] += 1
+    return totals
+
+
+class RevenueAggregateStore:
+    """SQLite revenue per (organization, month, counterparty) with incremental refresh of open months."""
+    
+    def __init__(
+        self,
+        db_path: Path,
+        fetch_sales: FetchSales,
+        refresh_window_months: int = REFRESH_WINDOW_MONTHS,
+        refresh_interval_sec: float = REFRESH_INTERVAL_SEC,
+        today: Callable[[], date] = date.today
+    ):
+        """
+        Initialize store.
+        
+        Args:
+            db_path: SQLite database file (created if missing)
+            fetch_sales: Coroutine loading posted sales documents of a period
+            refresh_window_months: Months before the current one that stay open
+            refresh_interval_sec: Minimum interval between reloads of an open month
+            today: Current date (1C document dates are local)
+        """
+        self.db_path = Path(db_path)
+        self._fetch_sales = fetch_sales
+        self.refresh_window_months = refresh_window_months
+        self.refresh_interval_sec = refresh_interval_sec
+        self._today = today
+        self._lock = asyncio.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create tables."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+    
+    def _first_open_month(self) -> date:
+        month = _month_start(self._today())
+        for _ in range(self.refresh_window_months):
+            month = _month_start(month - timedelta(days=1))
+        return month
+    
+    def _stale_months(self, first: date, last: date) -> List[date]:
+        """Months of [first, last] that are missing, reopened or due for a reload."""
+        loaded = {
+            row[0]: (bool(row[1]), row[2])
+            for row in self._connect().execute(
+                "SELECT month, closed, loaded_at FROM onec_revenue_months WHERE month BETWEEN ? AND ?",
+                (_month_key(first), _month_key(last))
+            )
+        }
+        first_open = self._first_open_month()
+        now = time.time()
+        stale = []
+        month = first
+        while month <= last:
+            state = loaded.get(_month_key(month))
+            if state is None:
+                stale.append(month)
+            elif month >= first_open:
+                if now - state[1] >= self.refresh_interval_sec:
+                    stale.append(month)
+            elif not state[0]:
+                # Loaded while open: reload once with its final documents
+                stale.append(month)
+            month = _next_month(month)
+        return stale
+    
+    async def refresh(self, first: date, last: date) -> int:
+        """
+        Load the missing and stale months of a range.
+        
+        Args:
+            first: First month (any day of it)
+            last: Last month (any day of it)
+        
+        Returns:
+            Number of OData loads (one per run of contiguous months)
+        """
+        async with self._lock:
+            stale = self._stale_months(_month_start(first), _month_start(last))
+            runs: List[List[date]] = []
+            for month in stale:
+                if runs and _next_month(runs[-1][-1]) == month:
+                    runs[-1].append(month)
+                else:
+                    runs.append([month])
+            for run in runs:
+                await self._load(run)
+            return len(runs)
+    
+    async def _load(self, months: List[date]) -> None:
+        """Replace the aggregates of contiguous months with their documents."""
+        start = datetime.combine(months[0], datetime.min.time())
+        end = datetime.combine(_next_month(months[-1]), datetime.min.time()) - timedelta(seconds=1)
+        documents = await self._fetch_sales(start, end, None)
+        totals = aggregate_sales(documents)
+        first_open = self._first_open_month()
+        keys = [_month_key(month) for month in months]
+        conn = self._connect()
+        with conn:
+            conn.executemany("DELETE FROM onec_revenue WHERE month = ?", [(key,) for key in keys])
+            conn.executemany(
+                "INSERT INTO onec_revenue (month, organization_key, counterparty_key, revenue, documents) VALUES (?, ?, ?, ?, ?)",
+                [(month, org, cp, revenue, int(count)) for (month, org, cp), (revenue, count) in totals.items() if month in keys]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO onec_revenue_months (month, closed, loaded_at) VALUES (?, ?, ?)",
+                [(_month_key(month), int(month < first_open), time.time()) for month in months]
+            )
+        logger.info(f"1C analytics: loaded {keys[0]}..{keys[-1]}, {len(documents)} documents")
+    
+    async def revenue(
+        self,
+        start: date,
+        end: date,
+        organization_key: Optional[str] = None
+    ) -> Tuple[Revenue, int]:
+        """
+        Revenue of a period by month and counterparty.
+        
+        Args:
+            start: First day of the period
+            end: Last day of the period (inclusive)
+            organization_key: Only this organization (default: all)
+        
+        Returns:
+            ({(month, counterparty key): revenue}, number of documents)
+        """
+        revenue: Revenue = {}
+        documents = 0
+        if end < start:
+            return revenue, documents
+        
+        # Whole months come from the store, partially covered edge months from their documents
+        first_full = start if start.day == 1 else _next_month(start)
+        end_month = _month_start(end)
+        if end + timedelta(days=1) == _next_month(end_month):
+            last_full = end_month
+        else:
+            last_full = _month_start(end_month - timedelta(days=1))
+        edges = []
+        if first_full > last_full:
+            edges.append((start, end))
+        else:
+            if start < first_full:
+                edges.append((start, first_full - timedelta(days=1)))
+            if _next_month(last_full) <= end:
+                edges.append((_next_month(last_full), end))
+            await self.refresh(first_full, last_full)
+            query = (
+                "SELECT month, counterparty_key, SUM(revenue), SUM(documents) FROM onec_revenue "
+                "WHERE month BETWEEN ? AND ?"
+            )
+            params: List[Any] = [_month_key(first_full), _month_key(last_full)]
+            if organization_key:
+                query += " AND organization_key = ?"
+                params.append(organization_key)
+            for month, counterparty, total, count in self._connect().execute(query + " GROUP BY month, counterparty_key", params):
+                revenue[(month, counterparty)] = total
+                documents += count
+        
+        for edge_start, edge_end in edges:
+            sales = await self._fetch_sales(
+                datetime.combine(edge_start, datetime.min.time()),
+                datetime.combine(edge_end, datetime.max.time()).replace(microsecond=0),
+                organization_key
+            )
+            for (month, _, counterparty), (total, count) in aggregate_sales(sales).items():
+                revenue[(month, counterparty)] = revenue.get((month, counterparty), 0.0) + total
+                documents += int(count)
+        return revenue, documents
+    
+    def close(self) -> None:
+        """Close the database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
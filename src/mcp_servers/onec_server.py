@@ -8,9 +8,10 @@ import json
 import sys
 import base64
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
+import time
 import httpx
 from collections import defaultdict
 
@@ -18,23 +19,42 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from src.mcp_servers.onec_analytics import RevenueAggregateStore, aggregate_sales
 from src.utils.config_loader import get_onec_config, OneCConfig
+from src.utils.tracing import configure_tracing, trace_tool_handler
 
 logger = logging.getLogger(__name__)
 
 
+# Counterparty names are re-read from the catalog at most this often
+COUNTERPARTIES_TTL_SEC = 600.0
+
+# Safety limit of documents loaded per revenue query without the analytics store
+MAX_SALES_RECORDS = 10000
+
+
 class OneCMCPServer:
     """MCP Server for 1C:Бухгалтерия OData operations."""
     
-    def __init__(self, config_path: Path):
+    def __init__(self, config_path: Path, analytics_store_path: Optional[Path] = None):
         """
         Initialize 1C MCP Server.
         
         Args:
             config_path: Path to 1C configuration file
+            analytics_store_path: SQLite file of the revenue aggregates; revenue
+                queries are served from it when set
         """
         self.config_path = Path(config_path)
         self._config: Optional[OneCConfig] = None
+        self._counterparties: Dict[str, str] = {}
+        self._counterparties_loaded_at = float("-inf")
+        self._analytics_store = (
+            RevenueAggregateStore(
+                analytics_store_path,
+                lambda start, end, org_guid: self._fetch_posted_sales(start, end, org_guid, max_records=None)
+            ) if analytics_store_path else None
+        )
         self.server = Server("onec-mcp")
         self._setup_tools()
     
@@ -93,6 +113,116 @@ class OneCMCPServer:
             response.raise_for_status()
             return response.json()
     
+    async def _counterparty_names(self) -> Dict[str, str]:
+        """Counterparty names by Ref_Key (catalog re-read at most every COUNTERPARTIES_TTL_SEC)."""
+        if time.monotonic() - self._counterparties_loaded_at < COUNTERPARTIES_TTL_SEC:
+            return self._counterparties
+        try:
+            counterparties_data = await self._odata_request("Catalog_Контрагенты", {"$top": 1000})
+            self._counterparties = {
+                cp["Ref_Key"]: cp.get("Description", "Unknown")
+                for cp in counterparties_data.get("value", [])
+                if "Ref_Key" in cp
+            }
+            self._counterparties_loaded_at = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Failed to fetch counterparties: {e}")
+        return self._counterparties
+    
+    async def _fetch_posted_sales(
+        self,
+        from_dt: datetime,
+        to_dt: datetime,
+        org_guid: Optional[str] = None,
+        max_records: Optional[int] = MAX_SALES_RECORDS
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch posted sales documents of a period with pagination.
+        
+        Args:
+            from_dt: Period start
+            to_dt: Period end (inclusive)
+            org_guid: Optional organization GUID for filtering
+            max_records: Stop after this many documents (None: all)
+        
+        Returns:
+            Documents with Date, Organization_Key, Counterparty_Key, Amount
+        """
+        filter_parts = [
+            f"Date ge datetime'{from_dt.isoformat()}'",
+            f"Date le datetime'{to_dt.isoformat()}'",
+            "Posted eq true"  # Only posted documents
+        ]
+        
+        if org_guid:
+            filter_parts.append(f"Organization_Key eq guid'{org_guid}'")
+        
+        params = {
+            "$filter": " and ".join(filter_parts),
+            "$select": "Date,Organization_Key,Counterparty_Key,Amount",
+            "$orderby": "Date"
+        }
+        
+        all_sales = []
+        skip = 0
+        page_size = 1000
+        
+        while True:
+            page_params = params.copy()
+            page_params["$top"] = page_size
+            page_params["$skip"] = skip
+            
+            try:
+                sales_data = await self._odata_request("Document_РеализацияТоваровУслуг", page_params)
+            except httpx.HTTPStatusError as e:
+                # Try alternative entity name
+                logger.warning(f"Failed with Document_РеализацияТоваровУслуг, trying alternatives: {e}")
+                try:
+                    sales_data = await self._odata_request("Document_Реализация", page_params)
+                except:
+                    raise ValueError(f"Failed to fetch sales documents. Check entity name in OData metadata. Error: {e}")
+            
+            if "value" not in sales_data or not sales_data["value"]:
+                break
+            
+            all_sales.extend(sales_data["value"])
+            
+            # Check if there are more pages
+            if len(sales_data["value"]) < page_size:
+                break
+            
+            skip += page_size
+            
+            # Safety limit
+            if max_records is not None and skip > max_records:
+                logger.warning(f"Reached pagination limit ({max_records} records)")
+                break
+        
+        return all_sales
+    
+    async def _stored_revenue(
+        self,
+        from_dt: datetime,
+        to_dt: datetime,
+        org_guid: Optional[str]
+    ) -> Optional[Tuple[Dict[Tuple[str, str], float], int]]:
+        """
+        Revenue of a period from the analytics store.
+        
+        Returns:
+            ({(month, counterparty key): revenue}, number of documents); None if
+            the store is disabled or unavailable (aggregate the documents instead)
+        """
+        if self._analytics_store is None:
+            return None
+        try:
+            return await self._analytics_store.revenue(from_dt.date(), to_dt.date(), org_guid)
+        except (httpx.HTTPError, ValueError):
+            raise
+        except Exception as e:
+            logger.warning(f"Analytics store unavailable, aggregating documents: {e}")
+            return None
+    
     def _setup_tools(self):
         """Register MCP tools."""
         
@@ -164,6 +294,7 @@ class OneCMCPServer:
             ]
         
         @self.server.call_tool()
+        @trace_tool_handler(self.server)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls."""
             try:
@@ -225,15 +356,7 @@ class OneCMCPServer:
                     }
                     
                     # Fetch counterparties for names
-                    counterparties = {}
-                    try:
-                        counterparties_data = await self._odata_request("Catalog_Контрагенты", {"$top": 1000})
-                        if "value" in counterparties_data:
-                            for cp in counterparties_data["value"]:
-                                if "Ref_Key" in cp:
-                                    counterparties[cp["Ref_Key"]] = cp.get("Description", "Unknown")
-                    except Exception as e:
-                        logger.warning(f"Failed to fetch counterparties: {e}")
+                    counterparties = await self._counterparty_names()
                     
                     # Fetch sales documents
                     try:
@@ -287,104 +410,30 @@ class OneCMCPServer:
                     except ValueError as e:
                         raise ValueError(f"Invalid date format: {e}")
                     
-                    # Build OData query - fetch all sales in period
-                    filter_parts = [
-                        f"Date ge datetime'{from_dt.isoformat()}'",
-                        f"Date le datetime'{to_dt.isoformat()}'",
-                        "Posted eq true"  # Only posted documents
-                    ]
-                    
-                    if org_guid:
-                        filter_parts.append(f"Organization_Key eq guid'{org_guid}'")
-                    
-                    params = {
-                        "$filter": " and ".join(filter_parts),
-                        "$select": "Date,Counterparty_Key,Amount",
-                        "$orderby": "Date"
-                    }
-                    
                     # Fetch counterparties for names
-                    counterparties = {}
-                    try:
-                        counterparties_data = await self._odata_request("Catalog_Контрагенты", {"$top": 1000})
-                        if "value" in counterparties_data:
-                            for cp in counterparties_data["value"]:
-                                if "Ref_Key" in cp:
-                                    counterparties[cp["Ref_Key"]] = cp.get("Description", "Unknown")
-                    except Exception as e:
-                        logger.warning(f"Failed to fetch counterparties: {e}")
-                    
-                    # Fetch sales documents with pagination
-                    all_sales = []
-                    skip = 0
-                    page_size = 1000
+                    counterparties = await self._counterparty_names()
                     
-                    while True:
-                        page_params = params.copy()
-                        page_params["$top"] = page_size
-                        page_params["$skip"] = skip
-                        
-                        try:
-                            sales_data = await self._odata_request("Document_РеализацияТоваровУслуг", page_params)
-                        except httpx.HTTPStatusError as e:
-                            # Try alternative entity name
-                            logger.warning(f"Failed with Document_РеализацияТоваровУслуг, trying alternatives: {e}")
-                            try:
-                                sales_data = await self._odata_request("Document_Реализация", page_params)
-                            except:
-                                raise ValueError(f"Failed to fetch sales documents. Check entity name in OData metadata. Error: {e}")
-                        
-                        if "value" not in sales_data or not sales_data["value"]:
-                            break
-                        
-                        all_sales.extend(sales_data["value"])
-                        
-                        # Check if there are more pages
-                        if len(sales_data["value"]) < page_size:
-                            break
-                        
-                        skip += page_size
-                        
-                        # Safety limit
-                        if skip > 10000:
-                            logger.warning("Reached pagination limit (10000 records)")
-                            break
-                    
-                    # Aggregate by month and counterparty
-                    revenue_by_month_cp = defaultdict(lambda: defaultdict(float))
-                    
-                    for doc in all_sales:
-                        date_str = doc.get("Date", "")
-                        if not date_str:
-                            continue
-                        
-                        try:
-                            # Parse date (OData format: "2025-01-15T00:00:00" or ISO)
-                            if "T" in date_str:
-                                doc_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                            else:
-                                doc_date = datetime.fromisoformat(f"{date_str}T00:00:00")
-                            
-                            month_key = doc_date.strftime("%Y-%m")
-                            cp_key = doc.get("Counterparty_Key", "")
-                            amount = float(doc.get("Amount", 0))
-                            
-                            revenue_by_month_cp[month_key][cp_key] += amount
-                        except (ValueError, TypeError) as e:
-                            logger.warning(f"Failed to process document date/amount: {e}")
-                            continue
+                    # Whole months come from the analytics store; otherwise aggregate the documents
+                    stored = await self._stored_revenue(from_dt, to_dt, org_guid)
+                    if stored is not None:
+                        revenue_by_month_cp, total_records = stored
+                    else:
+                        all_sales = await self._fetch_posted_sales(from_dt, to_dt, org_guid)
+                        total_records = len(all_sales)
+                        revenue_by_month_cp = defaultdict(float)
+                        for (month_key, _, cp_key), (amount, _) in aggregate_sales(all_sales).items():
+                            revenue_by_month_cp[(month_key, cp_key)] += amount
                     
                     # Format results
                     results = []
-                    for month in sorted(revenue_by_month_cp.keys()):
-                        for cp_key, revenue in revenue_by_month_cp[month].items():
-                            cp_name = counterparties.get(cp_key, "Unknown")
-                            results.append({
-                                "month": month,
-                                "counterparty_guid": cp_key,
-                                "counterparty_name": cp_name,
-                                "revenue": round(revenue, 2)
-                            })
+                    for (month, cp_key), revenue in revenue_by_month_cp.items():
+                        cp_name = counterparties.get(cp_key, "Unknown")
+                        results.append({
+                            "month": month,
+                            "counterparty_guid": cp_key,
+                            "counterparty_name": cp_name,
+                            "revenue": round(revenue, 2)
+                        })
                     
                     # Sort by month, then by counterparty
                     results.sort(key=lambda x: (x["month"], x["counterparty_name"]))
@@ -396,7 +445,7 @@ class OneCMCPServer:
                                 "from": from_date,
                                 "to": to_date
                             },
-                            "total_records": len(all_sales),
+                            "total_records": total_records,
                             "revenue_by_counterparty_month": results
                         }, indent=2, ensure_ascii=False)
                     )]
@@ -437,6 +486,12 @@ async def main():
         default="config/onec_config.json",
         help="Path to 1C configuration file"
     )
+    parser.add_argument(
+        "--analytics-store",
+        type=str,
+        default=None,
+        help="SQLite file of monthly revenue aggregates (revenue queries served locally)"
+    )
     args = parser.parse_args()
     
     # Setup logging
@@ -445,7 +500,13 @@ async def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    server = OneCMCPServer(Path(args.config_path))
+    # Spans of this process join the host trace via tool-call _meta
+    configure_tracing("onec")
+    
+    server = OneCMCPServer(
+        Path(args.config_path),
+        analytics_store_path=Path(args.analytics_store) if args.analytics_store else None
+    )
     await server.run()
 
 
@@ -15,6 +15,8 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from src.utils.tracing import configure_tracing, trace_tool_handler
+
 logger = logging.getLogger(__name__)
 
 
@@ -336,6 +338,7 @@ class ProjectLadMCPServer:
             ]
         
         @self.server.call_tool()
+        @trace_tool_handler(self.server)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Handle tool calls."""
             try:
@@ -608,6 +611,9 @@ async def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
+    # Spans of this process join the host trace via tool-call _meta
+    configure_tracing("projectlad")
+    
     server = ProjectLadMCPServer(Path(args.config_path))
     await server.run()
 
@@ -13,6 +13,7 @@ logger = logging.getLogger(__name__)
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from src.mcp_tools.tool_result import ToolResult, found_summary
 from src.utils.mcp_loader import get_mcp_manager
 from src.utils.validators import (
     validate_email,
@@ -21,6 +22,7 @@ from src.utils.validators import (
     validate_date_not_past,
     validate_duration
 )
+from src.utils.date_expressions import parse_date_expression
 from src.utils.exceptions import ToolExecutionError, ValidationError
 from src.utils.retry import retry_on_mcp_error
 from src.utils.config_loader import get_config
@@ -71,7 +73,7 @@ class CreateEventTool(BaseTool):
         description: Optional[str] = None,
         location: Optional[str] = None,
         timezone: Optional[str] = None
-    ) -> str:
+    ) -> ToolResult:
         """Execute the tool asynchronously."""
         try:
             # Get timezone from config if not provided
@@ -140,7 +142,12 @@ class CreateEventTool(BaseTool):
             elif isinstance(result, dict):
                 event_id = result.get("id", "unknown")
             
-            return f"Event '{title}' created successfully. Event ID: {event_id}. Start: {start_dt.strftime('%Y-%m-%d %H:%M')}"
+            return ToolResult(
+                f"Event '{title}' created successfully. Event ID: {event_id}. Start: {start_dt.strftime('%Y-%m-%d %H:%M')}",
+                data={"id": event_id, "summary": title, "start": {"dateTime": start_dt.isoformat()}},
+                kind="meeting",
+                summary=f"Встреча «{title}» создана"
+            )
             
         except ValidationError as e:
             raise ToolExecutionError(
@@ -299,7 +306,7 @@ class GetCalendarEventsTool(BaseTool):
         start_time: Optional[str] = None,
         end_time: Optional[str] = None,
         max_results: int = 10
-    ) -> str:
+    ) -> ToolResult:
         """Execute the tool asynchronously."""
         try:
             timezone = get_config().timezone
@@ -308,84 +315,17 @@ class GetCalendarEventsTool(BaseTool):
             
             args = {"maxResults": max_results}
             
-            # Handle "за прошлую неделю" / "на прошлой неделе" / "past week" / "last week" - previous calendar week (Mon-Sun)
-            start_lower = start_time.lower() if start_time else ""
-            if start_time and ("за прошлую неделю" in start_lower or "за последнюю неделю" in start_lower or "на прошлой неделе" in start_lower or "past week" in start_lower or "last week" in start_lower):
-                # Calculate previous calendar week (Monday to Sunday)
-                days_since_monday = now.weekday()  # 0 = Monday, 6 = Sunday
-                current_week_monday = now - timedelta(days=days_since_monday)
-                last_week_monday = current_week_monday - timedelta(days=7)
-                last_week_monday = last_week_monday.replace(hour=0, minute=0, second=0, microsecond=0)
-                last_week_sunday = last_week_monday + timedelta(days=6, hours=23, minutes=59, seconds=59)
-                
-                args["timeMin"] = last_week_monday.isoformat()
-                
-                # If end_time not specified, set to end of last week (Sunday)
-                if not end_time:
-                    args["timeMax"] = last_week_sunday.isoformat()
-                else:
-                    end_dt = parse_datetime(end_time, timezone)
-                    args["timeMax"] = end_dt.isoformat()
-            # Handle "за прошлые две недели" / "past two weeks" - automatically set range
-            elif start_time and ("за прошлые две недели" in start_time.lower() or "за последние две недели" in start_time.lower() or "past two weeks" in start_time.lower() or "last two weeks" in start_time.lower()):
-                # Calculate start of two weeks ago
-                days_since_monday = now.weekday()  # 0 = Monday, 6 = Sunday
-                two_weeks_ago = now - timedelta(days=14)
-                two_weeks_ago_start = two_weeks_ago.replace(hour=0, minute=0, second=0, microsecond=0)
-                args["timeMin"] = two_weeks_ago_start.isoformat()
-                
-                # If end_time not specified, set to now (end of range)
-                if not end_time:
-                    args["timeMax"] = now.isoformat()
-                else:
-                    end_dt = parse_datetime(end_time, timezone)
-                    args["timeMax"] = end_dt.isoformat()
-            # Handle "на неделе" / "this week" - automatically set week range
-            elif start_time and ("на неделе" in start_time.lower() or "на этой неделе" in start_time.lower() or "this week" in start_time.lower()):
-                # Calculate start of current week (Monday)
-                days_since_monday = now.weekday()  # 0 = Monday, 6 = Sunday
-                week_start = now - timedelta(days=days_since_monday)
-                week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-                args["timeMin"] = week_start.isoformat()
-                
-                # Calculate end of week (Sunday 23:59:59)
-                week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-                
-                # If end_time not specified OR end_time also contains "неделе" (LLM sometimes passes same value), use week end
-                end_lower = end_time.lower() if end_time else ""
-                if not end_time or "неделе" in end_lower or "week" in end_lower:
-                    args["timeMax"] = week_end.isoformat()
-                else:
-                    end_dt = parse_datetime(end_time, timezone)
-                    args["timeMax"] = end_dt.isoformat()
-            elif start_time:
-                start_dt = parse_datetime(start_time, timezone)
-                args["timeMin"] = start_dt.isoformat()
-                
-                # If end_time not specified and start_time is "сегодня" or "завтра", set end to end of that day
-                if not end_time:
-                    if "сегодня" in start_time.lower() or "today" in start_time.lower():
-                        end_dt = now.replace(hour=23, minute=59, second=59, microsecond=0)
-                        args["timeMax"] = end_dt.isoformat()
-                    elif "завтра" in start_time.lower() or "tomorrow" in start_time.lower():
-                        tomorrow = now + timedelta(days=1)
-                        end_dt = tomorrow.replace(hour=23, minute=59, second=59, microsecond=0)
-                        args["timeMax"] = end_dt.isoformat()
-            
-            if end_time and not ("на неделе" in start_time.lower() if start_time else False):
-                end_time_lower = end_time.lower()
-                # Check if end_time is a day-level expression without specific time
-                # If so, set to end of that day (23:59:59) to get full day's events
-                is_day_expression = any(day_word in end_time_lower for day_word in ["сегодня", "today", "завтра", "tomorrow", "послезавтра"])
-                has_specific_time = "в " in end_time_lower or "at " in end_time_lower or ":" in end_time
-                
-                if is_day_expression and not has_specific_time:
-                    # Set end to end of that day
-                    end_dt = parse_datetime(end_time, timezone)
-                    end_dt = end_dt.replace(hour=23, minute=59, second=59, microsecond=0)
-                else:
-                    end_dt = parse_datetime(end_time, timezone)
-                args["timeMax"] = end_dt.isoformat()
+            # Expressions resolve to ranges: "сегодня" - the whole day, "на неделе" - Monday to Sunday,
+            # "за прошлые две недели" - up to now
+            start = parse_date_expression(start_time, timezone, now) if start_time else None
+            end = parse_date_expression(end_time, timezone, now) if end_time else None
+            if start:
+                args["timeMin"] = start.start.isoformat()
+                if not end and not start.is_absolute:
+                    args["timeMax"] = start.end.isoformat()
+            if end:
+                # End with a time of day is that time, otherwise the end of its day/week
+                args["timeMax"] = (end.start if end.has_time else end.end).isoformat()
             
             mcp_manager = get_mcp_manager()
             result = await mcp_manager.call_tool("list_events", args, server_name="calendar")
@@ -414,20 +354,27 @@ class GetCalendarEventsTool(BaseTool):
             events = result.get("items", []) if isinstance(result, dict) else []
             count = result.get("count", len(events)) if isinstance(result, dict) else len(events) if isinstance(events, list) else 0
             
+            data = {"items": events, "count": count}
+            summary = found_summary(count, "встреча", "встречи", "встреч", "Встречи не найдены")
+            
             # If no events, return simple message
             if count == 0:
-                return "Found 0 events"
+                return ToolResult("Found 0 events", data=data, rows=[], kind="meeting", summary=summary)
             
             # If we have events but no details in items, return count with suggestion
             if isinstance(events, list) and len(events) == 0:
-                return f"Found {count} events (details not available in current response)"
+                return ToolResult(
+                    f"Found {count} events (details not available in current response)",
+                    data=data, rows=[], kind="meeting", summary=summary
+                )
             
             # Build detailed response with event information
             response_parts = [f"Found {count} event(s):"]
+            rows = []
             
             for i, event in enumerate(events[:max_results], 1):
                 if isinstance(event, dict):
-                    summary = event.get("summary", event.get("title", "No title"))
+                    title = event.get("summary", event.get("title", "No title"))
                     start = event.get("start", {})
                     end = event.get("end", {})
                     
@@ -458,8 +405,9 @@ class GetCalendarEventsTool(BaseTool):
                     attendees = event.get("attendees", [])
                     description = event.get("description", "")
                     
-                    event_info = f"\n{i}. {summary}"
+                    event_info = f"\n{i}. {title}"
                     event_info += f"\n   Время: {formatted_start} - {formatted_end}"
+                    rows.append(f"📅 {title} - {formatted_start}")
                     
                     if location:
                         event_info += f"\n   Место: {location}"
@@ -478,11 +426,12 @@ class GetCalendarEventsTool(BaseTool):
                     response_parts.append(event_info)
                 else:
                     response_parts.append(f"\n{i}. {str(event)}")
+                    rows.append(f"📅 {event}")
             
             if count > max_results:
                 response_parts.append(f"\n... и еще {count - max_results} событие(ий)")
             
-            return "\n".join(response_parts)
+            return ToolResult("\n".join(response_parts), data=data, rows=rows, kind="meeting", summary=summary)
             
         except Exception as e:
             raise ToolExecutionError(
@@ -596,41 +545,16 @@ class DeleteCalendarEventsTool(BaseTool):
             # Otherwise, search for events to show user for confirmation
             args = {"maxResults": 100}  # Get more events for deletion
             
-            # Parse start_time
-            start_lower = start_time.lower()
-            
-            # Handle "на неделе" / "this week"
-            if "на неделе" in start_lower or "на этой неделе" in start_lower or "this week" in start_lower:
-                days_since_monday = now.weekday()
-                week_start = now - timedelta(days=days_since_monday)
-                week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-                week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-                args["timeMin"] = week_start.isoformat()
-                args["timeMax"] = week_end.isoformat()
-            elif "сегодня" in start_lower or "today" in start_lower:
-                day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                day_end = now.replace(hour=23, minute=59, second=59, microsecond=0)
-                args["timeMin"] = day_start.isoformat()
-                if not end_time:
-                    args["timeMax"] = day_end.isoformat()
-            elif "завтра" in start_lower or "tomorrow" in start_lower:
-                tomorrow = now + timedelta(days=1)
-                day_start = tomorrow.replace(hour=0, minute=0, second=0, microsecond=0)
-                day_end = tomorrow.replace(hour=23, minute=59, second=59, microsecond=0)
-                args["timeMin"] = day_start.isoformat()
-                if not end_time:
-                    args["timeMax"] = day_end.isoformat()
-            else:
-                start_dt = parse_datetime(start_time, timezone)
-                args["timeMin"] = start_dt.isoformat()
-                if not end_time:
-                    # Default to +24h if no end time specified
-                    end_dt = start_dt + timedelta(hours=24)
-                    args["timeMax"] = end_dt.isoformat()
-            
+            # Parse start_time: an absolute time covers the next 24h, an expression its range
+            start = parse_date_expression(start_time, timezone, now)
+            args["timeMin"] = start.start.isoformat()
             if end_time:
-                end_dt = parse_datetime(end_time, timezone)
-                args["timeMax"] = end_dt.isoformat()
+                end = parse_date_expression(end_time, timezone, now)
+                args["timeMax"] = (end.start if end.has_time else end.end).isoformat()
+            elif start.is_absolute and start.has_time:
+                args["timeMax"] = (start.start + timedelta(hours=24)).isoformat()
+            else:
+                args["timeMax"] = start.end.isoformat()
             
             # Get events from MCP
             result = await mcp_manager.call_tool("list_events", args, server_name="calendar")
@@ -6,13 +6,9 @@ Allows AI to generate and execute Python code for data processing tasks.
 from typing import Optional, Dict, Any
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
-import asyncio
 import json
-import math
-from datetime import datetime
-from io import StringIO
-from contextlib import redirect_stdout, redirect_stderr
 
+from src.utils.code_sandbox import get_sandbox_pool
 from src.utils.exceptions import ToolExecutionError
 
 
@@ -43,7 +39,10 @@ class PythonCodeExecutionTool(BaseTool):
     - Process arrays/lists with custom logic
     - Generate data based on patterns
     
-    Available libraries: math, datetime, json
+    Available libraries: math, datetime, json (plus pandas as pd and numpy as np when installed)
+    
+    Code runs in an isolated worker process with CPU, memory and time limits;
+    long stdout/stderr/result values are truncated.
     
     Input:
     - code: Python code to execute
@@ -69,98 +68,39 @@ class PythonCodeExecutionTool(BaseTool):
         input_data: Optional[Dict[str, Any]] = None,
         timeout: int = 30
     ) -> str:
-        """Execute Python code in controlled environment."""
+        """Execute Python code in a pre-started sandbox worker process."""
         try:
-            # Prepare execution environment
-            # Only allow safe built-ins and libraries
-            safe_globals = {
-                '__builtins__': {
-                    '__import__': __import__,  # Needed for 'import' statements
-                    'abs': abs,
-                    'all': all,
-                    'any': any,
-                    'bool': bool,
-                    'dict': dict,
-                    'enumerate': enumerate,
-                    'float': float,
-                    'int': int,
-                    'len': len,
-                    'list': list,
-                    'max': max,
-                    'min': min,
-                    'range': range,
-                    'round': round,
-                    'sorted': sorted,
-                    'str': str,
-                    'sum': sum,
-                    'tuple': tuple,
-                    'zip': zip,
-                    'map': map,
-                    'filter': filter,
-                    'iter': iter,
-                    'next': next,
-                    'reversed': reversed,
-                    'set': set,
-                    'frozenset': frozenset,
-                },
-                'math': math,
-                'datetime': datetime,
-                'json': json,
-                'data': input_data or {},
-                'result': None
-            }
-            
-            # Capture output
-            stdout_capture = StringIO()
-            stderr_capture = StringIO()
+            outcome = await get_sandbox_pool().execute(code, input_data=input_data, timeout=timeout)
             
-            # Execute with timeout
-            def execute_code():
-                with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-                    exec(code, safe_globals)
-                return safe_globals.get('result')
-            
-            # Run with timeout using asyncio
-            try:
-                result = await asyncio.wait_for(
-                    asyncio.get_event_loop().run_in_executor(None, execute_code),
-                    timeout=timeout
-                )
-            except asyncio.TimeoutError:
+            if outcome.timed_out:
                 raise ToolExecutionError(
                     f"Code execution timeout after {timeout} seconds",
                     tool_name=self.name
                 )
+            if outcome.error:
+                raise ToolExecutionError(
+                    f"Code execution failed: {outcome.error}",
+                    tool_name=self.name
+                )
             
-            # Get captured output
-            stdout_text = stdout_capture.getvalue()
-            stderr_text = stderr_capture.getvalue()
+            result = outcome.result
             
             # Format response
             response_parts = []
             
             if result is not None:
-                # Try to serialize result
-                try:
-                    if isinstance(result, (list, dict, str, int, float, bool)):
-                        # For simple types, try JSON serialization
-                        try:
-                            result_str = json.dumps(result, ensure_ascii=False, indent=2)
-                            response_parts.append(f"Result:\n{result_str}")
-                        except (TypeError, ValueError):
-                            result_str = str(result)
-                            response_parts.append(f"Result:\n{result_str}")
-                    else:
-                        result_str = str(result)
-                        response_parts.append(f"Result:\n{result_str}")
-                except Exception as e:
-                    response_parts.append(f"Result: {str(result)} (serialization warning: {e})")
+                if outcome.result_is_text:
+                    # Already formatted by the worker (str() or truncated JSON)
+                    response_parts.append(f"Result:\n{result}")
+                else:
+                    result_str = json.dumps(result, ensure_ascii=False, indent=2)
+                    response_parts.append(f"Result:\n{result_str}")
             
-            if stdout_text:
-                response_parts.append(f"Output:\n{stdout_text}")
+            if outcome.stdout:
+                response_parts.append(f"Output:\n{outcome.stdout}")
             
-            if stderr_text:
-                response_parts.append(f"Errors:\n{stderr_text}")
+            if outcome.stderr:
+                response_parts.append(f"Errors:\n{outcome.stderr}")
             
             if not response_parts:
                 response_parts.append("Code executed successfully (no result returned - make sure to assign result to 'result' variable)")
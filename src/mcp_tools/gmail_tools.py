@@ -9,6 +9,7 @@ from typing import Optional, List, Dict, Any
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from src.mcp_tools.tool_result import ToolResult, found_summary
 from src.utils.mcp_loader import get_mcp_manager
 from src.utils.validators import validate_email, validate_email_list
 from src.utils.exceptions import ToolExecutionError, ValidationError
@@ -199,7 +200,7 @@ class SearchEmailsTool(BaseTool):
     args_schema: type = SearchEmailsInput
     
     @retry_on_mcp_error()
-    async def _arun(self, query: str, max_results: int = 10) -> str:
+    async def _arun(self, query: str, max_results: int = 10) -> ToolResult:
         """Execute the tool asynchronously."""
         try:
             args = {
@@ -237,15 +238,22 @@ class SearchEmailsTool(BaseTool):
             else:
                 count = 0
             
+            data = {"items": messages, "count": count}
+            summary = found_summary(count, "письмо", "письма", "писем", "Писем не найдено")
+            rows = [
+                f"📧 {(msg.get('subject') or 'No subject')[:80]} — {(msg.get('from') or 'Unknown')[:40]}"
+                for msg in messages if isinstance(msg, dict)
+            ]
+            
             if count == 0:
-                return f"No emails found matching query: {query}"
+                return ToolResult(f"No emails found matching query: {query}", data=data, rows=[], kind="email", summary=summary)
             
             # Format response with email summaries
             response_lines = [f"Found {count} emails matching query: {query}\n"]
             for i, msg in enumerate(messages[:5], 1):  # Show first 5
                 if isinstance(msg, dict):
-                    subj = msg.get('subject', 'No subject')
-                    from_addr = msg.get('from', 'Unknown')
+                    subj = msg.get('subject') or 'No subject'
+                    from_addr = msg.get('from') or 'Unknown'
                     msg_id = msg.get('id', 'unknown')
                     date = msg.get('date', '')
                     is_unread = '📩' if msg.get('isUnread') else '📧'
@@ -259,7 +267,7 @@ class SearchEmailsTool(BaseTool):
             if count > 5:
                 response_lines.append(f"... и ещё {count - 5} писем")
             
-            return "\n".join(response_lines)
+            return ToolResult("\n".join(response_lines), data=data, rows=rows, kind="email", summary=summary)
             
         except ToolExecutionError:
             raise
@@ -392,7 +400,7 @@ class ListEmailsTool(BaseTool):
     args_schema: type = ListEmailsInput
     
     @retry_on_mcp_error()
-    async def _arun(self, max_results: int = 10, label: str = "INBOX") -> str:
+    async def _arun(self, max_results: int = 10, label: str = "INBOX") -> ToolResult:
         """Execute the tool asynchronously."""
         try:
             args = {
@@ -432,15 +440,19 @@ class ListEmailsTool(BaseTool):
             else:
                 count = 0
             
+            data = {"items": messages, "count": count}
+            summary = found_summary(count, "письмо", "письма", "писем", "Писем не найдено")
+            
             if count == 0:
-                return f"No emails found in {label}"
+                return ToolResult(f"No emails found in {label}", data=data, rows=[], kind="email", summary=summary)
             
             # Format response
             response_lines = [f"📬 {count} emails in {label}:\n"]
+            rows = []
             for i, msg in enumerate(messages[:max_results], 1):
                 if isinstance(msg, dict):
-                    subj = msg.get('subject', 'No subject')
-                    from_addr = msg.get('from', 'Unknown')
+                    subj = msg.get('subject') or 'No subject'
+                    from_addr = msg.get('from') or 'Unknown'
                     msg_id = msg.get('id', 'unknown')
                     is_unread = '📩' if msg.get('isUnread') else '📧'
                     is_starred = '⭐' if msg.get('isStarred') else ''
@@ -448,8 +460,9 @@ class ListEmailsTool(BaseTool):
                     response_lines.append(f"   От: {from_addr[:40]}")
                     response_lines.append(f"   ID: {msg_id}")
                     response_lines.append("")
+                    rows.append(f"{is_unread} {subj[:80]} — {from_addr[:40]}")
             
-            return "\n".join(response_lines)
+            return ToolResult("\n".join(response_lines), data=data, rows=rows, kind="email", summary=summary)
             
         except Exception as e:
             raise ToolExecutionError(
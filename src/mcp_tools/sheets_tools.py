@@ -7,6 +7,7 @@ from typing import Optional, List, Dict, Any
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from src.mcp_tools.tool_result import ToolResult, pluralize_ru
 from src.utils.mcp_loader import get_mcp_manager
 from src.utils.validators import validate_spreadsheet_range
 from src.utils.exceptions import ToolExecutionError, ValidationError
@@ -169,7 +170,7 @@ class CreateSpreadsheetTool(BaseTool):
         self,
         title: str,
         sheet_names: Optional[List[str]] = None
-    ) -> str:
+    ) -> ToolResult:
         """Execute the tool asynchronously."""
         try:
             logger.info(f"[CreateSpreadsheet] Creating spreadsheet '{title}' with sheets: {sheet_names}")
@@ -205,7 +206,12 @@ class CreateSpreadsheetTool(BaseTool):
             logger.info(f"[CreateSpreadsheet] Successfully created spreadsheet '{title}': ID={spreadsheet_id}, URL={url}, Sheets={sheet_names}")
             # Make sheet names very explicit for LLM - put it at the beginning
             sheets_info = f"Sheet name(s): {', '.join(sheet_names)}. " if sheet_names else ""
-            return f"Spreadsheet '{title}' created successfully. {sheets_info}ID: {spreadsheet_id}. URL: {url}"
+            return ToolResult(
+                f"Spreadsheet '{title}' created successfully. {sheets_info}ID: {spreadsheet_id}. URL: {url}",
+                data={"id": spreadsheet_id, "name": title, "url": url, "sheets": sheet_names},
+                kind="sheet",
+                summary=f"Таблица «{title}» создана"
+            )
             
         except Exception as e:
             raise ToolExecutionError(
@@ -245,7 +251,7 @@ class GetSheetDataTool(BaseTool):
         spreadsheet_id: str,
         range: str,
         sheet_name: Optional[str] = None
-    ) -> str:
+    ) -> ToolResult:
         """Execute the tool asynchronously."""
         try:
             validated_range = validate_spreadsheet_range(range)
@@ -277,7 +283,12 @@ class GetSheetDataTool(BaseTool):
                     result = json.loads(first_item['text'])
             
             values = result.get("values", [])
-            return f"Retrieved {len(values)} row(s) from range '{validated_range}'"
+            return ToolResult(
+                f"Retrieved {len(values)} row(s) from range '{validated_range}'",
+                data={"range": validated_range, "values": values},
+                rows=[" | ".join(str(cell) for cell in row) for row in values],
+                summary=f"Получено {len(values)} {pluralize_ru(len(values), 'строка', 'строки', 'строк')}"
+            )
             
         except Exception as e:
             raise ToolExecutionError(
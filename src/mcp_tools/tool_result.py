@@ -0,0 +1,77 @@
+"""
+Typed result envelope returned by MCP tool wrappers.
+
+A ToolResult is the LLM-facing text itself (a str subclass, so consumers that
+print, slice or embed results keep working unchanged) and additionally
+carries the structured part:
+- data: structured payload (items as returned by the API)
+- rows: one-line UI renderings of the items, streamed as operation data
+- kind: entity type of the items ("meeting", "email", "file", "sheet")
+- summary: short UI summary ("Найдено 5 встреч")
+
+The engine, entity memory and UI streaming check isinstance(result, ToolResult)
+and use these fields instead of re-parsing the text.
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+class ToolResult(str):
+    """Tool result: LLM-facing text plus structured data and UI rows."""
+    
+    def __new__(
+        cls,
+        text: str,
+        data: Any = None,
+        rows: Optional[List[str]] = None,
+        kind: Optional[str] = None,
+        summary: Optional[str] = None
+    ):
+        """
+        Create result.
+        
+        Args:
+            text: Text rendering for the LLM
+            data: Structured payload (dict or list of items)
+            rows: UI rows, one per item
+            kind: Entity type of the items
+            summary: Short UI summary
+        """
+        result = super().__new__(cls, text)
+        result.data = data
+        result.rows = rows
+        result.kind = kind
+        result.summary = summary
+        return result
+    
+    @property
+    def text(self) -> str:
+        """Text rendering as a plain str."""
+        return str.__str__(self)
+    
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        """Structured items: data itself if it is a list, else its "items" list."""
+        if isinstance(self.data, list):
+            return self.data
+        if isinstance(self.data, dict) and isinstance(self.data.get("items"), list):
+            return self.data["items"]
+        return []
+
+
+def pluralize_ru(n: int, one: str, few: str, many: str) -> str:
+    """Russian plural form for n (1 встреча, 2 встречи, 5 встреч)."""
+    mod10 = n % 10
+    mod100 = n % 100
+    if 11 <= mod100 <= 14:
+        return many
+    if mod10 == 1:
+        return one
+    if 2 <= mod10 <= 4:
+        return few
+    return many
+
+
+def found_summary(count: int, one: str, few: str, many: str, none: str) -> str:
+    """UI summary like "Найдено 5 встреч" (none when count is 0)."""
+    return f"Найдено {count} {pluralize_ru(count, one, few, many)}" if count > 0 else none
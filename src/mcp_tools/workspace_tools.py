@@ -3,90 +3,213 @@ Google Workspace MCP tool wrappers for LangChain.
 Provides validated interfaces to Google Drive, Docs, and Sheets operations.
 """
 
+import asyncio
 import json
 import re
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from src.mcp_tools.tool_result import ToolResult, found_summary
+from src.utils.drive_query import name_contains_any
 from src.utils.mcp_loader import get_mcp_manager
 from src.utils.exceptions import ToolExecutionError
+from src.utils.logging_config import get_logger
 from src.utils.retry import retry_on_mcp_error
 from src.utils.validators import validate_spreadsheet_range
 
+logger = get_logger(__name__)
+
 
 # ========== HELPER FUNCTIONS ==========
 
-async def _try_case_variations_for_list_files(
-    query: str,
+# Length budget of the or-combined name clauses sent in one Drive query;
+# variations beyond it go to further queries run concurrently
+MAX_NAME_QUERY_LENGTH = 1500
+
+
+def _unique(values: List[str]) -> List[str]:
+    """Drop empty values and duplicates, keeping the order."""
+    return [value for value in dict.fromkeys(values) if value]
+
+
+def _case_variations(term: str) -> List[str]:
+    """Case variations of a file name: original, lowercase, capitalized, uppercase."""
+    return _unique([term, term.lower(), term.capitalize(), term.upper()])
+
+
+def _name_variations(term: str) -> List[str]:
+    """
+    Case and separator variations of a file name (тест2 → Тест2, ТЕСТ2, т_ест2, Т-ест2).
+    
+    Args:
+        term: File name or its fragment
+    
+    Returns:
+        Unique variations, the original first
+    """
+    variations = [term, term.lower(), term.upper(), term.capitalize(), term.title()]
+    
+    # Symbol variations (if term contains alphanumeric characters)
+    if re.search(r'[a-zA-Zа-яА-Я0-9]', term):
+        base_term = re.sub(r'[_\-\s]+', '', term)  # Remove existing separators
+        if len(base_term) > 1:
+            head, tail = base_term[0], base_term[1:]
+            variations += [head.upper() + tail, head.lower() + tail]
+            for separator in ("_", "-", " "):
+                variations += [f"{head}{separator}{tail}", f"{head.upper()}{separator}{tail}"]
+        elif base_term:
+            variations += [base_term.upper(), base_term.lower()]
+    
+    return _unique(variations)
+
+
+def _chunk_variations(variations: List[str], max_length: Optional[int] = None) -> List[List[str]]:
+    """
+    Split variations into groups whose or-combined clause fits the length budget.
+    
+    Args:
+        variations: Name variations
+        max_length: Maximum clause length per query (default: MAX_NAME_QUERY_LENGTH)
+    
+    Returns:
+        Groups of variations, one Drive query each
+    """
+    max_length = max_length or MAX_NAME_QUERY_LENGTH
+    chunks: List[List[str]] = []
+    for variation in variations:
+        if chunks and len(name_contains_any(chunks[-1] + [variation])) <= max_length:
+            chunks[-1].append(variation)
+        else:
+            chunks.append([variation])
+    return chunks
+
+
+def _match_rank(name: str, term: str) -> int:
+    """
+    Match quality of a file name for the searched term (lower is better).
+    
+    0 - same name (ignoring case and extension), 1 - same up to separators,
+    2 - name starts with the term, 3 - contains it, 4 - contains it up to
+    separators, 5 - matched only through a variation.
+    """
+    def compact(value: str) -> str:
+        return re.sub(r'[_\-\s]+', '', value)
+    
+    name_key = name.casefold()
+    term_key = term.strip().casefold()
+    stem = name_key.rsplit('.', 1)[0]
+    if term_key in (name_key, stem):
+        return 0
+    if compact(term_key) in (compact(name_key), compact(stem)):
+        return 1
+    if name_key.startswith(term_key):
+        return 2
+    if term_key in name_key:
+        return 3
+    if compact(term_key) in compact(name_key):
+        return 4
+    return 5
+
+
+def _files_from_result(result: Any) -> List[Dict[str, Any]]:
+    """Files of a workspace_list_files/workspace_search_files result (TextContent, JSON text, dict or list)."""
+    if isinstance(result, list) and len(result) > 0:
+        first_item = result[0]
+        if hasattr(first_item, 'text'):
+            result = first_item.text
+        elif isinstance(first_item, dict) and 'text' in first_item:
+            result = first_item['text']
+    
+    if isinstance(result, str):
+        result = json.loads(result)
+    
+    # Handle both dict and list results
+    if isinstance(result, dict):
+        files = result.get("files", [])
+    elif isinstance(result, list):
+        files = result
+    else:
+        files = []
+    return [f for f in files if isinstance(f, dict)]
+
+
+async def _search_name_variations(
+    tool_name: str,
+    term: str,
+    variations: List[str],
+    chunk_arguments: Callable[[List[str]], Dict[str, Any]],
     mime_type: Optional[str],
     max_results: int
 ) -> List[Dict[str, Any]]:
     """
-    Try searching with multiple case variations and return combined unique results.
+    Find files matching any variation with as few Drive queries as possible.
+    
+    Variations are or-combined into one query per length-budget chunk; the
+    chunks run concurrently. Results are deduplicated by ID and ranked by how
+    well the name matches the term (Drive order within the same rank).
     
     Args:
-        query: Search query string (simple text, not Drive API format)
+        tool_name: workspace_list_files or workspace_search_files
+        term: Searched file name
+        variations: Name variations to match
+        chunk_arguments: Tool arguments matching one chunk of variations
         mime_type: Optional MIME type filter
-        max_results: Maximum number of results per search
-        
+        max_results: Maximum number of results per query
+    
     Returns:
-        List of unique file dictionaries (deduplicated by ID)
+        List of unique file dictionaries, best matches first
     """
     mcp_manager = get_mcp_manager()
     
-    # Generate case variations: original, lowercase, capitalize, uppercase
-    variations = [
-        query,  # Original
-        query.lower(),
-        query.capitalize(),
-        query.upper()
-    ]
-    
-    # Remove duplicates while preserving order
-    seen_variations = set()
-    unique_variations = []
-    for var in variations:
-        if var not in seen_variations:
-            seen_variations.add(var)
-            unique_variations.append(var)
+    async def run_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+        args = {**chunk_arguments(chunk), "maxResults": max_results}
+        if mime_type:
+            args["mimeType"] = mime_type
+        result = await mcp_manager.call_tool(tool_name, args, server_name="google_workspace")
+        return _files_from_result(result)
+    
+    chunks = _chunk_variations(variations)
+    results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks), return_exceptions=True)
+    
+    all_files: Dict[str, Dict[str, Any]] = {}
+    for chunk, files in zip(chunks, results):
+        if isinstance(files, BaseException):
+            # Other chunks still count; a failed one only loses its variations
+            logger.warning(f"[{tool_name}] Name search for {chunk} failed: {files}")
+            continue
+        for f in files:
+            file_id = f.get('id')
+            if file_id and file_id not in all_files:
+                all_files[file_id] = f
     
-    # Try each variation and collect results
-    all_files = {}
-    seen_file_ids = set()
+    return sorted(all_files.values(), key=lambda f: _match_rank(f.get('name') or '', term))
+
+
+async def _try_case_variations_for_list_files(
+    query: str,
+    mime_type: Optional[str],
+    max_results: int
+) -> List[Dict[str, Any]]:
+    """
+    Search file names with case variations in a single query.
     
-    for variation in unique_variations:
-        try:
-            args = {"maxResults": max_results, "query": variation}
-            if mime_type:
-                args["mimeType"] = mime_type
-            
-            result = await mcp_manager.call_tool("workspace_list_files", args, server_name="google_workspace")
-            
-            if isinstance(result, str):
-                result = json.loads(result)
-            
-            # Handle both dict and list results
-            if isinstance(result, dict):
-                files = result.get("files", [])
-            elif isinstance(result, list):
-                files = result
-            else:
-                files = []
-            
-            # Deduplicate by file ID
-            for f in files:
-                if isinstance(f, dict):
-                    file_id = f.get('id')
-                    if file_id and file_id not in seen_file_ids:
-                        seen_file_ids.add(file_id)
-                        all_files[file_id] = f
-        
-        except Exception:
-            # Continue with next variation if one fails
-            continue
+    Args:
+        query: Search query string (simple text, not Drive API format)
+        mime_type: Optional MIME type filter
+        max_results: Maximum number of results per query
     
-    return list(all_files.values())
+    Returns:
+        List of unique file dictionaries (deduplicated by ID), best matches first
+    """
+    return await _search_name_variations(
+        "workspace_list_files",
+        query,
+        _case_variations(query),
+        lambda chunk: {"names": chunk},
+        mime_type,
+        max_results
+    )
 
 
 async def _try_case_variations_for_search_files(
@@ -95,125 +218,36 @@ async def _try_case_variations_for_search_files(
     max_results: int
 ) -> List[Dict[str, Any]]:
     """
-    Try searching with multiple case variations for search_files tool.
+    Search file names with case and symbol variations in a single query.
     Handles queries that may already be in Drive API format (e.g., 'name contains "term"') or simple text.
-    Generates variations for case (тест2 → Тест2, test2) and symbols (тест2 → тест_2, тест-2).
+    Variations cover case (тест2 → Тест2, test2) and symbols (тест2 → тест_2, тест-2).
     
     Args:
         query: Search query (may be Drive API format or simple text)
         mime_type: Optional MIME type filter
-        max_results: Maximum number of results per search
-        
+        max_results: Maximum number of results per query
+    
     Returns:
-        List of unique file dictionaries (deduplicated by ID)
+        List of unique file dictionaries (deduplicated by ID), best matches first
     """
-    mcp_manager = get_mcp_manager()
-    
     # Try to extract search term from Drive API query format
     # Pattern: name contains "term" or name contains 'term'
     match = re.search(r'name\s+contains\s+["\'](.+?)["\']', query, re.IGNORECASE)
     
     if match:
-        # Extract the term and generate variations
         search_term = match.group(1)
     else:
         # Not in Drive API format - treat as simple text
         search_term = query.strip()
     
-    # Generate variations: case and symbol variations
-    variations = set()
-    
-    # Original
-    variations.add(search_term)
-    
-    # Case variations
-    variations.add(search_term.lower())
-    variations.add(search_term.upper())
-    variations.add(search_term.capitalize())
-    if search_term:
-        # Title case (first letter of each word)
-        variations.add(search_term.title())
-    
-    # Symbol variations (if term contains alphanumeric characters)
-    if re.search(r'[a-zA-Zа-яА-Я0-9]', search_term):
-        # Try with underscore, hyphen, space
-        base_term = re.sub(r'[_\-\s]+', '', search_term)  # Remove existing separators
-        if base_term:
-            variations.add(f"{base_term[0].upper()}{base_term[1:]}" if len(base_term) > 1 else base_term.upper())
-            variations.add(f"{base_term[0].lower()}{base_term[1:]}" if len(base_term) > 1 else base_term.lower())
-            # Add separators
-            if len(base_term) > 1:
-                variations.add(f"{base_term[0]}_{base_term[1:]}")
-                variations.add(f"{base_term[0]}-{base_term[1:]}")
-                variations.add(f"{base_term[0]} {base_term[1:]}")
-                variations.add(f"{base_term[0].upper()}_{base_term[1:]}")
-                variations.add(f"{base_term[0].upper()}-{base_term[1:]}")
-                variations.add(f"{base_term[0].upper()} {base_term[1:]}")
-    
-    # Remove duplicates and convert to list
-    unique_variations = list(variations)
-    
-    # Generate queries for each variation (max 10 variations to avoid too many API calls)
-    query_variations = [f'name contains "{var}"' for var in unique_variations[:10]]
-    
-    # Try each variation and collect results
-    all_files = {}
-    seen_file_ids = set()
-    
-    
-    for query_var in query_variations:
-        try:
-            args = {"query": query_var, "maxResults": max_results}
-            if mime_type:
-                args["mimeType"] = mime_type
-            
-            
-            result = await mcp_manager.call_tool("workspace_search_files", args, server_name="google_workspace")
-            
-            
-            # Parse result - handle TextContent list
-            
-            if isinstance(result, list) and len(result) > 0:
-                first_item = result[0]
-                if hasattr(first_item, 'text'):
-                    result = first_item.text
-                elif isinstance(first_item, dict) and 'text' in first_item:
-                    result = first_item['text']
-            
-            
-            if isinstance(result, str):
-                try:
-                    result = json.loads(result)
-                except json.JSONDecodeError as e:
-                    raise
-            
-            # Handle both dict and list results
-            if isinstance(result, dict):
-                files = result.get("files", [])
-            elif isinstance(result, list):
-                files = result
-            else:
-                files = []
-            
-            
-            # Deduplicate by file ID and collect ALL files (don't stop after first match)
-            for f in files:
-                if isinstance(f, dict):
-                    file_id = f.get('id')
-                    if file_id and file_id not in seen_file_ids:
-                        seen_file_ids.add(file_id)
-                        all_files[file_id] = f
-            
-        
-        except Exception as e:
-            # Continue with next variation if one fails
-            continue
-    
-    
-    result_files = list(all_files.values())
-    
-    
-    return result_files
+    return await _search_name_variations(
+        "workspace_search_files",
+        search_term,
+        _name_variations(search_term),
+        lambda chunk: {"query": name_contains_any(chunk)},
+        mime_type,
+        max_results
+    )
 
 
 # ========== DRIVE TOOLS ==========
@@ -246,7 +280,7 @@ class ListFilesTool(BaseTool):
         mime_type: Optional[str] = None,
         query: Optional[str] = None,
         max_results: int = 50
-    ) -> str:
+    ) -> ToolResult:
         """Execute the tool asynchronously."""
         try:
             # If query is provided, use case-insensitive search with variations
@@ -275,11 +309,15 @@ class ListFilesTool(BaseTool):
                     files = []
                     count = 0
             
+            data = {"items": files, "count": count}
+            summary = found_summary(count, "файл", "файла", "файлов", "Файлов не найдено")
+            
             if count == 0:
                 if query:
-                    return f"No files found matching '{query}' in workspace folder."
+                    text = f"No files found matching '{query}' in workspace folder."
                 else:
-                    return "No files found in workspace folder."
+                    text = "No files found in workspace folder."
+                return ToolResult(text, data=data, rows=[], kind="file", summary=summary)
             
             file_list = "\n".join([
                 f"- {f.get('name') if isinstance(f, dict) else str(f)} ({f.get('mimeType', 'unknown type') if isinstance(f, dict) else 'unknown'}) - ID: {f.get('id') if isinstance(f, dict) else 'N/A'}"
@@ -289,11 +327,13 @@ class ListFilesTool(BaseTool):
             if count > 20:
                 file_list += f"\n... and {count - 20} more files"
             
+            rows = [f"📄 {f.get('name') if isinstance(f, dict) else f}" for f in files]
             if query:
-                return f"Found {count} file(s) matching '{query}' in workspace folder:\n{file_list}"
+                text = f"Found {count} file(s) matching '{query}' in workspace folder:\n{file_list}"
             else:
-                return f"Found {count} file(s) in workspace folder:\n{file_list}"
-            
+                text = f"Found {count} file(s) in workspace folder:\n{file_list}"
+            return ToolResult(text, data=data, rows=rows, kind="file", summary=summary)
+        
         except Exception as e:
             raise ToolExecutionError(
                 f"Failed to list files: {e}",
@@ -349,7 +389,7 @@ class GetFileInfoTool(BaseTool):
             url = result.get("webViewLink", "")
             
             return f"File: {name}\nType: {mime_type}\nModified: {modified_time}\nURL: {url}"
-            
+        
         except Exception as e:
             raise ToolExecutionError(
                 f"Failed to get file info: {e}",
@@ -404,7 +444,7 @@ class CreateFolderTool(BaseTool):
             url = result.get("url", "")
             
             return f"Folder '{folder_name}' created successfully. ID: {folder_id}. URL: {url}"
-            
+        
         except Exception as e:
             raise ToolExecutionError(
                 f"Failed to create folder: {e}",
@@ -443,7 +483,7 @@ class DeleteFileTool(BaseTool):
             result = await mcp_manager.call_tool("workspace_delete_file", args, server_name="google_workspace")
             
             return f"File deleted successfully (ID: {file_id})"
-            
+        
         except Exception as e:
             raise ToolExecutionError(
                 f"Failed to delete file: {e}",
@@ -486,16 +526,18 @@ class SearchFilesTool(BaseTool):
         mime_type: Optional[str] = None,
         max_results: int = 100,  # Increased to find all files with same name
         **kwargs  # Accept extra kwargs to ignore unknown parameters like folder_id
-    ) -> str:
+    ) -> ToolResult:
         """Execute the tool asynchronously."""
         try:
             # Use case-insensitive search with variations
             files = await _try_case_variations_for_search_files(query, mime_type, max_results)
             count = len(files)
-            
+            data = {"items": files, "count": count}
+            summary = found_summary(count, "файл", "файла", "файлов", "Файлов не найдено")
+            rows = [f"📄 {f.get('name', 'Unknown')}" for f in files]
             
             if count == 0:
-                return f"No files found matching query: {query}"
+                return ToolResult(f"No files found matching query: {query}", data=data, rows=[], kind="file", summary=summary)
             
             # If multiple files found, return format for user assistance request
             if count > 1:
@@ -553,16 +595,22 @@ class SearchFilesTool(BaseTool):
                 
                 # Return with context so LLM understands this requires user assistance
                 # The JSON must be included as-is for parsing
-                return f"""Найдено {count} файл(ов), соответствующих запросу '{query}'. Требуется выбор пользователя:
+                return ToolResult(
+                    f"""Найдено {count} файл(ов), соответствующих запросу '{query}'. Требуется выбор пользователя:
 
-{assistance_json}"""
+{assistance_json}""",
+                    data=data, rows=rows, kind="file", summary=summary
+                )
             
             # Single file found - return it directly
             file = files[0]
             file_name = file.get('name', 'Unknown')
             file_id = file.get('id', '')
-            return f"Found 1 file matching '{query}': {file_name} (ID: {file_id})"
-            
+            return ToolResult(
+                f"Found 1 file matching '{query}': {file_name} (ID: {file_id})",
+                data=data, rows=rows, kind="file", summary=summary
+            )
+        
         except Exception as e:
             raise ToolExecutionError(
                 f"Failed to search files: {e}",
@@ -654,7 +702,7 @@ class OpenFileTool(BaseTool):
             
             else:
                 return f"File '{file_name}' opened. Type: {file_type}. URL: {result.get('url', 'N/A')}"
-            
+        
         except Exception as e:
             raise ToolExecutionError(
                 f"Failed to open file: {e}",
@@ -762,7 +810,7 @@ class FindAndOpenFileTool(BaseTool):
                 response_parts.append(f"File '{file_name}' found. Type: {file_type}. URL: {result.get('url', 'N/A')}")
             
             return "\n".join(response_parts)
-            
+        
         except Exception as e:
             raise ToolExecutionError(
                 f"Failed to find and open file: {e}",
@@ -0,0 +1,524 @@
+"""
+Record/replay cassettes for LLM and MCP traffic.
+
+In record mode every LLM call (with streamed chunks and their timing) and
+every MCPServerManager.call_tool (with result and duration) made for a
+session is appended to a cassette file. In replay mode the same calls are
+answered from the cassette, so a conversation runs again with no network:
+at the recorded pace ("original") or as fast as possible ("max").
+
+Requests are matched after masking volatile values (timestamps, dates,
+UUIDs, message and tool-call ids, epoch-based intent ids); equal requests are answered in recorded
+order. A request with no match takes the next unused interaction of its
+kind, so small prompt drift does not derail a replay.
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+import asyncio
+import hashlib
+import importlib
+import json
+import re
+import threading
+import time
+
+from langchain_core.language_models.chat_models import (
+    BaseChatModel,
+    agenerate_from_stream,
+    generate_from_stream,
+)
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from src.utils.exceptions import MCPError
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+SPEED_ORIGINAL = "original"
+SPEED_MAX = "max"
+
+CASSETTE_VERSION = 1
+MASK = "<volatile>"
+
+# Keys whose values differ between otherwise identical requests
+VOLATILE_KEYS = frozenset({
+    "id",
+    "ts",
+    "timestamp",
+    "created_at",
+    "updated_at",
+    "started_at",
+    "finished_at",
+    "ended_at",
+    "elapsed_seconds",
+    "duration_ms",
+    "request_id",
+    "run_id",
+    "session_id",
+    "trace_id",
+    "span_id",
+    "tool_call_id",
+})
+
+_VOLATILE_PATTERNS = [
+    # UUIDs
+    re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"),
+    # Provider message / tool-call ids
+    re.compile(r"\b(?:toolu|call|msg|run|req|chatcmpl)[_-][A-Za-z0-9_-]{8,}\b"),
+    # ISO dates and datetimes
+    re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?\b"),
+    # Clock times
+    re.compile(r"\b\d{1,2}:\d{2}:\d{2}\b"),
+    # Epoch milliseconds (also inside ids like "task-1712345678901")
+    re.compile(r"(?<!\d)1\d{12}(?!\d)"),
+]
+
+
+class CassetteMissError(MCPError):
+    """Raised in replay mode when the cassette has no answer for a call."""
+    pass
+
+
+def normalize(value: Any) -> Any:
+    """
+    Mask volatile values so equal requests compare equal.
+    
+    Args:
+        value: JSON-like value
+    
+    Returns:
+        Copy with volatile keys and patterns replaced by a mask
+    """
+    if isinstance(value, dict):
+        return {
+            key: MASK if key in VOLATILE_KEYS and value[key] is not None else normalize(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, str):
+        for pattern in _VOLATILE_PATTERNS:
+            value = pattern.sub(MASK, value)
+        return value
+    return value
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    """Stable key of a request after masking volatile values."""
+    canonical = json.dumps([kind, normalize(request)], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def encode_value(value: Any) -> Any:
+    """Make a tool result JSON-safe, keeping pydantic models (MCP content) restorable."""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {str(key): encode_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if hasattr(value, "model_dump"):
+        cls = type(value)
+        return {"__model__": f"{cls.__module__}.{cls.__qualname__}", "data": value.model_dump(mode="json")}
+    return str(value)
+
+
+def decode_value(value: Any) -> Any:
+    """Inverse of encode_value."""
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if isinstance(value, dict):
+        if set(value) == {"__model__", "data"}:
+            module_name, _, class_name = value["__model__"].rpartition(".")
+            try:
+                cls = getattr(importlib.import_module(module_name), class_name)
+                return cls.model_validate(value["data"])
+            except (ImportError, AttributeError, ValueError) as e:
+                logger.warning(f"[Cassette] Cannot restore {value['__model__']}: {e}")
+                return value["data"]
+        return {key: decode_value(item) for key, item in value.items()}
+    return value
+
+
+class Cassette:
+    """
+    Recorded LLM and MCP interactions of one session.
+    
+    Interactions are stored in call order as
+    {"kind": "llm" | "mcp", "key", "request", "response"}.
+    """
+    
+    def __init__(self, path: Path, mode: str = MODE_RECORD, speed: str = SPEED_ORIGINAL):
+        """
+        Initialize cassette.
+        
+        Args:
+            path: Cassette file
+            mode: "record" or "replay"
+            speed: Replay pace, "original" or "max"
+        """
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.speed = speed
+        self.interactions: List[Dict[str, Any]] = []
+        self._used: set = set()
+        self._lock = threading.Lock()
+        self._token = None
+        
+        if self.path.exists():
+            self.load()
+        elif mode == MODE_REPLAY:
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+    
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+    
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+    
+    def load(self) -> None:
+        """Load interactions from the cassette file."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.interactions = data.get("interactions", [])
+        self._used = set()
+    
+    def save(self) -> None:
+        """Write interactions to the cassette file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "interactions": list(self.interactions)}
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        tmp_path.replace(self.path)
+    
+    def record(self, kind: str, request: Dict[str, Any], response: Dict[str, Any]) -> None:
+        """Append one interaction."""
+        with self._lock:
+            self.interactions.append({
+                "kind": kind,
+                "key": request_key(kind, request),
+                "request": encode_value(request),
+                "response": response,
+            })
+    
+    def take(self, kind: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Response for a request, consuming the interaction.
+        
+        Args:
+            kind: "llm" or "mcp"
+            request: Request as recorded
+        
+        Returns:
+            Recorded response
+        
+        Raises:
+            CassetteMissError: If no unused interaction of this kind is left
+        """
+        key = request_key(kind, request)
+        with self._lock:
+            candidates = [
+                index for index, interaction in enumerate(self.interactions)
+                if index not in self._used and interaction["kind"] == kind
+            ]
+            match = next((index for index in candidates if self.interactions[index]["key"] == key), None)
+            if match is None and candidates:
+                match = candidates[0]
+                logger.warning(f"[Cassette] No exact {kind} match in {self.path.name}, using next recorded interaction #{match}")
+            if match is None:
+                raise CassetteMissError(f"Cassette {self.path.name} has no {kind} interaction left for this request")
+            self._used.add(match)
+            return self.interactions[match]["response"]
+    
+    def delay(self, seconds: float) -> float:
+        """Replay delay for a recorded interval."""
+        return seconds if self.speed == SPEED_ORIGINAL else 0.0
+    
+    async def call_tool(self, request: Dict[str, Any], call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run an MCP tool call through the cassette.
+        
+        Args:
+            request: {"server", "tool", "arguments"}
+            call: Performs the real call (record mode)
+        
+        Returns:
+            Tool result (recorded or real)
+        """
+        if self.replaying:
+            response = self.take("mcp", request)
+            await asyncio.sleep(self.delay(response.get("duration", 0.0)))
+            if "error" in response:
+                raise MCPError(
+                    response["error"],
+                    server_name=request.get("server"),
+                    tool_name=request.get("tool")
+                )
+            return decode_value(response.get("result"))
+        
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except MCPError as e:
+            self.record("mcp", request, {"duration": time.perf_counter() - started, "error": str(e)})
+            raise
+        self.record("mcp", request, {"duration": time.perf_counter() - started, "result": encode_value(result)})
+        return result
+
+
+_current_cassette: ContextVar[Optional[Cassette]] = ContextVar("cassette", default=None)
+
+
+def current_cassette() -> Optional[Cassette]:
+    """Cassette that LLM and MCP calls currently go through."""
+    return _current_cassette.get()
+
+
+@contextmanager
+def use_cassette(cassette: Optional[Cassette]) -> Iterator[Optional[Cassette]]:
+    """Route LLM and MCP calls in this context through a cassette."""
+    token = _current_cassette.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _current_cassette.reset(token)
+        if cassette is not None and cassette.recording:
+            cassette.save()
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Chat model wrapper that records or replays calls of the wrapped model.
+    
+    Outside a cassette (no current_cassette) calls pass straight through.
+    The wrapper owns the callbacks, so metrics and usage accounting see
+    replayed calls exactly like live ones.
+    """
+    
+    inner: Any
+    
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+    
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"inner": self._model_name()}
+    
+    def _model_name(self) -> str:
+        model = getattr(self.inner, "bound", self.inner)
+        return str(getattr(model, "model", None) or getattr(model, "model_name", None) or type(model).__name__)
+    
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Any:
+        bound = self.inner.bind_tools(tools, **kwargs)
+        extra = getattr(bound, "kwargs", None) if bound is not self.inner else None
+        return self.bind(**extra) if extra else self
+    
+    def _request(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "model": self._model_name(),
+            "messages": messages_to_dict(messages),
+            "stop": stop,
+            "kwargs": {key: value for key, value in kwargs.items() if key != "callbacks"},
+        }
+    
+    @staticmethod
+    def _replay_chunks(response: Dict[str, Any]) -> Iterator[tuple]:
+        for recorded in response.get("chunks", []):
+            message = messages_from_dict([recorded["message"]])[0]
+            yield recorded.get("delay", 0.0), ChatGenerationChunk(message=message)
+    
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        cassette = current_cassette()
+        
+        if cassette is not None and cassette.replaying:
+            response = cassette.take("llm", self._request(messages, stop, kwargs))
+            for delay, chunk in self._replay_chunks(response):
+                await asyncio.sleep(cassette.delay(delay))
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        
+        recorded: List[Dict[str, Any]] = []
+        last = time.perf_counter()
+        async for message in self.inner.astream(messages, stop=stop, **kwargs):
+            now = time.perf_counter()
+            recorded.append({"delay": now - last, "message": message_to_dict(message)})
+            last = now
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        
+        if cassette is not None and cassette.recording:
+            cassette.record("llm", self._request(messages, stop, kwargs), {"chunks": recorded})
+    
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        cassette = current_cassette()
+        
+        if cassette is not None and cassette.replaying:
+            response = cassette.take("llm", self._request(messages, stop, kwargs))
+            for delay, chunk in self._replay_chunks(response):
+                time.sleep(cassette.delay(delay))
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        
+        recorded: List[Dict[str, Any]] = []
+        last = time.perf_counter()
+        for message in self.inner.stream(messages, stop=stop, **kwargs):
+            now = time.perf_counter()
+            recorded.append({"delay": now - last, "message": message_to_dict(message)})
+            last = now
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        
+        if cassette is not None and cassette.recording:
+            cassette.record("llm", self._request(messages, stop, kwargs), {"chunks": recorded})
+    
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        return await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
+    
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        return generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+
+
+class CassetteLibrary:
+    """Per-session cassettes in a directory, driven by CASSETTE_MODE."""
+    
+    def __init__(self, directory: Path, mode: str = MODE_OFF, speed: str = SPEED_ORIGINAL):
+        """
+        Initialize library.
+        
+        Args:
+            directory: Directory with <session_id>.json cassettes
+            mode: "off", "record" or "replay"
+            speed: Replay pace, "original" or "max"
+        """
+        self.directory = Path(directory)
+        self.mode = mode
+        self.speed = speed
+        self._cassettes: Dict[str, Cassette] = {}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.mode in (MODE_RECORD, MODE_REPLAY)
+    
+    def path_for(self, session_id: str) -> Path:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id)
+        return self.directory / f"{safe_name}.json"
+    
+    def get(self, session_id: str) -> Optional[Cassette]:
+        """Cassette of a session (None when disabled or nothing to replay)."""
+        if not self.enabled:
+            return None
+        if session_id not in self._cassettes:
+            try:
+                self._cassettes[session_id] = Cassette(self.path_for(session_id), self.mode, self.speed)
+            except FileNotFoundError:
+                logger.warning(f"[Cassette] No cassette to replay for session {session_id}, calls go live")
+                return None
+        return self._cassettes[session_id]
+    
+    def start(self, session_id: str) -> Optional[Cassette]:
+        """
+        Make the session cassette current for the running task.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            The cassette (pass it to stop) or None
+        """
+        cassette = self.get(session_id)
+        if cassette is not None:
+            cassette._token = _current_cassette.set(cassette)
+        return cassette
+    
+    def stop(self, cassette: Optional[Cassette]) -> None:
+        """Finish a run started by start; recorded interactions are saved."""
+        if cassette is None:
+            return
+        if cassette._token is not None:
+            try:
+                _current_cassette.reset(cassette._token)
+            except ValueError:
+                # Stopped from another context; the cassette there ends with its task
+                pass
+            cassette._token = None
+        if cassette.recording:
+            cassette.save()
+
+
+def with_cassette(llm: BaseChatModel) -> BaseChatModel:
+    """
+    Wrap an LLM client for recording/replay when CASSETTE_MODE is enabled.
+    
+    Callbacks move to the wrapper so they also fire for replayed calls.
+    """
+    if not get_cassette_library().enabled:
+        return llm
+    callbacks = llm.callbacks
+    llm.callbacks = None
+    return CassetteChatModel(inner=llm, callbacks=callbacks)
+
+
+_cassette_library: Optional[CassetteLibrary] = None
+
+
+def get_cassette_library() -> CassetteLibrary:
+    """Get global cassette library (mode, directory and speed from config)."""
+    global _cassette_library
+    
+    if _cassette_library is None:
+        from src.utils.config_loader import get_config
+        config = get_config()
+        _cassette_library = CassetteLibrary(
+            config.cassette_dir_path,
+            mode=config.cassette_mode,
+            speed=config.cassette_replay_speed
+        )
+    
+    return _cassette_library
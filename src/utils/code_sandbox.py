@@ -0,0 +1,389 @@
+"""
+Pre-started sandboxed worker pool for execute_python_code.
+
+Each worker is a separate process that pre-imports heavy libraries once
+(pandas/numpy when installed), runs under rlimits (CPU, address space,
+open files) and executes one snippet at a time. A snippet that exceeds its
+deadline gets its worker killed and replaced, so runaway code never keeps
+burning a core. Workers are recycled after a fixed number of executions.
+
+Only stdlib imports here: worker processes import this module on start.
+"""
+
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+import asyncio
+import json
+import multiprocessing
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_EXECUTIONS_PER_WORKER = 50
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+DEFAULT_MAX_OPEN_FILES = 64
+DEFAULT_MAX_OUTPUT_CHARS = 20000
+DEFAULT_PRELOAD_MODULES = ("numpy", "pandas")
+
+SAFE_BUILTIN_NAMES = (
+    "__import__", "abs", "all", "any", "bool", "dict", "enumerate", "float",
+    "int", "len", "list", "max", "min", "range", "round", "sorted", "str",
+    "sum", "tuple", "zip", "map", "filter", "iter", "next", "reversed",
+    "set", "frozenset",
+)
+
+
+@dataclass
+class SandboxResult:
+    """Structured outcome of a sandboxed execution."""
+    result: Any = None
+    stdout: str = ""
+    stderr: str = ""
+    stdout_truncated: bool = False
+    stderr_truncated: bool = False
+    result_truncated: bool = False
+    result_is_text: bool = False
+    error: Optional[str] = None
+    timed_out: bool = False
+    duration_ms: float = 0.0
+    worker_pid: Optional[int] = None
+
+
+def _truncate(text: str, limit: int) -> tuple:
+    """Cut text to limit chars, returning (text, truncated)."""
+    if len(text) <= limit:
+        return text, False
+    return text[:limit] + f"\n... [truncated {len(text) - limit} chars]", True
+
+
+def _apply_limits(memory_limit: Optional[int], max_open_files: Optional[int]) -> None:
+    """Apply per-process rlimits inside a worker."""
+    if resource is None:
+        return
+    limits = []
+    if memory_limit:
+        limits.append((resource.RLIMIT_AS, memory_limit))
+    if max_open_files:
+        limits.append((resource.RLIMIT_NOFILE, max_open_files))
+    for limit, value in limits:
+        try:
+            resource.setrlimit(limit, (value, value))
+        except (ValueError, OSError):
+            pass
+
+
+def _set_cpu_deadline(seconds: float) -> None:
+    """Allow the next job at most `seconds` of additional CPU time."""
+    if resource is None:
+        return
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_used = used.ru_utime + used.ru_stime
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(cpu_used + seconds) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _execute_job(job: Dict[str, Any], preloaded: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one snippet with restricted builtins and captured output."""
+    import builtins
+    import datetime
+    import math
+    from contextlib import redirect_stderr, redirect_stdout
+    from io import StringIO
+    
+    safe_globals = {
+        "__builtins__": {name: getattr(builtins, name) for name in SAFE_BUILTIN_NAMES},
+        "math": math,
+        "datetime": datetime.datetime,
+        "json": json,
+        "data": job.get("input_data") or {},
+        "result": None,
+        **preloaded,
+    }
+    stdout_capture = StringIO()
+    stderr_capture = StringIO()
+    error = None
+    try:
+        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
+            exec(job["code"], safe_globals)
+    except MemoryError:
+        error = "MemoryError: memory limit exceeded"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    
+    limit = job.get("max_output_chars", DEFAULT_MAX_OUTPUT_CHARS)
+    result = safe_globals.get("result")
+    result_truncated = False
+    # Results without a JSON form (sets, datetimes, DataFrames) and truncated
+    # JSON are sent as ready-made text, printed verbatim by the tool
+    result_is_text = False
+    if result is not None:
+        try:
+            if not isinstance(result, (list, dict, str, int, float, bool)):
+                raise TypeError(type(result).__name__)
+            encoded = json.dumps(result, ensure_ascii=False)
+            if len(encoded) > limit:
+                result, result_truncated = _truncate(encoded, limit)
+                result_is_text = True
+        except (TypeError, ValueError):
+            result, result_truncated = _truncate(str(result), limit)
+            result_is_text = True
+    
+    stdout, stdout_truncated = _truncate(stdout_capture.getvalue(), limit)
+    stderr, stderr_truncated = _truncate(stderr_capture.getvalue(), limit)
+    return {
+        "result": result,
+        "result_truncated": result_truncated,
+        "result_is_text": result_is_text,
+        "stdout": stdout,
+        "stdout_truncated": stdout_truncated,
+        "stderr": stderr,
+        "stderr_truncated": stderr_truncated,
+        "error": error,
+    }
+
+
+def _worker_main(conn: Any, preload_modules: List[str], memory_limit: Optional[int], max_open_files: Optional[int]) -> None:
+    """Worker process loop: preload, apply limits, then serve jobs."""
+    import importlib
+    
+    preloaded: Dict[str, Any] = {}
+    aliases = {"numpy": "np", "pandas": "pd"}
+    for name in preload_modules:
+        try:
+            preloaded[aliases.get(name, name)] = importlib.import_module(name)
+        except Exception:
+            pass
+    
+    _apply_limits(memory_limit, max_open_files)
+    conn.send({"ready": True})
+    
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        _set_cpu_deadline(job.get("timeout", 30))
+        conn.send(_execute_job(job, preloaded))
+
+
+class _SandboxWorker:
+    """Handle for one worker process."""
+    
+    def __init__(self, process: Any, conn: Any):
+        self.process = process
+        self.conn = conn
+        self.executions = 0
+    
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+    
+    def kill(self) -> None:
+        """Kill the process without waiting for cleanup."""
+        try:
+            self.process.kill()
+            self.process.join(timeout=1)
+        except Exception:
+            pass
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+    
+    def stop(self) -> None:
+        """Ask the worker to exit, kill it if it does not."""
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=1)
+        except Exception:
+            pass
+        if self.process.is_alive():
+            self.kill()
+        else:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+
+
+class SandboxPool:
+    """
+    Pool of pre-started sandbox worker processes.
+    """
+    
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        max_executions_per_worker: int = DEFAULT_MAX_EXECUTIONS_PER_WORKER,
+        memory_limit: Optional[int] = DEFAULT_MEMORY_LIMIT,
+        max_open_files: Optional[int] = DEFAULT_MAX_OPEN_FILES,
+        max_output_chars: int = DEFAULT_MAX_OUTPUT_CHARS,
+        preload_modules: tuple = DEFAULT_PRELOAD_MODULES
+    ):
+        """
+        Initialize pool (workers are started by start()).
+        
+        Args:
+            size: Number of worker processes
+            max_executions_per_worker: Recycle a worker after this many executions
+            memory_limit: Address-space limit per worker in bytes (None to disable)
+            max_open_files: File descriptor limit per worker (None to disable)
+            max_output_chars: Max chars kept from result, stdout and stderr each
+            preload_modules: Modules imported once per worker before limits apply
+        """
+        self.size = size
+        self.max_executions_per_worker = max_executions_per_worker
+        self.memory_limit = memory_limit
+        self.max_open_files = max_open_files
+        self.max_output_chars = max_output_chars
+        self.preload_modules = list(preload_modules)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_SandboxWorker] = []
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+    
+    def _spawn_worker(self) -> _SandboxWorker:
+        """Start a worker process and wait until it is ready (blocking)."""
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.preload_modules, self.memory_limit, self.max_open_files),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        if not parent_conn.poll(60):
+            process.kill()
+            raise RuntimeError("Sandbox worker failed to start")
+        parent_conn.recv()
+        return _SandboxWorker(process, parent_conn)
+    
+    async def start(self) -> None:
+        """Start all workers (idempotent)."""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            self._idle = asyncio.Queue()
+            workers = await asyncio.gather(*[
+                asyncio.to_thread(self._spawn_worker) for _ in range(self.size)
+            ])
+            for worker in workers:
+                self._workers.append(worker)
+                self._idle.put_nowait(worker)
+            logger.info(f"Sandbox pool started with {self.size} workers")
+    
+    async def _replace(self, worker: _SandboxWorker, kill: bool) -> None:
+        """Retire a worker and put a fresh one into the pool."""
+        if kill:
+            worker.kill()
+        else:
+            await asyncio.to_thread(worker.stop)
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if self._closed:
+            return
+        fresh = await asyncio.to_thread(self._spawn_worker)
+        self._workers.append(fresh)
+        self._idle.put_nowait(fresh)
+    
+    async def execute(
+        self,
+        code: str,
+        input_data: Optional[Dict[str, Any]] = None,
+        timeout: float = 30
+    ) -> SandboxResult:
+        """
+        Execute code in a sandbox worker.
+        
+        Args:
+            code: Python code; the outcome is read from the `result` variable
+            input_data: Value of the `data` variable
+            timeout: Wall-clock deadline in seconds; the worker is killed when exceeded
+        
+        Returns:
+            SandboxResult
+        """
+        await self.start()
+        worker = await self._idle.get()
+        started = time.perf_counter()
+        job = {
+            "code": code,
+            "input_data": input_data or {},
+            "timeout": timeout,
+            "max_output_chars": self.max_output_chars,
+        }
+        
+        try:
+            worker.conn.send(job)
+            ready = await asyncio.to_thread(worker.conn.poll, timeout)
+            reply = worker.conn.recv() if ready else None
+        except (EOFError, OSError, BrokenPipeError):
+            reply = None
+            ready = True
+        except BaseException:
+            # Cancelled (stop_generation, run timeout): the worker may still be
+            # running the job and its late reply would reach the next caller
+            await asyncio.shield(self._replace(worker, kill=True))
+            raise
+        
+        duration_ms = (time.perf_counter() - started) * 1000
+        pid = worker.pid
+        
+        if reply is None:
+            # Deadline exceeded or worker died (e.g. CPU rlimit): hard kill and respawn
+            await self._replace(worker, kill=True)
+            message = (
+                f"Code execution timeout after {timeout} seconds" if not ready
+                else "Sandbox worker terminated (resource limit exceeded)"
+            )
+            return SandboxResult(error=message, timed_out=not ready, duration_ms=duration_ms, worker_pid=pid)
+        
+        worker.executions += 1
+        if worker.executions >= self.max_executions_per_worker:
+            asyncio.create_task(self._replace(worker, kill=False))
+        else:
+            self._idle.put_nowait(worker)
+        
+        return SandboxResult(duration_ms=duration_ms, worker_pid=pid, **reply)
+    
+    async def shutdown(self) -> None:
+        """Stop all workers."""
+        self._closed = True
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            await asyncio.to_thread(worker.stop)
+        self._idle = None
+
+
+# Global sandbox pool
+_sandbox_pool: Optional[SandboxPool] = None
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Get global sandbox pool (workers start on first use)."""
+    global _sandbox_pool
+    
+    if _sandbox_pool is None:
+        _sandbox_pool = SandboxPool()
+    
+    return _sandbox_pool
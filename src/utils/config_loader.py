@@ -341,6 +341,52 @@ Parse CORS origins from string to list."""
     session_timeout_minutes: int = Field(default=30, alias="SESSION_TIMEOUT_MINUTES")
     max_sessions_per_user: int = Field(default=10, alias="MAX_SESSIONS_PER_USER")
     
+    # Multi-worker deployment: "local" (single process) or "sqlite" (shared event bus file)
+    event_bus_backend: str = Field(default="local", alias="EVENT_BUS_BACKEND")
+    event_bus_path: Optional[str] = Field(default=None, alias="EVENT_BUS_PATH")
+    
+    # LLM usage accounting: price overrides (JSON file, USD per 1M tokens by model)
+    # and optional budgets; a run stops gracefully once a budget is used up
+    llm_prices_path: Optional[str] = Field(default=None, alias="LLM_PRICES_PATH")
+    run_token_budget: Optional[int] = Field(default=None, alias="RUN_TOKEN_BUDGET")
+    run_cost_budget_usd: Optional[float] = Field(default=None, alias="RUN_COST_BUDGET_USD")
+    session_token_budget: Optional[int] = Field(default=None, alias="SESSION_TOKEN_BUDGET")
+    session_cost_budget_usd: Optional[float] = Field(default=None, alias="SESSION_COST_BUDGET_USD")
+    
+    # Record/replay of LLM and MCP traffic per session: "off", "record" or "replay";
+    # replay runs at the recorded pace ("original") or without waiting ("max")
+    cassette_mode: str = Field(default="off", alias="CASSETTE_MODE")
+    cassette_dir: Optional[str] = Field(default=None, alias="CASSETTE_DIR")
+    cassette_replay_speed: str = Field(default="original", alias="CASSETTE_REPLAY_SPEED")
+    
+    # Progress reporting: messages come from pipeline signals; a fallback message is
+    # sent only after this many seconds without any. Per-tool latency history (for ETA)
+    smart_progress_silence_sec: float = Field(default=5.0, alias="SMART_PROGRESS_SILENCE_SEC")
+    tool_latency_path: Optional[str] = Field(default=None, alias="TOOL_LATENCY_PATH")
+    
+    # Cache of READ tool results per session (TTLs per capability), invalidated by writes
+    tool_cache_enabled: bool = Field(default=True, alias="TOOL_CACHE_ENABLED")
+    tool_cache_max_entries: int = Field(default=512, alias="TOOL_CACHE_MAX_ENTRIES")
+    
+    # Docs/Slides servers queue edits per document and apply them in one batchUpdate
+    # (flushed before reads of the document and at the end of each agent run)
+    edit_batching_enabled: bool = Field(default=False, alias="EDIT_BATCHING")
+    
+    # Workspace server keeps a local index of the workspace folder tree (synced from
+    # the Drive changes feed) and answers file name lookups from it
+    drive_index_enabled: bool = Field(default=False, alias="DRIVE_INDEX")
+    drive_index_path: Optional[str] = Field(default=None, alias="DRIVE_INDEX_PATH")
+    
+    # Calendar server keeps a local copy of each calendar read (incremental sync with
+    # syncToken) and answers list_events from it
+    calendar_event_store_enabled: bool = Field(default=False, alias="CALENDAR_EVENT_STORE")
+    calendar_event_store_path: Optional[str] = Field(default=None, alias="CALENDAR_EVENT_STORE_PATH")
+    
+    # 1C server keeps revenue per (organization, month, counterparty) and answers revenue
+    # queries from it, reloading only the open months
+    onec_analytics_store_enabled: bool = Field(default=False, alias="ONEC_ANALYTICS_STORE")
+    onec_analytics_store_path: Optional[str] = Field(default=None, alias="ONEC_ANALYTICS_STORE_PATH")
+    
     # Rate limiting
     rate_limit_per_minute: int = Field(default=60, alias="RATE_LIMIT_PER_MINUTE")
     max_api_calls_per_message: int = Field(default=5, alias="MAX_API_CALLS_PER_MESSAGE")
@@ -370,6 +416,42 @@ Get directory for storing sessions."""
 Get directory for configuration files."""
         return CONFIG_DIR
     
+    @property
+    def event_bus_db_path(self) -> Path:
+        """
+Get path of the shared event bus database."""
+        return Path(self.event_bus_path) if self.event_bus_path else DATA_DIR / "event_bus.sqlite3"
+    
+    @property
+    def cassette_dir_path(self) -> Path:
+        """
+Get directory for record/replay cassettes."""
+        return Path(self.cassette_dir) if self.cassette_dir else DATA_DIR / "cassettes"
+    
+    @property
+    def tool_latency_stats_path(self) -> Path:
+        """
+Get path of the persisted per-tool latency history."""
+        return Path(self.tool_latency_path) if self.tool_latency_path else DATA_DIR / "tool_latencies.json"
+    
+    @property
+    def drive_index_db_path(self) -> Path:
+        """
+Get path of the workspace server's Drive metadata index."""
+        return Path(self.drive_index_path) if self.drive_index_path else DATA_DIR / "drive_index.sqlite3"
+    
+    @property
+    def calendar_event_store_db_path(self) -> Path:
+        """
+Get path of the calendar server's local event store."""
+        return Path(self.calendar_event_store_path) if self.calendar_event_store_path else DATA_DIR / "calendar_events.sqlite3"
+    
+    @property
+    def onec_analytics_db_path(self) -> Path:
+        """
+Get path of the 1C server's revenue aggregates store."""
+        return Path(self.onec_analytics_store_path) if self.onec_analytics_store_path else DATA_DIR / "onec_analytics.sqlite3"
+    
     @property
     def is_production(self) -> bool:
         """
@@ -0,0 +1,344 @@
+"""
+Natural-language date and time expressions for the calendar tools.
+
+One grammar for "сегодня", "завтра в 10", "на следующей неделе", "в пятницу
+после обеда", "за прошлые две недели", their English counterparts and ISO 8601,
+shared by the calendar tools and validators.parse_datetime. An expression is
+at most one anchor (day, weekday, week or period), a weekday inside a week
+anchor, a time and a part of the day, matched by patterns compiled once.
+
+parse_date_expression() resolves it against an explicit reference time and
+timezone into a DateExpression: the range it covers (for event queries) and
+the moment it names (for event start times).
+
+Parsing is memoized: the grammar match per expression, the resolved dates per
+(expression, reference date, timezone). Only what depends on the time of day
+("сегодня" without a time, periods ending now) is computed per call.
+"""
+
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import pytz
+
+from src.utils.exceptions import ValidationError
+
+
+# Start hour of a future day named without a time ("завтра", "в пятницу")
+DEFAULT_HOUR = 10
+
+# "сегодня" without a time after this hour means tomorrow at DEFAULT_HOUR
+LATE_HOUR = 18
+
+CACHE_SIZE = 1024
+
+_DAY_OFFSETS = {
+    "позавчера": -2, "вчера": -1, "сегодня": 0, "завтра": 1, "послезавтра": 2,
+    "day before yesterday": -2, "yesterday": -1, "today": 0, "tomorrow": 1, "day after tomorrow": 2,
+}
+
+_WEEKDAYS = {
+    "понедельник": 0, "вторник": 1, "среда": 2, "среду": 2, "четверг": 3, "пятница": 4, "пятницу": 4,
+    "суббота": 5, "субботу": 5, "воскресенье": 6,
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6,
+}
+
+# Parts of the day as [start hour, end hour)
+_DAY_PARTS = {
+    "утром": (9, 12), "с утра": (9, 12), "до обеда": (9, 13), "в обед": (13, 14), "днем": (12, 17),
+    "после обеда": (14, 18), "вечером": (18, 22),
+    "in the morning": (9, 12), "morning": (9, 12), "at noon": (12, 13), "in the afternoon": (14, 18),
+    "afternoon": (14, 18), "in the evening": (18, 22), "evening": (18, 22), "tonight": (18, 22),
+}
+
+
+def _words(words) -> str:
+    """Alternation of whole words, longest first ("послезавтра" before "завтра")."""
+    return r"(?<!\w)(" + "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)) + r")(?!\w)"
+
+
+# Anchors in order of precedence: (pattern, kind, offset); a group, if any, multiplies the offset
+_ANCHORS = [
+    (re.compile(r"(?:за\s+)?(?:прошлые|последние)\s+(?:две|2)\s+недели|(?:past|last)\s+(?:two|2)\s+weeks"), "past_days", 14),
+    (re.compile(r"(?:за\s+|на\s+)?(?:прошл|последн)\w*\s+недел\w*|(?:past|last|previous)\s+week"), "week", -1),
+    (re.compile(r"(?:на\s+)?следующ\w*\s+недел\w*|next\s+week"), "week", 1),
+    (re.compile(r"через\s+(\d+)\s+недел\w*|in\s+(\d+)\s+weeks?"), "day", 7),
+    (re.compile(r"через\s+неделю|in\s+a\s+week"), "day", 7),
+    (re.compile(r"на\s+(?:этой\s+)?неделе|эт\w+\s+недел\w*|this\s+week"), "week", 0),
+    (re.compile(r"через\s+(\d+)\s+(?:дн|ден|сут)\w*|in\s+(\d+)\s+days?"), "day", 1),
+    (re.compile(r"через\s+месяц|in\s+a\s+month|next\s+month"), "day", 30),
+]
+_DAY_WORD = re.compile(_words(_DAY_OFFSETS))
+_WEEKDAY = re.compile(r"(?<!\w)(следующ\w*\s+|next\s+)?" + _words(_WEEKDAYS)[len(r"(?<!\w)"):])
+_DAY_PART = re.compile(_words(_DAY_PARTS))
+_CLOCK = re.compile(r"(?<![\d:.])(\d{1,2})[:.](\d{2})(?![\d:.])")
+# DD.MM[.YYYY]; without a year "в 10.30" / "к 12.05" after a time preposition is a time
+_NUMERIC_DATE = re.compile(r"(?<![\d.:])(\d{1,2})\.(\d{1,2})(?:\.(\d{4}|\d{2}))?(?![\d:]|\.\d)")
+_TIME_PREPOSITION = re.compile(r"(?<!\w)(?:в|во|к|at)\s*$")
+_HOUR = re.compile(r"(?<!\w)(?:в|во|к|at)\s+(\d{1,2})(?![\d:.])(?:\s*(?:час\w*))?(?:\s*(утра|дня|вечера|ночи|am|pm))?")
+_AMPM = re.compile(r"\s*(утра|дня|вечера|ночи|am|pm)(?!\w)")
+_DATE_ONLY = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class DateExpression(NamedTuple):
+    """A resolved date expression."""
+    start: datetime
+    """Start of the range the expression covers"""
+    end: datetime
+    """End of the range (exclusive): next midnight for a day, next Monday for a week"""
+    moment: datetime
+    """Point in time the expression names ("завтра" - tomorrow at DEFAULT_HOUR)"""
+    has_time: bool
+    """The expression gives a time of day"""
+    is_absolute: bool
+    """ISO 8601 / "YYYY-MM-DD HH:MM" rather than a natural-language expression"""
+
+
+class _Spec(NamedTuple):
+    """Grammar match of an expression, independent of the reference time."""
+    anchor: Optional[str] = None
+    offset: int = 0
+    weekday: Optional[int] = None
+    next_weekday: bool = False
+    clock: Optional[Tuple[int, int]] = None
+    day_part: Optional[Tuple[int, int]] = None
+    absolute: Optional[datetime] = None
+    date_only: bool = False
+    numeric_date: Optional[Tuple[int, int, Optional[int]]] = None
+
+
+def _normalize(expression: str) -> str:
+    return " ".join(expression.lower().replace("ё", "е").split())
+
+
+def _hour_of(hour: int, suffix: Optional[str]) -> int:
+    if suffix in ("дня", "вечера", "pm") and hour < 12:
+        return hour + 12
+    if suffix in ("ночи", "am") and hour == 12:
+        return 0
+    return hour
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile(text: str) -> _Spec:
+    """
+    Match a normalized expression against the grammar.
+    
+    Raises:
+        ValidationError: If nothing in it is a date or a time
+    """
+    try:
+        absolute = datetime.fromisoformat(text.upper().replace("Z", "+00:00"))
+        return _Spec(absolute=absolute, date_only=bool(_DATE_ONLY.fullmatch(text)))
+    except ValueError:
+        pass
+    
+    anchor, offset = None, 0
+    numeric_date = None
+    for match in _NUMERIC_DATE.finditer(text):
+        day, month, year = int(match.group(1)), int(match.group(2)), match.group(3)
+        if not (1 <= day <= 31 and 1 <= month <= 12):
+            continue
+        if year is None and _TIME_PREPOSITION.search(text, 0, match.start()):
+            continue
+        if year is not None:
+            year = int(year) + (2000 if len(year) == 2 else 0)
+        anchor, numeric_date = "date", (day, month, year)
+        text = text[:match.start()] + " " + text[match.end():]
+        break
+    for pattern, kind, step in _ANCHORS if anchor is None else ():
+        match = pattern.search(text)
+        if match:
+            count = next((int(group) for group in match.groups() if group), 1)
+            anchor, offset = kind, step * count
+            text = text[:match.start()] + " " + text[match.end():]
+            break
+    if anchor is None:
+        match = _DAY_WORD.search(text)
+        if match:
+            anchor, offset = "day", _DAY_OFFSETS[match.group(1)]
+    
+    weekday, next_weekday = None, False
+    match = _WEEKDAY.search(text)
+    if match:
+        weekday, next_weekday = _WEEKDAYS[match.group(2)], bool(match.group(1))
+        if anchor is None:
+            anchor = "weekday"
+    
+    clock = None
+    match = _CLOCK.search(text)
+    if match:
+        suffix = _AMPM.match(text, match.end())
+        clock = (_hour_of(int(match.group(1)), suffix and suffix.group(1)), int(match.group(2)))
+    else:
+        match = _HOUR.search(text)
+        if match:
+            clock = (_hour_of(int(match.group(1)), match.group(2)), 0)
+    if clock and not (0 <= clock[0] <= 23 and 0 <= clock[1] <= 59):
+        clock = None
+    
+    match = _DAY_PART.search(text)
+    day_part = _DAY_PARTS[match.group(1)] if match else None
+    
+    if anchor is None and clock is None and day_part is None:
+        raise ValueError(text)
+    return _Spec(anchor, offset, weekday, next_weekday, clock, day_part, numeric_date=numeric_date)
+
+
+@lru_cache(maxsize=None)
+def _timezone(name: str) -> pytz.BaseTzInfo:
+    try:
+        return pytz.timezone(name)
+    except pytz.exceptions.UnknownTimeZoneError:
+        raise ValidationError(f"Unknown timezone: {name}", field="timezone", value=name)
+
+
+def _at(tz: pytz.BaseTzInfo, day: date, hour: int = 0, minute: int = 0) -> datetime:
+    return tz.localize(datetime.combine(day, time(hour, minute)))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _resolve(text: str, reference: date, timezone: str) -> DateExpression:
+    """Dates of an expression for a reference date (see parse_date_expression for the rest)."""
+    spec = _compile(text)
+    tz = _timezone(timezone)
+    
+    if spec.absolute is not None:
+        moment = spec.absolute.astimezone(tz) if spec.absolute.tzinfo else tz.localize(spec.absolute)
+        day = moment.date()
+        start = _at(tz, day) if spec.date_only else moment
+        return DateExpression(start, _at(tz, day + timedelta(days=1)), moment, not spec.date_only, True)
+    
+    # Multi-day anchors: a week (unless a weekday picks a day in it) or a period
+    if spec.anchor == "week" and spec.weekday is None:
+        monday = reference - timedelta(days=reference.weekday()) + timedelta(weeks=spec.offset)
+        start, end = _at(tz, monday), _at(tz, monday + timedelta(days=7))
+        if spec.clock:
+            moment = _at(tz, monday, *spec.clock)
+        else:
+            moment = _at(tz, monday, DEFAULT_HOUR) if spec.offset > 0 else start
+        return DateExpression(start, end, moment, spec.clock is not None, False)
+    if spec.anchor == "past_days":
+        first = reference - timedelta(days=spec.offset)
+        start = _at(tz, first)
+        moment = _at(tz, first, *spec.clock) if spec.clock else start
+        # End is the current time, set per call
+        return DateExpression(start, _at(tz, reference + timedelta(days=1)), moment, spec.clock is not None, False)
+    
+    if spec.anchor == "week":
+        monday = reference - timedelta(days=reference.weekday()) + timedelta(weeks=spec.offset)
+        day = monday + timedelta(days=spec.weekday)
+        future = day > reference
+    elif spec.anchor == "weekday":
+        ahead = (spec.weekday - reference.weekday()) % 7
+        if spec.next_weekday and ahead == 0:
+            ahead = 7
+        day, future = reference + timedelta(days=ahead), ahead > 0
+    elif spec.anchor == "date":
+        day_number, month, year = spec.numeric_date
+        day = date(year or reference.year, month, day_number)
+        future = day > reference
+    else:
+        day, future = reference + timedelta(days=spec.offset), spec.offset > 0
+    
+    start, end = _at(tz, day), _at(tz, day + timedelta(days=1))
+    if spec.clock:
+        start = moment = _at(tz, day, *spec.clock)
+    elif spec.day_part:
+        start, end = _at(tz, day, spec.day_part[0]), _at(tz, day, spec.day_part[1])
+        moment = start
+    else:
+        moment = _at(tz, day, DEFAULT_HOUR) if future else start
+    return DateExpression(start, end, moment, spec.clock is not None, False)
+
+
+def _upcoming_moment(spec: _Spec, moment: datetime, now: datetime, tz: pytz.BaseTzInfo, step: int) -> datetime:
+    """
+    Moment of an expression naming the current day, moved out of the past.
+    
+    A time already past, or a part of the day that is over, moves `step`
+    days ahead (tomorrow for "сегодня", next week for a weekday); a part of
+    the day in progress starts now. Without a time "сегодня" is now
+    (tomorrow at DEFAULT_HOUR after LATE_HOUR) and a weekday is DEFAULT_HOUR.
+    """
+    today = now.date()
+    if spec.clock:
+        return moment if moment >= now else _at(tz, today + timedelta(days=step), *spec.clock)
+    if spec.day_part:
+        if moment >= now:
+            return moment
+        if now < _at(tz, today, spec.day_part[1]):
+            return now.replace(second=0, microsecond=0)
+        return _at(tz, today + timedelta(days=step), spec.day_part[0])
+    if step == 1:
+        if now.hour >= LATE_HOUR:
+            return _at(tz, today + timedelta(days=1), DEFAULT_HOUR)
+        return now.replace(second=0, microsecond=0)
+    default = _at(tz, today, DEFAULT_HOUR)
+    return default if default >= now else _at(tz, today + timedelta(days=step), DEFAULT_HOUR)
+
+
+def parse_date_expression(
+    expression: str,
+    timezone: str = "Europe/Moscow",
+    now: Optional[datetime] = None
+) -> DateExpression:
+    """
+    Resolve a date/time expression.
+    
+    Supports ISO 8601 ("2024-01-15T14:30:00+03:00", "2024-01-15"),
+    "YYYY-MM-DD HH:MM" and natural language: days (сегодня, завтра,
+    послезавтра, вчера, через N дней), dates (20.10, 20.10.2026), weekdays (в пятницу, в следующую
+    среду), weeks (на этой / прошлой / следующей неделе, через неделю),
+    periods (за прошлые две недели), times (в 10, в 10:30, в 7 вечера,
+    at 2 pm) and parts of the day (утром, после обеда, вечером); English
+    equivalents of each.
+    
+    Args:
+        expression: Expression to parse
+        timezone: Timezone of the expression and the result
+        now: Reference time (default: current time)
+    
+    Returns:
+        DateExpression with the range and the moment in the timezone
+    
+    Raises:
+        ValidationError: If the expression or the timezone is not recognized
+    """
+    if not expression or not expression.strip():
+        raise ValidationError("Date/time is required", field="datetime")
+    tz = _timezone(timezone)
+    now = now.astimezone(tz) if now else datetime.now(tz)
+    text = _normalize(expression)
+    try:
+        spec = _compile(text)
+        result = _resolve(text, now.date(), tz.zone)
+    except ValueError:
+        raise ValidationError(
+            f"Unable to parse date/time: {expression}. "
+            f"Supported formats: ISO 8601, 'YYYY-MM-DD HH:MM', or natural language "
+            f"(сегодня, завтра, послезавтра, 20.10.2026, в пятницу, на следующей неделе, за прошлую неделю, "
+            f"за прошлые две недели, через неделю, через месяц, через N дней, в 10:30, после обеда, "
+            f"today, tomorrow, friday, next week, last week, past two weeks, in N days, at 2 pm)",
+            field="datetime",
+            value=expression
+        )
+    
+    if spec.anchor == "past_days":
+        result = result._replace(end=now)
+    elif (
+        spec.absolute is None and result.start.date() == now.date()
+        and (spec.anchor in (None, "day", "weekday") or spec.anchor == "week" and spec.weekday is not None)
+    ):
+        # Today or today's weekday: the range stays today, the moment is not in the past
+        step = 1 if spec.anchor in (None, "day") else 7
+        result = result._replace(moment=_upcoming_moment(spec, result.moment, now, tz, step))
+    return result
+
+
+def cache_clear() -> None:
+    """Drop memoized expressions (benchmarks, tests)."""
+    _compile.cache_clear()
+    _resolve.cache_clear()
@@ -0,0 +1,78 @@
+"""
+Delta streaming of growing text (answers, thinking) over WebSocket.
+
+Each stream event carries only the new text plus its position:
+{"chunk": delta, "offset": chars before it, "seq": 1, 2, ...}. From time to
+time an event also carries the full text so far in "content" (a checkpoint),
+so a client that missed a chunk (progress events can be dropped under
+backpressure) resynchronises without a full resend on every token.
+Checkpoints are spaced geometrically (each once the text has doubled, but at
+least CHECKPOINT_MIN_CHARS apart), which keeps total bytes linear in the
+answer length. Final events (message_complete, final_result_complete,
+thinking_completed) always carry the full text.
+
+Clients append "chunk" when seq follows the last one they applied, replace
+their text with "content" when present, and treat seq == 1 as a new stream.
+"""
+
+from typing import Any, Dict
+
+
+CHECKPOINT_MIN_CHARS = 2000
+
+
+class DeltaStream:
+    """Builds delta payloads for one growing text."""
+    
+    def __init__(
+        self,
+        checkpoint_min_chars: int = CHECKPOINT_MIN_CHARS,
+        delta_key: str = "chunk",
+        content_key: str = "content"
+    ):
+        """
+        Initialize stream.
+        
+        Args:
+            checkpoint_min_chars: Minimum growth between checkpoints
+            delta_key: Payload key of the new text
+            content_key: Payload key of the full text in checkpoints
+        """
+        self.checkpoint_min_chars = checkpoint_min_chars
+        self.delta_key = delta_key
+        self.content_key = content_key
+        self._parts = []
+        self.length = 0
+        self.seq = 0
+        self._next_checkpoint = checkpoint_min_chars
+    
+    @property
+    def text(self) -> str:
+        """Full text so far."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+    
+    def append(self, delta: str) -> Dict[str, Any]:
+        """
+        Add text and build its stream payload.
+        
+        Args:
+            delta: New text
+        
+        Returns:
+            {delta_key, "offset", "seq"}, plus content_key on checkpoints
+        """
+        offset = self.length
+        self._parts.append(delta)
+        self.length += len(delta)
+        self.seq += 1
+        payload: Dict[str, Any] = {self.delta_key: delta, "offset": offset, "seq": self.seq}
+        if self.length >= self._next_checkpoint:
+            payload[self.content_key] = self.text
+            self._next_checkpoint = max(self.length * 2, self.length + self.checkpoint_min_chars)
+        return payload
+    
+    def checkpoint(self) -> Dict[str, Any]:
+        """Payload with the full text (for final events)."""
+        return {self.content_key: self.text, "offset": self.length, "seq": self.seq}
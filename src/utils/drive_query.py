@@ -0,0 +1,51 @@
+"""
+Drive query clauses for file name lookups.
+
+Shared by the workspace MCP server and the LangChain workspace tools, so the
+tools can build queries without importing the server and its MCP stack.
+"""
+
+from typing import List, Optional
+import re
+
+
+def name_contains_any(names: List[str]) -> str:
+    """
+    Drive query clause matching files whose name contains any of the fragments.
+    
+    Args:
+        names: Name fragments
+    
+    Returns:
+        Clause like (name contains 'a' or name contains 'b')
+    """
+    clauses = []
+    for name in names:
+        escaped = name.replace("\\", "\\\\").replace("'", "\\'")
+        clauses.append(f"name contains '{escaped}'")
+    return "(" + " or ".join(clauses) + ")"
+
+
+_NAME_CONTAINS = re.compile(r"""name\s+contains\s+(?:'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)")""")
+
+
+def name_contains_fragments(query: Optional[str]) -> List[str]:
+    """
+    Name fragments of a Drive query made only of `name contains` clauses.
+    
+    Args:
+        query: Drive query like (name contains 'a' or name contains "b")
+    
+    Returns:
+        Unescaped fragments; empty if the query has any other condition
+    """
+    if not query:
+        return []
+    fragments = []
+    for match in _NAME_CONTAINS.finditer(query):
+        fragment = match.group(1) if match.group(1) is not None else match.group(2)
+        fragments.append(re.sub(r"\\(.)", r"\1", fragment))
+    rest = _NAME_CONTAINS.sub("", query)
+    if re.sub(r"\bor\b|[()\s]", "", rest):
+        return []
+    return fragments
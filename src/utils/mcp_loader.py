@@ -6,6 +6,7 @@ Handles connections to multiple MCP servers and tool discovery.
 import asyncio
 import json
 import os
+import time
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 import httpx
@@ -14,9 +15,13 @@ import logging
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+from src.utils.cassette import current_cassette
 from src.utils.exceptions import MCPConnectionError, MCPError
 from src.utils.config_loader import MCPConfig, MCPServerConfig
 from src.utils.retry import retry_on_mcp_error, CircuitBreaker
+from src.utils.metrics import MCP_CALL_TOOL_DURATION
+from src.utils import progress_signals
+from src.utils.tracing import get_tracer, inject
 
 logger = logging.getLogger(__name__)
 
@@ -128,6 +133,8 @@ class MCPConnection:
                         "--token-path",
                         str(token_path.absolute())
                     ]
+                    if config.calendar_event_store_enabled:
+                        args += ["--event-store", str(config.calendar_event_store_db_path.absolute())]
                     logger.info(f"[MCPConnection] Starting local Calendar MCP server: {command} {' '.join(args)}")
                 elif self.config.name == "sheets":
                     # Используем собственный локальный MCP сервер для Google Sheets
@@ -197,6 +204,8 @@ class MCPConnection:
                         "--config-path",
                         str(config_path.absolute())
                     ]
+                    if app_config.drive_index_enabled:
+                        args += ["--drive-index", str(app_config.drive_index_db_path.absolute())]
                     logger.info(f"[MCPConnection] Starting local Google Workspace MCP server: {command} {' '.join(args)}")
                 elif self.config.name == "docs":
                     # Используем собственный локальный MCP сервер для Google Docs
@@ -233,6 +242,8 @@ class MCPConnection:
                         "--config-path",
                         str(config_path.absolute())
                     ]
+                    if app_config.edit_batching_enabled:
+                        args.append("--batch-edits")
                     logger.info(f"[MCPConnection] Starting local Google Docs MCP server: {command} {' '.join(args)}")
                 elif self.config.name == "slides":
                     # Используем собственный локальный MCP сервер для Google Slides
@@ -269,6 +280,8 @@ class MCPConnection:
                         "--config-path",
                         str(config_path.absolute())
                     ]
+                    if app_config.edit_batching_enabled:
+                        args.append("--batch-edits")
                     logger.info(f"[MCPConnection] Starting local Google Slides MCP server: {command} {' '.join(args)}")
                 elif self.config.name == "onec":
                     # Используем собственный локальный MCP сервер для 1C:Бухгалтерия
@@ -302,6 +315,8 @@ class MCPConnection:
                         "--config-path",
                         str(config_path.absolute())
                     ]
+                    if app_config.onec_analytics_store_enabled:
+                        args += ["--analytics-store", str(app_config.onec_analytics_db_path.absolute())]
                     logger.info(f"[MCPConnection] Starting local 1C MCP server: {command} {' '.join(args)}")
                 elif self.config.name == "projectlad":
                     # Project Lad MCP server
@@ -479,6 +494,33 @@ class MCPConnection:
         Raises:
             MCPToolError: If tool execution fails
         """
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with get_tracer().start_span(
+                "mcp.call_tool",
+                {"mcp.server": self.config.name, "mcp.tool": tool_name}
+            ):
+                result = await self._call_tool(tool_name, arguments)
+            status = "ok"
+            return result
+        finally:
+            duration = time.perf_counter() - started
+            MCP_CALL_TOOL_DURATION.observe(duration, server=self.config.name, status=status)
+            progress_signals.emit(
+                progress_signals.MCP_CALL,
+                server=self.config.name,
+                tool=tool_name,
+                duration=duration,
+                status=status
+            )
+    
+    async def _call_tool(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any]
+    ) -> Any:
+        """Call an MCP tool over the configured transport (see call_tool)."""
         # Log current state
         logger.info(f"[MCPConnection] call_tool called for {tool_name} on {self.config.name}")
         logger.info(f"[MCPConnection] connected={self.connected}, session={self.session is not None}, tools_count={len(self.tools)}")
@@ -527,7 +569,8 @@ class MCPConnection:
                 # #endregion
                 
                 try:
-                    result = await self.session.call_tool(tool_name, arguments)
+                    # Trace context travels in _meta so server-side spans join this trace
+                    result = await self.session.call_tool(tool_name, arguments, meta=inject() or None)
                     
                     # #region agent log - H3: After session.call_tool SUCCESS
                     _session_call_end = _time.time()
@@ -611,6 +654,7 @@ class MCPConnection:
                     if self.config.api_key:
                         headers["Authorization"] = f"Bearer {self.config.api_key}"
                     headers["Content-Type"] = "application/json"
+                    inject(headers)
                     
                     # Call tool via HTTP endpoint
                     tool_url = f"{self.config.endpoint}/tools/{tool_name}"
@@ -810,7 +854,22 @@ class MCPServerManager:
         Raises:
             MCPError: If tool not found or execution fails
         """
-        
+        cassette = current_cassette()
+        if cassette is not None:
+            # Record/replay mode: the cassette answers or records the real call
+            return await cassette.call_tool(
+                {"server": server_name, "tool": tool_name, "arguments": arguments},
+                lambda: self._call_tool(tool_name, arguments, server_name)
+            )
+        return await self._call_tool(tool_name, arguments, server_name)
+    
+    async def _call_tool(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        server_name: Optional[str] = None
+    ) -> Any:
+        """Call a tool on its server connection (see call_tool)."""
         logger.info(f"[MCPServerManager] call_tool called: tool={tool_name}, server={server_name}")
         
         if server_name:
@@ -861,6 +920,28 @@ class MCPServerManager:
         
         return result
     
+    async def flush_pending_edits(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Apply edits queued by the Docs/Slides servers (EDIT_BATCHING).
+        
+        Returns:
+            Dictionary mapping server names to {"flushed": ..., "errors": ...}
+        """
+        results = {}
+        for name, tool_name in (("docs", "docs_flush_edits"), ("slides", "slides_flush_edits")):
+            connection = self.connections.get(name)
+            if not connection or not connection.connected or tool_name not in connection.tools:
+                continue
+            try:
+                result = await connection.call_tool(tool_name, {})
+                if isinstance(result, list):
+                    result = "\n".join(getattr(item, "text", str(item)) for item in result)
+                results[name] = json.loads(result) if isinstance(result, str) else result
+            except Exception as e:
+                logger.error(f"Failed to flush pending edits of {name}: {e}")
+                results[name] = {"flushed": {}, "errors": {"*": str(e)}}
+        return results
+    
     async def health_check(self) -> Dict[str, Dict[str, Any]]:
         """
         Check health of all MCP servers.
@@ -0,0 +1,354 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+A small, dependency-free subset of the Prometheus client model: counters,
+gauges and histograms with labels, rendered by the /metrics endpoint.
+Every metric caps its number of label sets, extra label combinations are
+folded into a single "other" series so cardinality stays bounded.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import bisect
+import math
+import threading
+import time
+
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+DEFAULT_MAX_SERIES = 200
+OVERFLOW_LABEL_VALUE = "other"
+METRIC_PREFIX = "multiagent_"
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render {name="value",...} (empty string when there are no labels)."""
+    pairs = [f'{n}="{_escape_label_value(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value."""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class: label handling and series bookkeeping."""
+    
+    metric_type = "untyped"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        max_series: int = DEFAULT_MAX_SERIES
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+    
+    def _new_series(self) -> object:
+        raise NotImplementedError
+    
+    def _get_series(self, labels: Dict[str, str]) -> object:
+        """Return the series for labels, folding overflow into 'other'."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is not None:
+            return series
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= self.max_series:
+                    key = tuple(OVERFLOW_LABEL_VALUE for _ in self.labelnames)
+                    series = self._series.get(key)
+                if series is None:
+                    series = self._new_series()
+                    self._series[key] = series
+        return series
+    
+    def collect(self) -> List[str]:
+        """Render HELP/TYPE header and samples."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        if not self.labelnames:
+            # Unlabelled metrics are always exported, starting at zero
+            self._get_series({})
+        for key, series in sorted(self._series.items()):
+            lines.extend(self._render_series(key, series))
+        return lines
+    
+    def _render_series(self, key: Tuple[str, ...], series: object) -> List[str]:
+        raise NotImplementedError
+    
+    def clear(self) -> None:
+        """Drop all series (used by tests)."""
+        with self._lock:
+            self._series.clear()
+
+
+class _Value:
+    """Single float value guarded by a lock."""
+    
+    __slots__ = ("value", "lock")
+    
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+    
+    metric_type = "counter"
+    
+    def _new_series(self) -> _Value:
+        return _Value()
+    
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase counter for labels."""
+        series = self._get_series(labels)
+        with series.lock:
+            series.value += amount
+    
+    def get(self, **labels: str) -> float:
+        """Current value for labels (0 if never set)."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        return series.value if series else 0.0
+    
+    def _render_series(self, key: Tuple[str, ...], series: _Value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(series.value)}"]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, optionally computed at scrape time."""
+    
+    metric_type = "gauge"
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._function: Optional[Callable[[], float]] = None
+    
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """Decrease gauge for labels."""
+        self.inc(-amount, **labels)
+    
+    def set(self, value: float, **labels: str) -> None:
+        """Set gauge for labels."""
+        series = self._get_series(labels)
+        with series.lock:
+            series.value = value
+    
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        """Compute the (unlabelled) value by calling function on every scrape."""
+        self._function = function
+    
+    def collect(self) -> List[str]:
+        if self._function is not None:
+            try:
+                self.set(float(self._function()))
+            except Exception:
+                pass
+        return super().collect()
+
+
+class _HistogramSeries:
+    """Bucket counts, sum and count of one histogram series."""
+    
+    __slots__ = ("buckets", "sum", "count", "lock")
+    
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds (cumulative buckets on render)."""
+    
+    metric_type = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        max_series: int = DEFAULT_MAX_SERIES
+    ):
+        super().__init__(name, documentation, labelnames, max_series)
+        self.upper_bounds = sorted(float(b) for b in buckets) + [math.inf]
+    
+    def _new_series(self) -> _HistogramSeries:
+        return _HistogramSeries(len(self.upper_bounds))
+    
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation."""
+        series = self._get_series(labels)
+        index = bisect.bisect_left(self.upper_bounds, value)
+        with series.lock:
+            series.buckets[index] += 1
+            series.sum += value
+            series.count += 1
+    
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the with-block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def get_count(self, **labels: str) -> int:
+        """Number of observations for labels."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        return series.count if series else 0
+    
+    def _render_series(self, key: Tuple[str, ...], series: _HistogramSeries) -> List[str]:
+        with series.lock:
+            buckets = list(series.buckets)
+            total, count = series.sum, series.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.upper_bounds, buckets):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def register(self, metric: _Metric) -> _Metric:
+        """Register a metric (returns the existing one for a duplicate name)."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+    
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format 0.0.4."""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+    
+    def clear(self) -> None:
+        """Reset all series (used by tests)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render_metrics() -> str:
+    """Render the global registry."""
+    return REGISTRY.render()
+
+
+# Metrics of the agent stack. Label values come from closed sets
+# (configured models, registered tools, configured MCP servers).
+
+LLM_REQUEST_DURATION = REGISTRY.register(Histogram(
+    METRIC_PREFIX + "llm_request_duration_seconds",
+    "LLM call latency from request start to last token.",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+))
+
+LLM_TIME_TO_FIRST_TOKEN = REGISTRY.register(Histogram(
+    METRIC_PREFIX + "llm_time_to_first_token_seconds",
+    "Time from LLM request start to the first streamed token.",
+    ["model"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+))
+
+LLM_TOKENS = REGISTRY.register(Counter(
+    METRIC_PREFIX + "llm_tokens_total",
+    "Provider-reported LLM tokens by kind (input, output, thinking, cache_read, cache_write).",
+    ["model", "kind"]
+))
+
+LLM_COST_USD = REGISTRY.register(Counter(
+    METRIC_PREFIX + "llm_cost_usd_total",
+    "Estimated LLM spend in USD from the configured price table.",
+    ["model"]
+))
+
+REACT_ITERATIONS = REGISTRY.register(Histogram(
+    METRIC_PREFIX + "react_iterations_per_run",
+    "ReAct loop iterations per engine run.",
+    buckets=(1, 2, 3, 4, 5, 7, 10, 15, 20, 30)
+))
+
+REACT_PHASE_DURATION = REGISTRY.register(Histogram(
+    METRIC_PREFIX + "react_phase_duration_seconds",
+    "Time spent in a ReAct phase (think, act, observe) per iteration.",
+    ["phase"]
+))
+
+CAPABILITY_EXECUTE_DURATION = REGISTRY.register(Histogram(
+    METRIC_PREFIX + "capability_execute_duration_seconds",
+    "CapabilityRegistry.execute latency by tool.",
+    ["tool", "status"]
+))
+
+TOOL_CACHE_REQUESTS = REGISTRY.register(Counter(
+    METRIC_PREFIX + "tool_cache_requests_total",
+    "Cacheable capability calls by outcome (hit, shared in-flight call, miss).",
+    ["tool", "result"]
+))
+
+MCP_CALL_TOOL_DURATION = REGISTRY.register(Histogram(
+    METRIC_PREFIX + "mcp_call_tool_duration_seconds",
+    "MCPConnection.call_tool latency by server.",
+    ["server", "status"]
+))
+
+WEBSOCKET_SEND_DURATION = REGISTRY.register(Histogram(
+    METRIC_PREFIX + "websocket_send_duration_seconds",
+    "Time to write one message to a WebSocket.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)
+))
+
+ACTIVE_SESSIONS = REGISTRY.register(Gauge(
+    METRIC_PREFIX + "active_sessions",
+    "Sessions with at least one open WebSocket connection."
+))
+
+RUNS_IN_FLIGHT = REGISTRY.register(Gauge(
+    METRIC_PREFIX + "agent_runs_in_flight",
+    "Agent runs currently being processed."
+))
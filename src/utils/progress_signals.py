@@ -0,0 +1,65 @@
+"""
+Progress signals from the agent pipeline.
+
+Components report what actually happens during a run (LLM time-to-first-token,
+tool start/end, MCP call latency) via emit(); the listener of the current run
+(SmartProgressGenerator) turns them into progress messages. The listener is
+bound through a context variable, so concurrent sessions never see each
+other's signals, and emitting without a listener is a no-op.
+"""
+
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+LLM_FIRST_TOKEN = "llm_first_token"  # model, ttft (seconds)
+TOOL_START = "tool_start"  # tool, display_name
+TOOL_END = "tool_end"  # tool, duration (seconds), success, result, size (optional hint)
+MCP_CALL = "mcp_call"  # server, tool, duration (seconds), status
+
+ProgressListener = Callable[[str, Dict[str, Any]], None]
+
+_listener: ContextVar[Optional[ProgressListener]] = ContextVar("progress_listener", default=None)
+
+
+def listen(listener: ProgressListener) -> Token:
+    """
+    Bind a listener to the current context (run).
+    
+    Args:
+        listener: Called synchronously with (signal, data); must not block
+    
+    Returns:
+        Token for unlisten()
+    """
+    return _listener.set(listener)
+
+
+def unlisten(token: Token) -> None:
+    """Unbind the listener bound by listen()."""
+    try:
+        _listener.reset(token)
+    except ValueError:
+        # Token from another context (stop() called outside the run's task)
+        _listener.set(None)
+
+
+def emit(signal: str, **data: Any) -> None:
+    """
+    Report a pipeline signal to the current listener, if any.
+    
+    Args:
+        signal: Signal name (LLM_FIRST_TOKEN, TOOL_START, ...)
+        **data: Signal data
+    """
+    listener = _listener.get()
+    if listener is None:
+        return
+    try:
+        listener(signal, data)
+    except Exception as e:
+        logger.debug(f"Progress listener failed on {signal}: {e}")
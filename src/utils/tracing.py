@@ -0,0 +1,458 @@
+"""
+Lightweight span-based tracing.
+
+Spans follow the OpenTelemetry data model (128-bit trace id, 64-bit span
+id, parent span id, start/end in unix nanoseconds, attributes, status) and
+propagate across process boundaries with a W3C `traceparent` value. The
+host process passes it to MCP stdio servers in the tool-call `_meta`, so
+server-side spans join the same trace.
+
+Finished spans go to an exporter chosen with environment variables, which
+MCP server subprocesses inherit:
+    TRACE_EXPORTER  none (default) | memory | file
+    TRACE_FILE      JSON-lines file for the file exporter (default data/traces.jsonl)
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+TRACEPARENT_KEY = "traceparent"
+DEFAULT_TRACE_FILE = Path("data") / "traces.jsonl"
+DEFAULT_MEMORY_SPANS = 10000
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifiers that link a span to its trace and parent."""
+    trace_id: str
+    span_id: str
+    
+    def to_traceparent(self) -> str:
+        """Encode as a W3C traceparent header value (sampled)."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+    name: str
+    context: SpanContext
+    parent_span_id: Optional[str]
+    service_name: str
+    start_time_ns: int = field(default_factory=time.time_ns)
+    end_time_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "UNSET"
+    status_message: Optional[str] = None
+    _tracer: Any = field(default=None, repr=False, compare=False)
+    _token: Any = field(default=None, repr=False, compare=False)
+    
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set a span attribute (value should be a str/int/float/bool)."""
+        self.attributes[key] = value
+    
+    def set_status(self, status: str, message: Optional[str] = None) -> None:
+        """Set status: UNSET, OK or ERROR."""
+        self.status = status
+        self.status_message = message
+    
+    def end(self) -> None:
+        """Finish the span, restore the previous current span and export it."""
+        if self.end_time_ns is not None:
+            return
+        self.end_time_ns = time.time_ns()
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Ended from another context (e.g. a different task)
+                pass
+            self._token = None
+        if self._tracer is not None and self._tracer.exporter is not None:
+            self._tracer.exporter.export(self)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize with OpenTelemetry field names."""
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_time_ns,
+            "end_time_unix_nano": self.end_time_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_message},
+            "resource": {"service.name": self.service_name},
+        }
+
+
+class SpanExporter:
+    """Receives finished spans."""
+    
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+    
+    def get_finished_spans(self) -> List[Dict[str, Any]]:
+        """Return exported spans (only for exporters that keep them)."""
+        return []
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the most recent spans in memory."""
+    
+    def __init__(self, max_spans: int = DEFAULT_MEMORY_SPANS):
+        self._spans: deque = deque(maxlen=max_spans)
+    
+    def export(self, span: Span) -> None:
+        self._spans.append(span.to_dict())
+    
+    def get_finished_spans(self) -> List[Dict[str, Any]]:
+        return list(self._spans)
+    
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Appends spans as JSON lines; safe to share between processes."""
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            logger.debug(f"Failed to write span: {e}")
+    
+    def get_finished_spans(self) -> List[Dict[str, Any]]:
+        return load_spans(self.path)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporter."""
+    
+    def __init__(self, service_name: str, exporter: Optional[SpanExporter] = None):
+        """
+        Initialize tracer.
+        
+        Args:
+            service_name: Reported as resource service.name on every span
+            exporter: Destination for finished spans (None: spans are not exported)
+        """
+        self.service_name = service_name
+        self.exporter = exporter
+    
+    def open_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None
+    ) -> Span:
+        """
+        Start a span and make it current until span.end() is called.
+        
+        Prefer start_span(); this form is for spans that do not map onto a
+        single block, such as one ReAct loop iteration.
+        
+        Args:
+            name: Span name
+            attributes: Initial attributes
+            parent: Explicit parent (e.g. extracted from a remote caller);
+                defaults to the current span, or a new trace if there is none
+        
+        Returns:
+            The started span
+        """
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current else None
+        
+        span = Span(
+            name=name,
+            context=SpanContext(
+                trace_id=parent.trace_id if parent else secrets.token_hex(16),
+                span_id=secrets.token_hex(8)
+            ),
+            parent_span_id=parent.span_id if parent else None,
+            service_name=self.service_name,
+            attributes=dict(attributes or {})
+        )
+        span._tracer = self
+        span._token = _current_span.set(span)
+        return span
+    
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None
+    ) -> Iterator[Span]:
+        """
+        Run the with-block inside a new span (see open_span for arguments).
+        
+        Exceptions mark the span as ERROR and are re-raised.
+        
+        Yields:
+            The active span
+        """
+        span = self.open_span(name, attributes, parent)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_status("ERROR", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end()
+
+
+def traced(name: str):
+    """
+    Decorator running an async function inside a span.
+    
+    Args:
+        name: Span name
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with get_tracer().start_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    """Return the active span in this context."""
+    return _current_span.get()
+
+
+def inject(carrier: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Add the current trace context to a carrier dict.
+    
+    Args:
+        carrier: Dict to update (a new one if None)
+    
+    Returns:
+        The carrier, with `traceparent` set when a span is active
+    """
+    carrier = carrier if carrier is not None else {}
+    span = _current_span.get()
+    if span is not None:
+        carrier[TRACEPARENT_KEY] = span.context.to_traceparent()
+    return carrier
+
+
+def extract(carrier: Any) -> Optional[SpanContext]:
+    """
+    Read trace context from a dict or an object with a `traceparent` attribute.
+    
+    Args:
+        carrier: Dict, pydantic model (e.g. MCP request meta) or None
+    
+    Returns:
+        SpanContext, or None if absent or malformed
+    """
+    if carrier is None:
+        return None
+    if isinstance(carrier, dict):
+        value = carrier.get(TRACEPARENT_KEY)
+    else:
+        value = getattr(carrier, TRACEPARENT_KEY, None)
+        extra = getattr(carrier, "model_extra", None)
+        if value is None and extra:
+            value = extra.get(TRACEPARENT_KEY)
+    if not isinstance(value, str):
+        return None
+    parts = value.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return SpanContext(trace_id=parts[1], span_id=parts[2])
+
+
+def load_spans(path: Path, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read spans from a JSON-lines trace file.
+    
+    Args:
+        path: Trace file
+        trace_id: Only return spans of this trace
+    
+    Returns:
+        List of span dicts
+    """
+    spans = []
+    path = Path(path)
+    if not path.exists():
+        return spans
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                span = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if trace_id is None or span.get("trace_id") == trace_id:
+                spans.append(span)
+    return spans
+
+
+def render_waterfall(spans: List[Dict[str, Any]], width: int = 50) -> str:
+    """
+    Render spans of one trace as a text waterfall (children under parents).
+    
+    Args:
+        spans: Span dicts of a single trace
+        width: Width of the timeline bar in characters
+    
+    Returns:
+        Multi-line string
+    """
+    spans = [s for s in spans if s.get("end_time_unix_nano")]
+    if not spans:
+        return "(no spans)"
+    
+    trace_start = min(s["start_time_unix_nano"] for s in spans)
+    trace_end = max(s["end_time_unix_nano"] for s in spans)
+    total = max(trace_end - trace_start, 1)
+    
+    by_id = {s["span_id"]: s for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        parent = s.get("parent_span_id")
+        children.setdefault(parent if parent in by_id else None, []).append(s)
+    for siblings in children.values():
+        siblings.sort(key=lambda s: s["start_time_unix_nano"])
+    
+    lines = [f"trace {spans[0]['trace_id']}  total {total / 1e6:.1f} ms"]
+    
+    def walk(span: Dict[str, Any], depth: int) -> None:
+        start = span["start_time_unix_nano"] - trace_start
+        duration = span["end_time_unix_nano"] - span["start_time_unix_nano"]
+        offset = int(start / total * width)
+        length = max(1, int(duration / total * width))
+        bar = " " * offset + "█" * min(length, width - offset)
+        service = span.get("resource", {}).get("service.name", "")
+        error = " !" if span.get("status", {}).get("code") == "ERROR" else ""
+        label = f"{'  ' * depth}{span['name']} [{service}]{error}"
+        lines.append(f"{label:<60.60} |{bar:<{width}}| {duration / 1e6:8.1f} ms")
+        for child in children.get(span["span_id"], []):
+            walk(child, depth + 1)
+    
+    for root in children.get(None, []):
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def exporter_from_env() -> Optional[SpanExporter]:
+    """Build the exporter selected by TRACE_EXPORTER / TRACE_FILE."""
+    kind = os.getenv("TRACE_EXPORTER", "none").lower()
+    if kind == "memory":
+        return InMemorySpanExporter()
+    if kind == "file":
+        return JsonFileSpanExporter(Path(os.getenv("TRACE_FILE", str(DEFAULT_TRACE_FILE))))
+    return None
+
+
+def instrument_google_api_client() -> None:
+    """
+    Wrap googleapiclient HttpRequest.execute in a span.
+    
+    Covers every `.execute()` call of an MCP server without touching the
+    call sites. Safe to call more than once.
+    """
+    try:
+        from googleapiclient.http import HttpRequest
+    except ImportError:
+        return
+    if getattr(HttpRequest.execute, "_traced", False):
+        return
+    
+    original = HttpRequest.execute
+    
+    def execute(self, *args, **kwargs):
+        with get_tracer().start_span(
+            f"google_api {getattr(self, 'methodId', None) or 'request'}",
+            {"http.method": getattr(self, "method", "")}
+        ):
+            return original(self, *args, **kwargs)
+    
+    execute._traced = True
+    HttpRequest.execute = execute
+
+
+def trace_tool_handler(server: Any):
+    """
+    Decorator for an MCP server call_tool handler.
+    
+    Runs the handler in a span whose parent is the `traceparent` sent by
+    the client in the request `_meta`, linking server-side spans (including
+    Google API calls) to the host trace.
+    
+    Args:
+        server: mcp.server.Server the handler is registered on
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(name: str, arguments: Dict[str, Any]):
+            try:
+                meta = server.request_context.meta
+            except LookupError:
+                meta = None
+            with get_tracer().start_span(f"mcp.server {name}", {"mcp.tool": name}, parent=extract(meta)):
+                return await func(name, arguments)
+        return wrapper
+    return decorator
+
+
+# Global tracer
+_tracer: Optional[Tracer] = None
+
+
+def configure_tracing(service_name: str, exporter: Optional[SpanExporter] = None) -> Tracer:
+    """
+    Replace the global tracer.
+    
+    Args:
+        service_name: Service name for spans of this process
+        exporter: Exporter (defaults to the one selected by environment)
+    
+    Returns:
+        The new tracer
+    """
+    global _tracer
+    _tracer = Tracer(service_name, exporter if exporter is not None else exporter_from_env())
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    """Get global tracer (service "multiagent-api" unless configured)."""
+    global _tracer
+    
+    if _tracer is None:
+        _tracer = Tracer("multiagent-api", exporter_from_env())
+    
+    return _tracer
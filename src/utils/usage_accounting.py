@@ -0,0 +1,537 @@
+"""
+Token and cost accounting for LLM calls.
+
+Every LLM client built by the model factory reports the provider usage of
+each call here. Usage is attributed to the current run (one user message)
+and its session, to the ReAct iteration and to the purpose of the call
+("think_and_plan", "analyze_result", ...). Runs and sessions can have
+token or cost budgets; the engine checks them between iterations and stops
+gracefully once a budget is used up.
+
+Attribution uses context variables, so concurrent sessions never mix up
+their numbers. Usage of a session is dropped with the session
+(SessionManager.delete_session); at most max_sessions sessions are kept,
+the least recently used are forgotten first.
+"""
+
+from typing import Any, Callable, Dict, Optional
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+import json
+import threading
+import time
+import uuid
+
+from src.utils.logging_config import get_logger
+from src.utils.metrics import LLM_COST_USD, LLM_TOKENS
+
+logger = get_logger(__name__)
+
+
+# USD per million tokens, keyed like MODELS in src/agents/model_factory.py.
+# input applies to uncached prompt tokens; thinking/reasoning tokens are
+# billed as output and are already included in output token counts.
+DEFAULT_PRICES: Dict[str, Dict[str, float]] = {
+    "claude-sonnet-4-5": {"input": 3.0, "output": 15.0, "cache_read": 0.30, "cache_write": 3.75},
+    "claude-3-haiku": {"input": 0.25, "output": 1.25, "cache_read": 0.03, "cache_write": 0.30},
+    "claude-3-5-sonnet": {"input": 3.0, "output": 15.0, "cache_read": 0.30, "cache_write": 3.75},
+    "gpt-4o": {"input": 2.50, "output": 10.0, "cache_read": 1.25, "cache_write": 2.50},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60, "cache_read": 0.075, "cache_write": 0.15},
+    "o1": {"input": 15.0, "output": 60.0, "cache_read": 7.50, "cache_write": 15.0},
+}
+
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_MAX_RUNS_PER_SESSION = 50
+DEFAULT_MAX_RECORDS_PER_RUN = 200
+UNATTRIBUTED_PURPOSE = "other"
+
+
+def normalize_usage(usage: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Convert LangChain usage_metadata or raw provider usage to common counters.
+    
+    input_tokens always includes cached prompt tokens (as LangChain reports
+    it); cache_read_tokens and cache_write_tokens are the cached share.
+    
+    Args:
+        usage: usage_metadata dict, Anthropic usage or OpenAI token_usage
+    
+    Returns:
+        Dict with input_tokens, output_tokens, thinking_tokens,
+        cache_read_tokens and cache_write_tokens
+    """
+    def _int(value: Any) -> int:
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+    
+    input_details = usage.get("input_token_details") or {}
+    output_details = usage.get("output_token_details") or {}
+    
+    if "input_token_details" in usage or "output_token_details" in usage or "total_tokens" in usage:
+        # LangChain usage_metadata (input_tokens already include cache tokens)
+        input_tokens = _int(usage.get("input_tokens"))
+        cache_read = _int(input_details.get("cache_read"))
+        cache_write = (
+            _int(input_details.get("cache_creation"))
+            + _int(input_details.get("ephemeral_5m_input_tokens"))
+            + _int(input_details.get("ephemeral_1h_input_tokens"))
+        )
+        output_tokens = _int(usage.get("output_tokens"))
+        thinking = _int(output_details.get("reasoning"))
+    elif "prompt_tokens" in usage:
+        # OpenAI token_usage
+        input_tokens = _int(usage.get("prompt_tokens"))
+        cache_read = _int((usage.get("prompt_tokens_details") or {}).get("cached_tokens"))
+        cache_write = 0
+        output_tokens = _int(usage.get("completion_tokens"))
+        thinking = _int((usage.get("completion_tokens_details") or {}).get("reasoning_tokens"))
+    else:
+        # Anthropic usage (input_tokens exclude cache tokens)
+        cache_read = _int(usage.get("cache_read_input_tokens"))
+        cache_write = _int(usage.get("cache_creation_input_tokens"))
+        input_tokens = _int(usage.get("input_tokens")) + cache_read + cache_write
+        output_tokens = _int(usage.get("output_tokens"))
+        thinking = 0
+    
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "thinking_tokens": thinking,
+        "cache_read_tokens": cache_read,
+        "cache_write_tokens": cache_write,
+    }
+
+
+def usage_from_llm_result(response: Any) -> Optional[Dict[str, int]]:
+    """
+    Extract normalized usage from a LangChain LLMResult.
+    
+    Args:
+        response: LLMResult passed to on_llm_end
+    
+    Returns:
+        Normalized usage or None if the provider reported nothing
+    """
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                return normalize_usage(dict(usage))
+    
+    llm_output = getattr(response, "llm_output", None) or {}
+    usage = llm_output.get("usage") or llm_output.get("token_usage")
+    if isinstance(usage, dict) and usage:
+        return normalize_usage(usage)
+    return None
+
+
+@dataclass
+class UsageTotals:
+    """Summed usage of several LLM calls."""
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    cost_usd: float = 0.0
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+    
+    def add(self, record: "UsageRecord") -> None:
+        """Add one call."""
+        self.calls += 1
+        self.input_tokens += record.input_tokens
+        self.output_tokens += record.output_tokens
+        self.thinking_tokens += record.thinking_tokens
+        self.cache_read_tokens += record.cache_read_tokens
+        self.cache_write_tokens += record.cache_write_tokens
+        self.cost_usd += record.cost_usd
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "thinking_tokens": self.thinking_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+@dataclass
+class UsageRecord:
+    """Usage of a single LLM call."""
+    model: str
+    purpose: str
+    session_id: Optional[str] = None
+    run_id: Optional[str] = None
+    iteration: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    cost_usd: float = 0.0
+    timestamp: float = field(default_factory=time.time)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "purpose": self.purpose,
+            "session_id": self.session_id,
+            "run_id": self.run_id,
+            "iteration": self.iteration,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "thinking_tokens": self.thinking_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "timestamp": self.timestamp,
+        }
+
+
+@dataclass
+class UsageBudget:
+    """Token and/or cost limit (None means unlimited)."""
+    max_tokens: Optional[int] = None
+    max_cost_usd: Optional[float] = None
+    
+    def exceeded(self, totals: UsageTotals) -> Optional[str]:
+        """Return a description of the exceeded limit, or None."""
+        if self.max_tokens is not None and totals.total_tokens >= self.max_tokens:
+            return f"{totals.total_tokens} of {self.max_tokens} tokens used"
+        if self.max_cost_usd is not None and totals.cost_usd >= self.max_cost_usd:
+            return f"${totals.cost_usd:.4f} of ${self.max_cost_usd:.4f} spent"
+        return None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"max_tokens": self.max_tokens, "max_cost_usd": self.max_cost_usd}
+
+
+@dataclass
+class UsageRun:
+    """Usage of one agent run (processing of one user message)."""
+    session_id: str
+    run_id: str = field(default_factory=lambda: f"run-{uuid.uuid4().hex[:12]}")
+    started_at: float = field(default_factory=time.time)
+    ended_at: Optional[float] = None
+    iteration: int = 0
+    totals: UsageTotals = field(default_factory=UsageTotals)
+    by_purpose: Dict[str, UsageTotals] = field(default_factory=dict)
+    by_model: Dict[str, UsageTotals] = field(default_factory=dict)
+    records: deque = field(default_factory=lambda: deque(maxlen=DEFAULT_MAX_RECORDS_PER_RUN))
+    budget_exceeded: Optional[str] = None
+    _token: Any = None
+    
+    def add(self, record: UsageRecord) -> None:
+        self.totals.add(record)
+        self.by_purpose.setdefault(record.purpose, UsageTotals()).add(record)
+        self.by_model.setdefault(record.model, UsageTotals()).add(record)
+        self.records.append(record)
+    
+    def to_dict(self, include_records: bool = False) -> Dict[str, Any]:
+        data = {
+            "run_id": self.run_id,
+            "session_id": self.session_id,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "iterations": self.iteration,
+            "totals": self.totals.to_dict(),
+            "by_purpose": {name: t.to_dict() for name, t in self.by_purpose.items()},
+            "by_model": {name: t.to_dict() for name, t in self.by_model.items()},
+            "budget_exceeded": self.budget_exceeded,
+        }
+        if include_records:
+            data["records"] = [record.to_dict() for record in self.records]
+        return data
+
+
+@dataclass
+class SessionUsage:
+    """Usage of a session: running totals and its most recent runs."""
+    session_id: str
+    totals: UsageTotals = field(default_factory=UsageTotals)
+    runs: deque = field(default_factory=lambda: deque(maxlen=DEFAULT_MAX_RUNS_PER_SESSION))
+
+
+# Current run and call purpose of the running task
+_current_run: ContextVar[Optional[UsageRun]] = ContextVar("usage_run", default=None)
+_current_purpose: ContextVar[Optional[str]] = ContextVar("usage_purpose", default=None)
+
+
+def current_usage_run() -> Optional[UsageRun]:
+    """Run that LLM usage is currently attributed to."""
+    return _current_run.get()
+
+
+def current_usage_purpose() -> Optional[str]:
+    """Purpose that LLM calls are currently attributed to."""
+    return _current_purpose.get()
+
+
+def usage_purpose(purpose: str) -> Callable:
+    """
+    Decorator attributing LLM calls made inside an async function to purpose.
+    
+    Args:
+        purpose: Purpose label, e.g. "think_and_plan"
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = _current_purpose.set(purpose)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _current_purpose.reset(token)
+        return wrapper
+    return decorator
+
+
+class UsageTracker:
+    """
+    Ledger of LLM usage per session and per run, with budgets.
+    """
+    
+    def __init__(
+        self,
+        prices: Optional[Dict[str, Dict[str, float]]] = None,
+        run_budget: Optional[UsageBudget] = None,
+        session_budget: Optional[UsageBudget] = None,
+        max_sessions: int = DEFAULT_MAX_SESSIONS
+    ):
+        """
+        Initialize tracker.
+        
+        Args:
+            prices: USD per million tokens by model name (defaults to DEFAULT_PRICES)
+            run_budget: Limit for a single run
+            session_budget: Limit for all runs of a session
+            max_sessions: Sessions kept before the least recently used are forgotten
+        """
+        self.prices = dict(prices if prices is not None else DEFAULT_PRICES)
+        self.run_budget = run_budget or UsageBudget()
+        self.session_budget = session_budget or UsageBudget()
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, SessionUsage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._unpriced_models: set = set()
+    
+    def price(self, model: str, usage: Dict[str, int]) -> float:
+        """
+        Cost of one call in USD.
+        
+        Args:
+            model: Model name (MODELS key)
+            usage: Normalized usage
+        """
+        table = self.prices.get(model)
+        if table is None:
+            if model not in self._unpriced_models:
+                self._unpriced_models.add(model)
+                logger.warning(f"No price configured for model {model}, cost counted as 0")
+            return 0.0
+        cache_read = usage["cache_read_tokens"]
+        cache_write = usage["cache_write_tokens"]
+        uncached_input = max(0, usage["input_tokens"] - cache_read - cache_write)
+        return (
+            uncached_input * table.get("input", 0.0)
+            + cache_read * table.get("cache_read", table.get("input", 0.0))
+            + cache_write * table.get("cache_write", table.get("input", 0.0))
+            + usage["output_tokens"] * table.get("output", 0.0)
+        ) / 1_000_000
+    
+    def _session(self, session_id: str) -> SessionUsage:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = SessionUsage(session_id=session_id)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return session
+    
+    def start_run(self, session_id: str) -> UsageRun:
+        """
+        Start a run and make it current for the running task.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            The new run (pass it to end_run)
+        """
+        run = UsageRun(session_id=session_id)
+        self._session(session_id).runs.append(run)
+        run._token = _current_run.set(run)
+        return run
+    
+    def end_run(self, run: UsageRun) -> Dict[str, Any]:
+        """
+        Finish a run started by start_run.
+        
+        Args:
+            run: Run returned by start_run
+        
+        Returns:
+            Run summary (the usage_summary event payload)
+        """
+        run.ended_at = time.time()
+        if run._token is not None:
+            try:
+                _current_run.reset(run._token)
+            except ValueError:
+                # Ended from another context; the run there ends with its task
+                pass
+            run._token = None
+        summary = run.to_dict()
+        summary["session_totals"] = self._session(run.session_id).totals.to_dict()
+        return summary
+    
+    def set_iteration(self, iteration: int) -> None:
+        """Attribute following calls of the current run to an iteration."""
+        run = _current_run.get()
+        if run is not None:
+            run.iteration = iteration
+    
+    def record(self, model: str, usage: Dict[str, int]) -> UsageRecord:
+        """
+        Record one LLM call for the current run and purpose.
+        
+        Args:
+            model: Model name (MODELS key)
+            usage: Normalized usage (see normalize_usage)
+        
+        Returns:
+            The stored record
+        """
+        run = _current_run.get()
+        record = UsageRecord(
+            model=model,
+            purpose=_current_purpose.get() or UNATTRIBUTED_PURPOSE,
+            session_id=run.session_id if run else None,
+            run_id=run.run_id if run else None,
+            iteration=run.iteration if run else 0,
+            cost_usd=self.price(model, usage),
+            **usage
+        )
+        
+        for kind in ("input", "output", "thinking", "cache_read", "cache_write"):
+            count = usage[f"{kind}_tokens"]
+            if count:
+                LLM_TOKENS.inc(count, model=model, kind=kind)
+        if record.cost_usd:
+            LLM_COST_USD.inc(record.cost_usd, model=model)
+        
+        if run is not None:
+            session = self._session(run.session_id)
+            with self._lock:
+                run.add(record)
+                session.totals.add(record)
+        return record
+    
+    def check_budget(self, run: Optional[UsageRun] = None) -> Optional[str]:
+        """
+        Check run and session budgets.
+        
+        Args:
+            run: Run to check (the current run by default)
+        
+        Returns:
+            Reason if a budget is used up, None otherwise
+        """
+        run = run or _current_run.get()
+        if run is None:
+            return None
+        reason = self.run_budget.exceeded(run.totals)
+        if reason:
+            reason = f"Run budget exceeded: {reason}"
+        else:
+            session_reason = self.session_budget.exceeded(self._session(run.session_id).totals)
+            if session_reason:
+                reason = f"Session budget exceeded: {session_reason}"
+        if reason:
+            run.budget_exceeded = reason
+        return reason
+    
+    def get_session_usage(self, session_id: str, include_records: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Usage of a session with its recent runs.
+        
+        Args:
+            session_id: Session identifier
+            include_records: Include per-call records of each run
+        
+        Returns:
+            Dict or None if the session made no runs
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        return {
+            "session_id": session_id,
+            "totals": session.totals.to_dict(),
+            "budgets": {
+                "run": self.run_budget.to_dict(),
+                "session": self.session_budget.to_dict(),
+            },
+            "runs": [run.to_dict(include_records=include_records) for run in session.runs],
+        }
+    
+    def reset_session(self, session_id: str) -> None:
+        """Forget usage of a session."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+def load_prices(path: Optional[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Default prices overridden by a JSON file ({model: {input, output, ...}}).
+    
+    Args:
+        path: JSON file path or None
+    """
+    prices = {model: dict(table) for model, table in DEFAULT_PRICES.items()}
+    if not path:
+        return prices
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        for model, table in overrides.items():
+            prices.setdefault(model, {}).update({k: float(v) for k, v in table.items()})
+    except (OSError, ValueError, AttributeError) as e:
+        logger.error(f"Failed to load LLM prices from {path}: {e}")
+    return prices
+
+
+# Global usage tracker
+_usage_tracker: Optional[UsageTracker] = None
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Get global usage tracker (prices and budgets from config)."""
+    global _usage_tracker
+    
+    if _usage_tracker is None:
+        from src.utils.config_loader import get_config
+        config = get_config()
+        _usage_tracker = UsageTracker(
+            prices=load_prices(config.llm_prices_path),
+            run_budget=UsageBudget(config.run_token_budget, config.run_cost_budget_usd),
+            session_budget=UsageBudget(config.session_token_budget, config.session_cost_budget_usd)
+        )
+    
+    return _usage_tracker
@@ -5,11 +5,12 @@ Validates emails, dates, timezones, and other inputs before processing.
 
 import re
 import pytz
-from typing import Optional, Tuple, List
-from datetime import datetime, timedelta
+from typing import Optional, List
+from datetime import datetime
 from email.utils import parseaddr
 
 from src.utils.exceptions import ValidationError
+from src.utils.date_expressions import parse_date_expression
 
 
 # Email validation regex (RFC 5322 compliant)
@@ -108,7 +109,8 @@ def validate_timezone(timezone: str) -> str:
 
 def parse_datetime(
     date_str: str,
-    timezone: str = "Europe/Moscow"
+    timezone: str = "Europe/Moscow",
+    now: Optional[datetime] = None
 ) -> datetime:
     """
     Parse datetime string with timezone support.
@@ -116,12 +118,15 @@ def parse_datetime(
     Supports formats:
     - ISO 8601: "2024-01-15T14:30:00+03:00"
     - Simple: "2024-01-15 14:30"
-    - Natural language: "next Monday at 2 PM"
+    - Natural language: "завтра в 10", "в пятницу после обеда", "next Monday at 2 PM"
+    
+    See src.utils.date_expressions for the grammar and the range form.
     
     Args:
         date_str: Date/time string to parse
         timezone: Default timezone if not specified
-        
+        now: Reference time for relative expressions (default: current time)
+    
     Returns:
         Datetime object with timezone
         
@@ -131,187 +136,7 @@ def parse_datetime(
     if not date_str:
         raise ValidationError("Date/time is required", field="datetime")
     
-    # Validate timezone
-    tz = pytz.timezone(validate_timezone(timezone))
-    
-    # Try ISO 8601 format first
-    try:
-        dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-        if dt.tzinfo is None:
-            dt = tz.localize(dt)
-        return dt
-    except ValueError:
-        pass
-    
-    # Try simple format: "YYYY-MM-DD HH:MM"
-    try:
-        dt = datetime.strptime(date_str, "%Y-%m-%d %H:%M")
-        return tz.localize(dt)
-    except ValueError:
-        pass
-    
-    # Try natural language parsing (extended support)
-    # Handle common Russian and English expressions
-    date_str_lower = date_str.lower().strip()
-    now = datetime.now(tz)
-    
-    # Helper function to extract time from string
-    def extract_time(text: str) -> Tuple[Optional[int], Optional[int]]:
-        """Extract hour and minute from text."""
-        # Russian patterns: "в 10", "в 10:00", "в 10 часов", "в 10:30"
-        ru_pattern = r'в\s+(\d{1,2})(?::(\d{2}))?(?:\s+час)?'
-        ru_match = re.search(ru_pattern, text)
-        if ru_match:
-            hour = int(ru_match.group(1))
-            minute = int(ru_match.group(2)) if ru_match.group(2) else 0
-            return hour, minute
-        
-        # English patterns: "at 10", "at 10:00", "at 10 AM", "at 2 PM"
-        en_pattern = r'at\s+(\d{1,2})(?::(\d{2}))?(?:\s*(?:am|pm))?'
-        en_match = re.search(en_pattern, text)
-        if en_match:
-            hour = int(en_match.group(1))
-            minute = int(en_match.group(2)) if en_match.group(2) else 0
-            # Handle AM/PM
-            if 'pm' in text and hour < 12:
-                hour += 12
-            elif 'am' in text and hour == 12:
-                hour = 0
-            return hour, minute
-        
-        return None, None
-    
-    # Russian: "сегодня" / "today"
-    if date_str_lower.startswith("сегодня") or date_str_lower.startswith("today"):
-        hour, minute = extract_time(date_str_lower)
-        if hour is not None:
-            dt = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            # If time is in the past, assume next day
-            if dt < now:
-                dt = dt + timedelta(days=1)
-        else:
-            # Default to current time or 10:00 if current time is late
-            if now.hour >= 18:
-                dt = (now + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
-            else:
-                dt = now.replace(second=0, microsecond=0)
-        return dt
-    
-    # Russian: "завтра" / "tomorrow"
-    if date_str_lower.startswith("завтра") or date_str_lower.startswith("tomorrow"):
-        hour, minute = extract_time(date_str_lower)
-        tomorrow = now + timedelta(days=1)
-        if hour is not None:
-            dt = tomorrow.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        else:
-            # Default to 10:00 if no time specified
-            dt = tomorrow.replace(hour=10, minute=0, second=0, microsecond=0)
-        return dt
-    
-    # Russian: "послезавтра" / "day after tomorrow"
-    if date_str_lower.startswith("послезавтра") or "day after tomorrow" in date_str_lower:
-        hour, minute = extract_time(date_str_lower)
-        day_after_tomorrow = now + timedelta(days=2)
-        if hour is not None:
-            dt = day_after_tomorrow.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        else:
-            dt = day_after_tomorrow.replace(hour=10, minute=0, second=0, microsecond=0)
-        return dt
-    
-    # Russian: "за прошлые две недели" / "за последние две недели" / "past two weeks"
-    if "за прошлые две недели" in date_str_lower or "за последние две недели" in date_str_lower or "past two weeks" in date_str_lower or "last two weeks" in date_str_lower:
-        # Calculate start of two weeks ago
-        two_weeks_ago = now - timedelta(days=14)
-        two_weeks_ago = two_weeks_ago.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Return start time (end will be calculated by caller)
-        hour, minute = extract_time(date_str_lower)
-        if hour is not None:
-            dt = two_weeks_ago.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        else:
-            dt = two_weeks_ago
-        return dt
-    
-    # Russian: "за прошлую неделю" / "на прошлой неделе" / "past week" / "last week" - previous calendar week (Mon-Sun)
-    if "за прошлую неделю" in date_str_lower or "за последнюю неделю" in date_str_lower or "на прошлой неделе" in date_str_lower or "past week" in date_str_lower or "last week" in date_str_lower:
-        # Calculate previous calendar week (Monday to Sunday)
-        days_since_monday = now.weekday()  # 0 = Monday, 6 = Sunday
-        current_week_monday = now - timedelta(days=days_since_monday)
-        last_week_monday = current_week_monday - timedelta(days=7)
-        last_week_monday = last_week_monday.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Return start of last week (Monday)
-        hour, minute = extract_time(date_str_lower)
-        if hour is not None:
-            dt = last_week_monday.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        else:
-            dt = last_week_monday
-        return dt
-    
-    # Russian: "на неделе" / "this week" / "на этой неделе"
-    if "на неделе" in date_str_lower or "на этой неделе" in date_str_lower or "this week" in date_str_lower:
-        # Calculate start of current week (Monday)
-        days_since_monday = now.weekday()  # 0 = Monday, 6 = Sunday
-        week_start = now - timedelta(days=days_since_monday)
-        week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Calculate end of current week (Sunday 23:59:59)
-        week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-        
-        # If only start_time is needed, return start of week
-        # If only end_time is needed, return end of week
-        # For simplicity, return start of week if no specific time mentioned
-        hour, minute = extract_time(date_str_lower)
-        if hour is not None:
-            dt = week_start.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        else:
-            dt = week_start
-        return dt
-    
-    # Russian: "через неделю" / "next week" / "in a week"
-    if "через неделю" in date_str_lower or "next week" in date_str_lower or "in a week" in date_str_lower:
-        hour, minute = extract_time(date_str_lower)
-        next_week = now + timedelta(days=7)
-        if hour is not None:
-            dt = next_week.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        else:
-            dt = next_week.replace(hour=10, minute=0, second=0, microsecond=0)
-        return dt
-    
-    # Russian: "через месяц" / "next month" / "in a month"
-    if "через месяц" in date_str_lower or "next month" in date_str_lower or "in a month" in date_str_lower:
-        hour, minute = extract_time(date_str_lower)
-        # Approximate: add 30 days
-        next_month = now + timedelta(days=30)
-        if hour is not None:
-            dt = next_month.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        else:
-            dt = next_month.replace(hour=10, minute=0, second=0, microsecond=0)
-        return dt
-    
-    # Russian: "через N дней" / "in N days"
-    days_match = re.search(r'через\s+(\d+)\s+дн', date_str_lower)
-    if not days_match:
-        days_match = re.search(r'in\s+(\d+)\s+days?', date_str_lower)
-    if days_match:
-        days = int(days_match.group(1))
-        hour, minute = extract_time(date_str_lower)
-        future_date = now + timedelta(days=days)
-        if hour is not None:
-            dt = future_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        else:
-            dt = future_date.replace(hour=10, minute=0, second=0, microsecond=0)
-        return dt
-    
-    # If all parsing attempts fail, raise error
-    raise ValidationError(
-        f"Unable to parse date/time: {date_str}. "
-        f"Supported formats: ISO 8601, 'YYYY-MM-DD HH:MM', or natural language "
-        f"(сегодня, завтра, послезавтра, за прошлую неделю, за прошлые две недели, через неделю, через месяц, через N дней, "
-        f"today, tomorrow, past week, last week, past two weeks, next week, next month, in N days)",
-        field="datetime",
-        value=date_str
-    )
+    return parse_date_expression(date_str, validate_timezone(timezone), now).moment
 
 
 def validate_date_not_past(date: datetime, field_name: str = "date") -> datetime:
@@ -4,13 +4,21 @@ Pytest fixtures for testing UnifiedReActEngine and related components.
 import pytest
 import time
 import os
+import json
+import tempfile
 from typing import List, Dict, Any, Optional
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from mcp import types
+
 # Mock config loader before importing anything that uses it
 os.environ.setdefault('ANTHROPIC_API_KEY', 'test-key')
 os.environ.setdefault('OPENAI_API_KEY', 'test-key')
 os.environ.setdefault('DEFAULT_MODEL', 'claude-3-haiku')
+os.environ.setdefault('GOOGLE_OAUTH_CLIENT_ID', 'test-client')
+os.environ.setdefault('GOOGLE_OAUTH_CLIENT_SECRET', 'test-secret')
+# Keep tool latency history of test runs out of data/
+os.environ.setdefault('TOOL_LATENCY_PATH', os.path.join(tempfile.gettempdir(), 'test_tool_latencies.json'))
 
 from src.core.context_manager import ConversationContext
 from src.core.unified_react_engine import UnifiedReActEngine, ReActConfig
@@ -76,6 +84,16 @@ class MockLLM:
             yield mock_chunk
 
 
+class FakeRequest:
+    """Google API request double: execute() returns the value, or calls it when callable."""
+    
+    def __init__(self, result: Any):
+        self._result = result
+    
+    def execute(self) -> Any:
+        return self._result() if callable(self._result) else self._result
+
+
 class MockResponse:
     """Mock LLM response."""
     
@@ -183,3 +201,28 @@ def create_test_engine_with_mock_llm(
     engine.fast_llm = mock_llm
     
     return engine
+
+
+async def call_mcp_tool(server: Any, name: str, arguments: Dict[str, Any]) -> str:
+    """
+    Call a tool through an MCP server's CallToolRequest handler.
+    
+    Args:
+        server: MCP server wrapper (its `server` attribute is the mcp Server)
+        name: Tool name
+        arguments: Tool arguments
+        
+    Returns:
+        Text of the first content item
+    """
+    handler = server.server.request_handlers[types.CallToolRequest]
+    result = await handler(types.CallToolRequest(
+        method="tools/call",
+        params=types.CallToolRequestParams(name=name, arguments=arguments)
+    ))
+    return result.root.content[0].text
+
+
+async def call_mcp_tool_json(server: Any, name: str, arguments: Dict[str, Any]) -> Any:
+    """Call a tool through an MCP server and parse its JSON answer."""
+    return json.loads(await call_mcp_tool(server, name, arguments))
@@ -0,0 +1,67 @@
+"""
+Tests for the benchmark suite.
+
+Скриптовая модель отвечает по назначению вызова и сообщает usage;
+сценарий проходит через реальный движок и stdio stub MCP-серверы;
+сравнение с baseline помечает регрессии сверх допуска.
+"""
+import pytest
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fake_llm import ScriptedChatModel, thought_action
+from benchmarks.harness import LLMProfile, percentile, run_scenario
+from benchmarks.run import compare
+from benchmarks.scenarios import get_scenario
+from src.utils.usage_accounting import usage_purpose
+
+
+@pytest.mark.asyncio
+async def test_scripted_model_answers_per_purpose_and_reports_usage():
+    model = ScriptedChatModel(
+        scripts={
+            "think_and_plan": [thought_action("Шаг", "get_sheet_data", {"range": "A1"}), "второй"],
+            "*": ["по умолчанию"],
+        },
+        tokens_per_second=0,
+        first_token_latency=0
+    )
+    
+    @usage_purpose("think_and_plan")
+    async def plan():
+        return await model.ainvoke([HumanMessage(content="x" * 400)])
+    
+    first = await plan()
+    assert "<action>" in first.content and "get_sheet_data" in first.content
+    assert first.usage_metadata["input_tokens"] == 100
+    assert (await plan()).content == "второй"
+    assert (await plan()).content == "второй"
+    assert (await model.ainvoke("привет")).content == "по умолчанию"
+    assert model.total_calls == 4
+    assert percentile([1, 2, 3, 4], 50) == 2 and percentile([1, 2, 3, 4], 95) == 4
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {"scenarios": {"s": {"latency_p50_ms": 100, "llm_calls": 4, "ws_bytes": 1000}}}
+    current = {"scenarios": {
+        "s": {"latency_p50_ms": 115, "llm_calls": 6, "ws_bytes": 500},
+        "new": {"latency_p50_ms": 1},
+    }}
+    
+    comparison = compare(current, baseline, tolerance=0.2)
+    
+    assert comparison["regressions"] == ["s.llm_calls: 4 -> 6 (+50%)"]
+    assert comparison["scenarios"]["s"]["ws_bytes"]["change"] == -0.5
+    assert "new" not in comparison["scenarios"]
+
+
+@pytest.mark.asyncio
+async def test_meeting_scenario_runs_through_stub_mcp_servers():
+    scenario = get_scenario("meeting_scheduling", latency_scale=0.1)
+    
+    result = await run_scenario(scenario, repeat=1, warmup=0, profile=LLMProfile(tokens_per_second=0, first_token_latency=0))
+    
+    assert result["statuses"] == {"completed": 1}
+    assert result["tool_calls"] == 2
+    assert result["llm_calls"] >= 3
+    assert result["ws_bytes"] > 0 and result["ws_messages"] > 0
+    assert result["peak_rss_mb"] > 0
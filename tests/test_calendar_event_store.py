@@ -0,0 +1,250 @@
+"""
+Tests for the local event store of the calendar server.
+
+Двойник Calendar API выдаёт syncToken и изменения с момента токена
+(отменённые события — со статусом "cancelled"), а устаревший токен
+отклоняет с 410. Выборки по диапазону из хранилища должны совпадать с
+ответом API, а запросов к API — становиться меньше.
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from src.mcp_servers.calendar_store import CalendarEventStore, parse_timestamp
+from src.mcp_servers.google_calendar_server import EVENT_FIELDS, GoogleCalendarMCPServer
+from tests.conftest import FakeRequest, call_mcp_tool_json
+
+TIME_ZONE = "Europe/Moscow"
+
+
+class FakeCalendar:
+    """Calendar API double: events with change versions, sync tokens and paging."""
+    
+    def __init__(self, page_size: int = 2):
+        self.page_size = page_size
+        self.events_by_id: Dict[str, Dict[str, Any]] = {}
+        self.changed_at: Dict[str, int] = {}
+        self.version = 0
+        self.oldest_valid_token = 0
+        self.calls: Counter = Counter()
+        self._next_id = 0
+    
+    def events(self):
+        return self
+    
+    def calendarList(self):
+        return _CalendarList()
+    
+    def put(self, summary: str, start: Dict[str, str], end: Dict[str, str], event_id: Optional[str] = None) -> str:
+        if event_id is None:
+            self._next_id += 1
+            event_id = f"event{self._next_id}"
+        self.version += 1
+        self.events_by_id[event_id] = {"id": event_id, "status": "confirmed", "summary": summary, "start": start, "end": end}
+        self.changed_at[event_id] = self.version
+        return event_id
+    
+    def cancel(self, event_id: str) -> None:
+        self.version += 1
+        self.events_by_id[event_id]["status"] = "cancelled"
+        self.changed_at[event_id] = self.version
+    
+    def _in_range(self, event, time_min, time_max) -> bool:
+        start = _bound(event["start"])
+        end = _bound(event["end"])
+        return (time_min is None or end > parse_timestamp(time_min)) and (time_max is None or start < parse_timestamp(time_max))
+    
+    def list(self, calendarId, syncToken=None, pageToken=None, maxResults=250, timeMin=None, timeMax=None, orderBy=None, **kwargs):
+        self.calls["list_sync" if syncToken else "list"] += 1
+        
+        def answer():
+            if syncToken is not None and int(syncToken) < self.oldest_valid_token:
+                raise HttpError(httplib2.Response({"status": 410}), b'{"error": {"code": 410, "message": "Gone"}}')
+            if syncToken is not None:
+                items = [e for i, e in self.events_by_id.items() if self.changed_at[i] > int(syncToken)]
+            else:
+                items = [
+                    e for e in self.events_by_id.values()
+                    if e["status"] != "cancelled" and self._in_range(e, timeMin, timeMax)
+                ]
+            if orderBy == "startTime":
+                items.sort(key=lambda e: (_bound(e["start"]), _bound(e["end"])))
+            size = min(maxResults, self.page_size)
+            start = int(pageToken or 0)
+            response = {"items": [dict(e) for e in items[start:start + size]], "timeZone": TIME_ZONE}
+            if start + size < len(items):
+                response["nextPageToken"] = str(start + size)
+            else:
+                response["nextSyncToken"] = str(self.version)
+            return response
+        
+        return FakeRequest(answer)
+    
+    def get(self, calendarId, eventId, **kwargs):
+        return FakeRequest(lambda: dict(self.events_by_id[eventId]))
+    
+    def insert(self, calendarId, body):
+        return FakeRequest(lambda: self.events_by_id[self.put(body["summary"], body["start"], body["end"])])
+    
+    def update(self, calendarId, eventId, body):
+        return FakeRequest(lambda: self.events_by_id[self.put(body["summary"], body["start"], body["end"], event_id=eventId)])
+    
+    def delete(self, calendarId, eventId):
+        return FakeRequest(lambda: self.cancel(eventId))
+
+
+class _CalendarList:
+    def list(self, **kwargs):
+        return FakeRequest(lambda: {"items": [{"id": "me@example.com", "primary": True}, {"id": "team@group.calendar.google.com"}]})
+
+
+def _bound(value: Dict[str, str]) -> float:
+    if "dateTime" in value:
+        return parse_timestamp(value["dateTime"])
+    return parse_timestamp(f"{value['date']}T00:00:00+03:00")
+
+
+def _at(day: int, hour: int) -> Dict[str, str]:
+    return {"dateTime": f"2026-10-{day:02d}T{hour:02d}:00:00+03:00"}
+
+
+def _calendar() -> FakeCalendar:
+    calendar = FakeCalendar()
+    calendar.put("Планёрка", _at(19, 10), _at(19, 11))
+    calendar.put("Обед", _at(19, 13), _at(19, 14))
+    calendar.put("Отпуск", {"date": "2026-10-20"}, {"date": "2026-10-22"})
+    calendar.put("Ночной релиз", _at(19, 23), {"dateTime": "2026-10-20T01:00:00+03:00"})
+    calendar.put("Ретро", _at(23, 16), _at(23, 17))
+    return calendar
+
+
+RANGES = [
+    ("2026-10-19T00:00:00+03:00", "2026-10-20T00:00:00+03:00"),
+    ("2026-10-20T00:00:00+03:00", "2026-10-21T00:00:00+03:00"),
+    ("2026-10-19T11:00:00+03:00", "2026-10-19T13:00:00+03:00"),
+    ("2026-10-18T21:00:00Z", "2026-10-25T21:00:00Z"),
+]
+
+
+def _api_ids(calendar: FakeCalendar, time_min: str, time_max: str) -> List[str]:
+    calls = calendar.calls.copy()
+    ids, page_token = [], None
+    while True:
+        response = calendar.list("primary", pageToken=page_token, timeMin=time_min, timeMax=time_max, orderBy="startTime").execute()
+        ids += [e["id"] for e in response["items"]]
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            calendar.calls = calls
+            return ids
+
+
+def _store_ids(store: CalendarEventStore, time_min: str, time_max: str) -> List[str]:
+    return [e["id"] for e in store.events("primary", time_min, time_max)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    calendar = _calendar()
+    store = CalendarEventStore(tmp_path / "calendar_events.sqlite3", lambda: calendar, EVENT_FIELDS)
+    yield calendar, store
+    store.close()
+
+
+def test_ranges_are_served_locally_after_full_sync(store):
+    calendar, store = store
+    for time_min, time_max in RANGES:
+        assert _store_ids(store, time_min, time_max) == _api_ids(calendar, time_min, time_max)
+    
+    # One full sync (paged), then no calls within the sync interval
+    assert calendar.calls == Counter(list=3)
+    assert [e["summary"] for e in store.events("primary", *RANGES[0], max_results=2)] == ["Планёрка", "Обед"]
+    with pytest.raises(ValueError):
+        store.events("primary", "2026-10-19T00:00:00", None)
+
+
+def test_incremental_sync_applies_changes(store):
+    calendar, store = store
+    store.events("primary", *RANGES[0])
+    calendar.put("Обед", _at(19, 15), _at(19, 16), event_id="event2")
+    calendar.cancel("event1")
+    calendar.put("Созвон", _at(21, 12), _at(21, 13))
+    
+    store.sync_interval_sec = 0
+    for time_min, time_max in RANGES:
+        assert _store_ids(store, time_min, time_max) == _api_ids(calendar, time_min, time_max)
+    
+    # One full sync, then a delta per read: the first one has two pages of changes
+    assert calendar.calls["list"] == 3
+    assert calendar.calls["list_sync"] == len(RANGES) + 1
+    assert [e["summary"] for e in store.events("primary", *RANGES[0])] == ["Обед", "Ночной релиз"]
+
+
+def test_expired_sync_token_triggers_full_sync(store):
+    calendar, store = store
+    store.events("primary", *RANGES[0])
+    calendar.cancel("event5")
+    calendar.put("Новое", _at(24, 10), _at(24, 11))
+    calendar.oldest_valid_token = calendar.version + 1
+    
+    store.sync("primary")
+    
+    assert calendar.calls["list_sync"] == 1 and calendar.calls["list"] == 6
+    for time_min, time_max in RANGES:
+        assert _store_ids(store, time_min, time_max) == _api_ids(calendar, time_min, time_max)
+
+
+@pytest.mark.asyncio
+async def test_server_reads_store_and_invalidates_on_writes(tmp_path):
+    server = GoogleCalendarMCPServer("token.json", event_store_path=tmp_path / "calendar_events.sqlite3")
+    server._calendar_service = calendar = _calendar()
+    today = {"timeMin": RANGES[0][0], "timeMax": RANGES[0][1], "maxResults": 10}
+    
+    # The first full sync runs in the background: the call meanwhile goes to the API
+    with server._event_store._lock:
+        listed = await call_mcp_tool_json(server, "list_events", today)
+        # The API pages by two events
+        assert [e["summary"] for e in listed["items"]] == ["Планёрка", "Обед"] and listed["nextPageToken"]
+        assert not server._event_store.is_ready("primary")
+    server._event_store._full_sync_threads["primary"].join(5)
+    assert server._event_store.is_ready("primary")
+    
+    for _ in range(5):
+        listed = await call_mcp_tool_json(server, "list_events", today)
+    assert [e["summary"] for e in listed["items"]] == ["Планёрка", "Обед", "Ночной релиз"]
+    assert calendar.calls == Counter(list=4)
+    
+    created = await call_mcp_tool_json(server, "create_event", {"summary": "Демо", "start": _at(19, 15), "end": _at(19, 16)})
+    listed = await call_mcp_tool_json(server, "list_events", today)
+    assert created["id"] in [e["id"] for e in listed["items"]]
+    await call_mcp_tool_json(server, "delete_event", {"eventId": "event1"})
+    listed = await call_mcp_tool_json(server, "list_events", today)
+    assert [e["summary"] for e in listed["items"]] == ["Обед", "Демо", "Ночной релиз"]
+    assert calendar.calls == Counter(list=4, list_sync=2)
+    
+    # Extra fields are not stored: fetched from the API
+    await call_mcp_tool_json(server, "list_events", {**today, "fields": "reminders"})
+    assert calendar.calls["list"] == 5
+
+
+@pytest.mark.asyncio
+async def test_only_own_calendars_are_stored(tmp_path):
+    server = GoogleCalendarMCPServer("token.json", event_store_path=tmp_path / "calendar_events.sqlite3")
+    server._calendar_service = calendar = _calendar()
+    today = {"timeMin": RANGES[0][0], "timeMax": RANGES[0][1], "maxResults": 10}
+    
+    # An attendee's calendar (free/busy fallback) goes to the API on every call, nothing is synced
+    for _ in range(3):
+        await call_mcp_tool_json(server, "list_events", {**today, "calendarId": "colleague@example.com"})
+    assert calendar.calls == Counter(list=3)
+    assert server._event_store._connect().execute("SELECT calendar_id FROM calendar_sync_state").fetchall() == []
+    
+    # Calendars of calendarList are served from the store once synced in the background
+    team = {**today, "calendarId": "team@group.calendar.google.com"}
+    await call_mcp_tool_json(server, "list_events", team)
+    server._event_store._full_sync_threads["team@group.calendar.google.com"].join(5)
+    for _ in range(3):
+        await call_mcp_tool_json(server, "list_events", team)
+    assert calendar.calls == Counter(list=7)
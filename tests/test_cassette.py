@@ -0,0 +1,108 @@
+"""
+Tests for record/replay cassettes.
+
+Разговор записывается против stdio stub MCP-серверов и скриптовой модели,
+затем воспроизводится без серверов и без вызовов модели; события
+WebSocket (без волатильных полей) должны совпасть байт в байт.
+"""
+import json
+import pytest
+from typing import Any, Dict, List
+
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.harness import BenchmarkEngine
+from benchmarks.scenarios import get_scenario
+from benchmarks.stub_mcp_server import StubMCPServers
+from src.api.websocket_manager import WebSocketManager
+from src.core.capability_registry import CapabilityRegistry
+from src.core.context_manager import ConversationContext
+from src.core.mode_adapters import AgentModeAdapter
+from src.core.providers.mcp_provider import MCPToolProvider
+from src.utils import mcp_loader
+from src.utils.cassette import (
+    Cassette,
+    CassetteChatModel,
+    CassetteMissError,
+    normalize,
+    request_key,
+    use_cassette,
+)
+from src.utils.mcp_loader import MCPServerManager
+
+
+class CapturingWebSocket:
+    def __init__(self):
+        self.messages: List[Dict[str, Any]] = []
+    
+    async def accept(self) -> None:
+        pass
+    
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        self.messages.append(message)
+    
+    async def close(self, code: int = 1000, reason: Any = None) -> None:
+        pass
+
+
+async def _run_conversation(scenario, inner: ScriptedChatModel, cassette: Cassette) -> bytes:
+    session_id = "cassette-session"
+    registry = CapabilityRegistry()
+    registry.register_provider(MCPToolProvider())
+    ws_manager = WebSocketManager()
+    websocket = CapturingWebSocket()
+    await ws_manager.connect(websocket, session_id)
+    engine = BenchmarkEngine(
+        config=AgentModeAdapter(registry, ws_manager, session_id).get_config(),
+        capability_registry=registry,
+        ws_manager=ws_manager,
+        session_id=session_id,
+        llm=CassetteChatModel(inner=inner)
+    )
+    
+    with use_cassette(cassette):
+        result = await engine.execute(goal=scenario.goal, context=ConversationContext(session_id=session_id))
+    await ws_manager.drain(session_id, timeout=10.0)
+    
+    assert result["status"] == "completed"
+    return json.dumps(normalize(websocket.messages), ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+
+def test_request_matching_ignores_volatile_fields():
+    first = {"messages": [{"id": "msg_01AbCdEfGh", "content": "Сегодня 2024-06-01T10:00:00+03:00, запрос 7f9c2ba4-e88f-11ee-9a1b-0242ac120002"}]}
+    second = {"messages": [{"id": "msg_02ZyXwVuTs", "content": "Сегодня 2025-01-15T18:30:12+03:00, запрос 0b1c2d3e-aaaa-4bbb-8ccc-0123456789ab"}]}
+    other = {"messages": [{"id": "msg_01AbCdEfGh", "content": "Другой запрос"}]}
+    
+    assert request_key("llm", first) == request_key("llm", second)
+    assert request_key("llm", first) != request_key("llm", other)
+
+
+@pytest.mark.asyncio
+async def test_recorded_conversation_replays_byte_identically(tmp_path):
+    scenario = get_scenario("meeting_scheduling", latency_scale=0.1)
+    path = tmp_path / "session.json"
+    
+    recorder = ScriptedChatModel(scripts=scenario.scripts, tokens_per_second=0, first_token_latency=0)
+    async with StubMCPServers(scenario.servers) as stubs:
+        recorded = await _run_conversation(scenario, recorder, Cassette(path, mode="record"))
+    assert stubs.tool_calls == 2
+    
+    kinds = [interaction["kind"] for interaction in json.loads(path.read_text(encoding="utf-8"))["interactions"]]
+    assert kinds.count("mcp") == 2
+    assert kinds.count("llm") == recorder.total_calls
+    
+    # No MCP servers and a model that must not be called
+    previous_manager = mcp_loader._mcp_manager
+    mcp_loader._mcp_manager = MCPServerManager()
+    try:
+        silent = ScriptedChatModel(scripts={"*": ["не должно вызываться"]}, tokens_per_second=0, first_token_latency=0)
+        replayed = await _run_conversation(scenario, silent, Cassette(path, mode="replay", speed="max"))
+        
+        assert silent.total_calls == 0
+        assert replayed == recorded
+        
+        exhausted = Cassette(path, mode="replay", speed="max")
+        exhausted._used = set(range(len(exhausted.interactions)))
+        with pytest.raises(CassetteMissError):
+            await exhausted.call_tool({"server": "calendar", "tool": "list_events", "arguments": {}}, None)
+    finally:
+        mcp_loader._mcp_manager = previous_manager
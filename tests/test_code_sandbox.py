@@ -0,0 +1,158 @@
+"""
+Tests for the sandboxed worker pool behind execute_python_code.
+
+Воркеры запускаются заранее, зависший код убивается по дедлайну,
+а пул продолжает обслуживать следующие запросы.
+"""
+import pytest
+import asyncio
+import time
+
+from src.utils.code_sandbox import SandboxPool
+from src.mcp_tools.code_execution_tools import PythonCodeExecutionTool
+from src.utils.exceptions import ToolExecutionError
+
+
+def _make_pool(**kwargs) -> SandboxPool:
+    kwargs.setdefault("size", 2)
+    kwargs.setdefault("preload_modules", ())
+    return SandboxPool(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_many_small_executions_reuse_workers():
+    """Мелкие вызовы идут через уже запущенные процессы."""
+    pool = _make_pool()
+    await pool.start()
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            pool.execute("result = sum(data['values']) * 2", input_data={"values": [i, 1]})
+            for i in range(40)
+        ])
+        elapsed = time.perf_counter() - started
+        
+        assert [r.result for r in results] == [(i + 1) * 2 for i in range(40)]
+        assert len({r.worker_pid for r in results}) <= 2
+        assert elapsed < 5
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_infinite_loop_is_killed_and_pool_recovers():
+    """Бесконечный цикл прерывается по таймауту, следующий вызов работает."""
+    pool = _make_pool(size=1)
+    await pool.start()
+    try:
+        started = time.perf_counter()
+        stuck = await pool.execute("while True:\n    pass", timeout=1)
+        assert stuck.timed_out
+        assert time.perf_counter() - started < 3
+        
+        after = await pool.execute("result = 'alive'")
+        assert after.result == "alive"
+        assert after.worker_pid != stuck.worker_pid
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_executions_do_not_leak_workers():
+    """Отменённые вызовы не забирают процессы навсегда: пул продолжает работать."""
+    pool = _make_pool(size=2)
+    await pool.start()
+    try:
+        tasks = [
+            asyncio.create_task(pool.execute("while True:\n    pass", timeout=30))
+            for _ in range(pool.size + 1)
+        ]
+        await asyncio.sleep(0.5)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        after = await asyncio.wait_for(pool.execute("result = 'alive'"), timeout=30)
+        assert after.result == "alive"
+        assert len(pool._workers) == pool.size
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_memory_limit_is_enforced():
+    """Попытка выделить больше лимита памяти завершается ошибкой."""
+    pool = _make_pool(size=1, memory_limit=256 * 1024 * 1024)
+    await pool.start()
+    try:
+        outcome = await pool.execute("x = bytearray(1024 * 1024 * 1024)\nresult = len(x)")
+        assert outcome.error
+        assert outcome.result is None
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_workers_are_recycled():
+    """После заданного числа запусков воркер заменяется новым процессом."""
+    pool = _make_pool(size=1, max_executions_per_worker=2)
+    await pool.start()
+    try:
+        first = await pool.execute("result = 1")
+        second = await pool.execute("result = 2")
+        third = await pool.execute("result = 3")
+        
+        assert first.worker_pid == second.worker_pid
+        assert third.worker_pid != first.worker_pid
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_large_output_is_truncated():
+    """Большой stdout обрезается и помечается флагом."""
+    pool = _make_pool(size=1, max_output_chars=100)
+    await pool.start()
+    try:
+        outcome = await pool.execute("import sys\nsys.stdout.write('x' * 1000)\nresult = list(range(500))")
+        assert outcome.stdout_truncated
+        assert outcome.result_truncated
+        assert len(outcome.stdout) < 200
+        assert not outcome.stderr_truncated
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_tool_keeps_response_format(monkeypatch):
+    """Инструмент возвращает тот же текстовый формат и те же ошибки."""
+    pool = _make_pool(size=1)
+    monkeypatch.setattr("src.mcp_tools.code_execution_tools.get_sandbox_pool", lambda: pool)
+    tool = PythonCodeExecutionTool()
+    try:
+        response = await tool._arun("import sys\nsys.stdout.write('hi')\nresult = {'a': 1}")
+        assert response == 'Result:\n{\n  "a": 1\n}\n\nOutput:\nhi'
+        
+        with pytest.raises(ToolExecutionError, match="Code execution failed"):
+            await tool._arun("result = 1 / 0")
+        with pytest.raises(ToolExecutionError, match="timeout after 1 seconds"):
+            await tool._arun("while True:\n    pass", timeout=1)
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_tool_prints_non_json_results_verbatim(monkeypatch):
+    """Множества, даты и прочие не-JSON значения выводятся как str(), без JSON-кавычек."""
+    pool = _make_pool(size=1)
+    monkeypatch.setattr("src.mcp_tools.code_execution_tools.get_sandbox_pool", lambda: pool)
+    tool = PythonCodeExecutionTool()
+    try:
+        assert await tool._arun("result = {1, 2}") == "Result:\n{1, 2}"
+        assert await tool._arun("result = datetime(2024, 1, 1)") == "Result:\n2024-01-01 00:00:00"
+        assert await tool._arun("result = (1, 'a')") == "Result:\n(1, 'a')"
+        assert await tool._arun("result = {'tags': {'x'}}") == "Result:\n{'tags': {'x'}}"
+        # Strings are still JSON-encoded, as before
+        assert await tool._arun("result = 'text'") == 'Result:\n"text"'
+    finally:
+        await pool.shutdown()
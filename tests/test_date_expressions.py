@@ -0,0 +1,210 @@
+"""
+Tests for the date expression parser shared by the calendar tools.
+
+Выражения разбираются относительно фиксированного момента — среды
+14.10.2026, 15:30 по Москве: для каждого проверяются диапазон (для выборок
+событий) и момент (для начала события). Отдельно — что validators.parse_datetime
+и инструменты календаря строят из них те же границы.
+"""
+from datetime import datetime
+
+import pytest
+import pytz
+
+from src.mcp_tools.calendar_tools import DeleteCalendarEventsTool, GetCalendarEventsTool
+from src.utils import date_expressions
+from src.utils.date_expressions import parse_date_expression
+from src.utils.exceptions import ValidationError
+from src.utils.validators import parse_datetime
+
+TZ = pytz.timezone("Europe/Moscow")
+NOW = TZ.localize(datetime(2026, 10, 14, 15, 30))
+
+
+def _t(value: str) -> datetime:
+    """'MM-DD HH:MM' of October 2026 (or '11-01 ...') in Moscow time."""
+    return TZ.localize(datetime.strptime(f"2026-{value}", "%Y-%m-%d %H:%M"))
+
+
+# expression: (start, end, moment, has_time)
+CASES = {
+    # Days
+    "сегодня": ("10-14 00:00", "10-15 00:00", "10-14 15:30", False),
+    "Сегодня": ("10-14 00:00", "10-15 00:00", "10-14 15:30", False),
+    "today": ("10-14 00:00", "10-15 00:00", "10-14 15:30", False),
+    "завтра": ("10-15 00:00", "10-16 00:00", "10-15 10:00", False),
+    "tomorrow": ("10-15 00:00", "10-16 00:00", "10-15 10:00", False),
+    "послезавтра": ("10-16 00:00", "10-17 00:00", "10-16 10:00", False),
+    "day after tomorrow": ("10-16 00:00", "10-17 00:00", "10-16 10:00", False),
+    "вчера": ("10-13 00:00", "10-14 00:00", "10-13 00:00", False),
+    "позавчера": ("10-12 00:00", "10-13 00:00", "10-12 00:00", False),
+    "через 3 дня": ("10-17 00:00", "10-18 00:00", "10-17 10:00", False),
+    "через 1 день": ("10-15 00:00", "10-16 00:00", "10-15 10:00", False),
+    "in 5 days": ("10-19 00:00", "10-20 00:00", "10-19 10:00", False),
+    "через месяц": ("11-13 00:00", "11-14 00:00", "11-13 10:00", False),
+    "next month": ("11-13 00:00", "11-14 00:00", "11-13 10:00", False),
+    # Times
+    "завтра в 10": ("10-15 10:00", "10-16 00:00", "10-15 10:00", True),
+    "завтра в 10:30": ("10-15 10:30", "10-16 00:00", "10-15 10:30", True),
+    "завтра в 10 часов": ("10-15 10:00", "10-16 00:00", "10-15 10:00", True),
+    "послезавтра в 9 утра": ("10-16 09:00", "10-17 00:00", "10-16 09:00", True),
+    "завтра в 7 вечера": ("10-15 19:00", "10-16 00:00", "10-15 19:00", True),
+    "tomorrow at 2 pm": ("10-15 14:00", "10-16 00:00", "10-15 14:00", True),
+    "tomorrow at 12 am": ("10-15 00:00", "10-16 00:00", "10-15 00:00", True),
+    "сегодня в 18:00": ("10-14 18:00", "10-15 00:00", "10-14 18:00", True),
+    # Today at a time already past: the moment is tomorrow, the range stays today
+    "сегодня в 10": ("10-14 10:00", "10-15 00:00", "10-15 10:00", True),
+    "в 15:00": ("10-14 15:00", "10-15 00:00", "10-15 15:00", True),
+    "at 17": ("10-14 17:00", "10-15 00:00", "10-14 17:00", True),
+    "через 2 дня в 16.45": ("10-16 16:45", "10-17 00:00", "10-16 16:45", True),
+    # Parts of the day
+    "завтра утром": ("10-15 09:00", "10-15 12:00", "10-15 09:00", False),
+    "сегодня вечером": ("10-14 18:00", "10-14 22:00", "10-14 18:00", False),
+    "сегодня после обеда": ("10-14 14:00", "10-14 18:00", "10-14 15:30", False),
+    "послезавтра днем": ("10-16 12:00", "10-16 17:00", "10-16 12:00", False),
+    "завтра до обеда": ("10-15 09:00", "10-15 13:00", "10-15 09:00", False),
+    "завтра в обед": ("10-15 13:00", "10-15 14:00", "10-15 13:00", False),
+    "tomorrow afternoon": ("10-15 14:00", "10-15 18:00", "10-15 14:00", False),
+    # Weekdays: the nearest one, today included; "следующ..." - strictly after today
+    "в пятницу": ("10-16 00:00", "10-17 00:00", "10-16 10:00", False),
+    "в понедельник": ("10-19 00:00", "10-20 00:00", "10-19 10:00", False),
+    # Today's weekday: the range is today, a moment already past is a week later
+    "в среду": ("10-14 00:00", "10-15 00:00", "10-21 10:00", False),
+    "в среду в 10": ("10-14 10:00", "10-15 00:00", "10-21 10:00", True),
+    "в среду после обеда": ("10-14 14:00", "10-14 18:00", "10-14 15:30", False),
+    "в следующую среду": ("10-21 00:00", "10-22 00:00", "10-21 10:00", False),
+    "во вторник в 11": ("10-20 11:00", "10-21 00:00", "10-20 11:00", True),
+    "в пятницу после обеда": ("10-16 14:00", "10-16 18:00", "10-16 14:00", False),
+    "friday evening": ("10-16 18:00", "10-16 22:00", "10-16 18:00", False),
+    "next monday at 2 pm": ("10-19 14:00", "10-20 00:00", "10-19 14:00", True),
+    "в воскресенье": ("10-18 00:00", "10-19 00:00", "10-18 10:00", False),
+    # Dates: DD.MM[.YYYY], never a time
+    "20.10.2026": ("10-20 00:00", "10-21 00:00", "10-20 10:00", False),
+    "20.10": ("10-20 00:00", "10-21 00:00", "10-20 10:00", False),
+    "20.10.26 в 15:00": ("10-20 15:00", "10-21 00:00", "10-20 15:00", True),
+    "1.11.2026 утром": ("11-01 09:00", "11-01 12:00", "11-01 09:00", False),
+    "13.10.2026": ("10-13 00:00", "10-14 00:00", "10-13 00:00", False),
+    "в 12.05": ("10-14 12:05", "10-15 00:00", "10-15 12:05", True),
+    # Weeks: Monday to Monday
+    "на неделе": ("10-12 00:00", "10-19 00:00", "10-12 00:00", False),
+    "на этой неделе": ("10-12 00:00", "10-19 00:00", "10-12 00:00", False),
+    "this week": ("10-12 00:00", "10-19 00:00", "10-12 00:00", False),
+    "на прошлой неделе": ("10-05 00:00", "10-12 00:00", "10-05 00:00", False),
+    "за прошлую неделю": ("10-05 00:00", "10-12 00:00", "10-05 00:00", False),
+    "за последнюю неделю": ("10-05 00:00", "10-12 00:00", "10-05 00:00", False),
+    "last week": ("10-05 00:00", "10-12 00:00", "10-05 00:00", False),
+    "на следующей неделе": ("10-19 00:00", "10-26 00:00", "10-19 10:00", False),
+    "next week": ("10-19 00:00", "10-26 00:00", "10-19 10:00", False),
+    "на следующей неделе в 12:00": ("10-19 00:00", "10-26 00:00", "10-19 12:00", True),
+    "на этой неделе в пятницу": ("10-16 00:00", "10-17 00:00", "10-16 10:00", False),
+    "на следующей неделе в четверг в 15": ("10-22 15:00", "10-23 00:00", "10-22 15:00", True),
+    "на прошлой неделе во вторник": ("10-06 00:00", "10-07 00:00", "10-06 00:00", False),
+    # Periods
+    "за прошлые две недели": ("09-30 00:00", "10-14 15:30", "09-30 00:00", False),
+    "за последние 2 недели": ("09-30 00:00", "10-14 15:30", "09-30 00:00", False),
+    "past two weeks": ("09-30 00:00", "10-14 15:30", "09-30 00:00", False),
+    "через неделю": ("10-21 00:00", "10-22 00:00", "10-21 10:00", False),
+    "in a week": ("10-21 00:00", "10-22 00:00", "10-21 10:00", False),
+    "через 2 недели в 9:15": ("10-28 09:15", "10-29 00:00", "10-28 09:15", True),
+}
+
+ABSOLUTE = {
+    "2026-10-20": ("10-20 00:00", "10-21 00:00", "10-20 00:00", False),
+    "2026-10-20 14:00": ("10-20 14:00", "10-21 00:00", "10-20 14:00", True),
+    "2026-10-20T14:00:00+03:00": ("10-20 14:00", "10-21 00:00", "10-20 14:00", True),
+    "2026-10-20T11:00:00Z": ("10-20 14:00", "10-21 00:00", "10-20 14:00", True),
+    "2026-10-20T14:00": ("10-20 14:00", "10-21 00:00", "10-20 14:00", True),
+}
+
+
+@pytest.mark.parametrize("expression", list(CASES) + list(ABSOLUTE))
+def test_expression_resolves_to_range_and_moment(expression):
+    start, end, moment, has_time = CASES.get(expression) or ABSOLUTE[expression]
+    result = parse_date_expression(expression, "Europe/Moscow", NOW)
+    
+    assert (result.start, result.end, result.moment) == (_t(start), _t(end), _t(moment))
+    assert result.has_time is has_time
+    assert result.is_absolute is (expression in ABSOLUTE)
+    assert result.start.utcoffset() == result.end.utcoffset() == result.moment.utcoffset()
+
+
+def test_reference_time_and_timezone_are_explicit():
+    evening = TZ.localize(datetime(2026, 10, 14, 20, 0))
+    assert parse_date_expression("сегодня", now=evening).moment == _t("10-15 10:00")
+    
+    # Same instant, other timezone: another day there
+    tokyo = parse_date_expression("завтра в 10", "Asia/Tokyo", TZ.localize(datetime(2026, 10, 14, 23, 0)))
+    assert tokyo.moment.isoformat() == "2026-10-16T10:00:00+09:00"
+    
+    # Memoized per reference date: the next day gets its own result
+    assert parse_date_expression("завтра", now=NOW).start == _t("10-15 00:00")
+    assert parse_date_expression("завтра", now=TZ.localize(datetime(2026, 10, 15, 9, 0))).start == _t("10-16 00:00")
+    
+    # Periods ending now follow the time of day, not the cache
+    assert parse_date_expression("за прошлые две недели", now=evening).end == evening
+    
+    # A part of the day that is over, or today's weekday before DEFAULT_HOUR
+    night = TZ.localize(datetime(2026, 10, 14, 22, 30))
+    assert parse_date_expression("вечером", now=night).moment == _t("10-15 18:00")
+    assert parse_date_expression("в среду вечером", now=night).moment == _t("10-21 18:00")
+    morning = TZ.localize(datetime(2026, 10, 14, 9, 0))
+    assert parse_date_expression("в среду", now=morning).moment == _t("10-14 10:00")
+
+
+def test_repeated_expressions_are_memoized():
+    date_expressions.cache_clear()
+    for expression in CASES:
+        parse_date_expression(expression, now=NOW)
+        parse_date_expression(expression.upper(), now=NOW)
+    assert date_expressions._resolve.cache_info().misses == len({e.lower() for e in CASES})
+
+
+@pytest.mark.parametrize("expression", ["", "   ", "когда-нибудь", "2026-13-45", "в 25:00", "31.02.2026", "32.10.2026"])
+def test_unrecognized_expression_raises_validation_error(expression):
+    with pytest.raises(ValidationError):
+        parse_date_expression(expression, now=NOW)
+
+
+def test_unknown_timezone_raises_validation_error():
+    with pytest.raises(ValidationError) as error:
+        parse_date_expression("завтра", "Mars/Olympus", NOW)
+    assert error.value.field == "timezone"
+
+
+def test_parse_datetime_returns_the_moment():
+    assert parse_datetime("завтра в 10", now=NOW) == _t("10-15 10:00")
+    assert parse_datetime("на следующей неделе", now=NOW) == _t("10-19 10:00")
+    assert parse_datetime("2026-10-20 14:00") == _t("10-20 14:00")
+    assert parse_datetime("20.10.2026", now=NOW) == _t("10-20 10:00")
+    with pytest.raises(ValidationError):
+        parse_datetime("Europe", "Mars/Olympus")
+
+
+class _CalendarManager:
+    """MCP manager double recording list_events arguments."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    async def call_tool(self, name, arguments, server_name=None):
+        self.calls.append((name, arguments))
+        return {"items": [], "count": 0}
+
+
+@pytest.mark.asyncio
+async def test_calendar_tools_query_expression_ranges(monkeypatch):
+    manager = _CalendarManager()
+    monkeypatch.setattr("src.mcp_tools.calendar_tools.get_mcp_manager", lambda: manager)
+    
+    await GetCalendarEventsTool()._arun(start_time="2026-10-20", end_time="2026-10-22")
+    await GetCalendarEventsTool()._arun(start_time="2026-10-20 09:00", end_time="2026-10-20 18:00")
+    await DeleteCalendarEventsTool()._arun(start_time="2026-10-20 09:00")
+    await DeleteCalendarEventsTool()._arun(start_time="2026-10-20", end_time="2026-10-21 12:00")
+    
+    ranges = [(args["timeMin"], args.get("timeMax")) for _, args in manager.calls]
+    assert ranges == [
+        ("2026-10-20T00:00:00+03:00", "2026-10-23T00:00:00+03:00"),
+        ("2026-10-20T09:00:00+03:00", "2026-10-20T18:00:00+03:00"),
+        ("2026-10-20T09:00:00+03:00", "2026-10-21T09:00:00+03:00"),
+        ("2026-10-20T00:00:00+03:00", "2026-10-21T12:00:00+03:00"),
+    ]
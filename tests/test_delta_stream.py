@@ -0,0 +1,52 @@
+"""
+Tests for delta streaming of answer and thinking text.
+
+События несут только новый текст с offset/seq; полный текст приходит в
+редких checkpoint'ах и в финальных событиях.
+"""
+import pytest
+
+from src.core.unified_react_engine import UnifiedReActEngine
+from src.utils.delta_stream import DeltaStream
+
+
+def test_delta_payloads_rebuild_text_with_geometric_checkpoints():
+    stream = DeltaStream(checkpoint_min_chars=100)
+    rebuilt = ""
+    checkpoints = []
+    total_chars = 0
+    
+    for i in range(1000):
+        payload = stream.append("слово ")
+        assert payload["offset"] == len(rebuilt)
+        assert payload["seq"] == i + 1
+        rebuilt += payload["chunk"]
+        if "content" in payload:
+            assert payload["content"] == rebuilt
+            checkpoints.append(payload["offset"])
+        total_chars += sum(len(value) for value in payload.values() if isinstance(value, str))
+    
+    assert stream.text == rebuilt and stream.length == 6000
+    assert len(checkpoints) == 6
+    # Checkpoints double the text each time: total stays linear in answer length
+    assert total_chars < 3 * len(rebuilt)
+    assert stream.checkpoint() == {"content": rebuilt, "offset": 6000, "seq": 1000}
+
+
+@pytest.mark.asyncio
+async def test_thought_parser_streams_deltas_across_split_tags(mock_ws_manager):
+    parser = UnifiedReActEngine.StreamingThoughtParser(mock_ws_manager, "s1", intent_id="intent-1")
+    
+    for chunk in ["<tho", "ught>Нужно ", "найти ", "встречи  ", "</tho", "ught>\n<action>", "list_events</action>"]:
+        await parser.process_chunk(chunk)
+    
+    chunks = [e["data"] for e in mock_ws_manager.events if e["type"] == "thinking_chunk"]
+    appends = [e["data"] for e in mock_ws_manager.events if e["type"] == "intent_thinking_append"]
+    completed = [e["data"] for e in mock_ws_manager.events if e["type"] == "thinking_completed"]
+    
+    assert "".join(c["chunk"] for c in chunks) == completed[0]["content"] == "Нужно найти встречи  "
+    assert [c["seq"] for c in chunks] == list(range(1, len(chunks) + 1))
+    assert all(not c["chunk"].endswith("</") for c in chunks)
+    assert "".join(a["text"] for a in appends) == completed[0]["content"]
+    assert parser.get_thought() == "Нужно найти встречи"
+    assert parser.get_remaining_buffer() == "\n<action>list_events</action>"
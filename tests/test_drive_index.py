@@ -0,0 +1,160 @@
+"""
+Tests for the local Drive metadata index of the workspace server.
+
+Индекс строится обходом дерева папки за несколько запросов files.list и
+поддерживается лентой изменений Drive; поиск по имени не зависит от
+регистра, диакритики и разделителей, находит опечатки и ограничивается
+подпапкой. Сервер с включённым индексом не обращается к Drive за поиском.
+"""
+import pytest
+
+from benchmarks.drive_index import DOCUMENT, SPREADSHEET, FakeDrive
+from src.mcp_servers.drive_index import FOLDER_MIME_TYPE, DriveMetadataIndex, normalize_name
+from src.mcp_servers.google_workspace_server import GoogleWorkspaceMCPServer
+from src.utils.drive_query import name_contains_fragments
+from tests.conftest import call_mcp_tool_json
+
+
+def _workspace() -> FakeDrive:
+    drive = FakeDrive()
+    drive.files_by_id["root"] = {"id": "root", "name": "Workspace", "mimeType": FOLDER_MIME_TYPE, "parents": [], "trashed": False}
+    drive.create("Отчёт_Продажи-2026.xlsx", "root", SPREADSHEET, file_id="report")
+    drive.create("Résumé final", "root", file_id="resume")
+    drive.create("Йогурт план", "root", file_id="yogurt")
+    drive.create("Архив", "root", FOLDER_MIME_TYPE, file_id="archive")
+    drive.create("отчет продажи 2025", "archive", file_id="old_report")
+    drive.create("Отчёт чужой", "elsewhere", file_id="foreign")
+    drive.log.clear()
+    return drive
+
+
+def _names(files) -> list:
+    return [f["name"] for f in files]
+
+
+@pytest.fixture
+def index(tmp_path):
+    drive = _workspace()
+    index = DriveMetadataIndex(tmp_path / "drive_index.sqlite3", lambda: drive, sync_interval_sec=0)
+    index.ensure_fresh("root")
+    yield drive, index
+    index.close()
+
+
+def test_bootstrap_covers_the_tree_in_few_queries(tmp_path):
+    drive = FakeDrive.tree(2000, subfolders=4, files_per_folder=20)
+    folders = sum(f["mimeType"] == FOLDER_MIME_TYPE for f in drive.files_by_id.values())
+    index = DriveMetadataIndex(tmp_path / "drive_index.sqlite3", lambda: drive)
+    
+    assert index.bootstrap("root") == 2000
+    assert drive.calls["files.list"] < folders / 10
+    assert index.root_folder_id == "root"
+    assert "Отчёт чужой" not in _names(index.search("Отчёт чужой"))
+    index.close()
+    
+    # Reopened index keeps the tree and the page token
+    reopened = DriveMetadataIndex(tmp_path / "drive_index.sqlite3", lambda: drive)
+    calls = drive.calls["files.list"]
+    reopened.ensure_fresh("root")
+    assert reopened.count() == 2000 and drive.calls["files.list"] == calls
+    reopened.close()
+
+
+def test_search_ignores_case_diacritics_and_separators(index):
+    drive, index = index
+    assert normalize_name("Отчёт_Продажи-2026.xlsx") == "отчет продажи 2026 xlsx"
+    assert normalize_name("Йогурт") == "йогурт"
+    
+    assert _names(index.search("ОТЧЕТ продажи 2026")) == ["Отчёт_Продажи-2026.xlsx"]
+    assert index.search("отчет-продажи-2026")[0]["id"] == "report"
+    assert index.search("resume")[0]["id"] == "resume"
+    assert index.search("йогурт")[0]["id"] == "yogurt"
+    # Typo: found by trigram similarity
+    assert index.search("resme fnal")[0]["id"] == "resume"
+    
+    assert not index.search("resme fnal", fuzzy=False)
+    
+    report = index.search("Отчёт_Продажи-2026")[0]
+    assert report["mimeType"] == SPREADSHEET and report["parents"] == ["root"]
+    assert report["webViewLink"].endswith("/report/view") and report["owners"][0]["emailAddress"]
+
+
+def test_fuzzy_matches_do_not_pad_substring_hits(index):
+    """Похожие имена не добавляются к точному совпадению, иначе одно совпадение превращается в выбор."""
+    drive, index = index
+    for n in (1, 2, 3):
+        drive.create(f"тест{n}.xlsx", "root", SPREADSHEET, file_id=f"test{n}")
+    index.sync()
+    
+    assert _names(index.search("тест2")) == ["тест2.xlsx"]
+    assert _names(index.search("тест2.xlsx")) == ["тест2.xlsx"]
+    assert set(_names(index.search("тест"))) == {"тест1.xlsx", "тест2.xlsx", "тест3.xlsx"}
+    # Without substring hits the fuzzy fallback still finds the typo
+    assert "тест2.xlsx" in _names(index.search("тест2.xslx"))
+
+
+def test_search_is_scoped_by_folder_and_mime_type(index):
+    drive, index = index
+    assert _names(index.search("отчет продажи", folder_id="archive")) == ["отчет продажи 2025"]
+    assert _names(index.search("отчет продажи", folder_id="root", recursive=False)) == ["Отчёт_Продажи-2026.xlsx"]
+    assert _names(index.search("отчет продажи", mime_type=DOCUMENT)) == ["отчет продажи 2025"]
+
+
+def test_changes_feed_keeps_the_index_fresh(index):
+    drive, index = index
+    drive.rename("report", "Сводка 2026")
+    drive.move("resume", "elsewhere")
+    drive.trash("yogurt")
+    drive.create("Новый план", "archive", file_id="new")
+    drive.create("Проекты", "elsewhere", FOLDER_MIME_TYPE, file_id="projects")
+    drive.create("Смета проекта", "projects", file_id="estimate")
+    drive.move("projects", "archive")
+    
+    index.ensure_fresh("root")
+    
+    assert index.search("сводка")[0]["id"] == "report"
+    assert "report" not in [f["id"] for f in index.search("отчет продажи 2026")]
+    assert not index.search("resume") and not index.search("йогурт")
+    assert index.search("новый план")[0]["id"] == "new"
+    # Folder moved into the tree comes with its contents
+    assert index.search("смета", folder_id="archive")[0]["id"] == "estimate"
+    
+    drive.trash("archive")
+    index.sync()
+    assert not index.search("смета") and not index.search("отчет продажи 2025")
+    assert index.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_server_answers_name_lookups_from_index(tmp_path):
+    drive = _workspace()
+    server = GoogleWorkspaceMCPServer("token.json", drive_index_path=tmp_path / "drive_index.sqlite3")
+    server._drive_service = drive
+    server._get_workspace_folder_id = lambda: "root"
+    
+    # The bootstrap runs in the background: lookups meanwhile go to Drive
+    with server._drive_index._lock:
+        listed = await call_mcp_tool_json(server, "workspace_list_files", {"query": "Отчёт_Продажи"})
+        assert [f["id"] for f in listed["files"]] == ["report"]
+        assert not server._drive_index.is_ready("root")
+    server._drive_index._bootstrap_thread.join(5)
+    assert server._drive_index.is_ready("root")
+    
+    listed = await call_mcp_tool_json(server, "workspace_list_files", {"query": "отчет продажи"})
+    bootstrap_calls = drive.calls["files.list"]
+    assert [f["id"] for f in listed["files"]] == ["report"]
+    
+    found = await call_mcp_tool_json(server, "workspace_search_files", {"query": "(name contains 'Resume' or name contains 'RESUME')"})
+    assert [f["id"] for f in found["files"]] == ["resume"]
+    listed = await call_mcp_tool_json(server, "workspace_list_files", {"names": ["ЙОГУРТ", "йогурт"], "mimeType": DOCUMENT})
+    assert [f["id"] for f in listed["files"]] == ["yogurt"]
+    # Tools keep `name contains` semantics: no near misses
+    listed = await call_mcp_tool_json(server, "workspace_list_files", {"query": "Отчёт_Продажи-2025"})
+    assert listed["files"] == []
+    assert drive.calls["files.list"] == bootstrap_calls
+    
+    # Other queries still go to Drive
+    await call_mcp_tool_json(server, "workspace_search_files", {"query": "fullText contains 'план'"})
+    assert drive.calls["files.list"] == bootstrap_calls + 1
+    assert name_contains_fragments("name contains 'a' and mimeType='x'") == []
+    assert name_contains_fragments("(name contains 'O\\'Neil' or name contains \"b\")") == ["O'Neil", "b"]
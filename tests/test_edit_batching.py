@@ -0,0 +1,216 @@
+"""
+Tests for transactional edit batching of the Docs and Slides servers.
+
+Одна и та же последовательность инструментов выполняется без пакетирования
+и с ним; итоговый документ должен совпасть, а число batchUpdate и чтений —
+уменьшиться. Индексы в режиме пакетирования берутся из состояния
+транзакции, а не из устаревшего чтения.
+"""
+from typing import Any, Dict, List
+
+import pytest
+
+from src.mcp_servers.edit_batching import EditBatcher, PendingEditsError
+from src.mcp_servers.google_docs_server import GoogleDocsMCPServer
+from src.mcp_servers.google_slides_server import GoogleSlidesMCPServer
+from tests.conftest import FakeRequest, call_mcp_tool_json
+
+
+class FakeDocs:
+    """Docs API double: body text as UTF-16 code units, indices from 1."""
+    
+    def __init__(self, text: str = "\n"):
+        self.units = text.encode("utf-16-le")
+        self.calls: List[str] = []
+        self.applied: List[Dict[str, Any]] = []
+    
+    @property
+    def text(self) -> str:
+        return self.units.decode("utf-16-le")
+    
+    def documents(self):
+        return self
+    
+    def get(self, documentId):
+        self.calls.append("get")
+        end_index = 1 + len(self.units) // 2
+        return FakeRequest({
+            "title": "Doc",
+            "body": {"content": [
+                {"endIndex": 1},
+                {"endIndex": end_index, "paragraph": {"elements": [{"textRun": {"content": self.text}}]}},
+            ]},
+        })
+    
+    def batchUpdate(self, documentId, body):
+        self.calls.append("batchUpdate")
+        return FakeRequest(lambda: self._apply(body["requests"]))
+    
+    def _apply(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        for request in requests:
+            (kind, data), = request.items()
+            if kind == "insertText":
+                offset = 2 * (data["location"]["index"] - 1)
+                assert 0 <= offset < len(self.units), "insert outside the body"
+                self.units = self.units[:offset] + data["text"].encode("utf-16-le") + self.units[offset:]
+            elif kind == "deleteContentRange":
+                start, end = data["range"]["startIndex"], data["range"]["endIndex"]
+                assert 1 <= start < end <= len(self.units) // 2, "delete outside the body"
+                self.units = self.units[:2 * (start - 1)] + self.units[2 * (end - 1):]
+            self.applied.append(request)
+        return {"replies": [{} for _ in requests]}
+
+
+class FakeSlides:
+    """Slides API double: slides from layouts, placeholder texts (UTF-16 indices) and styles."""
+    
+    def __init__(self):
+        self.calls: List[str] = []
+        self.layouts = [{
+            "objectId": "layout_body",
+            "layoutProperties": {"name": "TITLE_AND_BODY"},
+            "pageElements": [
+                {"objectId": "layout_title", "shape": {"shapeType": "TEXT_BOX", "placeholder": {"type": "TITLE", "index": 0}}},
+                {"objectId": "layout_text", "shape": {"shapeType": "TEXT_BOX", "placeholder": {"type": "BODY", "index": 0}}},
+            ],
+        }]
+        self.slides: List[Dict[str, Any]] = []
+        self.texts: Dict[str, str] = {}
+        self.styles: Dict[str, Dict[str, Any]] = {}
+    
+    def presentations(self):
+        return self
+    
+    def get(self, presentationId, fields=None):
+        self.calls.append("get")
+        slides = [
+            {"objectId": slide["objectId"], "pageElements": [
+                {
+                    "objectId": element_id,
+                    "shape": {
+                        "shapeType": "TEXT_BOX",
+                        "placeholder": {"type": kind},
+                        "text": {"textElements": [{"textRun": {"content": self.texts[element_id]}}]},
+                    },
+                }
+                for kind, element_id in slide["placeholders"]
+            ]}
+            for slide in self.slides
+        ]
+        return FakeRequest({"title": "Deck", "layouts": self.layouts, "slides": slides})
+    
+    def batchUpdate(self, presentationId, body):
+        self.calls.append("batchUpdate")
+        return FakeRequest(lambda: self._apply(body["requests"]))
+    
+    def _apply(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        replies = []
+        for request in requests:
+            (kind, data), = request.items()
+            if kind == "createSlide":
+                mapped = {m["layoutPlaceholder"]["type"]: m["objectId"] for m in data.get("placeholderIdMappings", [])}
+                placeholders = []
+                for i, element in enumerate(self.layouts[0]["pageElements"]):
+                    placeholder_type = element["shape"]["placeholder"]["type"]
+                    element_id = mapped.get(placeholder_type, f"{data['objectId']}_auto{i}")
+                    placeholders.append((placeholder_type, element_id))
+                    self.texts[element_id] = ""
+                self.slides.append({"objectId": data["objectId"], "placeholders": placeholders})
+                replies.append({"createSlide": {"objectId": data["objectId"]}})
+                continue
+            assert data["objectId"] in self.texts, f"{kind} of unknown object {data['objectId']}"
+            if kind == "insertText":
+                units = self.texts[data["objectId"]].encode("utf-16-le")
+                offset = 2 * data["insertionIndex"]
+                assert 0 <= offset <= len(units), "insert outside the text"
+                self.texts[data["objectId"]] = (units[:offset] + data["text"].encode("utf-16-le") + units[offset:]).decode("utf-16-le")
+            elif kind == "updateTextStyle":
+                self.styles[data["objectId"]] = data["style"]
+            replies.append({})
+        return {"replies": replies}
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [
+            {kind: (self.texts[element_id], self.styles.get(element_id)) for kind, element_id in slide["placeholders"]}
+            for slide in self.slides
+        ]
+
+
+async def _edit_document(batch_edits: bool) -> FakeDocs:
+    server = GoogleDocsMCPServer("token.json", batch_edits=batch_edits)
+    server._docs_service = docs = FakeDocs()
+    
+    await call_mcp_tool_json(server, "docs_append", {"documentId": "doc1", "content": "Отчёт 📈\n"})
+    await call_mcp_tool_json(server, "docs_append", {"documentId": "doc1", "content": "Выручка выросла\n"})
+    await call_mcp_tool_json(server, "docs_format_text", {"documentId": "doc1", "startIndex": 1, "endIndex": 6, "bold": True})
+    await call_mcp_tool_json(server, "docs_update", {"documentId": "doc1", "content": "Итоги 🚀 квартала\n"})
+    await call_mcp_tool_json(server, "docs_append", {"documentId": "doc1", "content": "Подробности ниже\n"})
+    read = await call_mcp_tool_json(server, "docs_read", {"documentId": "doc1"})
+    assert read["content"] == docs.text
+    return docs
+
+
+@pytest.mark.asyncio
+async def test_batched_document_edits_match_individual_calls():
+    individual = await _edit_document(batch_edits=False)
+    batched = await _edit_document(batch_edits=True)
+    
+    assert batched.text == individual.text == "Итоги 🚀 квартала\nПодробности ниже\n\n"
+    # Same requests with the same indices, sent in one batchUpdate after a single read
+    assert batched.applied == individual.applied
+    assert individual.calls.count("batchUpdate") == 5
+    assert batched.calls.count("batchUpdate") == 1
+    assert batched.calls.count("get") == 2
+    assert individual.calls.count("get") == 5
+
+
+async def _build_slide(batch_edits: bool) -> FakeSlides:
+    server = GoogleSlidesMCPServer("token.json", batch_edits=batch_edits)
+    server._slides_service = slides = FakeSlides()
+    
+    created = await call_mcp_tool_json(server, "slides_create_slide", {"presentationId": "pres1", "layout": "TITLE_AND_BODY"})
+    page_id = created["slideId"]
+    await call_mcp_tool_json(server, "slides_insert_text", {"presentationId": "pres1", "pageId": page_id, "targetElement": "title", "text": "Итоги"})
+    await call_mcp_tool_json(server, "slides_insert_text", {"presentationId": "pres1", "pageId": page_id, "targetElement": "body", "text": "Выручка 📈"})
+    await call_mcp_tool_json(server, "slides_insert_text", {"presentationId": "pres1", "pageId": page_id, "targetElement": "body", "text": " +12%"})
+    deck = await call_mcp_tool_json(server, "slides_get", {"presentationId": "pres1"})
+    assert deck
+    return slides
+
+
+@pytest.mark.asyncio
+async def test_batched_slide_edits_match_individual_calls():
+    individual = await _build_slide(batch_edits=False)
+    batched = await _build_slide(batch_edits=True)
+    
+    assert batched.snapshot() == individual.snapshot()
+    assert batched.snapshot()[0]["BODY"][0] == "Выручка 📈 +12%"
+    assert batched.snapshot()[0]["TITLE"][1]["bold"] is True
+    assert individual.calls.count("batchUpdate") == 5
+    assert batched.calls.count("batchUpdate") == 1
+    # Layouts once for the new slide, then the flushed read
+    assert batched.calls.count("get") == 2
+
+
+def test_rejected_batch_is_retried_without_formatting():
+    sent: List[List[Dict[str, Any]]] = []
+    
+    def execute(document_id, requests):
+        sent.append(requests)
+        if any("updateTextStyle" in request for request in requests):
+            raise RuntimeError("invalid style")
+        return {"replies": []}
+    
+    batcher = EditBatcher(execute, enabled=True, style_request_types={"updateTextStyle"})
+    batcher.submit("doc1", [{"insertText": {"location": {"index": 1}, "text": "a"}}])
+    batcher.submit("doc1", [{"updateTextStyle": {"range": {"startIndex": 1, "endIndex": 2}}}])
+    
+    assert batcher.flush("doc1") == 1
+    assert sent[-1] == [{"insertText": {"location": {"index": 1}, "text": "a"}}]
+    
+    batcher.submit("doc1", [{"updateTextStyle": {"range": {"startIndex": 1, "endIndex": 2}}}])
+    assert batcher.flush_all()["errors"]["doc1"]
+    assert batcher.pending("doc1") == 0
+    with pytest.raises(PendingEditsError):
+        batcher.submit("doc2", [{"updateTextStyle": {}}])
+        batcher.flush("doc2")
@@ -0,0 +1,332 @@
+"""
+Tests for cross-worker event fan-out and command routing.
+
+Два экземпляра приложения в одном процессе (модуль src.api.server,
+загруженный дважды, — каждый со своим WebSocketManager, SQLiteEventBus,
+SessionManager и SessionCommandRouter) делят один файл SQLite, как воркеры
+uvicorn --workers N. Агент заменён двойником, который записывает вызовы и
+контекст сессии, с которым его вызвали.
+"""
+import pytest
+import asyncio
+import importlib.util
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+import src.api.server
+from src.api.websocket_manager import WebSocketManager
+from src.api.session_manager import SessionManager, SQLiteSessionStorage
+from src.api.event_bus import SQLiteEventBus, LocalEventBus, SessionCommandRouter, create_event_bus
+from src.utils.metrics import ACTIVE_SESSIONS
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+class FakeWebSocket:
+    """Fake WebSocket that records sent messages."""
+    
+    def __init__(self):
+        self.sent: List[Dict[str, Any]] = []
+    
+    async def accept(self):
+        pass
+    
+    async def send_json(self, message: Dict[str, Any]):
+        self.sent.append(message)
+    
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+class RecordingAgent:
+    """AgentWrapper double: records commands with the session context they ran on."""
+    
+    def __init__(self):
+        self.handled: List[Dict[str, Any]] = []
+        self.release: Optional[asyncio.Event] = None
+    
+    async def process_message(self, user_message, context, session_id, file_ids=None, open_files=None):
+        self.handled.append({
+            "type": "message",
+            "session_id": session_id,
+            "content": user_message,
+            "file_ids": file_ids,
+            "uploaded_files": sorted(context.uploaded_files),
+            "execution_mode": context.execution_mode,
+        })
+        if self.release is not None:
+            await self.release.wait()
+        context.add_message("assistant", f"ответ на {user_message}")
+    
+    async def approve_plan(self, confirmation_id, context, session_id):
+        self.handled.append({"type": "approve_plan", "session_id": session_id, "confirmation_id": confirmation_id})
+    
+    async def reject_plan(self, confirmation_id, context, session_id):
+        self.handled.append({"type": "reject_plan", "session_id": session_id, "confirmation_id": confirmation_id})
+    
+    async def stop_generation(self, session_id):
+        self.handled.append({"type": "stop_generation", "session_id": session_id})
+
+
+class PausedPdfIngestor:
+    """DocumentIngestor double: a two-page PDF whose second page waits for release."""
+    
+    def __init__(self):
+        self.release = asyncio.Event()
+    
+    async def count_pdf_pages(self, path) -> int:
+        return 2
+    
+    async def extract_pdf(self, path, on_batch, total_pages):
+        await on_batch([(1, "первая страница")], 1, total_pages)
+        await self.release.wait()
+        await on_batch([(2, "вторая страница")], 2, total_pages)
+
+
+class AppInstance:
+    """One API worker: its own copy of src.api.server wired to the shared database."""
+    
+    def __init__(self, db_path, worker_id: str):
+        spec = importlib.util.spec_from_file_location(f"_server_{worker_id}", src.api.server.__file__)
+        self.server = importlib.util.module_from_spec(spec)
+        active_sessions = ACTIVE_SESSIONS._function
+        spec.loader.exec_module(self.server)
+        # The gauge is process-global: keep it on the real app
+        ACTIVE_SESSIONS.set_function(active_sessions)
+        
+        self.bus = SQLiteEventBus(db_path, worker_id=worker_id, poll_interval=0.01)
+        self.ws_manager = WebSocketManager()
+        self.ws_manager.set_event_bus(self.bus)
+        self.agent = RecordingAgent()
+        self.server.event_bus = self.bus
+        self.server.ws_manager = self.ws_manager
+        self.server.agent_wrapper = self.agent
+        self.server.session_manager = SessionManager(shared_storage=SQLiteSessionStorage(db_path))
+        self.router = SessionCommandRouter(self.bus, self.server.command_router.handlers)
+        self.server.command_router = self.router
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.server.app), base_url="http://test")
+    
+    @property
+    def handled(self) -> List[Dict[str, Any]]:
+        return self.agent.handled
+    
+    async def upload(self, session_id: str, filename: str) -> str:
+        response = await self.client.post(
+            "/api/upload",
+            files={"file": (filename, PNG, "image/png")},
+            data={"session_id": session_id}
+        )
+        assert response.status_code == 200, response.text
+        return response.json()["file_id"]
+    
+    async def start(self):
+        await self.bus.start()
+    
+    async def stop(self):
+        await self.client.aclose()
+        await self.bus.stop()
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    """Poll predicate until true or timeout."""
+    deadline = asyncio.get_event_loop().time() + timeout
+    while asyncio.get_event_loop().time() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return predicate()
+
+
+@pytest.mark.asyncio
+async def test_events_cross_workers(tmp_path):
+    """Событие от воркера-владельца доходит до клиента, подключённого к другому воркеру."""
+    worker_a = AppInstance(tmp_path / "bus.sqlite3", "worker-a")
+    worker_b = AppInstance(tmp_path / "bus.sqlite3", "worker-b")
+    await worker_a.start()
+    await worker_b.start()
+    try:
+        # Run starts on worker A
+        await worker_a.router.dispatch("s1", {"type": "message", "content": "привет"})
+        assert await _wait_for(lambda: len(worker_a.handled) == 1)
+        assert worker_a.handled[0]["type"] == "message"
+        
+        # Browser is connected to worker B
+        client = FakeWebSocket()
+        await worker_b.ws_manager.connect(client, "s1")
+        
+        await worker_a.ws_manager.send_event("s1", "intent_start", {"intent_id": "1"})
+        await worker_a.ws_manager.send_event("s1", "final_result", {"content": "готово"})
+        
+        assert await _wait_for(lambda: len(client.sent) == 2)
+        assert [m["type"] for m in client.sent] == ["intent_start", "final_result"]
+        assert [m["seq"] for m in client.sent] == [1, 2]
+        
+        # Worker B can replay events it only received through the bus
+        reconnect = FakeWebSocket()
+        await worker_b.ws_manager.connect(reconnect, "s1", last_seq=1)
+        assert await _wait_for(lambda: len(reconnect.sent) == 1)
+        assert reconnect.sent[0]["type"] == "final_result"
+    finally:
+        await worker_a.stop()
+        await worker_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_approvals_and_stop_routed_to_owner(tmp_path):
+    """approve_plan / stop_generation, пришедшие на другой воркер, выполняются на владельце."""
+    worker_a = AppInstance(tmp_path / "bus.sqlite3", "worker-a")
+    worker_b = AppInstance(tmp_path / "bus.sqlite3", "worker-b")
+    await worker_a.start()
+    await worker_b.start()
+    try:
+        await worker_a.router.dispatch("s1", {"type": "message", "content": "составь план"})
+        
+        forwarded_to = await worker_b.router.dispatch("s1", {"type": "approve_plan", "confirmation_id": "c1"})
+        assert forwarded_to == "worker-a"
+        await worker_b.router.dispatch("s1", {"type": "stop_generation"})
+        
+        assert await _wait_for(lambda: len(worker_a.handled) == 3)
+        assert [c["type"] for c in worker_a.handled] == ["message", "approve_plan", "stop_generation"]
+        assert worker_a.handled[1]["confirmation_id"] == "c1"
+        assert worker_b.handled == []
+    finally:
+        await worker_a.stop()
+        await worker_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_session_ownership_is_sticky(tmp_path):
+    """Новое сообщение на другой воркер уходит владельцу, а не перехватывает сессию."""
+    worker_a = AppInstance(tmp_path / "bus.sqlite3", "worker-a")
+    worker_b = AppInstance(tmp_path / "bus.sqlite3", "worker-b")
+    await worker_a.start()
+    await worker_b.start()
+    try:
+        await worker_a.router.dispatch("s1", {"type": "message", "content": "1"})
+        await worker_b.router.dispatch("s1", {"type": "message", "content": "2"})
+        
+        assert await _wait_for(lambda: len(worker_a.handled) == 2)
+        assert await worker_b.bus.get_session_owner("s1") == "worker-a"
+        
+        # A different session is claimed by whichever worker sees it first
+        await worker_b.router.dispatch("s2", {"type": "message", "content": "3"})
+        assert await worker_a.bus.get_session_owner("s2") == "worker-b"
+    finally:
+        await worker_a.stop()
+        await worker_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_stopped_worker_sessions_can_be_taken_over(tmp_path):
+    """После остановки владельца сессию может забрать другой воркер."""
+    worker_a = AppInstance(tmp_path / "bus.sqlite3", "worker-a")
+    worker_b = AppInstance(tmp_path / "bus.sqlite3", "worker-b")
+    await worker_a.start()
+    await worker_b.start()
+    try:
+        await worker_a.router.dispatch("s1", {"type": "message", "content": "1"})
+        await worker_a.stop()
+        
+        forwarded_to = await worker_b.router.dispatch("s1", {"type": "message", "content": "2"})
+        assert forwarded_to is None
+        assert await _wait_for(lambda: len(worker_b.handled) == 1)
+        assert worker_b.handled[0]["content"] == "2"
+    finally:
+        await worker_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_session_state_is_shared_between_workers(tmp_path):
+    """Сессия и файлы, загруженные через REST на одном воркере, видны воркеру, который выполняет сообщение."""
+    worker_a = AppInstance(tmp_path / "bus.sqlite3", "worker-a")
+    worker_b = AppInstance(tmp_path / "bus.sqlite3", "worker-b")
+    await worker_a.start()
+    await worker_b.start()
+    try:
+        # REST calls land on worker A
+        response = await worker_a.client.post("/api/session/create", json={"execution_mode": "approval"})
+        session_id = response.json()["session_id"]
+        first = await worker_a.upload(session_id, "chart.png")
+        
+        # The message arrives on worker B, which claims the session
+        assert await worker_b.router.dispatch(session_id, {"type": "message", "content": "1", "file_ids": [first]}) is None
+        assert await _wait_for(lambda: len(worker_b.handled) == 1)
+        assert worker_b.handled[0]["uploaded_files"] == [first]
+        assert worker_b.handled[0]["execution_mode"] == "approval"
+        
+        # An upload on A while B's run is in progress survives B saving the session
+        worker_b.agent.release = asyncio.Event()
+        await worker_b.router.dispatch(session_id, {"type": "message", "content": "2"})
+        assert await _wait_for(lambda: len(worker_b.handled) == 2)
+        second = await worker_a.upload(session_id, "table.png")
+        worker_b.agent.release.set()
+        await asyncio.sleep(0.05)
+        
+        # Forwarded from A to the owner B, which sees both files and its own history
+        third = await worker_a.upload(session_id, "photo.png")
+        forwarded_to = await worker_a.router.dispatch(session_id, {"type": "message", "content": "3", "file_ids": [third]})
+        assert forwarded_to == "worker-b"
+        assert await _wait_for(lambda: len(worker_b.handled) == 3)
+        assert worker_b.handled[2]["uploaded_files"] == sorted([first, second, third])
+        assert worker_a.handled == []
+        await asyncio.sleep(0.05)
+        
+        history = await worker_a.client.get(f"/api/chat/history/{session_id}")
+        assert [m["content"] for m in history.json()["messages"]] == ["ответ на 1", "ответ на 2", "ответ на 3"]
+    finally:
+        await worker_a.stop()
+        await worker_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_background_pdf_extraction_keeps_later_session_changes(tmp_path):
+    """Фоновое извлечение PDF сохраняет файл в текущую версию сессии, не затирая её."""
+    worker_a = AppInstance(tmp_path / "bus.sqlite3", "worker-a")
+    worker_b = AppInstance(tmp_path / "bus.sqlite3", "worker-b")
+    ingestor = PausedPdfIngestor()
+    worker_a.server.get_document_ingestor = lambda: ingestor
+    await worker_a.start()
+    await worker_b.start()
+    try:
+        response = await worker_a.client.post("/api/session/create", json={"execution_mode": "instant"})
+        session_id = response.json()["session_id"]
+        response = await worker_a.client.post(
+            "/api/upload",
+            files={"file": ("report.pdf", b"%PDF-1.4", "application/pdf")},
+            data={"session_id": session_id}
+        )
+        assert response.json()["status"] == "processing"
+        file_id = response.json()["file_id"]
+        
+        # B runs a message on the session while A is still extracting
+        assert await worker_b.router.dispatch(session_id, {"type": "message", "content": "1"}) is None
+        assert await _wait_for(lambda: len(worker_b.handled) == 1)
+        await asyncio.sleep(0.05)
+        ingestor.release.set()
+        
+        def stored():
+            return SQLiteSessionStorage(tmp_path / "bus.sqlite3").load(session_id)[0]
+        assert await _wait_for(lambda: stored().get_file(file_id)["status"] == "ready")
+        context = stored()
+        assert [m["content"] for m in context.messages] == ["ответ на 1"]
+        assert "вторая страница" in context.get_file(file_id)["text"]
+    finally:
+        await worker_a.stop()
+        await worker_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_local_bus_handles_everything_locally():
+    """LocalEventBus (по умолчанию) выполняет все команды в текущем процессе."""
+    bus = create_event_bus("local")
+    assert isinstance(bus, LocalEventBus)
+    handled = []
+    
+    async def handler(session_id, command):
+        handled.append(command["type"])
+    
+    router = SessionCommandRouter(bus, {"message": handler, "stop_generation": handler})
+    assert await router.dispatch("s1", {"type": "message"}) is None
+    assert await router.dispatch("s1", {"type": "stop_generation"}) is None
+    assert handled == ["message", "stop_generation"]
@@ -0,0 +1,232 @@
+"""
+Tests for partial-response field masks of the Google MCP servers.
+
+Двойник API применяет маску `fields` к полному ресурсу так же, как Google:
+инструменты должны запрашивать только поля, которые возвращают, а аргумент
+"fields" — расширять маску (или снимать её через "*").
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from src.mcp_servers.gmail_server import GmailMCPServer
+from src.mcp_servers.google_calendar_server import GoogleCalendarMCPServer
+from src.mcp_servers.google_services import extra_field_names, field_mask, split_fields
+from src.mcp_servers.google_sheets_server import GoogleSheetsMCPServer
+from src.mcp_servers.google_workspace_server import GoogleWorkspaceMCPServer
+from tests.conftest import FakeRequest, call_mcp_tool_json
+
+EVENT = {
+    "kind": "calendar#event",
+    "etag": "\"3381\"",
+    "id": "event1",
+    "status": "confirmed",
+    "htmlLink": "https://calendar.google.com/event?eid=event1",
+    "created": "2026-10-01T09:00:00Z",
+    "updated": "2026-10-02T09:00:00Z",
+    "summary": "Планёрка",
+    "description": "Итоги недели",
+    "start": {"dateTime": "2026-10-19T10:00:00+03:00"},
+    "end": {"dateTime": "2026-10-19T11:00:00+03:00"},
+    "creator": {"email": "owner@example.com", "self": True},
+    "organizer": {"email": "owner@example.com", "displayName": "Owner", "self": True},
+    "attendees": [
+        {"email": f"user{i}@example.com", "displayName": f"User {i}", "responseStatus": "accepted", "self": False, "comment": "x" * 40}
+        for i in range(5)
+    ],
+    "conferenceData": {
+        "entryPoints": [{"entryPointType": "video", "uri": "https://meet.google.com/abc", "label": "meet.google.com/abc"}],
+        "conferenceSolution": {"name": "Google Meet", "iconUri": "https://example.com/icon.png", "key": {"type": "hangoutsMeet"}},
+        "conferenceId": "abc",
+    },
+    "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 10}]},
+    "iCalUID": "event1@google.com",
+    "sequence": 3,
+}
+
+MESSAGE = {
+    "id": "msg1",
+    "threadId": "thread1",
+    "labelIds": ["INBOX", "UNREAD"],
+    "snippet": "Привет",
+    "historyId": "99001",
+    "internalDate": "1760000000000",
+    "sizeEstimate": 48213,
+    "payload": {
+        "partId": "",
+        "mimeType": "text/plain",
+        "filename": "",
+        "headers": [
+            {"name": "Subject", "value": "Отчёт"},
+            {"name": "From", "value": "a@example.com"},
+            {"name": "To", "value": "b@example.com"},
+            {"name": "Date", "value": "Mon, 19 Oct 2026 10:00:00 +0300"},
+        ] + [{"name": "Received", "value": "by mx.example.com " + "y" * 80} for _ in range(6)],
+        "body": {"size": 12, "data": "0J_RgNC40LLQtdGC"},
+    },
+}
+
+SPREADSHEET = {
+    "spreadsheetId": "sheet1",
+    "spreadsheetUrl": "https://docs.google.com/spreadsheets/d/sheet1/edit",
+    "properties": {"title": "Продажи", "locale": "ru_RU", "timeZone": "Europe/Moscow", "autoRecalc": "ON_CHANGE",
+                   "defaultFormat": {"backgroundColor": {"red": 1, "green": 1, "blue": 1}}},
+    "sheets": [
+        {
+            "properties": {"sheetId": i, "title": f"Лист{i}", "index": i, "sheetType": "GRID",
+                           "gridProperties": {"rowCount": 1000, "columnCount": 26, "frozenRowCount": 1}},
+            "conditionalFormats": [{"ranges": [{"sheetId": i}], "booleanRule": {"condition": {"type": "NOT_BLANK"}}}],
+            "data": [{"rowData": [{"values": [{"formattedValue": str(n)} for n in range(26)]} for _ in range(20)]}],
+        }
+        for i in range(3)
+    ],
+}
+
+DRIVE_FILE = {
+    "kind": "drive#file",
+    "id": "file1",
+    "name": "Отчёт.docx",
+    "mimeType": "application/vnd.google-apps.document",
+    "createdTime": "2026-10-01T09:00:00Z",
+    "modifiedTime": "2026-10-02T09:00:00Z",
+    "webViewLink": "https://docs.google.com/document/d/file1/edit",
+    "size": "2048",
+    "parents": ["folder1"],
+    "owners": [{"displayName": "Owner", "emailAddress": "owner@example.com", "photoLink": "https://example.com/p.png"}],
+    "shared": True,
+    "capabilities": {name: True for name in ("canEdit", "canComment", "canShare", "canCopy", "canDownload", "canTrash")},
+    "permissions": [{"id": "p1", "role": "owner", "type": "user"}],
+}
+
+
+def apply_mask(resource: Any, fields: Optional[str]) -> Any:
+    """Partial response as the Google APIs build it."""
+    if fields is None or fields.strip() == "*":
+        return resource
+    if isinstance(resource, list):
+        return [apply_mask(item, fields) for item in resource]
+    result: Dict[str, Any] = {}
+    for selector in split_fields(fields):
+        head, _, nested = selector.partition("(")
+        name, _, path = head.partition("/")
+        if name not in resource:
+            continue
+        sub_fields = nested[:-1] if nested else None
+        if path:
+            sub_fields = f"{path}({sub_fields})" if sub_fields else path
+        value = apply_mask(resource[name], sub_fields) if sub_fields else resource[name]
+        if isinstance(value, dict) and isinstance(result.get(name), dict):
+            result[name].update(value)
+        elif isinstance(value, list) and isinstance(result.get(name), list):
+            result[name] = [{**old, **new} for old, new in zip(result[name], value)]
+        else:
+            result[name] = value
+    return result
+
+
+class FakeGoogle:
+    """Any Google API: resource chains end in get()/list() answering with masked fixtures."""
+    
+    def __init__(self, get_result: Dict[str, Any], list_key: str = "items"):
+        self.get_result = get_result
+        self.list_key = list_key
+        self.masks: List[Optional[str]] = []
+        self.payloads: List[Any] = []
+    
+    def __getattr__(self, name):
+        # Resource accessors: events(), users(), messages(), files(), spreadsheets()
+        return lambda *args, **kwargs: self
+    
+    def _answer(self, resource: Dict[str, Any], fields: Optional[str]) -> FakeRequest:
+        self.masks.append(fields)
+        payload = apply_mask(resource, fields)
+        self.payloads.append(payload)
+        return FakeRequest(payload)
+    
+    def get(self, fields=None, **kwargs):
+        return self._answer(self.get_result, fields)
+    
+    def list(self, fields=None, **kwargs):
+        return self._answer({self.list_key: [self.get_result], "nextPageToken": None}, fields)
+
+
+def _size(payload: Any) -> int:
+    return len(json.dumps(payload, ensure_ascii=False))
+
+
+def test_field_mask_merges_requested_fields():
+    assert split_fields("id, files(id,name),owners/emailAddress") == ["id", "files(id,name)", "owners/emailAddress"]
+    assert field_mask("id,name", "name,owners(emailAddress)") == "id,name,owners(emailAddress)"
+    assert field_mask("id,name", "size", collection="files") == "nextPageToken,files(id,name,size)"
+    assert field_mask("id,name", " * ", collection="files") == "*"
+    assert extra_field_names("owners(emailAddress),capabilities/canEdit") == ["owners", "capabilities"]
+    assert extra_field_names("*") is None
+
+
+@pytest.mark.asyncio
+async def test_calendar_events_are_requested_with_masks():
+    server = GoogleCalendarMCPServer("token.json")
+    server._calendar_service = calendar = FakeGoogle(EVENT)
+    
+    event = await call_mcp_tool_json(server, "get_event", {"eventId": "event1"})
+    assert event["summary"] == "Планёрка"
+    assert event["attendees"][0] == {"email": "user0@example.com", "displayName": "User 0", "responseStatus": "accepted"}
+    assert "conferenceData" not in event and "etag" not in event
+    assert _size(event) < _size(EVENT) / 2
+    
+    event = await call_mcp_tool_json(server, "get_event", {"eventId": "event1", "fields": "conferenceData"})
+    assert event["conferenceData"] == EVENT["conferenceData"]
+    
+    listed = await call_mcp_tool_json(server, "list_events", {"timeMin": "2026-10-19T00:00:00Z", "timeMax": "2026-10-20T00:00:00Z"})
+    assert calendar.masks[-1].startswith("nextPageToken,items(id,status,")
+    assert "reminders" not in listed["items"][0]
+    
+    listed = await call_mcp_tool_json(server, "list_events", {"timeMin": "2026-10-19T00:00:00Z", "timeMax": "2026-10-20T00:00:00Z", "fields": "*"})
+    assert calendar.masks[-1] == "*"
+    assert listed["items"][0] == EVENT
+
+
+@pytest.mark.asyncio
+async def test_gmail_message_skips_unused_fields():
+    server = GmailMCPServer("token.json")
+    server._gmail_service = gmail = FakeGoogle(MESSAGE)
+    
+    message = await call_mcp_tool_json(server, "gmail_get_message", {"messageId": "msg1"})
+    
+    assert message["subject"] == "Отчёт"
+    assert message["body"] == "Привет"
+    assert gmail.payloads[-1].keys() == {"id", "threadId", "snippet", "labelIds", "payload"}
+    assert gmail.payloads[-1]["payload"].keys() == {"mimeType", "headers", "body"}
+    assert gmail.payloads[-1]["payload"]["body"] == {"data": MESSAGE["payload"]["body"]["data"]}
+
+
+@pytest.mark.asyncio
+async def test_spreadsheet_info_does_not_download_grid_data():
+    server = GoogleSheetsMCPServer("token.json")
+    server._sheets_service = sheets = FakeGoogle(SPREADSHEET)
+    
+    info = await call_mcp_tool_json(server, "sheets_get_spreadsheet_info", {"spreadsheetId": "sheet1"})
+    
+    assert info["title"] == "Продажи"
+    assert [sheet["rowCount"] for sheet in info["sheets"]] == [1000, 1000, 1000]
+    assert "data" not in sheets.payloads[-1]["sheets"][0]
+    assert _size(sheets.payloads[-1]) < _size(SPREADSHEET) / 10
+
+
+@pytest.mark.asyncio
+async def test_drive_tools_return_requested_extra_fields():
+    server = GoogleWorkspaceMCPServer("token.json")
+    server._drive_service = drive = FakeGoogle(DRIVE_FILE, list_key="files")
+    server._get_workspace_folder_id = lambda: "folder1"
+    
+    listed = await call_mcp_tool_json(server, "workspace_list_files", {"fields": "owners(emailAddress)"})
+    assert drive.masks[-1].endswith(",size,owners(emailAddress))")
+    assert listed["files"][0]["owners"] == [{"emailAddress": "owner@example.com"}]
+    assert "capabilities" not in listed["files"][0]
+    
+    info = await call_mcp_tool_json(server, "workspace_get_file_info", {"fileId": "file1"})
+    assert info["shared"] is True and "capabilities" not in info and "permissions" not in info
+    
+    info = await call_mcp_tool_json(server, "workspace_get_file_info", {"fileId": "file1", "fields": "capabilities/canEdit"})
+    assert info["capabilities"] == {"canEdit": True}
@@ -0,0 +1,60 @@
+"""
+Tests for the shared Google service factory.
+
+Сервисы строятся из встроенных discovery-документов один раз на учётные
+данные и ходят через общий пул соединений к локальной заглушке Google API;
+обновление токена выполняется одним запросом при конкурентных вызовах.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.google_service_startup import GoogleStandIn
+from src.mcp_servers.google_services import GoogleServiceFactory
+
+
+def test_services_share_credentials_and_connections(tmp_path):
+    with GoogleStandIn() as stand_in:
+        token_path = stand_in.write_token(tmp_path / "token.json")
+        factory = GoogleServiceFactory(api_endpoint=stand_in.url, token_uri=stand_in.url + "token")
+        
+        drive = factory.service("drive", "v3", token_path)
+        assert factory.service("drive", "v3", token_path) is drive
+        sheets = factory.service("sheets", "v4", token_path)
+        docs = factory.service("docs", "v1", token_path)
+        
+        for _ in range(3):
+            assert drive.files().get(fileId="file1").execute()["ok"] is True
+            sheets.spreadsheets().get(spreadsheetId="sheet1").execute()
+            docs.documents().get(documentId="doc1").execute()
+        
+        assert stand_in.requests == 9
+        assert stand_in.connections == 1
+        assert stand_in.token_requests == 0
+
+
+def test_rejected_token_is_refreshed_once_for_concurrent_calls(tmp_path):
+    with GoogleStandIn(request_delay=0.01) as stand_in:
+        token_path = stand_in.write_token(tmp_path / "token.json", token="token-0")
+        stand_in.rejected_tokens.add("token-0")
+        drive = GoogleServiceFactory(api_endpoint=stand_in.url, token_uri=stand_in.url + "token").service("drive", "v3", token_path)
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: drive.files().get(fileId=f"file{i}").execute(), range(8)))
+        
+        assert all(result["ok"] for result in results)
+        assert stand_in.token_requests == 1
+        assert json.loads(token_path.read_text())["token"] == "token-1"
+
+
+def test_expired_token_is_refreshed_at_construction(tmp_path):
+    with GoogleStandIn() as stand_in:
+        token_path = stand_in.write_token(tmp_path / "token.json", expired=True)
+        factory = GoogleServiceFactory(api_endpoint=stand_in.url, token_uri=stand_in.url + "token")
+        
+        slides = factory.service("slides", "v1", token_path)
+        drive = factory.service("drive", "v3", token_path)
+        slides.presentations().get(presentationId="pres1").execute()
+        drive.files().get(fileId="file1").execute()
+        
+        assert stand_in.token_requests == 1
+        assert json.loads(token_path.read_text())["token"] == "token-1"
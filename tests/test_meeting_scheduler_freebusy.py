@@ -0,0 +1,205 @@
+"""
+Tests for chunked FreeBusy queries of MeetingScheduler.
+
+Двойник сервера календаря отвечает на freebusy_query с задержкой и, как
+Google, отклоняет запросы с числом календарей больше лимита. Планировщик
+должен делить большие списки участников на чанки и запрашивать их
+параллельно, для упавших чанков — параллельно, но с ограничением,
+запрашивать list_events, а участников с неизвестной занятостью — называть,
+а не считать свободными.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+import pytest
+import pytz
+
+from src.core.meeting_scheduler import AvailabilityUnknownError, MeetingScheduler
+
+LATENCY = 0.05
+
+
+class FakeCalendarServer:
+    """MCP manager double for the calendar server: freebusy with an item limit and latency, paged list_events."""
+    
+    def __init__(self, max_items: int = 50, latency: float = LATENCY, page_size: int = 250):
+        self.max_items = max_items
+        self.latency = latency
+        self.page_size = page_size
+        self.busy: Dict[str, List[Dict[str, str]]] = {}
+        self.failing_freebusy: Set[str] = set()
+        self.backend_errors: Set[str] = set()
+        self.missing_calendars: Set[str] = set()
+        self.failing_list: Set[str] = set()
+        self.calls: List[tuple] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def call_tool(self, name: str, arguments: dict, server_name: Optional[str] = None):
+        self.calls.append((name, arguments))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return [_Text(json.dumps(self._answer(name, arguments)))]
+        finally:
+            self.in_flight -= 1
+    
+    def _answer(self, name: str, arguments: dict) -> dict:
+        if name == "freebusy_query":
+            ids = [item["id"] for item in arguments["items"]]
+            if len(ids) > self.max_items:
+                # The calendar server returns API errors as {"error": ...}
+                return {"error": "Google Calendar API error: tooManyCalendarsRequestedForTimeRange"}
+            if self.failing_freebusy & set(ids):
+                return {"error": "Google Calendar API error: backendError"}
+            return {"calendars": {
+                email: {"busy": [], "errors": [{"domain": "global", "reason": "backendError"}]}
+                if email in self.backend_errors else {"busy": self.busy.get(email, []), "errors": []}
+                for email in ids if email not in self.missing_calendars
+            }}
+        if name == "list_events":
+            email = arguments["calendarId"]
+            if email in self.failing_list:
+                raise ConnectionError(f"calendar server unreachable for {email}")
+            items = [{"summary": "Busy", "start": {"dateTime": s["start"]}, "end": {"dateTime": s["end"]}} for s in self.busy.get(email, [])]
+            offset = int(arguments.get("pageToken") or 0)
+            size = min(self.page_size, arguments["maxResults"])
+            page = {"items": items[offset:offset + size], "count": len(items[offset:offset + size])}
+            if offset + size < len(items):
+                page["nextPageToken"] = str(offset + size)
+            return page
+        raise AssertionError(f"Unexpected tool {name}")
+    
+    def freebusy_calls(self) -> List[List[str]]:
+        return [[item["id"] for item in args["items"]] for name, args in self.calls if name == "freebusy_query"]
+    
+    def list_calls(self) -> List[str]:
+        return [args["calendarId"] for name, args in self.calls if name == "list_events"]
+
+
+class _Text:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _attendees(count: int) -> List[str]:
+    return [f"user{i:03d}@example.com" for i in range(count)]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeCalendarServer()
+    monkeypatch.setattr("src.core.meeting_scheduler.get_mcp_manager", lambda: server)
+    monkeypatch.setattr("src.core.meeting_scheduler.get_local_timezone", lambda: pytz.UTC)
+    return server
+
+
+async def _find_slot(scheduler: MeetingScheduler, attendees: List[str]):
+    return await scheduler.find_available_slot(
+        participants=attendees,
+        duration_minutes=50,
+        buffer_minutes=10,
+        search_start=datetime(2026, 1, 9, 9, 0),
+        search_end=datetime(2026, 1, 9, 18, 0)
+    )
+
+
+@pytest.mark.asyncio
+async def test_large_attendee_lists_are_queried_in_concurrent_chunks(server):
+    attendees = _attendees(170)
+    server.busy["user169@example.com"] = [{"start": "2026-01-09T09:00:00Z", "end": "2026-01-09T12:00:00Z"}]
+    
+    started = time.perf_counter()
+    slot = await _find_slot(MeetingScheduler(use_mcp=True), attendees)
+    elapsed = time.perf_counter() - started
+    
+    chunks = server.freebusy_calls()
+    assert [len(chunk) for chunk in chunks] == [50, 50, 50, 20]
+    assert sum(chunks, []) == attendees
+    assert server.max_in_flight == 4 and elapsed < 3 * LATENCY
+    assert not server.list_calls()
+    # The busy attendee of the last chunk is taken into account
+    assert slot["start"] == datetime(2026, 1, 9, 12, 10)
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_falls_back_to_concurrent_list_events(server):
+    attendees = _attendees(60)
+    server.failing_freebusy.add("user007@example.com")
+    server.busy["user007@example.com"] = [{"start": "2026-01-09T09:00:00Z", "end": "2026-01-09T11:00:00Z"}]
+    server.busy["user055@example.com"] = [{"start": "2026-01-09T11:00:00Z", "end": "2026-01-09T13:00:00Z"}]
+    
+    started = time.perf_counter()
+    slot = await _find_slot(MeetingScheduler(use_mcp=True, max_concurrency=10), attendees)
+    elapsed = time.perf_counter() - started
+    
+    # Only the failed chunk goes to list_events, at most max_concurrency at a time
+    assert sorted(server.list_calls()) == attendees[:50]
+    assert server.max_in_flight == 10
+    assert elapsed < 8 * LATENCY
+    assert slot["start"] == datetime(2026, 1, 9, 13, 10)
+
+
+@pytest.mark.asyncio
+async def test_per_calendar_errors_fall_back_for_those_attendees_only(server):
+    attendees = _attendees(5)
+    server.backend_errors.add("user003@example.com")
+    server.busy["user003@example.com"] = [{"start": "2026-01-09T09:00:00Z", "end": "2026-01-09T10:00:00Z"}]
+    
+    slot = await _find_slot(MeetingScheduler(use_mcp=True), attendees)
+    
+    assert server.list_calls() == ["user003@example.com"]
+    assert slot["start"] == datetime(2026, 1, 9, 10, 10)
+
+
+@pytest.mark.asyncio
+async def test_attendees_missing_from_freebusy_are_not_free(server):
+    """Участник без записи в ответе FreeBusy проверяется через list_events."""
+    attendees = _attendees(5)
+    server.missing_calendars.add("user002@example.com")
+    server.busy["user002@example.com"] = [{"start": "2026-01-09T09:00:00Z", "end": "2026-01-09T10:00:00Z"}]
+    
+    slot = await _find_slot(MeetingScheduler(use_mcp=True), attendees)
+    
+    assert server.list_calls() == ["user002@example.com"]
+    assert slot["start"] == datetime(2026, 1, 9, 10, 10)
+    
+    server.failing_list.add("user002@example.com")
+    with pytest.raises(AvailabilityUnknownError) as error:
+        await _find_slot(MeetingScheduler(use_mcp=True), attendees)
+    assert error.value.attendees == ["user002@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_fallback_follows_list_events_pages(server):
+    """Занятость из list_events собирается со всех страниц."""
+    server.page_size = 2
+    server.backend_errors.add("user000@example.com")
+    server.busy["user000@example.com"] = [
+        {"start": f"2026-01-09T{hour:02d}:00:00Z", "end": f"2026-01-09T{hour + 1:02d}:00:00Z"}
+        for hour in range(9, 14)
+    ]
+    
+    slot = await _find_slot(MeetingScheduler(use_mcp=True), _attendees(1))
+    
+    assert server.list_calls() == ["user000@example.com"] * 3
+    assert slot["start"] == datetime(2026, 1, 9, 14, 10)
+
+
+@pytest.mark.asyncio
+async def test_unknown_availability_is_reported_not_treated_as_free(server):
+    attendees = _attendees(60)
+    server.max_items = 40
+    server.failing_list.update({"user012@example.com", "user049@example.com"})
+    
+    with pytest.raises(AvailabilityUnknownError) as error:
+        await _find_slot(MeetingScheduler(use_mcp=True, freebusy_chunk_size=50), attendees)
+    
+    assert error.value.attendees == ["user012@example.com", "user049@example.com"]
+    assert "user012@example.com" in str(error.value)
+    # The chunk over the server's item limit fails as a whole; the other one does not
+    assert len(server.list_calls()) == 50
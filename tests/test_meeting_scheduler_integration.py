@@ -92,8 +92,10 @@ class TestMeetingSchedulerMCPIntegration:
                 search_end=datetime(2026, 1, 9, 18, 0)
             )
         
-        # Проверяем что все участники включены в запрос
-        call_args = mock_mcp_manager.call_tool.call_args
+        # Проверяем что все участники включены в запрос FreeBusy
+        # (без календарей в ответе занятость затем запрашивается через list_events)
+        call_args = mock_mcp_manager.call_tool.call_args_list[0]
+        assert call_args[0][0] == "freebusy_query"
         items = call_args[0][1].get("items", [])
         item_ids = [item["id"] for item in items]
         
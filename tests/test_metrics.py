@@ -0,0 +1,198 @@
+"""
+Tests for the in-process metrics subsystem and the /metrics endpoint.
+
+Скриптовый прогон движка с фейковыми LLM и инструментом, после чего
+эндпоинт /metrics должен отдавать гистограммы по всем слоям.
+"""
+import pytest
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+
+from src.agents.model_factory import LLMMetricsCallback
+from src.core.action_provider import (
+    ActionCapability,
+    ActionProvider,
+    CapabilityCategory,
+    ProviderType,
+)
+from src.core.capability_registry import CapabilityRegistry
+from src.core.context_manager import ConversationContext
+from src.core.result_analyzer import Analysis
+from src.core.unified_react_engine import ReActConfig, UnifiedReActEngine
+from src.api.websocket_manager import WebSocketManager
+from src.utils.config_loader import MCPServerConfig
+from src.utils.mcp_loader import MCPConnection
+from src.utils.metrics import Gauge, Histogram, MetricsRegistry, REGISTRY
+from tests.conftest import MockWebSocketManager
+
+
+class FakeMCPSession:
+    """Stand-in for an MCP ClientSession."""
+    
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> Any:
+        return type("Result", (), {"isError": False, "content": [{"type": "text", "text": "ok"}]})()
+
+
+class FakeWebSocket:
+    """Fake WebSocket that accepts every message."""
+    
+    async def accept(self):
+        pass
+    
+    async def send_json(self, message: Dict[str, Any]):
+        pass
+
+
+class FakeProvider(ActionProvider):
+    """Provider with a single read tool."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def execute(self, capability_name: str, arguments: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> Any:
+        self.calls += 1
+        return f"rows for {arguments.get('query')}"
+    
+    def get_capabilities(self) -> List[ActionCapability]:
+        return [ActionCapability(
+            name="fake_lookup",
+            description="Look up rows",
+            category=CapabilityCategory.READ,
+            provider_type=ProviderType.MCP_TOOL,
+            input_schema={"type": "object", "properties": {"query": {"type": "string"}}},
+            service="sheets"
+        )]
+    
+    @property
+    def provider_type(self) -> ProviderType:
+        return ProviderType.MCP_TOOL
+    
+    async def health_check(self) -> bool:
+        return True
+
+
+def _sample(text: str, name: str) -> float:
+    """Value of the first sample line starting with name."""
+    for line in text.splitlines():
+        if line.startswith(name + " ") or line.startswith(name + "{"):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not found in metrics output")
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Гистограмма отдаётся в текстовом формате Prometheus."""
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("demo_seconds", "Demo.", ["tool"], buckets=(0.1, 1.0)))
+    histogram.observe(0.05, tool="a")
+    histogram.observe(0.5, tool="a")
+    histogram.observe(5, tool="a")
+    
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{tool="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{tool="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{tool="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{tool="a"} 3' in text
+
+
+def test_label_cardinality_is_bounded():
+    """Лишние комбинации меток сворачиваются в серию 'other'."""
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("bounded_seconds", "Demo.", ["tool"], max_series=3))
+    for i in range(10):
+        histogram.observe(0.01, tool=f"tool-{i}")
+    
+    assert len(histogram._series) == 4
+    assert histogram.get_count(tool="other") == 7
+    
+    gauge = registry.register(Gauge("demo_gauge", "Demo."))
+    gauge.set_function(lambda: 3)
+    assert "demo_gauge 3" in registry.render()
+
+
+@pytest.mark.asyncio
+async def test_scripted_run_is_visible_on_metrics_endpoint():
+    """После прогона движка /metrics содержит LLM, ReAct, инструменты и сессии."""
+    from fastapi.testclient import TestClient
+    from src.api import server
+    
+    REGISTRY.clear()
+    
+    llm = FakeListChatModel(
+        responses=["Нужно посмотреть строки", "Данных достаточно"],
+        callbacks=[LLMMetricsCallback("fake-model")]
+    )
+    provider = FakeProvider()
+    registry = CapabilityRegistry()
+    registry.register_provider(provider)
+    
+    engine = UnifiedReActEngine(
+        config=ReActConfig(
+            mode="agent",
+            allowed_categories=[CapabilityCategory.READ],
+            max_iterations=5,
+            enable_alternatives=False
+        ),
+        capability_registry=registry,
+        ws_manager=MockWebSocketManager(),
+        session_id="metrics-session"
+    )
+    plans = [
+        {"tool_name": "fake_lookup", "arguments": {"query": "sales"}, "description": "Lookup"},
+        {"tool_name": "FINISH", "arguments": {}, "description": "Done", "reasoning": "Done"},
+    ]
+    
+    async def scripted_think_and_plan(state, context, file_ids):
+        thought = ""
+        async for chunk in llm.astream([HumanMessage(content=state.goal)]):
+            thought += chunk.content
+        return thought, plans[state.iteration - 1]
+    
+    engine._think_and_plan = scripted_think_and_plan
+    engine._needs_tools = AsyncMock(return_value=True)
+    engine._generate_final_answer = AsyncMock(return_value="Готово")
+    engine.result_analyzer.analyze = AsyncMock(return_value=Analysis(
+        is_success=True, is_goal_achieved=False, is_error=False, progress_toward_goal=0.5
+    ))
+    
+    result = await engine.execute(goal="покажи продажи", context=ConversationContext(session_id="metrics-session"))
+    assert result["status"] == "completed"
+    assert provider.calls == 1
+    
+    connection = MCPConnection(MCPServerConfig(name="fake-server", endpoint="stub"))
+    connection.connected = True
+    connection.session = FakeMCPSession()
+    connection.tools = {"fake_lookup": {}}
+    assert await connection.call_tool("fake_lookup", {"query": "sales"}) == "ok"
+    
+    ws_manager = WebSocketManager()
+    websocket = FakeWebSocket()
+    await ws_manager.connect(websocket, "metrics-session")
+    await ws_manager.send_event("metrics-session", "message_complete", {})
+    await ws_manager.drain("metrics-session", timeout=1.0)
+    ws_manager.disconnect(websocket, "metrics-session")
+    
+    server.ws_manager.active_connections["metrics-session"] = {object()}
+    try:
+        response = TestClient(server.app).get("/metrics")
+    finally:
+        server.ws_manager.active_connections.pop("metrics-session", None)
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    
+    assert _sample(text, 'multiagent_llm_request_duration_seconds_count{model="fake-model"}') == 2
+    assert _sample(text, 'multiagent_llm_time_to_first_token_seconds_count{model="fake-model"}') == 2
+    assert _sample(text, "multiagent_react_iterations_per_run_count") == 1
+    assert _sample(text, "multiagent_react_iterations_per_run_sum") == 2
+    for phase in ("think", "act", "observe"):
+        assert _sample(text, f'multiagent_react_phase_duration_seconds_count{{phase="{phase}"}}') >= 1
+    assert _sample(text, 'multiagent_capability_execute_duration_seconds_count{tool="fake_lookup",status="ok"}') == 1
+    assert _sample(text, 'multiagent_mcp_call_tool_duration_seconds_count{server="fake-server",status="ok"}') == 1
+    assert _sample(text, "multiagent_websocket_send_duration_seconds_count") >= 1
+    assert _sample(text, "multiagent_active_sessions") >= 1
+    assert _sample(text, "multiagent_agent_runs_in_flight") == 0
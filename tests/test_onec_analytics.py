@@ -0,0 +1,164 @@
+"""
+Tests for the revenue aggregates store of the 1C server.
+
+Заглушка OData отдаёт проведённые документы реализации по фильтру
+$filter (период, организация) с постраничной выдачей и считает запросы.
+Выручка из хранилища должна совпадать с агрегацией документов, закрытые
+месяцы — загружаться один раз, а перекрывающиеся периоды — не вызывать
+повторной выгрузки.
+"""
+import re
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from src.mcp_servers.onec_analytics import RevenueAggregateStore
+from src.mcp_servers.onec_server import OneCMCPServer
+from tests.conftest import call_mcp_tool_json
+
+ORG_A = "00000000-0000-0000-0000-00000000000a"
+ORG_B = "00000000-0000-0000-0000-00000000000b"
+COUNTERPARTIES = {"cp1": "Альфа", "cp2": "Бета", "cp3": "Гамма"}
+TODAY = date(2026, 10, 18)
+
+
+class StubOData:
+    """1C OData double: posted sales documents filtered by $filter, paged by $top/$skip."""
+    
+    def __init__(self):
+        self.documents: List[Dict[str, Any]] = []
+        self.calls: Counter = Counter()
+        self.periods: List[tuple] = []
+    
+    def add(self, day: str, organization: str, counterparty: str, amount: float, posted: bool = True) -> None:
+        self.documents.append({
+            "Date": f"{day}T12:00:00", "Organization_Key": organization,
+            "Counterparty_Key": counterparty, "Amount": amount, "Posted": posted,
+        })
+    
+    async def request(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self.calls[path] += 1
+        if path == "Catalog_Контрагенты":
+            return {"value": [{"Ref_Key": key, "Description": name} for key, name in COUNTERPARTIES.items()]}
+        assert path == "Document_РеализацияТоваровУслуг"
+        query = params["$filter"]
+        low = re.search(r"Date ge datetime'([^']+)'", query).group(1)
+        high = re.search(r"Date le datetime'([^']+)'", query).group(1)
+        organization = re.search(r"Organization_Key eq guid'([^']+)'", query)
+        if params.get("$skip", 0) == 0:
+            self.periods.append((low[:10], high[:10], organization.group(1) if organization else None))
+        matched = [
+            {field: doc[field] for field in params["$select"].split(",")}
+            for doc in sorted(self.documents, key=lambda d: d["Date"])
+            if low <= doc["Date"] <= high and doc["Posted"]
+            and (organization is None or doc["Organization_Key"] == organization.group(1))
+        ]
+        skip = params.get("$skip", 0)
+        return {"value": matched[skip:skip + params["$top"]]}
+    
+    def document_queries(self) -> int:
+        return self.calls["Document_РеализацияТоваровУслуг"]
+
+
+def _odata() -> StubOData:
+    odata = StubOData()
+    for month in range(1, 11):
+        odata.add(f"2026-{month:02d}-03", ORG_A, "cp1", 100.0 * month)
+        odata.add(f"2026-{month:02d}-17", ORG_A, "cp2", 10.0 * month)
+        odata.add(f"2026-{month:02d}-28", ORG_B, "cp1", 1.5 * month)
+        odata.add(f"2026-{month:02d}-11", ORG_B, "cp3", 7.0, posted=False)
+    odata.add("2026-03-31", ORG_B, "cp3", 42.0)
+    return odata
+
+
+def _servers(tmp_path, odata: StubOData):
+    """Server with the analytics store and one aggregating documents, same OData."""
+    stored = OneCMCPServer(tmp_path / "onec_config.json", analytics_store_path=tmp_path / "onec_analytics.sqlite3")
+    stored._odata_request = odata.request
+    stored._analytics_store._today = lambda: TODAY
+    plain = OneCMCPServer(tmp_path / "onec_config.json")
+    plain._odata_request = odata.request
+    return stored, plain
+
+
+def _fetcher(odata: StubOData):
+    """fetch_sales over the stub, as the server builds it."""
+    server = OneCMCPServer("onec_config.json")
+    server._odata_request = odata.request
+    return lambda start, end, org_guid: server._fetch_posted_sales(start, end, org_guid, max_records=None)
+
+
+PERIODS = [
+    {"from": "2026-07-01", "to": "2026-09-30"},
+    {"from": "2026-07-01", "to": "2026-08-31"},
+    {"from": "2026-04-01", "to": "2026-09-30"},
+    {"from": "2026-01-15", "to": "2026-03-10"},
+    {"from": "2026-02-10", "to": "2026-02-20"},
+    {"from": "2026-01-01", "to": "2026-10-31", "organization_guid": ORG_B},
+]
+
+
+@pytest.mark.asyncio
+async def test_store_answers_match_document_aggregation(tmp_path):
+    odata = _odata()
+    stored, plain = _servers(tmp_path, odata)
+    for period in PERIODS:
+        assert await call_mcp_tool_json(stored, "onec_revenue_by_counterparty_month", period) == \
+            await call_mcp_tool_json(plain, "onec_revenue_by_counterparty_month", period)
+    
+    march = await call_mcp_tool_json(stored, "onec_revenue_by_counterparty_month", {"from": "2026-03-01", "to": "2026-03-31"})
+    assert march["total_records"] == 4
+    assert [(r["counterparty_name"], r["revenue"]) for r in march["revenue_by_counterparty_month"]] == \
+        [("Альфа", 304.5), ("Бета", 30.0), ("Гамма", 42.0)]
+
+
+@pytest.mark.asyncio
+async def test_overlapping_periods_load_each_month_once(tmp_path):
+    odata = _odata()
+    stored, _ = _servers(tmp_path, odata)
+    
+    await call_mcp_tool_json(stored, "onec_revenue_by_counterparty_month", PERIODS[0])
+    await call_mcp_tool_json(stored, "onec_revenue_by_counterparty_month", PERIODS[1])
+    await call_mcp_tool_json(stored, "onec_revenue_by_counterparty_month", PERIODS[2])
+    await call_mcp_tool_json(stored, "onec_revenue_by_counterparty_month", {**PERIODS[2], "organization_guid": ORG_A})
+    
+    # Q3 in one query, April-June in one more; August-September and the organization filter from the store
+    assert odata.periods == [("2026-07-01", "2026-09-30", None), ("2026-04-01", "2026-06-30", None)]
+    assert odata.calls["Catalog_Контрагенты"] == 1
+    
+    # Partially covered edge months are read from their documents
+    await call_mcp_tool_json(stored, "onec_revenue_by_counterparty_month", {"from": "2026-03-20", "to": "2026-10-05"})
+    assert odata.periods[2:] == [
+        ("2026-03-20", "2026-03-31", None),
+        ("2026-10-01", "2026-10-05", None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_only_open_months_are_reloaded(tmp_path):
+    odata = _odata()
+    store = RevenueAggregateStore(tmp_path / "onec_analytics.sqlite3", _fetcher(odata), today=lambda: TODAY)
+    
+    assert await store.refresh(date(2026, 1, 1), date(2026, 10, 1)) == 1
+    assert await store.refresh(date(2026, 1, 1), date(2026, 10, 1)) == 0
+    
+    # August is closed: immutable; September (refresh window) and October are reloaded
+    odata.add("2026-08-20", ORG_A, "cp3", 5.0)
+    odata.add("2026-10-16", ORG_A, "cp3", 8.0)
+    store.refresh_interval_sec = 0
+    assert await store.refresh(date(2026, 1, 1), date(2026, 10, 1)) == 1
+    assert odata.periods[-1] == ("2026-09-01", "2026-10-31", None)
+    revenue, _ = await store.revenue(date(2026, 8, 1), date(2026, 10, 31))
+    assert ("2026-08", "cp3") not in revenue and revenue[("2026-10", "cp3")] == 8.0
+    
+    # Months loaded while open are reloaded once after they close
+    store.refresh_interval_sec = 300
+    store._today = lambda: date(2026, 12, 5)
+    queries = odata.document_queries()
+    assert await store.refresh(date(2026, 1, 1), date(2026, 12, 1)) == 1
+    assert odata.periods[-1] == ("2026-09-01", "2026-12-31", None)
+    assert await store.refresh(date(2026, 1, 1), date(2026, 12, 1)) == 0
+    assert odata.document_queries() == queries + 1
+    store.close()
@@ -0,0 +1,154 @@
+"""
+Tests for the range cache of the Google Sheets MCP server.
+
+Повторные и вложенные чтения берутся из кэша, пока версия файла в Drive
+не изменилась; чтения нескольких диапазонов подряд объединяются в один
+values.batchGet, а ошибка одного диапазона достаётся только его читателям;
+кэш хранит ограниченное число таблиц; результаты сериализуются компактно.
+"""
+import asyncio
+import json
+import httplib2
+import pytest
+from typing import Any, Dict, List
+
+from googleapiclient.errors import HttpError
+
+from src.mcp_servers.google_sheets_server import GoogleSheetsMCPServer, _parse_a1
+from tests.conftest import FakeRequest, call_mcp_tool
+
+
+def _column_letter(number: int) -> str:
+    return chr(ord("A") + number - 1)
+
+
+class FakeSheetsService:
+    """Sheets and Drive API double over one in-memory sheet."""
+    
+    def __init__(self, rows: int = 20, columns: int = 5):
+        self.grid = [[f"Ячейка {_column_letter(c)}{r}" for c in range(1, columns + 1)] for r in range(1, rows + 1)]
+        self.version = 1
+        self.calls: List[str] = []
+    
+    def spreadsheets(self) -> "FakeSheetsService":
+        return self
+    
+    def values(self) -> "FakeSheetsService":
+        return self
+    
+    def files(self) -> "FakeSheetsService":
+        return self
+    
+    def _value_range(self, range_notation: str) -> Dict[str, Any]:
+        if not range_notation.startswith("Sheet1!"):
+            raise HttpError(httplib2.Response({"status": 400}), f'{{"error": {{"code": 400, "message": "Unable to parse range: {range_notation}"}}}}'.encode())
+        _, r0, c0, r1, c1 = _parse_a1(range_notation)
+        values = [row[c0 - 1:c1] for row in self.grid[r0 - 1:r1]]
+        a1 = range_notation.rpartition("!")[2]
+        return {"range": f"Sheet1!{a1}", "majorDimension": "ROWS", "values": values}
+    
+    def get(self, **kwargs) -> FakeRequest:
+        if "fileId" in kwargs:
+            self.calls.append("files.get")
+            return FakeRequest(lambda: {"version": str(self.version), "modifiedTime": f"2024-06-0{self.version}T10:00:00Z"})
+        self.calls.append("values.get")
+        return FakeRequest(lambda: self._value_range(kwargs["range"]))
+    
+    def batchGet(self, **kwargs) -> FakeRequest:
+        self.calls.append("values.batchGet")
+        return FakeRequest(lambda: {"valueRanges": [self._value_range(r) for r in kwargs["ranges"]]})
+    
+    def update(self, **kwargs) -> FakeRequest:
+        self.calls.append("values.update")
+        
+        def apply(range, body, **_):
+            _, r0, c0, _, _ = _parse_a1(range)
+            for i, row in enumerate(body["values"]):
+                for j, value in enumerate(row):
+                    self.grid[r0 - 1 + i][c0 - 1 + j] = value
+            self.version += 1
+            return {"updatedRange": range, "updatedCells": sum(len(row) for row in body["values"])}
+        return FakeRequest(lambda: apply(**kwargs))
+
+
+@pytest.fixture
+def sheets_server(tmp_path):
+    server = GoogleSheetsMCPServer(tmp_path / "token.json", config_path=tmp_path / "workspace_config.json")
+    service = FakeSheetsService()
+    server._sheets_service = service
+    server._drive_service = service
+    return server, service
+
+
+@pytest.mark.asyncio
+async def test_repeated_and_nested_reads_reuse_values_until_revision_changes(sheets_server):
+    server, service = sheets_server
+    read = {"spreadsheetId": "sheet-1", "range": "Sheet1!A1:D10"}
+    
+    first = await call_mcp_tool(server, "sheets_read_range", read)
+    again = await call_mcp_tool(server, "sheets_read_range", read)
+    nested = json.loads(await call_mcp_tool(server, "sheets_read_range", {"spreadsheetId": "sheet-1", "range": "Sheet1!B2:C3"}))
+    
+    assert again == first
+    assert "\n" not in first and ", " not in first and "Ячейка A1" in first
+    assert nested == {"range": "Sheet1!B2:C3", "values": [["Ячейка B2", "Ячейка C2"], ["Ячейка B3", "Ячейка C3"]], "rowCount": 2, "columnCount": 2}
+    assert service.calls.count("values.get") == 1
+    
+    # A write through the server and an outside edit both invalidate
+    await call_mcp_tool(server, "sheets_write_range", {"spreadsheetId": "sheet-1", "range": "Sheet1!A1", "values": [["Итого"]]})
+    assert json.loads(await call_mcp_tool(server, "sheets_read_range", read))["values"][0][0] == "Итого"
+    service.grid[1][1] = "Изменено"
+    service.version += 1
+    assert json.loads(await call_mcp_tool(server, "sheets_read_range", read))["values"][1][1] == "Изменено"
+    assert service.calls.count("values.get") == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_of_one_spreadsheet_share_one_batch_get(sheets_server):
+    server, service = sheets_server
+    
+    results = await asyncio.gather(
+        call_mcp_tool(server, "sheets_read_range", {"spreadsheetId": "sheet-1", "range": "Sheet1!A1:B2"}),
+        call_mcp_tool(server, "sheets_read_range", {"spreadsheetId": "sheet-1", "range": "Sheet1!C5:D6"}),
+        call_mcp_tool(server, "sheets_read_multiple_ranges", {"spreadsheetId": "sheet-1", "ranges": ["Sheet1!A1:B2", "Sheet1!E1:E3"]}),
+    )
+    
+    assert service.calls.count("values.batchGet") == 1
+    assert service.calls.count("values.get") == 0
+    assert service.calls.count("files.get") == 1
+    assert json.loads(results[1])["values"] == [["Ячейка C5", "Ячейка D5"], ["Ячейка C6", "Ячейка D6"]]
+    assert [r["range"] for r in json.loads(results[2])["ranges"]] == ["Sheet1!A1:B2", "Sheet1!E1:E3"]
+    
+    await call_mcp_tool(server, "sheets_read_multiple_ranges", {"spreadsheetId": "sheet-1", "ranges": ["Sheet1!C5:D6", "Sheet1!A1"]})
+    assert service.calls.count("values.batchGet") == 1 and service.calls.count("values.get") == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_range_does_not_fail_coalesced_readers(sheets_server):
+    """Ошибка batchGet из-за одного диапазона не ломает чтения других вызывающих."""
+    server, service = sheets_server
+    
+    good, bad = await asyncio.gather(
+        call_mcp_tool(server, "sheets_read_range", {"spreadsheetId": "sheet-1", "range": "Sheet1!A1:B2"}),
+        call_mcp_tool(server, "sheets_read_range", {"spreadsheetId": "sheet-1", "range": "Нет!A1:B2"}),
+    )
+    
+    assert json.loads(good)["values"] == [["Ячейка A1", "Ячейка B1"], ["Ячейка A2", "Ячейка B2"]]
+    assert "Unable to parse range: Нет!A1:B2" in json.loads(bad)["error"]
+    assert service.calls.count("values.batchGet") == 1 and service.calls.count("values.get") == 2
+    
+    # The good range was cached, the failing one was not
+    await call_mcp_tool(server, "sheets_read_range", {"spreadsheetId": "sheet-1", "range": "Sheet1!A1:B2"})
+    assert service.calls.count("values.get") == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_keeps_most_recently_read_spreadsheets(sheets_server):
+    server, service = sheets_server
+    server._range_cache.max_spreadsheets = 2
+    
+    for spreadsheet_id in ("sheet-1", "sheet-2", "sheet-1", "sheet-3"):
+        await call_mcp_tool(server, "sheets_read_range", {"spreadsheetId": spreadsheet_id, "range": "Sheet1!A1"})
+    
+    assert list(server._range_cache._spreadsheets) == ["sheet-1", "sheet-3"]
+    assert service.calls.count("values.get") == 3
@@ -0,0 +1,188 @@
+"""
+Tests for building a presentation from a document.
+
+Идентификаторы слайдов и плейсхолдеров назначаются заранее, поэтому
+колода собирается одним чтением презентации и минимальным числом
+batchUpdate; фейковый сервис проверяет порядок запросов.
+"""
+import json
+import re
+import pytest
+from typing import Any, Dict, List
+
+from src.mcp_servers import google_slides_server
+from src.mcp_servers.edit_batching import utf16_length
+from src.mcp_servers.google_slides_server import GoogleSlidesMCPServer
+from tests.conftest import FakeRequest, call_mcp_tool_json
+
+
+def _paragraph(text: str, style: str = "NORMAL_TEXT", bullet: bool = False) -> Dict[str, Any]:
+    paragraph = {"paragraphStyle": {"namedStyleType": style}, "elements": [{"textRun": {"content": text + "\n"}}]}
+    if bullet:
+        paragraph["bullet"] = {"listId": "l1"}
+    return {"paragraph": paragraph}
+
+
+def _layout(object_id: str, name: str, placeholders: List[str]) -> Dict[str, Any]:
+    return {
+        "objectId": object_id,
+        "layoutProperties": {"name": name},
+        "pageElements": [
+            {"objectId": f"{object_id}_{kind.lower()}", "shape": {"shapeType": "TEXT_BOX", "placeholder": {"type": kind, "index": 0}}}
+            for kind in placeholders
+        ],
+    }
+
+
+class FakeGoogle:
+    """Docs, Drive and Slides API double that validates batchUpdate ordering."""
+    
+    ID_PATTERN = re.compile(r"^[a-zA-Z0-9_][a-zA-Z0-9_\-:]{4,49}$")
+    
+    def __init__(self, document: Dict[str, Any], existing_slides: int = 1):
+        self.document = document
+        self.calls: List[str] = []
+        self.layouts = [
+            _layout("layout_title", "TITLE", ["CENTERED_TITLE", "SUBTITLE"]),
+            _layout("layout_body", "TITLE_AND_BODY", ["TITLE", "BODY"]),
+            _layout("layout_section", "SECTION_HEADER", ["TITLE"]),
+        ]
+        self.slides = [
+            {"objectId": f"p{i}", "pageElements": [
+                {"objectId": f"p{i}_title", "shape": {"placeholder": {"type": "CENTERED_TITLE"}}},
+                {"objectId": f"p{i}_subtitle", "shape": {"placeholder": {"type": "SUBTITLE"}}},
+            ]}
+            for i in range(existing_slides)
+        ]
+        self.objects = {element["objectId"] for slide in self.slides for element in slide["pageElements"]}
+        self.objects.update(slide["objectId"] for slide in self.slides)
+        self.texts: Dict[str, str] = {}
+        self.batches: List[List[Dict[str, Any]]] = []
+    
+    # Docs
+    def documents(self):
+        return self
+    
+    # Drive
+    def files(self):
+        return self
+    
+    def copy(self, fileId, body, fields=None):
+        self.calls.append("drive.copy")
+        return FakeRequest({"id": "pres1", "webViewLink": "https://docs.google.com/presentation/d/pres1/edit"})
+    
+    def create(self, body, fields=None):
+        self.calls.append("drive.create")
+        assert body["mimeType"] == "application/vnd.google-apps.presentation" and body["parents"] == ["folder1"]
+        return FakeRequest({"id": "pres1", "webViewLink": "https://docs.google.com/presentation/d/pres1/edit"})
+    
+    # Slides
+    def presentations(self):
+        return self
+    
+    def get(self, **kwargs):
+        if "documentId" in kwargs:
+            self.calls.append("docs.get")
+            return FakeRequest(self.document)
+        self.calls.append("slides.get")
+        return FakeRequest({"layouts": self.layouts, "slides": self.slides})
+    
+    def batchUpdate(self, presentationId, body):
+        self.calls.append("slides.batchUpdate")
+        return FakeRequest(lambda: self._apply(body["requests"]))
+    
+    def _apply(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self.batches.append(requests)
+        for request in requests:
+            (kind, data), = request.items()
+            if kind == "deleteObject":
+                assert data["objectId"] in self.objects
+                self.objects.discard(data["objectId"])
+            elif kind == "createSlide":
+                layout = next(l for l in self.layouts if l["objectId"] == data["slideLayoutReference"]["layoutId"])
+                available = {e["shape"]["placeholder"]["type"] for e in layout["pageElements"]}
+                new_ids = [data["objectId"]] + [m["objectId"] for m in data.get("placeholderIdMappings", [])]
+                for mapping in data.get("placeholderIdMappings", []):
+                    assert mapping["layoutPlaceholder"]["type"] in available
+                for object_id in new_ids:
+                    assert self.ID_PATTERN.match(object_id) and object_id not in self.objects
+                    self.objects.add(object_id)
+            elif kind == "insertText":
+                assert data["objectId"] in self.objects, f"insertText before createSlide: {data['objectId']}"
+                self.texts[data["objectId"]] = self.texts.get(data["objectId"], "") + data["text"]
+            elif kind in ("updateTextStyle", "createParagraphBullets"):
+                assert data["objectId"] in self.texts, f"{kind} before insertText"
+                if data["textRange"]["type"] == "FIXED_RANGE":
+                    assert data["textRange"]["endIndex"] <= utf16_length(self.texts[data["objectId"]])
+        return {"replies": [{} for _ in requests]}
+
+
+def _document(sections: int, bullets: int, marker: str = "") -> Dict[str, Any]:
+    content = [_paragraph("Квартальный отчёт", "TITLE")]
+    for section in range(sections):
+        content.append(_paragraph(f"Раздел {section + 1}", "HEADING_2"))
+        content.extend(_paragraph(f"{marker}Пункт {section + 1}.{item + 1}", bullet=True) for item in range(bullets))
+    return {"title": "Отчёт", "body": {"content": content}}
+
+
+@pytest.fixture
+def slides_server(tmp_path):
+    def build(document, template: bool = False, existing_slides: int = 1):
+        config = {"folder_id": "folder1"}
+        if template:
+            config["presentation_templates"] = {"professional": {"id": "template1"}}
+        config_path = tmp_path / "workspace_config.json"
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+        server = GoogleSlidesMCPServer(tmp_path / "token.json", config_path=config_path)
+        fake = FakeGoogle(document, existing_slides=existing_slides)
+        server._slides_service = server._drive_service = server._docs_service = fake
+        return server, fake
+    return build
+
+
+async def _create(server: GoogleSlidesMCPServer) -> Dict[str, Any]:
+    return await call_mcp_tool_json(server, "slides_create_presentation_from_doc", {"documentId": "doc1"})
+
+
+@pytest.mark.asyncio
+async def test_twenty_slide_deck_is_built_with_one_batch_update(slides_server):
+    server, fake = slides_server(_document(sections=19, bullets=3))
+    
+    result = await _create(server)
+    
+    assert result["slidesCreated"] == 20
+    assert result["url"] == "https://docs.google.com/presentation/d/pres1/edit"
+    assert fake.calls == ["docs.get", "drive.create", "slides.get", "slides.batchUpdate"]
+    assert fake.texts["p0_title"] == "Отчёт" and fake.texts["p0_subtitle"] == "Квартальный отчёт"
+    bodies = [text for object_id, text in fake.texts.items() if object_id.endswith("_body")]
+    assert len(bodies) == 19 and bodies[0] == "Пункт 1.1\nПункт 1.2\nПункт 1.3"
+    bullets = [r for r in fake.batches[0] if "createParagraphBullets" in r]
+    assert len(bullets) == 19 * 3
+
+
+@pytest.mark.asyncio
+async def test_template_deck_is_chunked_in_order(slides_server, monkeypatch):
+    monkeypatch.setattr(google_slides_server, "MAX_REQUESTS_PER_BATCH", 25)
+    server, fake = slides_server(_document(sections=12, bullets=4), template=True, existing_slides=3)
+    
+    result = await _create(server)
+    
+    assert result["templateUsed"] is True
+    assert fake.calls[:3] == ["docs.get", "drive.copy", "slides.get"]
+    assert all(len(batch) <= 25 for batch in fake.batches)
+    assert len(fake.batches) == fake.calls.count("slides.batchUpdate") > 1
+    assert fake.batches[0][:2] == [{"deleteObject": {"objectId": "p1"}}, {"deleteObject": {"objectId": "p2"}}]
+    assert len([r for batch in fake.batches for r in batch if "createSlide" in r]) == 12
+
+
+@pytest.mark.asyncio
+async def test_bullet_ranges_count_utf16_code_units(slides_server):
+    """Индексы маркированных абзацев считаются в UTF-16, как в Slides API."""
+    server, fake = slides_server(_document(sections=1, bullets=3, marker="🚀 "))
+    
+    await _create(server)
+    
+    body, = [text for object_id, text in fake.texts.items() if object_id.endswith("_body")]
+    ranges = [r["createParagraphBullets"]["textRange"] for r in fake.batches[0] if "createParagraphBullets" in r]
+    item_length = utf16_length("🚀 Пункт 1.1\n")
+    assert [(r["startIndex"], r["endIndex"]) for r in ranges] == [(0, item_length), (item_length, 2 * item_length), (2 * item_length, utf16_length(body))]
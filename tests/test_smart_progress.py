@@ -3,6 +3,7 @@ Tests for SmartProgressGenerator - contextual progress messages based on task an
 """
 import pytest
 import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock
 from tests.conftest import mock_ws_manager
 
@@ -236,3 +237,137 @@ async def test_sends_start_event_with_estimated_duration(mock_ws_manager):
         f"Expected estimated_duration={estimated_duration}, "
         f"got {start_data['estimated_duration_sec']}"
     )
+
+
+@pytest.mark.asyncio
+async def test_signals_drive_messages_with_bounded_rate_and_persisted_eta(mock_ws_manager, tmp_path):
+    """
+    Сообщения строятся из сигналов пайплайна, частота ограничена,
+    латентности инструментов сохраняются и дают ETA в следующем запуске.
+    """
+    from src.core.smart_progress import SmartProgressGenerator, ToolLatencyStats
+    from src.utils import progress_signals
+    
+    stats_path = tmp_path / "tool_latencies.json"
+    generator = SmartProgressGenerator(
+        ws_manager=mock_ws_manager,
+        session_id="test-session",
+        silence_sec=60,
+        latency_stats=ToolLatencyStats(stats_path)
+    )
+    generator.MIN_MESSAGE_INTERVAL = 0.1
+    
+    await generator.start("покажи встречи", 5)
+    started = time.monotonic()
+    for i in range(100):
+        progress_signals.emit(progress_signals.TOOL_START, tool="get_calendar_events", display_name="Календарь")
+        progress_signals.emit(progress_signals.MCP_CALL, server="calendar", tool="list_events", duration=0.2)
+        progress_signals.emit(progress_signals.TOOL_END, tool="get_calendar_events", duration=2.0, success=True, result=[{}] * 7)
+        await asyncio.sleep(0.003)
+    await asyncio.sleep(0.15)
+    elapsed = time.monotonic() - started
+    generator.stop()
+    await generator._save_task
+    
+    messages = [e["data"] for e in mock_ws_manager.events if e["type"] == "smart_progress_message"]
+    # Стартовое сообщение + не больше одного на MIN_MESSAGE_INTERVAL
+    assert len(messages) <= 2 + elapsed / 0.1
+    assert messages[-1]["kind"] == progress_signals.TOOL_END
+    assert messages[-1]["message"].startswith("Календарь: получено 7 записей")
+    assert "calendar" in messages[-1]["message"]
+    
+    # Сигналы после stop() не обрабатываются
+    progress_signals.emit(progress_signals.TOOL_START, tool="get_calendar_events")
+    assert generator._pending is None
+    
+    history = ToolLatencyStats(stats_path)
+    assert history.expected("get_calendar_events") == pytest.approx(2.0)
+    
+    mock_ws_manager.clear_events()
+    next_run = SmartProgressGenerator(mock_ws_manager, "test-session", silence_sec=60, latency_stats=history)
+    next_run.MIN_MESSAGE_INTERVAL = 0
+    await next_run.start("покажи встречи", 1)
+    progress_signals.emit(progress_signals.TOOL_START, tool="get_calendar_events", display_name="Календарь")
+    await asyncio.sleep(0.05)
+    next_run.stop()
+    
+    tool_message = [e["data"] for e in mock_ws_manager.events if e["type"] == "smart_progress_message"][-1]
+    assert "обычно ~2 с" in tool_message["message"]
+    assert tool_message["eta_sec"] > 1.5
+    assert tool_message["estimated_sec"] >= 2
+
+
+@pytest.mark.asyncio
+async def test_fallback_only_after_silence_and_no_task_leaks(mock_ws_manager, tmp_path):
+    """
+    Fallback-сообщение отправляется только после паузы без сигналов;
+    после завершения запусков не остаётся фоновых задач.
+    """
+    from src.core.smart_progress import SmartProgressGenerator, ToolLatencyStats
+    
+    def progress_tasks():
+        return [t for t in asyncio.all_tasks() if "_publish_loop" in repr(t.get_coro())]
+    
+    for _ in range(3):
+        generator = SmartProgressGenerator(
+            mock_ws_manager,
+            "test-session",
+            silence_sec=0.1,
+            latency_stats=ToolLatencyStats(tmp_path / "stats.json")
+        )
+        await generator.start("назначь встречу", 5)
+        assert len(progress_tasks()) == 1
+        await asyncio.sleep(0.25)
+        generator.stop()
+        await asyncio.sleep(0.01)
+        assert progress_tasks() == []
+    
+    kinds = [e["data"]["kind"] for e in mock_ws_manager.events if e["type"] == "smart_progress_message"]
+    assert kinds.count("start") == 3
+    assert 3 <= kinds.count("fallback") <= 9
+
+
+@pytest.mark.asyncio
+async def test_stop_saves_history_off_loop_and_result_size_does_not_serialize(mock_ws_manager, tmp_path, monkeypatch):
+    """
+    stop() пишет историю латентностей в отдельном потоке; размер результата
+    берётся из строки или size-подсказки, без str() от произвольных объектов.
+    """
+    import threading
+    from src.core.smart_progress import SmartProgressGenerator, ToolLatencyStats, _result_size
+    from src.mcp_tools.tool_result import ToolResult
+    from src.utils import progress_signals
+    
+    stats = ToolLatencyStats(tmp_path / "stats.json")
+    write_threads = []
+    original_write = stats._write
+    
+    def recording_write(payload):
+        write_threads.append(threading.current_thread())
+        original_write(payload)
+    
+    monkeypatch.setattr(stats, "_write", recording_write)
+    generator = SmartProgressGenerator(mock_ws_manager, "test-session", silence_sec=60, latency_stats=stats)
+    generator.MIN_MESSAGE_INTERVAL = 0
+    await generator.start("покажи встречи", 1)
+    progress_signals.emit(progress_signals.TOOL_START, tool="list_files", display_name="Drive")
+    progress_signals.emit(
+        progress_signals.TOOL_END, tool="list_files", duration=1.0, success=True,
+        result=ToolResult("a.txt\nb.txt", rows=["a.txt", "b.txt"])
+    )
+    await asyncio.sleep(0.05)
+    generator.stop()
+    await generator._save_task
+    
+    assert write_threads and write_threads[0] is not threading.main_thread()
+    assert ToolLatencyStats(tmp_path / "stats.json").expected("list_files") == pytest.approx(1.0)
+    messages = [e["data"]["message"] for e in mock_ws_manager.events if e["type"] == "smart_progress_message"]
+    assert messages[-1].startswith("Drive: получено 2 записей, 11 Б")
+    
+    class Unprintable:
+        def __str__(self):
+            raise AssertionError("result must not be serialized")
+    
+    assert _result_size(Unprintable()) == (None, None)
+    assert _result_size(Unprintable(), 2048) == (2048, None)
+    assert _result_size({"events": [1, 2, 3]}) == (None, 3)
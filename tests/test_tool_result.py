@@ -0,0 +1,149 @@
+"""
+Tests for the structured tool result envelope.
+
+Инструменты возвращают ToolResult: текст для LLM плюс данные, строки для UI
+и краткую сводку; движок и память сущностей берут их без разбора текста.
+"""
+import json
+import pytest
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from benchmarks.stub_mcp_server import StubMCPServers, StubTool
+from src.core.action_provider import ActionCapability, ActionProvider, CapabilityCategory, ProviderType
+from src.core.capability_registry import CapabilityRegistry
+from src.core.context_manager import ConversationContext
+from src.core.unified_react_engine import MAX_STREAMED_ROWS
+from src.core.entity_memory import extract_entities_from_tool_result
+from src.mcp_tools.calendar_tools import GetCalendarEventsTool
+from src.mcp_tools.gmail_tools import ListEmailsTool, SearchEmailsTool
+from src.mcp_tools.tool_result import ToolResult
+from tests.conftest import MockWebSocketManager, create_test_engine
+
+
+class OperationCapturingWebSocketManager(MockWebSocketManager):
+    async def send_operation_start(self, session_id: str, operation_id: str, title: str, streaming_title: str, operation_type: str = "read", **kwargs: Any) -> None:
+        await self.send_event(session_id, "operation_start", {"operation_id": operation_id, "title": title})
+    
+    async def send_operation_data(self, session_id: str, operation_id: str, data: str) -> None:
+        await self.send_event(session_id, "operation_data", {"operation_id": operation_id, "data": data})
+    
+    async def send_operation_end(self, session_id: str, operation_id: str, summary: str) -> None:
+        await self.send_event(session_id, "operation_end", {"operation_id": operation_id, "summary": summary})
+
+
+class EmailProvider(ActionProvider):
+    async def execute(self, capability_name: str, arguments: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> Any:
+        messages = [{"id": "m1", "subject": "Счёт"}, {"id": "m2", "subject": "Акт"}]
+        return ToolResult(
+            "Found 2 emails matching query: счёт",
+            data={"items": messages, "count": 2},
+            rows=["📧 Счёт", "📧 Акт"],
+            kind="email",
+            summary="Найдено 2 письма"
+        )
+    
+    def get_capabilities(self) -> List[ActionCapability]:
+        return [ActionCapability(
+            name="search_emails",
+            description="Search emails",
+            category=CapabilityCategory.READ,
+            provider_type=ProviderType.MCP_TOOL,
+            input_schema={"type": "object", "properties": {"query": {"type": "string"}}},
+            service="gmail"
+        )]
+    
+    @property
+    def provider_type(self) -> ProviderType:
+        return ProviderType.MCP_TOOL
+    
+    async def health_check(self) -> bool:
+        return True
+
+
+@pytest.mark.asyncio
+async def test_calendar_tool_returns_envelope_used_without_text_parsing(mock_ws_manager):
+    servers = {"calendar": {"list_events": StubTool(0, 600, "calendar_events")}}
+    async with StubMCPServers(servers):
+        result = await GetCalendarEventsTool().ainvoke({"start_time": "2024-06-01", "max_results": 50})
+    
+    assert isinstance(result, ToolResult) and isinstance(result, str)
+    count = len(result.items)
+    assert count >= 2
+    assert result.startswith(f"Found {count} event(s):")
+    assert result.rows[0] == "📅 Встреча 0 - 2024-06-01 09:00"
+    assert len(result.rows) == count
+    
+    entities = extract_entities_from_tool_result("get_calendar_events", result)
+    assert [(e.entity_type, e.entity_id, e.name) for e in entities[:2]] == [("meeting", "evt0", "Встреча 0"), ("meeting", "evt1", "Встреча 1")]
+    
+    engine = create_test_engine(mock_ws_manager)
+    assert engine._format_result_summary(result, "get_calendar_events") == result.summary
+    assert result.summary.startswith(f"Найдено {count} встреч")
+    assert engine._extract_result_details(result) == result.rows[:10]
+
+
+@pytest.mark.asyncio
+async def test_engine_streams_rows_of_any_list_tool():
+    ws_manager = OperationCapturingWebSocketManager()
+    registry = CapabilityRegistry()
+    registry.register_provider(EmailProvider())
+    engine = create_test_engine(ws_manager, registry)
+    
+    result = await engine._execute_action(
+        {"tool_name": "search_emails", "arguments": {"query": "счёт"}},
+        ConversationContext(session_id="test-session")
+    )
+    
+    assert result.summary == "Найдено 2 письма"
+    operation = [(e["type"], e["data"]) for e in ws_manager.events if e["type"].startswith("operation_")]
+    assert [kind for kind, _ in operation] == ["operation_start", "operation_data", "operation_data", "operation_end"]
+    assert [data["data"] for kind, data in operation if kind == "operation_data"] == ["📧 Счёт", "📧 Акт"]
+    assert operation[-1][1]["summary"] == "Найдено 2 письма"
+    assert len({data["operation_id"] for _, data in operation}) == 1
+
+
+class SheetProvider(EmailProvider):
+    async def execute(self, capability_name: str, arguments: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> Any:
+        values = [[f"r{i}", i] for i in range(10000)]
+        return ToolResult(
+            "Data from A1:B10000",
+            data={"values": values},
+            rows=[" | ".join(str(cell) for cell in row) for row in values],
+            summary="Прочитано 10000 строк"
+        )
+
+
+@pytest.mark.asyncio
+async def test_engine_caps_streamed_rows():
+    ws_manager = OperationCapturingWebSocketManager()
+    registry = CapabilityRegistry()
+    registry.register_provider(SheetProvider())
+    engine = create_test_engine(ws_manager, registry)
+    
+    result = await engine._execute_action(
+        {"tool_name": "search_emails", "arguments": {"query": "A1:B10000"}},
+        ConversationContext(session_id="test-session")
+    )
+    
+    rows = [e["data"]["data"] for e in ws_manager.events if e["type"] == "operation_data"]
+    assert rows[:2] == ["r0 | 0", "r1 | 1"]
+    assert len(rows) == MAX_STREAMED_ROWS + 1
+    assert rows[-1] == f"… и ещё {10000 - MAX_STREAMED_ROWS}"
+    assert len(result.data["values"]) == 10000
+
+
+@pytest.mark.asyncio
+async def test_gmail_rows_tolerate_null_subject_and_sender():
+    """Письма с subject/from = null не роняют построение строк результата."""
+    messages = [{"id": "m1", "subject": None, "from": None}, {"id": "m2", "subject": "Акт", "from": "a@b.ru"}]
+    mcp_manager = MagicMock()
+    mcp_manager.call_tool = AsyncMock(return_value=json.dumps({"messages": messages, "count": 2}))
+    
+    with patch("src.mcp_tools.gmail_tools.get_mcp_manager", return_value=mcp_manager):
+        found = await SearchEmailsTool().ainvoke({"query": "акт"})
+        listed = await ListEmailsTool().ainvoke({})
+    
+    assert found.rows == ["📧 No subject — Unknown", "📧 Акт — a@b.ru"]
+    assert "1. 📧 No subject" in found
+    assert listed.rows[0] == "📧 No subject — Unknown"
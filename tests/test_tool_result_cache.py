@@ -0,0 +1,150 @@
+"""
+Tests for the read-through cache of READ capability results.
+
+Повторные чтения с теми же аргументами обслуживаются из кэша сессии,
+одновременные одинаковые вызовы выполняются один раз, а запись
+инвалидирует закэшированные чтения затронутых ресурсов.
+"""
+import asyncio
+import pytest
+from typing import Any, Dict, List, Optional
+
+from src.core.action_provider import ActionCapability, ActionProvider, CapabilityCategory, ProviderType
+from src.core.capability_registry import CapabilityRegistry
+
+
+def _capability(name: str, category: CapabilityCategory, service: str, ttl: Optional[float] = None) -> ActionCapability:
+    return ActionCapability(
+        name=name,
+        description=name,
+        category=category,
+        provider_type=ProviderType.MCP_TOOL,
+        input_schema={"type": "object"},
+        service=service,
+        cache_ttl_sec=ttl
+    )
+
+
+class StubProvider(ActionProvider):
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls: List[str] = []
+        self.version = 0
+        self.fail = False
+    
+    async def execute(self, capability_name: str, arguments: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> Any:
+        self.calls.append(capability_name)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("backend down")
+        if capability_name.startswith(("update_", "create_")):
+            self.version += 1
+            return "ok"
+        return f"{capability_name}:{sorted(arguments.items())}:v{self.version}"
+    
+    def get_capabilities(self) -> List[ActionCapability]:
+        return [
+            _capability("get_sheet_data", CapabilityCategory.READ, "sheets", ttl=60),
+            _capability("list_files", CapabilityCategory.READ, "workspace", ttl=60),
+            _capability("get_calendar_events", CapabilityCategory.READ, "calendar", ttl=30),
+            _capability("get_next_availability", CapabilityCategory.READ, "unknown"),
+            _capability("update_sheet", CapabilityCategory.WRITE, "sheets"),
+            _capability("create_event", CapabilityCategory.WRITE, "calendar"),
+        ]
+    
+    @property
+    def provider_type(self) -> ProviderType:
+        return ProviderType.MCP_TOOL
+    
+    async def health_check(self) -> bool:
+        return True
+
+
+def _registry(provider: StubProvider) -> CapabilityRegistry:
+    registry = CapabilityRegistry()
+    registry.register_provider(provider)
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_repeated_reads_are_served_per_session():
+    provider = StubProvider()
+    registry = _registry(provider)
+    
+    first = await registry.execute("get_sheet_data", {"spreadsheet_id": "X", "range": "A1:B2", "_session_id": "s1"})
+    for intent in range(4):
+        again = await registry.execute(
+            "get_sheet_data",
+            {"range": "A1:B2", "spreadsheet_id": "X", "_session_id": "s1", "_intent_id": f"i{intent}"}
+        )
+        assert again == first
+    await registry.execute("get_sheet_data", {"spreadsheet_id": "X", "range": "A1:B2"}, context={"session_id": "s2"})
+    await registry.execute("get_sheet_data", {"spreadsheet_id": "X", "range": "C1", "_session_id": "s1"})
+    await registry.execute("get_next_availability", {"_session_id": "s1"})
+    await registry.execute("get_next_availability", {"_session_id": "s1"})
+    
+    assert provider.calls.count("get_sheet_data") == 3
+    assert provider.calls.count("get_next_availability") == 2
+    assert registry.result_cache.hits == 4
+    assert registry.result_cache.hits / (registry.result_cache.hits + registry.result_cache.misses) == pytest.approx(4 / 7)
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_affected_reads():
+    provider = StubProvider()
+    registry = _registry(provider)
+    reads = [
+        ("get_sheet_data", {"spreadsheet_id": "X", "range": "A1"}),
+        ("get_sheet_data", {"spreadsheet_id": "Y", "range": "A1"}),
+        ("list_files", {"query": "отчёт"}),
+        ("get_calendar_events", {"calendar_id": "primary"}),
+    ]
+    
+    async def read_all() -> List[str]:
+        return [await registry.execute(name, {**args, "_session_id": "s1"}) for name, args in reads]
+    
+    before = await read_all()
+    await registry.execute("update_sheet", {"spreadsheet_id": "X", "values": [[1]], "_session_id": "s2"})
+    after_sheet_write = await read_all()
+    
+    # X and the listing are re-read, Y and the calendar stay cached
+    assert provider.calls.count("get_sheet_data") == 3
+    assert provider.calls.count("list_files") == 2
+    assert provider.calls.count("get_calendar_events") == 1
+    assert after_sheet_write[0].endswith(":v1") and after_sheet_write[1] == before[1]
+    
+    # A write without resource ids invalidates its whole service
+    await registry.execute("create_event", {"title": "Встреча"})
+    after_event_write = await read_all()
+    assert provider.calls.count("get_calendar_events") == 2
+    assert provider.calls.count("get_sheet_data") == 3
+    assert after_event_write[3].endswith(":v2")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_reads_share_one_call():
+    provider = StubProvider(delay=0.05)
+    registry = _registry(provider)
+    args = {"spreadsheet_id": "X", "range": "A1", "_session_id": "s1"}
+    
+    results = await asyncio.gather(*[registry.execute("get_sheet_data", dict(args)) for _ in range(5)])
+    assert provider.calls == ["get_sheet_data"]
+    assert len(set(results)) == 1
+    
+    # Errors reach every waiter and are not cached
+    provider.fail = True
+    other = {**args, "range": "B1"}
+    errors = await asyncio.gather(*[registry.execute("get_sheet_data", dict(other)) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    provider.fail = False
+    assert (await registry.execute("get_sheet_data", dict(other))).endswith(":v0")
+    assert provider.calls.count("get_sheet_data") == 3
+    
+    # A read overlapping a write is returned but not stored
+    third = {**args, "range": "C1"}
+    read = asyncio.create_task(registry.execute("get_sheet_data", dict(third)))
+    await asyncio.sleep(0.01)
+    await registry.execute("update_sheet", {"spreadsheet_id": "Z"})
+    await read
+    await registry.execute("get_sheet_data", dict(third))
+    assert provider.calls.count("get_sheet_data") == 5
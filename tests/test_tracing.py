@@ -0,0 +1,181 @@
+"""
+Tests for span-based tracing across the host process and MCP servers.
+
+Цепочка WebSocket → итерация ReAct → _execute_action → CapabilityRegistry
+→ MCPConnection.call_tool → stdio-сервер → Google API должна быть связана
+через parent_span_id в одном trace_id.
+"""
+import os
+import sys
+import pytest
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from src.core.action_provider import (
+    ActionCapability,
+    ActionProvider,
+    CapabilityCategory,
+    ProviderType,
+)
+from src.core.capability_registry import CapabilityRegistry
+from src.core.context_manager import ConversationContext
+from src.core.result_analyzer import Analysis
+from src.core.unified_react_engine import ReActConfig, UnifiedReActEngine
+from src.utils.config_loader import MCPServerConfig
+from src.utils.mcp_loader import MCPConnection
+from src.utils import tracing
+from src.utils.tracing import (
+    InMemorySpanExporter,
+    JsonFileSpanExporter,
+    configure_tracing,
+    extract,
+    get_tracer,
+    inject,
+    load_spans,
+    render_waterfall,
+)
+from tests.conftest import MockWebSocketManager
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+class ConnectionProvider(ActionProvider):
+    """Provider that forwards its tool to an MCPConnection."""
+    
+    def __init__(self, connection: MCPConnection):
+        self.connection = connection
+    
+    async def execute(self, capability_name: str, arguments: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> Any:
+        return await self.connection.call_tool(capability_name, arguments)
+    
+    def get_capabilities(self) -> List[ActionCapability]:
+        return [ActionCapability(
+            name="lookup",
+            description="Lookup",
+            category=CapabilityCategory.READ,
+            provider_type=ProviderType.MCP_TOOL,
+            input_schema={"type": "object", "properties": {}},
+            service="sheets"
+        )]
+    
+    @property
+    def provider_type(self) -> ProviderType:
+        return ProviderType.MCP_TOOL
+    
+    async def health_check(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def restore_tracer():
+    previous = tracing._tracer
+    yield
+    tracing._tracer = previous
+
+
+def test_nested_spans_share_trace_and_link_parents(restore_tracer):
+    """Вложенные спаны получают общий trace_id и ссылку на родителя."""
+    exporter = InMemorySpanExporter()
+    tracer = configure_tracing("test", exporter)
+    
+    with tracer.start_span("outer") as outer:
+        carrier = inject()
+        with tracer.start_span("inner"):
+            pass
+    with pytest.raises(ValueError):
+        with tracer.start_span("failing"):
+            raise ValueError("boom")
+    
+    spans = {s["name"]: s for s in exporter.get_finished_spans()}
+    assert spans["inner"]["trace_id"] == spans["outer"]["trace_id"]
+    assert spans["inner"]["parent_span_id"] == spans["outer"]["span_id"]
+    assert spans["failing"]["trace_id"] != spans["outer"]["trace_id"]
+    assert spans["failing"]["status"]["code"] == "ERROR"
+    assert extract(carrier) == outer.context
+    assert tracing.current_span() is None
+
+
+@pytest.mark.asyncio
+async def test_trace_propagates_into_stdio_mcp_server(tmp_path, restore_tracer):
+    """Спаны сервера MCP и Google API связаны с цепочкой хоста."""
+    trace_file = tmp_path / "traces.jsonl"
+    configure_tracing("multiagent-api", JsonFileSpanExporter(trace_file))
+    
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": str(PROJECT_ROOT),
+        "TRACE_EXPORTER": "file",
+        "TRACE_FILE": str(trace_file),
+    })
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=[str(PROJECT_ROOT / "benchmarks" / "stub_mcp_server.py")],
+        env=env
+    )
+    
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            connection = MCPConnection(MCPServerConfig(name="stub", endpoint="stub"))
+            connection.session = session
+            await connection._initialize()
+            connection.connected = True
+            
+            registry = CapabilityRegistry()
+            registry.register_provider(ConnectionProvider(connection))
+            engine = UnifiedReActEngine(
+                config=ReActConfig(
+                    mode="agent",
+                    allowed_categories=[CapabilityCategory.READ],
+                    max_iterations=3,
+                    enable_alternatives=False
+                ),
+                capability_registry=registry,
+                ws_manager=MockWebSocketManager(),
+                session_id="trace-session"
+            )
+            plans = [
+                {"tool_name": "lookup", "arguments": {}, "description": "Lookup"},
+                {"tool_name": "FINISH", "arguments": {}, "description": "Done", "reasoning": "Done"},
+            ]
+            
+            async def scripted_think_and_plan(state, context, file_ids):
+                return "thought", plans[state.iteration - 1]
+            
+            engine._think_and_plan = scripted_think_and_plan
+            engine._needs_tools = AsyncMock(return_value=True)
+            engine._generate_final_answer = AsyncMock(return_value="Готово")
+            engine.result_analyzer.analyze = AsyncMock(return_value=Analysis(
+                is_success=True, is_goal_achieved=False, is_error=False, progress_toward_goal=0.5
+            ))
+            
+            with get_tracer().start_span("ws.message message") as root:
+                await engine.execute(goal="найди строки", context=ConversationContext(session_id="trace-session"))
+    
+    spans = load_spans(trace_file, root.context.trace_id)
+    by_name = {}
+    for span in spans:
+        # First occurrence: the iteration that ran the tool ends before the FINISH one
+        by_name.setdefault(span["name"], span)
+    chain = [
+        "ws.message message",
+        "react.iteration",
+        "react.execute_action",
+        "capability.execute",
+        "mcp.call_tool",
+        "mcp.server lookup",
+        "google_api sheets.spreadsheets.values.get",
+    ]
+    for parent, child in zip(chain, chain[1:]):
+        assert by_name[child]["parent_span_id"] == by_name[parent]["span_id"], (parent, child)
+    
+    assert by_name["mcp.server lookup"]["resource"]["service.name"] == "stub-mcp"
+    assert by_name["react.execute_action"]["resource"]["service.name"] == "multiagent-api"
+    assert len([s for s in spans if s["name"] == "react.iteration"]) == 2
+    
+    waterfall = render_waterfall(spans)
+    assert root.context.trace_id in waterfall
+    assert "  mcp.server lookup [stub-mcp]" in waterfall
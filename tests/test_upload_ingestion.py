@@ -0,0 +1,127 @@
+"""
+Tests for the upload ingestion pipeline (chunked spooling + process pool extraction).
+"""
+import pytest
+import asyncio
+import time
+
+from benchmarks.pdf_fixture import build_pdf
+from src.api.upload_ingestion import (
+    DocumentIngestor,
+    ExtractionTimeout,
+    UploadTooLarge,
+    format_pdf_pages,
+    spool_upload,
+)
+
+
+class FakeUpload:
+    """Fake UploadFile that returns content in chunks."""
+    
+    def __init__(self, content: bytes):
+        self.content = content
+        self.offset = 0
+        self.read_sizes = []
+    
+    async def read(self, size: int = -1) -> bytes:
+        self.read_sizes.append(size)
+        chunk = self.content[self.offset:self.offset + size]
+        self.offset += len(chunk)
+        return chunk
+
+
+@pytest.fixture
+def ingestor():
+    """DocumentIngestor with small batches for tests."""
+    ingestor = DocumentIngestor(max_workers=1, job_timeout=30, page_batch_size=5)
+    yield ingestor
+    ingestor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_reads_in_chunks(tmp_path):
+    """Файл копируется на диск частями, а не читается целиком."""
+    upload = FakeUpload(b"x" * 10_000)
+    
+    path, size = await spool_upload(upload, max_size=20_000, chunk_size=4096, spool_dir=tmp_path)
+    
+    assert size == 10_000
+    assert path.read_bytes() == b"x" * 10_000
+    assert all(s == 4096 for s in upload.read_sizes)
+    assert len(upload.read_sizes) == 4
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_rejects_too_large_and_cleans_up(tmp_path):
+    """Превышение лимита обнаруживается во время чтения, временный файл удаляется."""
+    upload = FakeUpload(b"x" * 10_000)
+    
+    with pytest.raises(UploadTooLarge):
+        await spool_upload(upload, max_size=5_000, chunk_size=1024, spool_dir=tmp_path)
+    
+    assert list(tmp_path.iterdir()) == []
+    # Stopped reading soon after the limit was crossed
+    assert upload.offset <= 6 * 1024
+
+
+@pytest.mark.asyncio
+async def test_extract_pdf_reports_batches_incrementally(tmp_path, ingestor):
+    """Страницы извлекаются пачками, прогресс сообщается после каждой."""
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(build_pdf([f"Page {i} text" for i in range(12)]))
+    progress = []
+    
+    async def on_batch(batch, done, total):
+        progress.append((done, total, [page_num for page_num, _ in batch]))
+    
+    pages = await ingestor.extract_pdf(path, on_batch)
+    
+    assert [p[0] for p in progress] == [5, 10, 12]
+    assert all(p[1] == 12 for p in progress)
+    assert progress[0][2] == [1, 2, 3, 4, 5]
+    assert len(pages) == 12
+    assert "Page 0 text" in pages[0][1]
+    assert format_pdf_pages(pages[:1]).startswith("\n--- Page 1 ---\n")
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_extraction(tmp_path, ingestor):
+    """Во время разбора большого PDF event loop не блокируется."""
+    path = tmp_path / "big.pdf"
+    path.write_bytes(build_pdf([("line " * 20 + "\n") * 40 for _ in range(100)]))
+    await ingestor.count_pdf_pages(path)  # warm up pool
+    
+    lags = []
+    done = asyncio.Event()
+    
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            expected = loop.time() + 0.005
+            await asyncio.sleep(0.005)
+            lags.append(loop.time() - expected)
+    
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await ingestor.extract_pdf(path)
+    done.set()
+    await ticker_task
+    
+    assert len(lags) > 5
+    assert max(lags) < 0.25
+
+
+@pytest.mark.asyncio
+async def test_job_timeout_kills_worker_and_pool_recovers(tmp_path, ingestor):
+    """Зависшая задача прерывается по таймауту, пул пересоздаётся."""
+    ingestor.job_timeout = 0.5
+    
+    start = time.monotonic()
+    with pytest.raises(ExtractionTimeout):
+        await ingestor._run(time.sleep, 30)
+    assert time.monotonic() - start < 5
+    
+    ingestor.job_timeout = 30
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(build_pdf(["after timeout"]))
+    assert await ingestor.count_pdf_pages(path) == 1
@@ -0,0 +1,230 @@
+"""
+Tests for LLM token and cost accounting.
+
+Фейковая модель сообщает usage_metadata как провайдер; движок должен
+атрибутировать токены запуску, итерации и назначению вызова, остановиться
+по бюджету и отдать сводку через WebSocket и /api/usage.
+"""
+import pytest
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.agents.model_factory import MODELS, LLMUsageCallback
+from src.core.action_provider import (
+    ActionCapability,
+    ActionProvider,
+    CapabilityCategory,
+    ProviderType,
+)
+from src.core.capability_registry import CapabilityRegistry
+from src.core.context_manager import ConversationContext
+from src.core.result_analyzer import Analysis
+from src.core.unified_react_engine import ReActConfig, UnifiedReActEngine
+from src.utils import usage_accounting
+from src.utils.usage_accounting import (
+    DEFAULT_PRICES,
+    UsageBudget,
+    UsageTracker,
+    normalize_usage,
+    usage_purpose,
+)
+from tests.conftest import MockWebSocketManager
+
+
+USAGE = {
+    "input_tokens": 1200,
+    "output_tokens": 300,
+    "total_tokens": 1500,
+    "input_token_details": {"cache_read": 1000, "cache_creation": 0},
+    "output_token_details": {"reasoning": 100},
+}
+
+
+class UsageReportingChatModel(BaseChatModel):
+    """Chat model that answers from a list and reports fixed usage."""
+    
+    responses: List[str]
+    usage: Dict[str, Any]
+    calls: int = 0
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        message = AIMessage(content=text, usage_metadata=dict(self.usage))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+    
+    @property
+    def _llm_type(self) -> str:
+        return "usage-reporting-fake"
+
+
+class LookupProvider(ActionProvider):
+    """Provider with a single read tool."""
+    
+    async def execute(self, capability_name: str, arguments: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> Any:
+        return "rows"
+    
+    def get_capabilities(self) -> List[ActionCapability]:
+        return [ActionCapability(
+            name="fake_lookup",
+            description="Look up rows",
+            category=CapabilityCategory.READ,
+            provider_type=ProviderType.MCP_TOOL,
+            input_schema={"type": "object", "properties": {"query": {"type": "string"}}},
+            service="sheets"
+        )]
+    
+    @property
+    def provider_type(self) -> ProviderType:
+        return ProviderType.MCP_TOOL
+    
+    async def health_check(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    """Fresh global usage tracker."""
+    tracker = UsageTracker()
+    monkeypatch.setattr(usage_accounting, "_usage_tracker", tracker)
+    return tracker
+
+
+def _scripted_engine(session_id: str, plans: List[Dict[str, Any]]) -> UnifiedReActEngine:
+    """Engine whose planning and final answer go through the usage-reporting model."""
+    llm = UsageReportingChatModel(
+        responses=["Думаю", "Ответ"],
+        usage=USAGE,
+        callbacks=[LLMUsageCallback("claude-3-haiku")]
+    )
+    registry = CapabilityRegistry()
+    registry.register_provider(LookupProvider())
+    engine = UnifiedReActEngine(
+        config=ReActConfig(
+            mode="agent",
+            allowed_categories=[CapabilityCategory.READ],
+            max_iterations=5,
+            enable_alternatives=False
+        ),
+        capability_registry=registry,
+        ws_manager=MockWebSocketManager(),
+        session_id=session_id
+    )
+    
+    @usage_purpose("think_and_plan")
+    async def scripted_think_and_plan(state, context, file_ids):
+        response = await llm.ainvoke([HumanMessage(content=state.goal)])
+        return response.content, plans[min(state.iteration, len(plans)) - 1]
+    
+    @usage_purpose("final_answer")
+    async def scripted_final_answer(state, context=None, file_ids=None):
+        response = await llm.ainvoke([HumanMessage(content=state.goal)])
+        return response.content
+    
+    engine._think_and_plan = scripted_think_and_plan
+    engine._generate_final_answer = scripted_final_answer
+    engine._needs_tools = AsyncMock(return_value=True)
+    engine.result_analyzer.analyze = AsyncMock(return_value=Analysis(
+        is_success=True, is_goal_achieved=False, is_error=False, progress_toward_goal=0.5
+    ))
+    return engine
+
+
+def test_usage_normalization_and_pricing():
+    """Кэшированные токены выделяются и тарифицируются отдельно."""
+    usage = normalize_usage(USAGE)
+    assert usage == {
+        "input_tokens": 1200,
+        "output_tokens": 300,
+        "thinking_tokens": 100,
+        "cache_read_tokens": 1000,
+        "cache_write_tokens": 0,
+    }
+    
+    raw_anthropic = normalize_usage({"input_tokens": 200, "output_tokens": 300, "cache_read_input_tokens": 1000})
+    assert raw_anthropic["input_tokens"] == 1200
+    
+    tracker = UsageTracker()
+    # 200 uncached * 0.25 + 1000 cached * 0.03 + 300 output * 1.25 (per 1M)
+    assert tracker.price("claude-3-haiku", usage) == pytest.approx((200 * 0.25 + 1000 * 0.03 + 300 * 1.25) / 1_000_000)
+    assert set(MODELS) <= set(DEFAULT_PRICES)
+
+
+@pytest.mark.asyncio
+async def test_run_usage_is_attributed_and_reported(tracker):
+    """Сводка запуска разбита по назначению и итерациям и доступна через API."""
+    from fastapi.testclient import TestClient
+    from src.api import server
+    
+    engine = _scripted_engine("usage-session", [
+        {"tool_name": "fake_lookup", "arguments": {"query": "sales"}, "description": "Lookup"},
+        {"tool_name": "FINISH", "arguments": {}, "description": "Done", "reasoning": "Done"},
+    ])
+    
+    result = await engine.execute(goal="покажи продажи", context=ConversationContext(session_id="usage-session"))
+    assert result["status"] == "completed"
+    
+    summaries = [e["data"] for e in engine.ws_manager.events if e["type"] == "usage_summary"]
+    assert len(summaries) == 1
+    summary = summaries[0]
+    assert summary["totals"]["calls"] == 3
+    assert summary["totals"]["input_tokens"] == 3600
+    assert summary["totals"]["cache_read_tokens"] == 3000
+    assert summary["totals"]["thinking_tokens"] == 300
+    assert summary["by_purpose"]["think_and_plan"]["calls"] == 2
+    assert summary["by_purpose"]["final_answer"]["calls"] == 1
+    assert summary["totals"]["cost_usd"] == pytest.approx(3 * tracker.price("claude-3-haiku", normalize_usage(USAGE)), abs=1e-6)
+    assert summary["session_totals"]["calls"] == 3
+    
+    response = TestClient(server.app).get("/api/usage/usage-session", params={"include_records": True})
+    assert response.status_code == 200
+    records = response.json()["runs"][0]["records"]
+    assert [(r["purpose"], r["iteration"]) for r in records] == [
+        ("think_and_plan", 1), ("think_and_plan", 2), ("final_answer", 2)
+    ]
+    assert TestClient(server.app).get("/api/usage/unknown-session").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_run_budget_stops_loop_gracefully(tracker):
+    """Исчерпанный бюджет запуска завершает цикл без исключения."""
+    tracker.run_budget = UsageBudget(max_tokens=2000)
+    engine = _scripted_engine("budget-session", [
+        {"tool_name": "fake_lookup", "arguments": {"query": "sales"}, "description": "Lookup"},
+    ])
+    
+    result = await engine.execute(goal="покажи продажи", context=ConversationContext(session_id="budget-session"))
+    
+    assert result["status"] == "budget_exceeded"
+    assert result["iterations"] == 2
+    summary = [e["data"] for e in engine.ws_manager.events if e["type"] == "usage_summary"][0]
+    assert summary["totals"]["total_tokens"] == 3000
+    assert summary["budget_exceeded"].startswith("Run budget exceeded")
+
+
+def test_session_usage_is_evicted(tracker, monkeypatch, tmp_path):
+    """Учёт сессии удаляется вместе с сессией, а число сессий ограничено (LRU)."""
+    from src.api import session_manager as session_manager_module
+    from src.api.session_manager import SessionManager, SQLiteSessionStorage
+    from src.api.websocket_manager import WebSocketManager
+    
+    monkeypatch.setattr(session_manager_module, "get_websocket_manager", lambda: WebSocketManager())
+    sessions = SessionManager(shared_storage=SQLiteSessionStorage(tmp_path / "sessions.db"))
+    session_id = sessions.create_session()
+    tracker.end_run(tracker.start_run(session_id))
+    assert tracker.get_session_usage(session_id) is not None
+    
+    sessions.delete_session(session_id)
+    assert tracker.get_session_usage(session_id) is None
+    
+    tracker.max_sessions = 2
+    for name in ("a", "b"):
+        tracker.end_run(tracker.start_run(name))
+    tracker.end_run(tracker.start_run("a"))
+    tracker.end_run(tracker.start_run("c"))
+    assert tracker.get_session_usage("b") is None
+    assert tracker.get_session_usage("a") is not None and tracker.get_session_usage("c") is not None
@@ -0,0 +1,178 @@
+"""
+Tests for resumable event streams in WebSocketManager.
+
+При переподключении клиент передаёт последний полученный seq,
+и сервер досылает пропущенные события из буфера.
+"""
+import pytest
+import asyncio
+import time
+from typing import List, Dict, Any
+
+from src.api import session_manager as session_manager_module
+from src.api.session_manager import SessionManager, SQLiteSessionStorage
+from src.api.websocket_manager import WebSocketManager
+
+
+class FakeWebSocket:
+    """Fake WebSocket that records sent messages."""
+    
+    def __init__(self):
+        self.sent: List[Dict[str, Any]] = []
+    
+    async def accept(self):
+        pass
+    
+    async def send_json(self, message: Dict[str, Any]):
+        self.sent.append(message)
+    
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+async def _scripted_run(manager: WebSocketManager, session_id: str, start: int, count: int) -> None:
+    """Emit a fixed sequence of engine-like events."""
+    for i in range(start, start + count):
+        await manager.send_event(session_id, "intent_start", {"intent_id": f"intent-{i}"})
+        await manager.send_event(session_id, "operation_end", {"operation_id": f"op-{i}", "summary": "ok"})
+
+
+@pytest.mark.asyncio
+async def test_events_have_monotonic_sequence_numbers():
+    """Каждое событие получает возрастающий seq в рамках сессии."""
+    manager = WebSocketManager()
+    ws = FakeWebSocket()
+    await manager.connect(ws, "s1")
+    
+    await _scripted_run(manager, "s1", 0, 5)
+    await manager.drain("s1", timeout=1.0)
+    
+    seqs = [m["seq"] for m in ws.sent]
+    assert seqs == list(range(1, 11))
+    assert manager.get_last_seq("s1") == 10
+    manager.disconnect(ws, "s1")
+
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_missed_events():
+    """Разрыв соединения посреди выполнения: после reconnect приходят все пропущенные события."""
+    manager = WebSocketManager()
+    first = FakeWebSocket()
+    await manager.connect(first, "s1")
+    
+    await _scripted_run(manager, "s1", 0, 3)
+    await manager.drain("s1", timeout=1.0)
+    last_seen = first.sent[-1]["seq"]
+    manager.disconnect(first, "s1")
+    
+    # Events emitted while the browser is disconnected
+    await _scripted_run(manager, "s1", 3, 4)
+    
+    second = FakeWebSocket()
+    await manager.connect(second, "s1", last_seq=last_seen)
+    await _scripted_run(manager, "s1", 7, 1)
+    await manager.drain("s1", timeout=1.0)
+    
+    combined = first.sent + second.sent
+    seqs = [m["seq"] for m in combined]
+    assert seqs == list(range(1, 17))
+    assert [m["data"].get("intent_id") for m in combined if m["type"] == "intent_start"] == [
+        f"intent-{i}" for i in range(8)
+    ]
+    manager.disconnect(second, "s1")
+
+
+@pytest.mark.asyncio
+async def test_reconnect_without_last_seq_does_not_replay():
+    """Новое подключение без last_seq получает только новые события."""
+    manager = WebSocketManager()
+    await _scripted_run(manager, "s1", 0, 3)
+    
+    ws = FakeWebSocket()
+    await manager.connect(ws, "s1")
+    await manager.send_event("s1", "message_complete", {})
+    await manager.drain("s1", timeout=1.0)
+    
+    assert [m["type"] for m in ws.sent] == ["message_complete"]
+    manager.disconnect(ws, "s1")
+
+
+@pytest.mark.asyncio
+async def test_replay_reports_gap_when_buffer_overflowed():
+    """Если буфер уже не содержит часть событий, клиент получает replay_gap."""
+    manager = WebSocketManager(replay_buffer_size=4)
+    await _scripted_run(manager, "s1", 0, 5)
+    
+    ws = FakeWebSocket()
+    await manager.connect(ws, "s1", last_seq=2)
+    await manager.drain("s1", timeout=1.0)
+    
+    assert ws.sent[0]["type"] == "replay_gap"
+    assert ws.sent[0]["data"] == {"from_seq": 3, "to_seq": 6}
+    assert [m["seq"] for m in ws.sent[1:]] == [7, 8, 9, 10]
+    manager.disconnect(ws, "s1")
+
+
+@pytest.mark.asyncio
+async def test_sessions_have_independent_sequences():
+    """Счётчики seq и буферы независимы для разных сессий."""
+    manager = WebSocketManager()
+    await _scripted_run(manager, "s1", 0, 2)
+    await _scripted_run(manager, "s2", 0, 1)
+    
+    assert manager.get_last_seq("s1") == 4
+    assert manager.get_last_seq("s2") == 2
+    
+    manager.clear_session("s1")
+    assert manager.get_last_seq("s1") == 0
+
+
+@pytest.mark.asyncio
+async def test_replay_buffer_is_evicted_after_ttl_without_connections():
+    """Буфер сессии без подключений удаляется через replay_ttl, переподключение получает replay_gap."""
+    manager = WebSocketManager(replay_ttl=60)
+    first = FakeWebSocket()
+    await manager.connect(first, "s1")
+    other = FakeWebSocket()
+    await manager.connect(other, "s2")
+    await _scripted_run(manager, "s1", 0, 2)
+    await _scripted_run(manager, "s2", 0, 2)
+    await manager.drain("s1", timeout=1.0)
+    manager.disconnect(first, "s1")
+    await _scripted_run(manager, "s1", 2, 1)
+    # Events of a session connected to another worker
+    manager.deliver_remote_event("s3", {"type": "intent_start", "seq": 1, "data": {}})
+    
+    now = time.monotonic()
+    assert manager.evict_idle_buffers(now=now + 30) == 0
+    assert manager.evict_idle_buffers(now=now + 61) == 2
+    assert set(manager._replay_buffers) == {"s2"}
+    assert manager.get_last_seq("s1") == 6
+    
+    second = FakeWebSocket()
+    await manager.connect(second, "s1", last_seq=4)
+    await _scripted_run(manager, "s1", 3, 1)
+    await manager.drain("s1", timeout=1.0)
+    
+    assert second.sent[0]["type"] == "replay_gap"
+    assert second.sent[0]["data"] == {"from_seq": 5, "to_seq": 6}
+    assert [m["seq"] for m in second.sent[1:]] == [7, 8]
+    # A connected session keeps its buffer however old it is
+    assert manager.evict_idle_buffers(now=now + 3600) == 0
+    manager.disconnect(second, "s1")
+    manager.disconnect(other, "s2")
+
+
+@pytest.mark.asyncio
+async def test_deleting_session_drops_replay_buffer(tmp_path, monkeypatch):
+    """Удаление сессии удаляет её буфер и счётчик seq."""
+    manager = WebSocketManager()
+    monkeypatch.setattr(session_manager_module, "get_websocket_manager", lambda: manager)
+    sessions = SessionManager(shared_storage=SQLiteSessionStorage(tmp_path / "sessions.db"))
+    session_id = sessions.create_session()
+    await _scripted_run(manager, session_id, 0, 2)
+    
+    sessions.delete_session(session_id)
+    
+    assert session_id not in manager._replay_buffers
+    assert manager.get_last_seq(session_id) == 0
@@ -0,0 +1,166 @@
+"""
+Tests for per-connection send queues in WebSocketManager.
+
+Медленный или зависший WebSocket не должен задерживать другие вкладки
+и цикл ReAct engine, который отправляет события.
+"""
+import pytest
+import asyncio
+import time
+from typing import List, Dict, Any
+
+from src.api.websocket_manager import WebSocketManager, ConnectionSender, DROPPABLE_EVENT_TYPES
+
+
+class FakeWebSocket:
+    """Fake WebSocket that records sent messages."""
+    
+    def __init__(self):
+        self.sent: List[Dict[str, Any]] = []
+        self.closed = False
+    
+    async def accept(self):
+        pass
+    
+    async def send_json(self, message: Dict[str, Any]):
+        self.sent.append(message)
+    
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = True
+
+
+class BlockingWebSocket(FakeWebSocket):
+    """Fake WebSocket whose send blocks until released."""
+    
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+    
+    async def send_json(self, message: Dict[str, Any]):
+        await self.release.wait()
+        self.sent.append(message)
+
+
+async def _run_engine_iterations(manager: WebSocketManager, session_id: str, iterations: int) -> List[float]:
+    """Simulate engine iterations that emit progress and intent events."""
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await manager.send_event(session_id, "intent_detail", {"text": f"step {i}"})
+        await manager.send_event(session_id, "thinking_chunk", {"chunk": "x" * 100})
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+@pytest.mark.asyncio
+async def test_send_event_does_not_await_network():
+    """send_event только ставит сообщение в очередь, даже если сокет завис."""
+    manager = WebSocketManager()
+    ws = BlockingWebSocket()
+    await manager.connect(ws, "s1")
+    
+    latencies = await _run_engine_iterations(manager, "s1", 50)
+    
+    assert max(latencies) < 0.05
+    assert ws.sent == []
+    
+    ws.release.set()
+    assert await manager.drain("s1", timeout=1.0)
+    assert len(ws.sent) == 100
+    manager.disconnect(ws, "s1")
+
+
+@pytest.mark.asyncio
+async def test_engine_latency_unaffected_by_slow_consumer():
+    """Задержка итераций с зависшим клиентом сравнима с задержкой без клиента."""
+    baseline_manager = WebSocketManager()
+    fast_ws = FakeWebSocket()
+    await baseline_manager.connect(fast_ws, "s1")
+    baseline = sum(await _run_engine_iterations(baseline_manager, "s1", 200))
+    baseline_manager.disconnect(fast_ws, "s1")
+    
+    manager = WebSocketManager(max_queue_size=64)
+    slow_ws = BlockingWebSocket()
+    await manager.connect(slow_ws, "s2")
+    with_slow = sum(await _run_engine_iterations(manager, "s2", 200))
+    
+    # Generous bound: the point is that blocked sends are not awaited inline
+    assert with_slow < max(baseline * 5, 0.05)
+    manager.disconnect(slow_ws, "s2")
+
+
+@pytest.mark.asyncio
+async def test_slow_tab_does_not_delay_other_connections():
+    """Медленная вкладка не задерживает доставку в другие соединения сессии."""
+    manager = WebSocketManager()
+    slow_ws = BlockingWebSocket()
+    fast_ws = FakeWebSocket()
+    await manager.connect(slow_ws, "s1")
+    # connect() replaces old connections, so attach the second socket directly
+    manager.active_connections["s1"].add(fast_ws)
+    manager._senders[fast_ws] = ConnectionSender(fast_ws, "s1")
+    
+    for i in range(10):
+        await manager.send_event("s1", "intent_start", {"intent_id": str(i)})
+    await asyncio.sleep(0.01)
+    
+    assert len(fast_ws.sent) == 10
+    assert slow_ws.sent == []
+    manager.disconnect(slow_ws, "s1")
+    manager.disconnect(fast_ws, "s1")
+
+
+@pytest.mark.asyncio
+async def test_overflow_drops_oldest_progress_but_keeps_terminal_events():
+    """При переполнении отбрасываются старые progress-события, финальные сохраняются."""
+    manager = WebSocketManager(max_queue_size=10)
+    ws = BlockingWebSocket()
+    await manager.connect(ws, "s1")
+    
+    await manager.send_event("s1", "intent_start", {"intent_id": "1"})
+    for i in range(30):
+        await manager.send_event("s1", "thinking_chunk", {"chunk": str(i)})
+    await manager.send_event("s1", "final_result", {"content": "done"})
+    await manager.send_event("s1", "message_complete", {})
+    
+    ws.release.set()
+    assert await manager.drain("s1", timeout=1.0)
+    
+    types = [m["type"] for m in ws.sent]
+    assert types[0] == "intent_start"
+    assert types[-2:] == ["final_result", "message_complete"]
+    assert len(ws.sent) <= 10
+    
+    # Newest progress events survive, oldest are dropped
+    chunks = [m["data"]["chunk"] for m in ws.sent if m["type"] == "thinking_chunk"]
+    assert chunks == sorted(chunks, key=int)
+    assert chunks[-1] == "29"
+    assert "0" not in chunks
+    manager.disconnect(ws, "s1")
+
+
+@pytest.mark.asyncio
+async def test_chronically_slow_consumer_is_disconnected_on_overflow():
+    """Клиент, у которого копятся неотбрасываемые события, отключается."""
+    manager = WebSocketManager(max_queue_size=5)
+    ws = BlockingWebSocket()
+    await manager.connect(ws, "s1")
+    
+    assert "operation_start" not in DROPPABLE_EVENT_TYPES
+    for i in range(20):
+        await manager.send_event("s1", "operation_start", {"operation_id": str(i)})
+    
+    assert manager.get_connection_count("s1") == 0
+
+
+@pytest.mark.asyncio
+async def test_stalled_send_disconnects_after_timeout():
+    """Отправка, зависшая дольше send_timeout, приводит к отключению."""
+    manager = WebSocketManager(send_timeout=0.05)
+    ws = BlockingWebSocket()
+    await manager.connect(ws, "s1")
+    
+    await manager.send_event("s1", "intent_start", {"intent_id": "1"})
+    await asyncio.sleep(0.15)
+    
+    assert manager.get_connection_count("s1") == 0
@@ -0,0 +1,184 @@
+"""
+Tests for the single-query file name search of the workspace tools.
+
+Варианты имени (регистр, разделители) объединяются в один запрос Drive
+через `or`; длинные наборы делятся на части, которые выполняются
+параллельно. Найденные файлы должны совпадать с последовательным перебором
+вариантов, а лучшие совпадения — идти первыми.
+"""
+import asyncio
+import re
+from typing import Any, Dict, List
+
+import pytest
+from mcp import types
+
+from src.mcp_servers.google_workspace_server import GoogleWorkspaceMCPServer
+from src.mcp_tools import workspace_tools
+from src.mcp_tools.workspace_tools import ListFilesTool, SearchFilesTool
+from src.utils.drive_query import name_contains_any
+from tests.conftest import call_mcp_tool
+
+FOLDER_ID = "folder1"
+NAMES = [
+    "Отчёт тест2 финал",
+    "Тест_2",
+    "ТЕСТ2 копия",
+    "тест2",
+    "т-ест2",
+    "Бюджет 2026",
+    "test2.xlsx",
+]
+SPREADSHEET = "application/vnd.google-apps.spreadsheet"
+
+
+class _ListRequest:
+    def __init__(self, drive: "FakeDrive", q: str, page_size: int):
+        self._drive = drive
+        self._q = q
+        self._page_size = page_size
+        self.pageToken = None
+    
+    def execute(self):
+        return {"files": self._drive.match(self._q)[:self._page_size]}
+
+
+class FakeDrive:
+    """Drive double: case-sensitive `name contains`, or-combined name clauses."""
+    
+    def __init__(self, files: List[Dict[str, Any]]):
+        self.files_data = files
+        self.queries: List[str] = []
+    
+    def files(self):
+        return self
+    
+    def list(self, q, pageSize=100, **kwargs):
+        self.queries.append(q)
+        return _ListRequest(self, q, pageSize)
+    
+    def match(self, q: str) -> List[Dict[str, Any]]:
+        assert f"'{FOLDER_ID}' in parents" in q
+        fragments = [
+            re.sub(r"\\(.)", r"\1", fragment)
+            for fragment in re.findall(r"name contains '((?:[^'\\]|\\.)*)'", q)
+        ]
+        mime_type = re.search(r"mimeType='([^']+)'", q)
+        return [
+            f for f in self.files_data
+            if any(fragment in f["name"] for fragment in fragments)
+            and (mime_type is None or f["mimeType"] == mime_type.group(1))
+        ]
+
+
+class FakeMCPManager:
+    """Routes tool calls to a workspace server backed by FakeDrive."""
+    
+    def __init__(self, server: GoogleWorkspaceMCPServer, delay: float = 0.0):
+        self.server = server
+        self.delay = delay
+        self.calls: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any], server_name: str = None):
+        self.calls.append({"tool": tool_name, **arguments})
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return [types.TextContent(type="text", text=await call_mcp_tool(self.server, tool_name, arguments))]
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def workspace(monkeypatch):
+    files = [
+        {"id": f"file{i}", "name": name, "mimeType": SPREADSHEET if i % 2 else "application/vnd.google-apps.document"}
+        for i, name in enumerate(NAMES)
+    ]
+    server = GoogleWorkspaceMCPServer("token.json")
+    server._drive_service = drive = FakeDrive(files)
+    server._get_workspace_folder_id = lambda: FOLDER_ID
+    manager = FakeMCPManager(server, delay=0.01)
+    monkeypatch.setattr(workspace_tools, "get_mcp_manager", lambda: manager)
+    return drive, manager
+
+
+async def _serial_ids(manager: FakeMCPManager, tool_name: str, variations: List[str]) -> set:
+    """File IDs found by one query per variation (the previous behaviour)."""
+    ids = set()
+    for variation in variations:
+        if tool_name == "workspace_search_files":
+            args = {"query": f"name contains '{variation}'", "maxResults": 100}
+        else:
+            args = {"query": variation, "maxResults": 100}
+        ids |= {f["id"] for f in workspace_tools._files_from_result(await manager.call_tool(tool_name, args))}
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_search_folds_variations_into_one_query(workspace):
+    drive, manager = workspace
+    variations = workspace_tools._name_variations("тест2")
+    assert len(variations) > 5
+    
+    result = await SearchFilesTool()._arun(query="тест2")
+    
+    assert len(drive.queries) == 1
+    assert " or " in drive.queries[0]
+    found = result.data["items"]
+    assert found[0]["name"] == "тест2"
+    ranks = [workspace_tools._match_rank(f["name"], "тест2") for f in found]
+    assert ranks == sorted(ranks) and found[1]["name"] == "т-ест2"
+    
+    drive.queries.clear()
+    assert {f["id"] for f in found} == await _serial_ids(manager, "workspace_search_files", variations)
+    assert len(drive.queries) == len(variations)
+
+
+@pytest.mark.asyncio
+async def test_long_variation_sets_run_as_concurrent_chunks(workspace, monkeypatch):
+    drive, manager = workspace
+    variations = workspace_tools._name_variations("тест2")
+    monkeypatch.setattr(workspace_tools, "MAX_NAME_QUERY_LENGTH", 80)
+    chunks = workspace_tools._chunk_variations(variations)
+    assert 1 < len(chunks) < len(variations)
+    assert all(len(name_contains_any(chunk)) <= 80 for chunk in chunks)
+    
+    found = await workspace_tools._try_case_variations_for_search_files("тест2", None, 100)
+    
+    assert len(drive.queries) == len(chunks)
+    assert manager.max_in_flight == len(chunks)
+    assert {f["id"] for f in found} == await _serial_ids(manager, "workspace_search_files", variations)
+
+
+@pytest.mark.asyncio
+async def test_list_files_uses_one_query_with_mime_filter(workspace):
+    drive, manager = workspace
+    
+    result = await ListFilesTool()._arun(query="тест2", mime_type=SPREADSHEET)
+    
+    assert len(drive.queries) == 1
+    assert f"mimeType='{SPREADSHEET}'" in drive.queries[0]
+    found = result.data["items"]
+    assert all(f["mimeType"] == SPREADSHEET for f in found)
+    
+    drive.queries.clear()
+    serial = set()
+    variations = workspace_tools._case_variations("тест2")
+    for variation in variations:
+        files = workspace_tools._files_from_result(
+            await manager.call_tool("workspace_list_files", {"query": variation, "mimeType": SPREADSHEET, "maxResults": 50})
+        )
+        serial |= {f["id"] for f in files}
+    assert {f["id"] for f in found} == serial
+    assert len(drive.queries) == len(variations) == 3
+
+
+def test_name_contains_any_escapes_quotes():
+    assert name_contains_any(["O'Neil", "a\\b"]) == "(name contains 'O\\'Neil' or name contains 'a\\\\b')"
+    assert workspace_tools._match_rank("Тест2.xlsx", "тест2") == 0
+    assert workspace_tools._match_rank("Т-ест2", "тест2") == 1
+    assert workspace_tools._match_rank("отчёт тест2", "тест2") == 3